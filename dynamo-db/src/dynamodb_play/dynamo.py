@@ -1,6 +1,7 @@
 import os
 
 import boto3
+from mypy_boto3_dynamodb import DynamoDBClient
 from mypy_boto3_dynamodb.service_resource import _Table
 
 ROOTSKI_DYNAMO_TABLE_NAME = "rootski-table"
@@ -10,3 +11,9 @@ def get_rootski_dynamo_table() -> _Table:
     os.environ["AWS_PROFILE"] = "rootski"
     rootski_table = boto3.resource("dynamodb").Table(name=ROOTSKI_DYNAMO_TABLE_NAME)
     return rootski_table
+
+
+def get_rootski_dynamo_client() -> DynamoDBClient:
+    """Create a dynamo client from a new session, so that it can be created and used from any thread."""
+    os.environ["AWS_PROFILE"] = "rootski"
+    return boto3.session.Session().client("dynamodb")
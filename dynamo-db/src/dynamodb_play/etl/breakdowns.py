@@ -3,34 +3,30 @@ NOTE: remember to cast all IDs to strings
 """
 
 from itertools import chain
-from typing import List, Union
+from typing import Iterator, List, Optional, Union
 
 import rootski.services.database.models as orm
 from dynamodb_play.etl.db_service import get_dbservice
-from dynamodb_play.etl.utils import batch_load_into_dynamo
+from dynamodb_play.etl.loader import DynamoBulkLoader
+from dynamodb_play.etl.pipeline import Batch, Pipeline, batched, stream_query
 from dynamodb_play.models.breakdown import Breakdown
 from dynamodb_play.models.breakdown_item import BreakdownItem, NullBreakdownItem
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import Session, selectinload
 
 """
 TODO Run this etl one more time. The BreakdownItem.to_item() function was missing the position field.
 """
 
 
-def extract() -> List[orm.Breakdown]:
-    """Query breakdowns items from postgres database."""
-    # connect to an instance of the rootski postgres database running locally
-    db_service = get_dbservice()
-    session = db_service.get_sync_session()
-
-    # query all of the breakdown rows from postgres
-    orm_breakdowns: List[orm.Breakdown] = (
-        session.query(orm.Breakdown)
-        .options(joinedload(orm.Breakdown.breakdown_items), joinedload(orm.Breakdown.submitted_by_user))
-        .all()
+def extract(session: Session, batch_size: int) -> Iterator[Batch[orm.Breakdown]]:
+    """Stream the breakdowns from the postgres database, ``batch_size`` at a time."""
+    # the breakdown items and their morphemes are loaded with one extra query per chunk
+    # of breakdowns rather than lazily, one query per item
+    query = session.query(orm.Breakdown).options(
+        selectinload(orm.Breakdown.breakdown_items).selectinload(orm.BreakdownItem.morpheme_),
+        selectinload(orm.Breakdown.submitted_by_user),
     )
-
-    return orm_breakdowns
+    return batched(stream_query(query), batch_size=batch_size)
 
 
 def make_dynamo_breakdown_item_dict_from_orm(
@@ -104,11 +100,16 @@ def transform(orm_breakdowns) -> List[dict]:
     return breakdown_dict_list + breakdown_item_dict_list
 
 
-if __name__ == "__main__":
-    # batch_etl_morphemes_from_postgres_to_dynamo()
-    import os
+def etl(batch_size: int = 500, num_load_workers: int = 4, max_wcu_per_second: Optional[float] = None):
+    session: Session = get_dbservice().get_sync_session()
+    Pipeline(
+        name="breakdowns",
+        extract=lambda: extract(session=session, batch_size=batch_size),
+        transform=transform,
+        load=DynamoBulkLoader(max_wcu_per_second=max_wcu_per_second).write_items,
+        num_load_workers=num_load_workers,
+    ).run()
 
-    os.environ["AWS_PROFILE"] = "rootski"
-    orm_breakdowns_ = extract()
-    dynamo_dictionaries_list = transform(orm_breakdowns_)
-    batch_load_into_dynamo(dynamo_dictionaries_list, batch_size=1000)
+
+if __name__ == "__main__":
+    etl()
@@ -0,0 +1,25 @@
+"""
+Bump the version of the data in dynamo after loading new data.
+
+The API caches words and morpheme families across requests and polls the
+:class:`~dynamodb_play.models.data_version.DataVersion` item, so writing a new
+version makes every API process drop the entries loaded before it.
+"""
+
+import uuid
+from datetime import datetime, timezone
+
+from dynamodb_play.etl.loader import DynamoBulkLoader
+from dynamodb_play.models.data_version import DataVersion
+
+
+def make_data_version() -> str:
+    """Return a new, unique version; the time it was made is included to make it readable."""
+    return f"{datetime.now(timezone.utc).isoformat()}#{uuid.uuid4().hex}"
+
+
+def bump_data_version(loader: DynamoBulkLoader) -> str:
+    """Write a new data version and return it; call this after the data has been written."""
+    version: str = make_data_version()
+    loader.write_items([DataVersion(version=version).to_item()])
+    return version
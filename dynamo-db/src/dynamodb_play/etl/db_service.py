@@ -4,6 +4,7 @@ from pathlib import Path
 import dotenv
 from rootski.config import Config
 from rootski.services.database.database import DBService
+from rootski.services.database.non_orm.db_service import RootskiDBService
 
 THIS_DIR = Path(__file__).parent
 DEV_DOT_ENV_FPATH = THIS_DIR / "../../../../dev.env"
@@ -25,5 +26,12 @@ def get_dbservice() -> DBService:
     return db_service
 
 
+def get_rootski_db_service() -> RootskiDBService:
+    """Return a ``RootskiDBService`` (the raw SQL queries) bound to the same database as ``get_dbservice``."""
+    db_service = get_dbservice()
+    engine = db_service.get_sync_session().get_bind()
+    return RootskiDBService(engine=engine)
+
+
 if __name__ == "__main__":
     get_dbservice()
@@ -0,0 +1,267 @@
+"""
+Parallel, retrying bulk writes to DynamoDB.
+
+``table.batch_writer()`` resends unprocessed items right away, with no backoff, and
+fails the whole request if two items in it have the same key. :class:`DynamoBulkLoader`
+instead writes with ``BatchWriteItem`` directly:
+
+- items with the same ``(pk, sk)`` are de-duplicated before they're sent; the last one wins
+- ``UnprocessedItems`` and throttling errors are retried with exponential backoff and
+  full jitter, up to ``max_attempts`` times
+- writes can be paced to a target rate of write capacity units (WCUs) per second
+- :meth:`DynamoBulkLoader.load` shards the items by key across ``num_workers`` threads
+  or processes, each with its own client
+
+:meth:`DynamoBulkLoader.write_items` writes in the calling thread, so it can be used as
+the ``load`` stage of a :class:`~dynamodb_play.etl.pipeline.Pipeline`, which already
+runs loads concurrently.
+
+.. code-block:: python
+
+    loader = DynamoBulkLoader(num_workers=8, max_wcu_per_second=1000)
+    loader.load(items)
+"""
+
+import json
+import math
+import random
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError
+from dynamodb_play.dynamo import ROOTSKI_DYNAMO_TABLE_NAME, get_rootski_dynamo_client
+from mypy_boto3_dynamodb import DynamoDBClient
+
+# BatchWriteItem accepts at most 25 put requests
+MAX_BATCH_WRITE_ITEMS = 25
+
+# a write consumes 1 WCU per 1KB of item, rounded up
+WCU_BYTES = 1024
+
+KEY_ATTRIBUTES = ("pk", "sk")
+
+# errors raised when all of the items of a request were throttled
+RETRYABLE_ERROR_CODES = {
+    "ProvisionedThroughputExceededException",
+    "ThrottlingException",
+    "RequestLimitExceeded",
+    "InternalServerError",
+}
+
+_serializer = TypeSerializer()
+
+
+class UnprocessedItemsError(Exception):
+    """Raised when items are still unprocessed after all of the retries."""
+
+    def __init__(self, unprocessed_items: List[dict]):
+        self.unprocessed_items = unprocessed_items
+        super().__init__(f"{len(unprocessed_items)} items could not be written to dynamo.")
+
+
+class WCURateLimiter:
+    """
+    Pace writes to ``wcu_per_second`` WCUs per second; thread safe.
+
+    Each write reserves the next free slot of time on a shared schedule and sleeps
+    until it comes up, so concurrent writers share the rate rather than each getting it.
+    """
+
+    def __init__(self, wcu_per_second: float):
+        if wcu_per_second <= 0:
+            raise ValueError(f"wcu_per_second must be positive, got {wcu_per_second}")
+        self.wcu_per_second = wcu_per_second
+        self._next_write_time: float = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, wcus: float):
+        with self._lock:
+            now: float = time.monotonic()
+            write_time: float = max(now, self._next_write_time)
+            self._next_write_time = write_time + wcus / self.wcu_per_second
+        if write_time > now:
+            time.sleep(write_time - now)
+
+
+def estimate_wcus(item: dict) -> int:
+    """Estimate the WCUs consumed by writing ``item`` from the size of its JSON."""
+    num_bytes: int = len(json.dumps(item, default=str, ensure_ascii=False).encode())
+    return max(1, math.ceil(num_bytes / WCU_BYTES))
+
+
+def serialize_item(item: dict) -> dict:
+    """Convert an item to the ``{"attribute": {"S": "value"}}`` format of the low level client."""
+    return {name: _serializer.serialize(value) for name, value in item.items()}
+
+
+def get_item_key(item: dict, key_attributes: Sequence[str] = KEY_ATTRIBUTES) -> Tuple:
+    return tuple(item[attribute] for attribute in key_attributes)
+
+
+def dedupe_items(items: Iterable[dict], key_attributes: Sequence[str] = KEY_ATTRIBUTES) -> List[dict]:
+    """Keep the last of the items with the same key, in the position of the first one."""
+    items_by_key: Dict[Tuple, dict] = {}
+    for item in items:
+        items_by_key[get_item_key(item, key_attributes)] = item
+    return list(items_by_key.values())
+
+
+def shard_items(
+    items: Iterable[dict], num_shards: int, key_attributes: Sequence[str] = KEY_ATTRIBUTES
+) -> List[List[dict]]:
+    """
+    Split ``items`` into ``num_shards`` lists by a hash of their key.
+
+    Items with the same key end up in the same shard, in order, so the last one is still
+    the one that is written. ``crc32`` is used rather than ``hash()`` because it is the same
+    in every process.
+    """
+    shards: List[List[dict]] = [[] for _ in range(num_shards)]
+    for item in items:
+        key: bytes = json.dumps(get_item_key(item, key_attributes), default=str).encode()
+        shards[zlib.crc32(key) % num_shards].append(item)
+    return shards
+
+
+def get_backoff_seconds(attempt: int, base_seconds: float, max_seconds: float) -> float:
+    """Exponential backoff with full jitter: a random wait of up to ``base * 2^attempt`` seconds."""
+    return random.uniform(0, min(max_seconds, base_seconds * 2**attempt))
+
+
+class DynamoBulkLoader:
+    """
+    Write items to a dynamo table in parallel.
+
+    :param num_workers: number of threads or processes :meth:`load` shards the items across
+    :param use_processes: shard across processes instead of threads, e.g. when serializing
+        the items is the bottleneck; the items must be picklable
+    :param max_wcu_per_second: target rate of writes across all workers; unlimited if ``None``
+    :param max_attempts: number of times a request is sent before giving up on its unprocessed items
+    """
+
+    def __init__(
+        self,
+        table_name: str = ROOTSKI_DYNAMO_TABLE_NAME,
+        num_workers: int = 8,
+        use_processes: bool = False,
+        max_wcu_per_second: Optional[float] = None,
+        max_attempts: int = 8,
+        base_backoff_seconds: float = 0.05,
+        max_backoff_seconds: float = 5.0,
+    ):
+        self.table_name = table_name
+        self.num_workers = num_workers
+        self.use_processes = use_processes
+        self.max_wcu_per_second = max_wcu_per_second
+        self.max_attempts = max_attempts
+        self.base_backoff_seconds = base_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+
+        # shared by every thread writing with this loader
+        self._rate_limiter: Optional[WCURateLimiter] = (
+            None if max_wcu_per_second is None else WCURateLimiter(max_wcu_per_second)
+        )
+        self._thread_local = threading.local()
+
+    @property
+    def options(self) -> dict:
+        """The arguments this loader was made with, e.g. to make a copy of it in another process."""
+        return {
+            "table_name": self.table_name,
+            "num_workers": self.num_workers,
+            "use_processes": self.use_processes,
+            "max_wcu_per_second": self.max_wcu_per_second,
+            "max_attempts": self.max_attempts,
+            "base_backoff_seconds": self.base_backoff_seconds,
+            "max_backoff_seconds": self.max_backoff_seconds,
+        }
+
+    def _get_client(self) -> DynamoDBClient:
+        # each thread gets its own client; creating clients from the default session isn't thread safe
+        if not hasattr(self._thread_local, "client"):
+            self._thread_local.client = get_rootski_dynamo_client()
+        return self._thread_local.client
+
+    def write_items(self, items: List[dict]) -> int:
+        """
+        Write ``items`` from the calling thread and return how many were written.
+
+        :raises UnprocessedItemsError: if some items are still unprocessed after ``max_attempts`` tries
+        """
+        deduped_items: List[dict] = dedupe_items(items)
+        for start in range(0, len(deduped_items), MAX_BATCH_WRITE_ITEMS):
+            batch: List[dict] = deduped_items[start : start + MAX_BATCH_WRITE_ITEMS]
+            self._write_batch(
+                requests=[{"PutRequest": {"Item": serialize_item(item)}} for item in batch],
+                wcus=sum(estimate_wcus(item) for item in batch) if self._rate_limiter else 0,
+            )
+        return len(deduped_items)
+
+    def delete_items(self, keys: List[dict]) -> int:
+        """
+        Delete the items with the given ``keys`` (e.g. ``{"pk": ..., "sk": ...}``) and return how many there were.
+
+        :raises UnprocessedItemsError: if some items are still unprocessed after ``max_attempts`` tries
+        """
+        deduped_keys: List[dict] = dedupe_items(keys)
+        for start in range(0, len(deduped_keys), MAX_BATCH_WRITE_ITEMS):
+            batch: List[dict] = deduped_keys[start : start + MAX_BATCH_WRITE_ITEMS]
+            # a delete consumes WCUs for the size of the deleted item, which we don't know; assume 1
+            self._write_batch(
+                requests=[{"DeleteRequest": {"Key": serialize_item(key)}} for key in batch], wcus=len(batch)
+            )
+        return len(deduped_keys)
+
+    def _write_batch(self, requests: List[dict], wcus: float):
+        """Send up to 25 put or delete ``requests``, retrying the unprocessed ones."""
+        client: DynamoDBClient = self._get_client()
+        num_requests: int = len(requests)
+
+        for attempt in range(self.max_attempts):
+            if attempt > 0:
+                time.sleep(get_backoff_seconds(attempt, self.base_backoff_seconds, self.max_backoff_seconds))
+
+            if self._rate_limiter is not None:
+                # retries are paced too, in proportion to the share of the requests that are resent
+                self._rate_limiter.acquire(wcus * len(requests) / num_requests)
+
+            try:
+                response: dict = client.batch_write_item(RequestItems={self.table_name: requests})
+            except ClientError as e:
+                if e.response["Error"]["Code"] not in RETRYABLE_ERROR_CODES:
+                    raise
+                continue
+
+            requests = response.get("UnprocessedItems", {}).get(self.table_name, [])
+            if not requests:
+                return
+
+        raise UnprocessedItemsError(unprocessed_items=requests)
+
+    def load(self, items: Iterable[dict]) -> int:
+        """Shard ``items`` by key across the workers, write them, and return how many were written."""
+        shards: List[List[dict]] = [shard for shard in shard_items(items, self.num_workers) if shard]
+        if not shards:
+            return 0
+
+        if not self.use_processes:
+            with ThreadPoolExecutor(len(shards)) as executor:
+                return sum(executor.map(self.write_items, shards))
+
+        # each process makes its own loader, which paces itself to its share of the rate
+        worker_options: dict = {
+            **self.options,
+            "max_wcu_per_second": None
+            if self.max_wcu_per_second is None
+            else self.max_wcu_per_second / len(shards),
+        }
+        with ProcessPoolExecutor(len(shards)) as executor:
+            return sum(executor.map(_write_shard, [worker_options] * len(shards), shards))
+
+
+def _write_shard(loader_options: dict, items: List[dict]) -> int:
+    return DynamoBulkLoader(**loader_options).write_items(items)
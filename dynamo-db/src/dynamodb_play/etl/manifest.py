@@ -0,0 +1,89 @@
+"""
+Content-hash manifests for incremental (delta) ETL runs.
+
+A manifest records a hash of every item an ETL wrote to dynamo, by key. On the next
+run, the freshly transformed items are compared against it so that only the items
+that were added or changed are written, and the items that are no longer produced
+are deleted. A refresh after a handful of edits in postgres then writes a handful
+of items instead of the whole entity type.
+
+The manifest is only saved after a run finishes, so an interrupted run is redone in full
+the next time rather than leaving the manifest ahead of the table.
+
+.. code-block:: python
+
+    manifest = ContentHashManifest.load(fpath)
+    changed_items = manifest.diff(items)       # for each batch
+    loader.delete_items(manifest.deleted_keys())
+    manifest.commit()
+    manifest.save(fpath)
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence
+
+from dynamodb_play.etl.loader import KEY_ATTRIBUTES
+
+# {pk: {sk: hash}}
+THashesByKey = Dict[str, Dict[str, str]]
+
+
+def hash_item(item: dict) -> str:
+    """Hash the content of ``item``; the order of the attributes doesn't matter."""
+    serialized_item: str = json.dumps(item, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(serialized_item.encode()).hexdigest()
+
+
+class ContentHashManifest:
+    """
+    The hashes of the items written by the last run, and of the items seen by this one.
+
+    :param hashes: ``{pk: {sk: hash}}`` of the items written by the last run
+    """
+
+    def __init__(self, hashes: THashesByKey = None, key_attributes: Sequence[str] = KEY_ATTRIBUTES):
+        self.hashes: THashesByKey = hashes or {}
+        self.key_attributes = key_attributes
+        self._seen_hashes: THashesByKey = {}
+
+    @classmethod
+    def load(cls, fpath: Path) -> "ContentHashManifest":
+        """Load the manifest saved at ``fpath``; if there isn't one, every item counts as added."""
+        if not fpath.exists():
+            return cls()
+        return cls(hashes=json.loads(fpath.read_text()))
+
+    def save(self, fpath: Path):
+        # write to a temporary file first so that a crash can't leave a half written manifest
+        tmp_fpath = fpath.with_name(fpath.name + ".tmp")
+        tmp_fpath.write_text(json.dumps(self.hashes, sort_keys=True))
+        tmp_fpath.replace(fpath)
+
+    def diff(self, items: Iterable[dict]) -> List[dict]:
+        """Record ``items`` as seen by this run and return the ones that were added or changed since the last."""
+        pk_attribute, sk_attribute = self.key_attributes
+        changed_items: List[dict] = []
+        for item in items:
+            pk, sk = str(item[pk_attribute]), str(item[sk_attribute])
+            item_hash: str = hash_item(item)
+            self._seen_hashes.setdefault(pk, {})[sk] = item_hash
+            if self.hashes.get(pk, {}).get(sk) != item_hash:
+                changed_items.append(item)
+        return changed_items
+
+    def deleted_keys(self) -> List[dict]:
+        """Keys of the items written by the last run that this run hasn't seen."""
+        pk_attribute, sk_attribute = self.key_attributes
+        return [
+            {pk_attribute: pk, sk_attribute: sk}
+            for pk, hashes_by_sk in self.hashes.items()
+            for sk in hashes_by_sk
+            if sk not in self._seen_hashes.get(pk, {})
+        ]
+
+    def commit(self):
+        """Make the items seen by this run the baseline of the next one."""
+        self.hashes = self._seen_hashes
+        self._seen_hashes = {}
@@ -0,0 +1,128 @@
+"""
+Script to build the morpheme family -> words inverted index in DynamoDB.
+
+Every ``BreakdownItem`` in dynamo points at its morpheme family, but answering
+"which words contain this family?" from those items means querying gsi1 and then
+fetching every word. This ETL precomputes the answer instead: for each family,
+the distinct words whose breakdowns contain one of its morphemes, sorted by
+frequency rank and chunked into ``MORPHEME_FAMILY_WORDS`` items.
+
+The rows are streamed ordered by family, so only the words of the families in the
+current batch are held in memory.
+
+A family that has fewer words than in the previous run keeps its extra chunks, and a
+family that is no longer in any breakdown keeps all of them, unless they are deleted.
+The keys of the chunks written by each run are recorded in a content-hash manifest
+(see :mod:`dynamodb_play.etl.manifest`), and the chunks of the previous run that this
+run didn't write are deleted at the end.
+
+Run it after the breakdowns and words have been loaded.
+"""
+
+from itertools import groupby
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from dynamodb_play.etl.db_service import get_dbservice
+from dynamodb_play.etl.loader import DynamoBulkLoader
+from dynamodb_play.etl.manifest import ContentHashManifest
+from dynamodb_play.etl.pipeline import Batch, Pipeline, batched, stream_rows
+from dynamodb_play.models.morpheme_family_words import (
+    MorphemeFamilyWord,
+    MorphemeFamilyWordsChunk,
+    make_morpheme_family_words_chunks,
+)
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+THIS_DIR = Path(__file__).parent
+
+MANIFEST_FPATH = THIS_DIR / "../morpheme-family-words-etl-manifest.json"
+
+# (family_id, word_id, word, frequency)
+TMorphemeFamilyWordRow = Tuple[int, int, str, Optional[int]]
+
+# (family_id, the family's rows)
+TMorphemeFamilyRows = Tuple[int, List[TMorphemeFamilyWordRow]]
+
+# every (family, word) pair for which some breakdown of the word contains a morpheme of the family
+MORPHEME_FAMILY_WORDS_SQL = """
+SELECT DISTINCT
+    morphemes.family_id
+    ,words.id
+    ,words.word
+    ,words.frequency
+FROM breakdowns
+JOIN morphemes ON morphemes.morpheme_id = breakdowns.morpheme_id
+JOIN word_to_breakdowns ON word_to_breakdowns.breakdown_id = breakdowns.breakdown_id
+JOIN words ON words.id = word_to_breakdowns.word_id
+ORDER BY morphemes.family_id
+"""
+
+
+def extract(session: Session, batch_size: int) -> Iterator[Batch[TMorphemeFamilyRows]]:
+    """Stream the (family, word) pairs from postgres, grouped into ``batch_size`` families at a time."""
+    rows: Iterator[TMorphemeFamilyWordRow] = (
+        tuple(row) for row in stream_rows(session, text(MORPHEME_FAMILY_WORDS_SQL))
+    )
+    # the rows are ordered by family, so the rows of a family are consecutive
+    families: Iterator[TMorphemeFamilyRows] = (
+        (family_id, list(family_rows)) for family_id, family_rows in groupby(rows, key=lambda row: row[0])
+    )
+    return batched(families, batch_size=batch_size)
+
+
+def transform(families: Iterable[TMorphemeFamilyRows]) -> List[dict]:
+    """Build the chunked index items of every family."""
+    chunks: List[MorphemeFamilyWordsChunk] = [
+        chunk
+        for family_id, rows in families
+        for chunk in make_morpheme_family_words_chunks(
+            family_id=str(family_id),
+            words=[
+                MorphemeFamilyWord(word_id=str(word_id), word=word, frequency=frequency)
+                for _, word_id, word, frequency in rows
+            ],
+        )
+    ]
+    return [chunk.to_item() for chunk in chunks]
+
+
+def etl(
+    batch_size: int = 100,
+    num_load_workers: int = 4,
+    max_wcu_per_second: Optional[float] = None,
+    delta: bool = False,
+    manifest_fpath: Path = MANIFEST_FPATH,
+):
+    """
+    Build the index of every family and delete the chunks of the previous run that weren't rewritten.
+
+    :param delta: only write the chunks that changed since the last run; the first run
+        (without a manifest) writes everything
+    """
+    session: Session = get_dbservice().get_sync_session()
+    loader = DynamoBulkLoader(max_wcu_per_second=max_wcu_per_second)
+    manifest: ContentHashManifest = ContentHashManifest.load(manifest_fpath)
+
+    def transform_and_record(families: List[TMorphemeFamilyRows]) -> List[dict]:
+        items: List[dict] = transform(families)
+        changed_items: List[dict] = manifest.diff(items)
+        return changed_items if delta else items
+
+    Pipeline(
+        name="morpheme family words",
+        extract=lambda: extract(session=session, batch_size=batch_size),
+        transform=transform_and_record,
+        load=loader.write_items,
+        num_load_workers=num_load_workers,
+    ).run()
+
+    num_deleted: int = loader.delete_items(manifest.deleted_keys())
+    print(f"Deleted {num_deleted} chunks that are past the end of their family's index")
+    manifest.commit()
+    manifest.save(manifest_fpath)
+
+
+if __name__ == "__main__":
+    etl()
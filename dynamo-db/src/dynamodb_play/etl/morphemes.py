@@ -1,14 +1,29 @@
-from functools import reduce
-from typing import List
+"""
+Script to ETL the morpheme families and their morphemes from postgres into DynamoDB.
+
+By default every item is rewritten. With ``delta=True``, the items are compared against
+the content hashes saved by the previous delta run (see :mod:`dynamodb_play.etl.manifest`):
+only the added or changed families and morphemes are written, and the ones that no longer
+exist in postgres are deleted.
+"""
+
+from itertools import chain
+from pathlib import Path
+from typing import Iterator, List, Optional
 
 import rootski.services.database.models as orm
-from dynamodb_play.dynamo import get_rootski_dynamo_table
+from dynamodb_play.etl.data_version import bump_data_version
 from dynamodb_play.etl.db_service import get_dbservice
-from dynamodb_play.etl.utils import batchify
+from dynamodb_play.etl.loader import DynamoBulkLoader
+from dynamodb_play.etl.manifest import ContentHashManifest
+from dynamodb_play.etl.pipeline import Batch, Pipeline, batched, stream_query
 from dynamodb_play.models.morpheme import Morpheme
 from dynamodb_play.models.morpheme_family import MorphemeFamily, MorphemeItem
-from rich.pretty import pprint
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import Session, selectinload
+
+THIS_DIR = Path(__file__).parent
+
+MANIFEST_FPATH = THIS_DIR / "../morphemes-etl-manifest.json"
 
 
 def make_dynamo_morpheme_family_from_orm(orm_family: orm.MorphemeFamily) -> MorphemeFamily:
@@ -36,59 +51,67 @@ def make_dynamo_morpheme_family_from_orm(orm_family: orm.MorphemeFamily) -> Morp
     )
 
 
-def batch_etl_morphemes_from_postgres_to_dynamo():
-
-    # query and serialize all MorphemeFamily and their Morpheme objects from postgres
-    morpheme_items: List[dict] = query_morpheme_items_from_postgres()
-
-    print("families")
-    pprint(morpheme_items[:3])
-
-    print("morphemes")
-    pprint(morpheme_items[::-1][:3])
-
-    # write 50 dicts at a time to dynamo
-    table = get_rootski_dynamo_table()
-    for batch_index, batch in enumerate(batchify(morpheme_items, batch_size=50)):
-        print(f"Writing batch {batch_index} to dynamo")
-        with table.batch_writer() as batch_writer:
-            for item in batch:
-                batch_writer.put_item(item)
-
-
-def query_morpheme_items_from_postgres() -> List[dict]:
-
-    # connect to an instance of the rootski postgres database running locally
-    db_service = get_dbservice()
-    session = db_service.get_sync_session()
-
-    # query all of the MorphemeFamily rows from postgres, eagerloading the "morphemes" and "family_meanings"
-    # with "LEFT OUTER JOIN"s on the query
-    m_families_orm: List[orm.MorphemeFamily] = (
-        session.query(orm.MorphemeFamily)
-        .options(
-            joinedload(orm.MorphemeFamily.morphemes),
-            joinedload(orm.MorphemeFamily.meanings),
-        )
-        .all()
+def extract(session: Session, batch_size: int) -> Iterator[Batch[orm.MorphemeFamily]]:
+    """Stream the morpheme families from postgres, ``batch_size`` at a time."""
+    # the "morphemes" and "family_meanings" are loaded with one extra query per chunk of families
+    query = session.query(orm.MorphemeFamily).options(
+        selectinload(orm.MorphemeFamily.morphemes),
+        selectinload(orm.MorphemeFamily.meanings),
     )
+    return batched(stream_query(query), batch_size=batch_size)
+
 
+def transform(m_families_orm: List[orm.MorphemeFamily]) -> List[dict]:
     # convert the SQLAlchemy "orm.MorphemeFamily" models to dicts meant for dynamo
     m_families: List[MorphemeFamily] = [make_dynamo_morpheme_family_from_orm(f) for f in m_families_orm]
     m_family_items: List[dict] = [m.to_item() for m in m_families]
 
     # build a list of (dynamo) "Morpheme" objects from each (dynamo) "MorphemeFamily" object
     # so that later we can query for a morpheme family by morpheme id using dynamo
-    morpheme_lists: List[List[Morpheme]] = [m.create_morphemes() for m in m_families]
-    morphemes = reduce(lambda l1, l2: l1 + l2, morpheme_lists)
+    morphemes: Iterator[Morpheme] = chain.from_iterable(m.create_morphemes() for m in m_families)
     morpheme_items = [m.to_item() for m in morphemes]
 
     # return all of these items in a single list so that we can write them to dynamo in batches
-    items = m_family_items + morpheme_items
+    return m_family_items + morpheme_items
+
+
+def etl(
+    batch_size: int = 50,
+    num_load_workers: int = 4,
+    max_wcu_per_second: Optional[float] = None,
+    delta: bool = False,
+    manifest_fpath: Path = MANIFEST_FPATH,
+):
+    """
+    Load the morpheme families and morphemes into dynamo.
+
+    :param delta: only write the items that changed since the last delta run and delete the
+        ones that were removed; the first delta run (without a manifest) writes everything
+    """
+    session: Session = get_dbservice().get_sync_session()
+    loader = DynamoBulkLoader(max_wcu_per_second=max_wcu_per_second)
+    manifest: Optional[ContentHashManifest] = ContentHashManifest.load(manifest_fpath) if delta else None
+
+    def transform_changed(m_families_orm: List[orm.MorphemeFamily]) -> List[dict]:
+        return manifest.diff(transform(m_families_orm))
+
+    Pipeline(
+        name="morphemes",
+        extract=lambda: extract(session=session, batch_size=batch_size),
+        transform=transform_changed if delta else transform,
+        load=loader.write_items,
+        num_load_workers=num_load_workers,
+    ).run()
 
-    return items
+    if delta:
+        num_deleted: int = loader.delete_items(manifest.deleted_keys())
+        print(f"Deleted {num_deleted} items that are no longer in postgres")
+        manifest.commit()
+        manifest.save(manifest_fpath)
 
+    # make the API drop the morpheme families it cached before this run
+    bump_data_version(loader)
 
 
 if __name__ == "__main__":
-    batch_etl_morphemes_from_postgres_to_dynamo()
+    etl()
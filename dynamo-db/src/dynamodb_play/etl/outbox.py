@@ -0,0 +1,111 @@
+"""
+Read the ``dynamo_sync_outbox`` table and work out which dynamo items its changes affect.
+
+The outbox is filled by triggers (see migration 5 in ``rootski_db_migrations``): one row
+per inserted, updated or deleted row of the tables the dynamo items are built from,
+with the row before (``old_row``) and after (``new_row``) the change as JSON.
+
+A changed row is mapped to the *entities* whose items have to be rebuilt, e.g. a new
+row in ``nouns`` means the ``Word`` item of its ``word_id`` is out of date. The items
+themselves are rebuilt from postgres by :mod:`dynamodb_play.etl.sync`, so the outbox
+only needs to say *what* changed, and any number of changes to one word in a batch
+result in a single write.
+"""
+
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Set
+
+OUTBOX_TABLE = "dynamo_sync_outbox"
+NOTIFY_CHANNEL = "dynamo_sync"
+
+# SKIP LOCKED lets several sync processes take turns without applying the same changes twice
+SELECT_OUTBOX_CHANGES_SQL = f"""
+SELECT id, table_name, operation, old_row, new_row
+FROM {OUTBOX_TABLE}
+ORDER BY id
+LIMIT :limit
+FOR UPDATE SKIP LOCKED
+"""
+
+DELETE_OUTBOX_CHANGES_SQL = f"""
+DELETE FROM {OUTBOX_TABLE}
+WHERE id = ANY(:ids)
+"""
+
+# tables with a word_id column whose rows are part of the Word item of that word;
+# the seeded verb data is in ``conjugations``, which is what the Word items are built from
+WORD_DATA_TABLES = {"nouns", "adjectives", "verbs", "conjugations", "word_defs", "word_to_sentence"}
+
+
+@dataclass
+class OutboxChange:
+    id: int
+    table_name: str
+    operation: str
+    old_row: Optional[dict]
+    new_row: Optional[dict]
+
+    @property
+    def rows(self) -> List[dict]:
+        """The versions of the row before and after the change that exist."""
+        return [row for row in (self.old_row, self.new_row) if row is not None]
+
+
+@dataclass
+class AffectedEntities:
+    """
+    The entities whose dynamo items have to be rebuilt.
+
+    :param word_ids: words whose ``Word`` and ``WordForSearch`` items are out of date
+    :param search_words: spellings that might no longer belong to a word; their
+        ``WordForSearch`` items are rewritten or deleted
+    :param breakdown_word_ids: words whose ``Breakdown`` and ``BreakdownItem`` items are out of date
+    :param breakdown_ids: breakdowns whose items changed; the sync looks up their words
+    :param family_ids: morpheme families whose ``MorphemeFamily`` and ``Morpheme`` items are out of date
+    """
+
+    word_ids: Set[int] = field(default_factory=set)
+    search_words: Set[str] = field(default_factory=set)
+    breakdown_word_ids: Set[int] = field(default_factory=set)
+    breakdown_ids: Set[int] = field(default_factory=set)
+    family_ids: Set[int] = field(default_factory=set)
+
+    def is_empty(self) -> bool:
+        return not (
+            self.word_ids
+            or self.search_words
+            or self.breakdown_word_ids
+            or self.breakdown_ids
+            or self.family_ids
+        )
+
+
+def _add_ids(ids: Set[int], rows: Iterable[dict], column: str):
+    ids.update(row[column] for row in rows if row.get(column) is not None)
+
+
+def get_affected_entities(changes: Iterable[OutboxChange]) -> AffectedEntities:
+    """Map each change to the entities it affects; changes to other tables are ignored."""
+    affected = AffectedEntities()
+    for change in changes:
+        rows: List[dict] = change.rows
+        if change.table_name == "words":
+            _add_ids(affected.word_ids, rows, "id")
+            # breakdowns store the spelling of their word
+            _add_ids(affected.breakdown_word_ids, rows, "id")
+            if change.old_row is not None:
+                affected.search_words.add(change.old_row["word"])
+        elif change.table_name in WORD_DATA_TABLES:
+            _add_ids(affected.word_ids, rows, "word_id")
+        elif change.table_name == "verb_pairs":
+            _add_ids(affected.word_ids, rows, "imp_word_id")
+            _add_ids(affected.word_ids, rows, "pfv_word_id")
+        elif change.table_name == "word_to_breakdowns":
+            _add_ids(affected.breakdown_word_ids, rows, "word_id")
+        elif change.table_name == "breakdowns":
+            _add_ids(affected.breakdown_ids, rows, "breakdown_id")
+        elif change.table_name == "morpheme_families":
+            _add_ids(affected.family_ids, rows, "id")
+        elif change.table_name in ("morphemes", "morpheme_family_meanings"):
+            _add_ids(affected.family_ids, rows, "family_id")
+    return affected
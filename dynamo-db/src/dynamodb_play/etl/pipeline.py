@@ -0,0 +1,228 @@
+"""
+A small streaming ETL pipeline for loading postgres data into DynamoDB in constant memory.
+
+A :class:`Pipeline` is made of three stages:
+
+1. **extract**: a generator of :class:`Batch` objects, typically built with :func:`batched`
+   from a query streamed with :func:`stream_query` (a server-side cursor, so the
+   table is never held in memory at once)
+2. **transform**: turns the records of a batch into dynamo items; it runs in the main
+   thread or, if ``num_transform_workers > 0``, in a process pool. ORM objects that
+   lazy load relationships can't be sent to another process, so ETLs over ORM objects
+   should either eager load everything they need or transform in the main thread.
+3. **load**: writes the items of a batch; ``num_load_workers`` batches are written concurrently
+
+At most ``max_batches_in_flight`` batches are transformed or loaded at a time.
+Batches finish in the order they were extracted, and ``on_batch_done`` is called
+for each one, e.g. to save a checkpoint.
+
+The time spent in each stage is added up and reported at the end of the run.
+Transform and load times are summed over workers, so they can exceed the wall time.
+
+.. code-block:: python
+
+    Pipeline(
+        name="words for search",
+        extract=lambda: batched(stream_query(session.query(orm.Word)), batch_size=500),
+        transform=transform,
+        load=DynamoBulkLoader().write_items,
+    ).run()
+"""
+
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from itertools import count, islice
+from typing import Any, Callable, Deque, Generic, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.sql.expression import Executable
+
+TRecord = TypeVar("TRecord")
+
+#: default number of rows fetched from the server-side cursor at a time
+DEFAULT_YIELD_PER = 1000
+
+
+@dataclass
+class Batch(Generic[TRecord]):
+    """
+    A batch of records flowing through a :class:`Pipeline`.
+
+    :param checkpoint: optional marker of how far the extract has gotten once this batch is
+        done, e.g. the last ID in the batch; passed along to ``on_batch_done``
+    """
+
+    index: int
+    records: List[TRecord]
+    checkpoint: Any = None
+
+
+@dataclass
+class StageTimings:
+    """Seconds spent in each stage of a pipeline run."""
+
+    extract: float = 0.0
+    transform: float = 0.0
+    load: float = 0.0
+
+
+@dataclass
+class PipelineStats:
+    batches: int = 0
+    records: int = 0
+    items: int = 0
+    seconds: float = 0.0
+    timings: StageTimings = field(default_factory=StageTimings)
+
+    @property
+    def items_per_second(self) -> float:
+        return self.items / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.batches} batches, {self.records} records, {self.items} items in {self.seconds:.1f}s"
+            + f" ({self.items_per_second:.0f} items/s);"
+            + f" extract {self.timings.extract:.1f}s, transform {self.timings.transform:.1f}s,"
+            + f" load {self.timings.load:.1f}s"
+        )
+
+
+def stream_query(query: Query, yield_per: int = DEFAULT_YIELD_PER) -> Iterator:
+    """
+    Iterate over the results of an ORM query ``yield_per`` rows at a time.
+
+    With postgres, ``yield_per`` streams the rows from a server-side cursor instead of
+    loading the whole result set. Eager load collections with ``selectinload``, which
+    runs one extra query per chunk of rows; ``joinedload`` can't be combined with ``yield_per``.
+    """
+    return iter(query.yield_per(yield_per))
+
+
+def stream_rows(session: Session, statement: Executable, yield_per: int = DEFAULT_YIELD_PER) -> Iterator[Row]:
+    """Execute a core statement (e.g. ``text(...)``) and stream its rows from a server-side cursor."""
+    return iter(session.execute(statement.execution_options(yield_per=yield_per)))
+
+
+def batched(records: Iterable[TRecord], batch_size: int) -> Iterator[Batch[TRecord]]:
+    """Group ``records`` into :class:`Batch` objects of up to ``batch_size`` records, lazily."""
+    iterator = iter(records)
+    for index in count():
+        records_batch: List[TRecord] = list(islice(iterator, batch_size))
+        if not records_batch:
+            return
+        yield Batch(index=index, records=records_batch)
+
+
+def _timed(fn: Callable, *args) -> Tuple[Any, float]:
+    start: float = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def _timed_load(load: Callable[[List[dict]], Any], items_future: Future) -> Tuple[int, float, float]:
+    """Wait for the transformed items, load them, and return ``(num_items, transform_seconds, load_seconds)``."""
+    items, transform_seconds = items_future.result()
+    _, load_seconds = _timed(load, items)
+    return len(items), transform_seconds, load_seconds
+
+
+class _ImmediateExecutor(Executor):
+    """Run the submitted function right away in the calling thread."""
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:  # pylint: disable=broad-except
+            future.set_exception(e)
+        return future
+
+
+class Pipeline(Generic[TRecord]):
+    """
+    Stream batches from ``extract`` through ``transform`` into ``load``.
+
+    :param name: used in the progress messages
+    :param extract: returns the generator of batches
+    :param transform: turns the records of a batch into dynamo items; must be picklable
+        (a module level function) if ``num_transform_workers > 0``
+    :param load: writes a list of items; called from ``num_load_workers`` threads at once
+    :param num_transform_workers: size of the transform process pool; 0 transforms in the main thread
+    :param num_load_workers: number of batches loaded concurrently
+    :param max_batches_in_flight: bound on batches being transformed or loaded; defaults to
+        twice the number of load workers
+    :param on_batch_done: called in the main thread with each batch and its number of items,
+        in extract order, after the batch has been loaded
+    """
+
+    def __init__(
+        self,
+        name: str,
+        extract: Callable[[], Iterable[Batch[TRecord]]],
+        transform: Callable[[List[TRecord]], List[dict]],
+        load: Callable[[List[dict]], Any],
+        num_transform_workers: int = 0,
+        num_load_workers: int = 4,
+        max_batches_in_flight: Optional[int] = None,
+        on_batch_done: Optional[Callable[[Batch[TRecord], int], None]] = None,
+        verbose: bool = True,
+    ):
+        self.name = name
+        self.extract = extract
+        self.transform = transform
+        self.load = load
+        self.num_transform_workers = num_transform_workers
+        self.num_load_workers = num_load_workers
+        self.max_batches_in_flight = max_batches_in_flight or 2 * num_load_workers
+        self.on_batch_done = on_batch_done
+        self.verbose = verbose
+
+    def run(self) -> PipelineStats:
+        stats = PipelineStats()
+        in_flight: Deque[Tuple[Batch[TRecord], Future]] = deque()
+        start_time: float = time.perf_counter()
+
+        def finish_oldest_batch():
+            batch, load_future = in_flight.popleft()
+            num_items, transform_seconds, load_seconds = load_future.result()
+
+            stats.batches += 1
+            stats.records += len(batch.records)
+            stats.items += num_items
+            stats.timings.transform += transform_seconds
+            stats.timings.load += load_seconds
+            stats.seconds = time.perf_counter() - start_time
+
+            if self.on_batch_done is not None:
+                self.on_batch_done(batch, num_items)
+            if self.verbose:
+                print(f"[{self.name}] batch {batch.index}: {stats.summary()}")
+
+        transform_pool: Executor = (
+            ProcessPoolExecutor(self.num_transform_workers)
+            if self.num_transform_workers > 0
+            else _ImmediateExecutor()
+        )
+        with transform_pool, ThreadPoolExecutor(self.num_load_workers) as load_pool:
+            batches: Iterator[Batch[TRecord]] = iter(self.extract())
+            while True:
+                batch, extract_seconds = _timed(next, batches, None)
+                stats.timings.extract += extract_seconds
+                if batch is None:
+                    break
+
+                items_future: Future = transform_pool.submit(_timed, self.transform, batch.records)
+                in_flight.append((batch, load_pool.submit(_timed_load, self.load, items_future)))
+
+                while len(in_flight) >= self.max_batches_in_flight:
+                    finish_oldest_batch()
+
+            while in_flight:
+                finish_oldest_batch()
+
+        stats.seconds = time.perf_counter() - start_time
+        print(f"[{self.name}] done: {stats.summary()}")
+        return stats
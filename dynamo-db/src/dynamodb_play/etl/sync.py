@@ -0,0 +1,256 @@
+"""
+Keep ``rootski-table`` in sync with postgres by applying the changes in the outbox.
+
+Each sync takes a batch of rows from ``dynamo_sync_outbox`` (see :mod:`dynamodb_play.etl.outbox`),
+maps them to the affected words, breakdowns and morpheme families, and rebuilds just
+those items from postgres with the ``transform`` functions of the full ETLs. Items of
+an affected entity that the rebuild no longer produces (e.g. a removed morpheme, or a
+breakdown item whose position changed) are deleted. The outbox rows are deleted in the
+same transaction they were read in, after the writes to dynamo succeeded, so a failed
+sync is retried with the same changes.
+
+Between syncs, the service waits on ``LISTEN dynamo_sync``, which the outbox triggers
+notify, so changes reach dynamo within seconds without polling the table.
+
+Not synced; a change to these still needs a run of the ETL that builds them:
+
+- definitions, example sentences and other rows that reach a word only through another
+  table (e.g. ``definition_contents``); see :mod:`dynamodb_play.etl.words`
+- the ``BreakdownItem`` items of the breakdowns that use a morpheme whose family changed;
+  the family ID is part of their keys, and only the morpheme's own items are rebuilt
+  (see :mod:`dynamodb_play.etl.breakdowns`)
+- the morpheme family -> words index (the ``WORDS#`` chunks in a family's partition),
+  which depends on every breakdown that uses the family; the sync leaves those chunks
+  alone (see :mod:`dynamodb_play.etl.morpheme_family_words`)
+"""
+
+import select
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set
+
+import rootski.services.database.models as orm
+from dynamodb_play.dynamo import get_rootski_dynamo_table
+from dynamodb_play.etl import breakdowns, morphemes, words, words_for_search
+from dynamodb_play.etl.data_version import bump_data_version
+from dynamodb_play.etl.db_service import get_dbservice, get_rootski_db_service
+from dynamodb_play.etl.loader import DynamoBulkLoader, get_item_key
+from dynamodb_play.etl.outbox import (
+    DELETE_OUTBOX_CHANGES_SQL,
+    NOTIFY_CHANNEL,
+    SELECT_OUTBOX_CHANGES_SQL,
+    AffectedEntities,
+    OutboxChange,
+    get_affected_entities,
+)
+from dynamodb_play.models import breakdown, morpheme, word, word_for_search
+from mypy_boto3_dynamodb.service_resource import _Table
+from rootski.services.database.non_orm.db_service import RootskiDBService
+from sqlalchemy import text
+from sqlalchemy.orm import Session, selectinload
+
+DEFAULT_MAX_CHANGES_PER_SYNC = 500
+
+
+@dataclass
+class SyncPlan:
+    """Items to write and keys to delete to bring the affected entities up to date."""
+
+    items: List[dict] = field(default_factory=list)
+    deleted_keys: List[dict] = field(default_factory=list)
+
+    def replace_stale_items(self, items: List[dict], existing_keys: Iterable[dict]):
+        """Write ``items`` and delete the ``existing_keys`` that aren't among them."""
+        item_keys = {get_item_key(item) for item in items}
+        self.items.extend(items)
+        self.deleted_keys.extend(key for key in existing_keys if get_item_key(key) not in item_keys)
+
+
+def query_keys(table: _Table, pk: str) -> List[dict]:
+    """Return the keys of every item in the ``pk`` partition."""
+    keys: List[dict] = []
+    query_kwargs = {
+        "KeyConditionExpression": "pk = :pk",
+        "ExpressionAttributeValues": {":pk": pk},
+        "ProjectionExpression": "pk, sk",
+    }
+    while True:
+        response: dict = table.query(**query_kwargs)
+        keys.extend(response["Items"])
+        if "LastEvaluatedKey" not in response:
+            return keys
+        query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+class DynamoSync:
+    """
+    Apply the changes recorded in the outbox to dynamo.
+
+    :param max_changes_per_sync: the outbox rows applied together; changes to the same
+        entity within a batch result in a single write
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        db: RootskiDBService,
+        table: _Table,
+        loader: DynamoBulkLoader,
+        max_changes_per_sync: int = DEFAULT_MAX_CHANGES_PER_SYNC,
+    ):
+        self.session = session
+        self.db = db
+        self.table = table
+        self.loader = loader
+        self.max_changes_per_sync = max_changes_per_sync
+
+    def sync_once(self) -> int:
+        """Apply the oldest outbox changes and return how many there were."""
+        try:
+            rows = self.session.execute(text(SELECT_OUTBOX_CHANGES_SQL), {"limit": self.max_changes_per_sync})
+            changes: List[OutboxChange] = [OutboxChange(**row) for row in rows.mappings()]
+            if not changes:
+                self.session.rollback()
+                return 0
+
+            plan: SyncPlan = self.make_sync_plan(get_affected_entities(changes))
+            self.loader.delete_items(plan.deleted_keys)
+            self.loader.write_items(plan.items)
+            if plan.items or plan.deleted_keys:
+                # make the API drop the items it cached before the changes
+                bump_data_version(self.loader)
+
+            self.session.execute(text(DELETE_OUTBOX_CHANGES_SQL), {"ids": [change.id for change in changes]})
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+        print(
+            f"Applied {len(changes)} changes: wrote {len(plan.items)}, deleted {len(plan.deleted_keys)} items"
+        )
+        return len(changes)
+
+    def make_sync_plan(self, affected: AffectedEntities) -> SyncPlan:
+        plan = SyncPlan()
+        if affected.is_empty():
+            return plan
+
+        self._plan_words(plan, word_ids=affected.word_ids)
+        self._plan_words_for_search(plan, word_ids=affected.word_ids, search_words=affected.search_words)
+        self._plan_breakdowns(
+            plan, word_ids=affected.breakdown_word_ids | self._get_breakdown_word_ids(affected)
+        )
+        self._plan_morpheme_families(plan, family_ids=affected.family_ids)
+        return plan
+
+    def _plan_words(self, plan: SyncPlan, word_ids: Set[int]):
+        if not word_ids:
+            return
+        # a word missing because a query failed would otherwise be deleted from dynamo
+        words_data: Dict[int, dict] = self.db.fetch_words_data(word_ids=sorted(word_ids), raise_errors=True)
+        plan.items.extend(words.transform(list(words_data.values())))
+        plan.deleted_keys.extend(
+            word.make_keys(word_id=str(word_id)) for word_id in word_ids if word_id not in words_data
+        )
+
+    def _plan_words_for_search(self, plan: SyncPlan, word_ids: Set[int], search_words: Set[str]):
+        if not (word_ids or search_words):
+            return
+        # rewrite the items of the affected words and of any other word that shares an old spelling
+        orm_words: List[orm.Word] = (
+            self.session.query(orm.Word)
+            .filter(orm.Word.id.in_(word_ids) | orm.Word.word.in_(search_words))
+            .all()
+        )
+        plan.replace_stale_items(
+            items=words_for_search.transform(orm_words),
+            existing_keys=[word_for_search.make_keys(word=search_word) for search_word in search_words],
+        )
+
+    def _get_breakdown_word_ids(self, affected: AffectedEntities) -> Set[int]:
+        if not affected.breakdown_ids:
+            return set()
+        rows = self.session.query(orm.Breakdown.word_id).filter(
+            orm.Breakdown.breakdown_id.in_(affected.breakdown_ids)
+        )
+        return {row.word_id for row in rows}
+
+    def _plan_breakdowns(self, plan: SyncPlan, word_ids: Set[int]):
+        if not word_ids:
+            return
+        orm_breakdowns: List[orm.Breakdown] = (
+            self.session.query(orm.Breakdown)
+            .filter(orm.Breakdown.word_id.in_(word_ids))
+            .options(
+                selectinload(orm.Breakdown.breakdown_items).selectinload(orm.BreakdownItem.morpheme_),
+                selectinload(orm.Breakdown.submitted_by_user),
+            )
+            .all()
+        )
+        # the Word item shares the partition of the breakdown items, so only the breakdown keys are candidates
+        existing_keys: List[dict] = [
+            key
+            for word_id in word_ids
+            for key in query_keys(self.table, pk=breakdown.make_pk(word_id=str(word_id)))
+            if key["sk"].startswith(breakdown.make_sk())
+        ]
+        plan.replace_stale_items(items=breakdowns.transform(orm_breakdowns), existing_keys=existing_keys)
+
+    def _plan_morpheme_families(self, plan: SyncPlan, family_ids: Set[int]):
+        if not family_ids:
+            return
+        orm_families: List[orm.MorphemeFamily] = (
+            self.session.query(orm.MorphemeFamily)
+            .filter(orm.MorphemeFamily.id.in_(family_ids))
+            .options(selectinload(orm.MorphemeFamily.morphemes), selectinload(orm.MorphemeFamily.meanings))
+            .all()
+        )
+        # the partition also holds the related words index, which is maintained by its own ETL
+        existing_keys: List[dict] = []
+        for family_id in family_ids:
+            pk: str = morpheme.make_pk(family_id=str(family_id))
+            existing_keys.extend(
+                key
+                for key in query_keys(self.table, pk=pk)
+                if key["sk"] == pk or key["sk"].startswith(morpheme.make_sk(morpheme_id=""))
+            )
+        plan.replace_stale_items(items=morphemes.transform(orm_families), existing_keys=existing_keys)
+
+    def run(self, max_wait_seconds: float = 30.0):
+        """
+        Apply changes as they come in, forever.
+
+        After the outbox has been drained, wait for a notification from the outbox triggers,
+        or ``max_wait_seconds`` in case one was missed.
+        """
+        # a dedicated connection, taken out of the pool since it is switched to autocommit:
+        # LISTEN only takes effect once committed, and notifications are only delivered between transactions
+        pool_connection = self.session.get_bind().raw_connection()
+        pool_connection.detach()
+        listen_connection = pool_connection.dbapi_connection
+        listen_connection.autocommit = True
+        listen_connection.cursor().execute(f"LISTEN {NOTIFY_CHANNEL};")
+        print(f"Listening for changes on {NOTIFY_CHANNEL}")
+
+        try:
+            while True:
+                while self.sync_once() > 0:
+                    pass
+                if select.select([listen_connection], [], [], max_wait_seconds) != ([], [], []):
+                    listen_connection.poll()
+                    listen_connection.notifies.clear()
+        finally:
+            listen_connection.close()
+
+
+def get_dynamo_sync(max_wcu_per_second: Optional[float] = None) -> DynamoSync:
+    return DynamoSync(
+        session=get_dbservice().get_sync_session(),
+        db=get_rootski_db_service(),
+        table=get_rootski_dynamo_table(),
+        loader=DynamoBulkLoader(max_wcu_per_second=max_wcu_per_second),
+    )
+
+
+if __name__ == "__main__":
+    get_dynamo_sync().run()
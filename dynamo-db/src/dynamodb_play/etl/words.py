@@ -1,76 +1,127 @@
 """
 Script to ETL "word" entities from the rootski postgres database into DynamoDB.
+
+The ETL streams the words table in batches of word IDs:
+
+1. **extract**: page through the word IDs in order (keyset pagination) and fetch the data
+   of each batch with ``RootskiDBService.fetch_words_data``, a handful of queries per batch
+2. **transform**: build the dynamo items of a batch in a process pool
+3. **load**: write the items of a batch with one of several concurrent batch writers
+
+The stages run in a :class:`~dynamodb_play.etl.pipeline.Pipeline`, so only a bounded
+number of batches are in flight at a time. After a batch has been written (and every
+batch before it), the highest word ID in it is saved to a checkpoint file, so an
+interrupted run resumes where it left off.
+
+``populate_words_dir_from_db`` writes the same payloads to one JSON file per word
+instead, which is handy for inspecting the data without going through dynamo.
 """
 
 import json
+from dataclasses import asdict, dataclass
+from itertools import count
 from pathlib import Path
-from typing import Generator, List, Set
+from typing import Dict, Iterator, List, Optional
 
-import pandas as pd
-import requests
-from dynamodb_play.etl.utils import batchify, bulk_upload_to_dynamo
+from dynamodb_play.etl.data_version import bump_data_version
+from dynamodb_play.etl.db_service import get_rootski_db_service
+from dynamodb_play.etl.loader import DynamoBulkLoader
+from dynamodb_play.etl.pipeline import Batch, Pipeline
 from dynamodb_play.models.word import Word
+from rootski.services.database.non_orm.db_service import RootskiDBService
 
 THIS_DIR = Path(__file__).parent
 
-ROOTSKI_API_BASE_URL = "http://localhost:3333"
-
+CHECKPOINT_FPATH = THIS_DIR / "../words-etl-checkpoint.json"
 WORDS_OUT_DIR = THIS_DIR / "../words"
-WORDS_CSV_FPATH = WORDS_OUT_DIR / "../../../../rootski_db_migrations/src/migrations/initial_data/data/words.csv"
 
-#################
-# --- Words --- #
-#################
+# keyset pagination: the next batch starts after the last word ID of the previous one
+WORD_IDS_AFTER_SQL = """
+SELECT id
+FROM words
+WHERE id > :after_word_id
+ORDER BY id
+LIMIT :batch_size
+"""
+
+######################
+# --- Checkpoint --- #
+######################
+
 
+@dataclass
+class WordsETLCheckpoint:
+    """Progress of the words ETL; every word with an ID <= ``last_word_id`` has been loaded."""
 
-def populate_words_dir_with_dynamo_objects(pickup_where_left_off: bool = False, reverse: bool = False):
-    WORDS_OUT_DIR.mkdir(exist_ok=True)
+    last_word_id: int = 0
+    items_written: int = 0
 
-    words_df = pd.read_csv(WORDS_CSV_FPATH)
-    num_words = len(words_df)
+    @classmethod
+    def load(cls, fpath: Path) -> "WordsETLCheckpoint":
+        if not fpath.exists():
+            return cls()
+        return cls(**json.loads(fpath.read_text()))
 
-    already_requested_word_ids: Set[int] = get_already_written_ids(dir=WORDS_OUT_DIR)
+    def save(self, fpath: Path):
+        # write to a temporary file first so that a crash can't leave a half written checkpoint
+        tmp_fpath = fpath.with_name(fpath.name + ".tmp")
+        tmp_fpath.write_text(json.dumps(asdict(self)))
+        tmp_fpath.replace(fpath)
 
-    rows_iter = words_df[::-1].iterrows() if reverse else words_df.iterrows()
 
-    print(words_df.head())
+#################
+# --- Words --- #
+#################
 
-    for idx, row in rows_iter:
-        word_id = row["id"]
-        word_pos = row["type"]
 
-        if pickup_where_left_off and word_id in already_requested_word_ids:
-            continue
+def extract(db: RootskiDBService, batch_size: int, after_word_id: int) -> Iterator[Batch[dict]]:
+    """
+    Yield the ``fetch_words_data`` payloads of the words with an ID > ``after_word_id``, a batch at a time.
 
-        try:
-            request_and_save_word_data(word_id=word_id, pos=word_pos)
-            print(f"Success on {idx}/{num_words}\t\tword_id={word_id}\tword_pos={word_pos}")
-        except:
-            print(f"FAILED \t\tword_id={word_id}\tword_pos={word_pos}")
+    The checkpoint of each batch is the highest word ID in it. A failed query raises rather
+    than being logged and treated as empty, so that the run stops before the batch is
+    checkpointed instead of ending early or skipping the words of the batch.
+    """
+    for index in count():
+        rows: List[dict] = db.run_query(
+            WORD_IDS_AFTER_SQL,
+            params={"after_word_id": after_word_id, "batch_size": batch_size},
+            raise_errors=True,
+        )
+        if not rows:
+            return
 
+        word_ids: List[int] = [row["id"] for row in rows]
+        words_data: Dict[int, dict] = db.fetch_words_data(word_ids=word_ids, raise_errors=True)
+        yield Batch(
+            index=index,
+            records=[words_data[word_id] for word_id in word_ids if word_id in words_data],
+            checkpoint=word_ids[-1],
+        )
 
-def get_already_written_ids(dir: Path) -> Set[int]:
-    files: List[Path] = dir.glob("*.json")
-    file_ids: Set[int] = set(map(lambda fpath: int(fpath.name.strip(".json")), files))
-    return file_ids
+        after_word_id = word_ids[-1]
 
 
-def request_word_data(word_id: int, pos: str) -> dict:
-    return requests.get(f"{ROOTSKI_API_BASE_URL}/word/{word_id}/{pos}").json()
+def populate_words_dir_from_db(batch_size: int = 1000, after_word_id: int = 0, words_dir: Path = WORDS_OUT_DIR):
+    """
+    Write the ``fetch_words_data`` payload of each word to ``<words_dir>/<word_id>.json``.
 
+    The words with an ID > ``after_word_id`` are read from postgres ``batch_size`` at a time,
+    the same way the ETL reads them.
+    """
+    words_dir.mkdir(exist_ok=True)
 
-def request_and_save_word_data(word_id: int, pos: str):
-    word_data: dict = request_word_data(word_id=word_id, pos=pos)
-    jsonified_word_data: str = json.dumps(word_data, indent=4, ensure_ascii=False)
-    word_data_outfile_fpath: Path = WORDS_OUT_DIR / f"{word_id}.json"
-    word_data_outfile_fpath.write_text(jsonified_word_data, encoding="utf-8")
+    db: RootskiDBService = get_rootski_db_service()
+    for batch in extract(db=db, batch_size=batch_size, after_word_id=after_word_id):
+        for word_data in batch.records:
+            save_word_data(word_data=word_data, words_dir=words_dir)
+        print(f"Saved batch {batch.index}: {len(batch.records)} words, up to word {batch.checkpoint}")
 
 
-def extract(batch_size: int) -> Generator[List[dict], None, None]:
-    print("Reading all morphemes dicts from disk")
-    word_json_fpaths: List[Path] = list(WORDS_OUT_DIR.glob("*.json"))
-    for fpaths_batch in batchify(word_json_fpaths, batch_size=batch_size):
-        yield [json.loads(fpath.read_text()) for fpath in fpaths_batch]
+def save_word_data(word_data: dict, words_dir: Path):
+    jsonified_word_data: str = json.dumps(word_data, indent=4, ensure_ascii=False)
+    word_data_outfile_fpath: Path = words_dir / f"{word_data['word']['word_id']}.json"
+    word_data_outfile_fpath.write_text(jsonified_word_data, encoding="utf-8")
 
 
 def transform(word_json_dicts: List[dict]) -> List[dict]:
@@ -83,18 +134,50 @@ def transform(word_json_dicts: List[dict]) -> List[dict]:
     return results
 
 
-def load(items: List[dict]):
-    bulk_upload_to_dynamo(items=items)
-
-
-def etl():
-    raw_word_json_dicts__batch: List[dict]
-    for index, raw_word_json_dicts__batch in enumerate(extract(batch_size=500)):
-        print(f"processing batch {index}")
-        word_items: List[dict] = transform(word_json_dicts=raw_word_json_dicts__batch)
-        load(items=word_items)
+def etl(
+    batch_size: int = 500,
+    num_transform_processes: int = 4,
+    num_writer_threads: int = 8,
+    max_wcu_per_second: Optional[float] = None,
+    resume: bool = True,
+    checkpoint_fpath: Path = CHECKPOINT_FPATH,
+):
+    """
+    Stream the words from postgres into dynamo.
+
+    :param batch_size: number of words fetched, transformed and written together
+    :param num_transform_processes: size of the process pool that builds the dynamo items
+    :param num_writer_threads: number of batches written to dynamo concurrently
+    :param max_wcu_per_second: target rate of dynamo writes across the writer threads; unlimited if ``None``
+    :param resume: start after the words recorded in the checkpoint rather than from the beginning
+    """
+    checkpoint = WordsETLCheckpoint.load(checkpoint_fpath) if resume else WordsETLCheckpoint()
+    print(f"Starting after word {checkpoint.last_word_id}")
+
+    def save_checkpoint(batch: Batch[dict], num_items: int):
+        # batches finish in the order they were extracted, so every word
+        # up to the batch's checkpoint has been written
+        checkpoint.last_word_id = batch.checkpoint
+        checkpoint.items_written += num_items
+        checkpoint.save(checkpoint_fpath)
+
+    db: RootskiDBService = get_rootski_db_service()
+    loader = DynamoBulkLoader(max_wcu_per_second=max_wcu_per_second)
+    Pipeline(
+        name="words",
+        extract=lambda: extract(db=db, batch_size=batch_size, after_word_id=checkpoint.last_word_id),
+        transform=transform,
+        load=loader.write_items,
+        num_transform_workers=num_transform_processes,
+        num_load_workers=num_writer_threads,
+        on_batch_done=save_checkpoint,
+    ).run()
+
+    # make the API drop the words it cached before this run
+    bump_data_version(loader)
+    print(f"Done. {checkpoint.items_written} words have been loaded in total.")
 
 
 if __name__ == "__main__":
-    # populate_words_dir_with_dynamo_objects(pickup_where_left_off=True, reverse=True)
+    # populate_words_dir_from_db()
     etl()
@@ -1,19 +1,15 @@
-from typing import List
+from typing import Iterator, List, Optional
 
 import rootski.services.database.models as orm
 from dynamodb_play.etl.db_service import get_dbservice
-from dynamodb_play.etl.utils import batch_load_into_dynamo
+from dynamodb_play.etl.loader import DynamoBulkLoader
+from dynamodb_play.etl.pipeline import Batch, Pipeline, batched, stream_query
 from dynamodb_play.models.word_for_search import WordForSearch
-from rich.pretty import pprint
+from sqlalchemy.orm import Session
 
 
-def extract() -> List[orm.Word]:
-
-    db_service = get_dbservice()
-    session = db_service.get_sync_session()
-    words: List[orm.Word] = session.query(orm.Word).all()
-
-    return words
+def extract(session: Session, batch_size: int) -> Iterator[Batch[orm.Word]]:
+    return batched(stream_query(session.query(orm.Word)), batch_size=batch_size)
 
 
 def transform(words: List[orm.Word]) -> List[dict]:
@@ -28,16 +24,15 @@ def transform(words: List[orm.Word]) -> List[dict]:
     ]
 
 
-def load(dynamo_words: List[WordForSearch], batch_size: int):
-    batch_load_into_dynamo(items=dynamo_words, batch_size=batch_size)
-
-
-def etl():
-    orm_words: List[orm.Word] = extract()
-    dynamo_words: List[WordForSearch] = transform(words=orm_words)
-
-    pprint(dynamo_words[:3])
-    load(dynamo_words=dynamo_words, batch_size=500)
+def etl(batch_size: int = 500, num_load_workers: int = 4, max_wcu_per_second: Optional[float] = None):
+    session: Session = get_dbservice().get_sync_session()
+    Pipeline(
+        name="words for search",
+        extract=lambda: extract(session=session, batch_size=batch_size),
+        transform=transform,
+        load=DynamoBulkLoader(max_wcu_per_second=max_wcu_per_second).write_items,
+        num_load_workers=num_load_workers,
+    ).run()
 
 
 if __name__ == "__main__":
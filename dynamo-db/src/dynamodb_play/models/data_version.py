@@ -0,0 +1,53 @@
+"""
+A single item holding the version of the data in the table.
+
+The ETLs and the sync service write a new version after they load data. The API polls
+the item and discards its cached words and morpheme families when the version changes.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Literal
+
+from dynamodb_play.models.base import DynamoModel
+
+
+@dataclass
+class DataVersion(DynamoModel):
+
+    version: str
+
+    __type: Literal["DATA_VERSION"] = "DATA_VERSION"
+
+    @property
+    def pk(self) -> str:
+        return make_pk()
+
+    @property
+    def sk(self) -> str:
+        return make_sk()
+
+    @property
+    def keys(self) -> Dict[str, str]:
+        return make_keys()
+
+    def to_item(self) -> dict:
+        return {
+            **self.keys,
+            "version": self.version,
+            "__type": self.__type,
+        }
+
+
+def make_pk() -> str:
+    return "DATA_VERSION"
+
+
+def make_sk() -> str:
+    return "DATA_VERSION"
+
+
+def make_keys() -> Dict[str, str]:
+    return {
+        "pk": make_pk(),
+        "sk": make_sk(),
+    }
@@ -0,0 +1,73 @@
+"""
+Inverted index from a morpheme family to the words whose breakdowns contain it.
+
+The words of a family are sorted by frequency rank and split into chunks of up to
+``WORDS_PER_CHUNK`` words, stored next to the ``MorphemeFamily`` item (same ``pk``).
+Each word is stored as a compact ``[word_id, word, frequency]`` list.
+
+NOTE: remember to cast all IDs to strings
+"""
+
+from dataclasses import dataclass
+from typing import List, Literal, Optional, Sequence, TypedDict
+
+from dynamodb_play.models.base import DynamoModel
+
+# a chunk of 500 words is ~15KB, well under dynamo's 400KB item size limit
+WORDS_PER_CHUNK = 500
+
+
+class MorphemeFamilyWord(TypedDict):
+    word_id: str
+    word: str
+    # frequency rank of the word; 1 is the most common word
+    frequency: Optional[int]
+
+
+@dataclass
+class MorphemeFamilyWordsChunk(DynamoModel):
+
+    family_id: str
+    chunk_index: int
+    total_words: int
+    words: List[MorphemeFamilyWord]
+
+    __type: Literal["MORPHEME_FAMILY_WORDS"] = "MORPHEME_FAMILY_WORDS"
+
+    @property
+    def pk(self) -> str:
+        return f"MORPHEME_FAMILY#{self.family_id}"
+
+    @property
+    def sk(self) -> str:
+        # zero padded so that the chunks of a family sort in order
+        return f"WORDS#{self.chunk_index:05d}"
+
+    def to_item(self) -> dict:
+        return {
+            **self.keys,
+            "__type": self.__type,
+            "family_id": str(self.family_id),
+            "chunk_index": self.chunk_index,
+            "total_words": self.total_words,
+            "words": [[str(w["word_id"]), w["word"], w["frequency"]] for w in self.words],
+        }
+
+
+def make_morpheme_family_words_chunks(
+    family_id: str, words: Sequence[MorphemeFamilyWord], words_per_chunk: int = WORDS_PER_CHUNK
+) -> List[MorphemeFamilyWordsChunk]:
+    """Sort ``words`` from most to least common and split them into chunks; unranked words go last."""
+    sorted_words: List[MorphemeFamilyWord] = sorted(
+        words,
+        key=lambda w: (w["frequency"] is None, w["frequency"] or 0, int(w["word_id"])),
+    )
+    return [
+        MorphemeFamilyWordsChunk(
+            family_id=str(family_id),
+            chunk_index=chunk_index,
+            total_words=len(sorted_words),
+            words=sorted_words[start : start + words_per_chunk],
+        )
+        for chunk_index, start in enumerate(range(0, len(sorted_words), words_per_chunk))
+    ]
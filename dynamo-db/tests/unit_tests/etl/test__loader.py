@@ -0,0 +1,111 @@
+import os
+import time
+from typing import List
+
+import boto3
+import pytest
+from moto import mock_dynamodb
+
+from dynamodb_play.etl import loader
+from dynamodb_play.etl.loader import (
+    DynamoBulkLoader,
+    UnprocessedItemsError,
+    WCURateLimiter,
+    dedupe_items,
+    shard_items,
+)
+
+TABLE_NAME = "test-table"
+
+
+def make_items(num_items: int) -> List[dict]:
+    return [{"pk": f"WORD#{i}", "sk": "WORD", "word": f"слово{i}"} for i in range(num_items)]
+
+
+class FakeClient:
+    """Leaves the last item of every request unprocessed the first ``num_failures`` times."""
+
+    def __init__(self, num_failures: int):
+        self.num_failures = num_failures
+        self.requests: List[List[dict]] = []
+
+    def batch_write_item(self, RequestItems: dict) -> dict:  # pylint: disable=invalid-name
+        requests: List[dict] = RequestItems[TABLE_NAME]
+        self.requests.append(requests)
+        if self.num_failures > 0:
+            self.num_failures -= 1
+            return {"UnprocessedItems": {TABLE_NAME: requests[-1:]}}
+        return {"UnprocessedItems": {}}
+
+
+@pytest.fixture
+def fake_loader(monkeypatch) -> DynamoBulkLoader:
+    monkeypatch.setattr(loader, "get_backoff_seconds", lambda *args: 0)
+    return DynamoBulkLoader(table_name=TABLE_NAME, max_attempts=3)
+
+
+def test__dedupe_items():
+    items = [{"pk": "a", "sk": "1", "v": 1}, {"pk": "b", "sk": "1", "v": 2}, {"pk": "a", "sk": "1", "v": 3}]
+    assert dedupe_items(items) == [{"pk": "a", "sk": "1", "v": 3}, {"pk": "b", "sk": "1", "v": 2}]
+
+
+def test__shard_items():
+    items = make_items(100) + make_items(10)
+    shards = shard_items(items, num_shards=4)
+    assert sum(len(shard) for shard in shards) == 110
+    # both copies of a key land in the same shard
+    for item in make_items(10):
+        assert any(shard.count(item) == 2 for shard in shards)
+
+
+def test__write_items__retries_unprocessed_items(fake_loader: DynamoBulkLoader):
+    client = FakeClient(num_failures=2)
+    fake_loader._thread_local.client = client  # pylint: disable=protected-access
+
+    assert fake_loader.write_items(make_items(30)) == 30
+    # two full requests of 25 and 5 items, then the retries of the last unprocessed item
+    assert [len(r) for r in client.requests] == [25, 1, 1, 5]
+
+
+def test__write_items__gives_up_after_max_attempts(fake_loader: DynamoBulkLoader):
+    fake_loader._thread_local.client = FakeClient(num_failures=3)  # pylint: disable=protected-access
+
+    with pytest.raises(UnprocessedItemsError) as exc_info:
+        fake_loader.write_items(make_items(5))
+    assert len(exc_info.value.unprocessed_items) == 1
+
+
+def test__rate_limiter():
+    rate_limiter = WCURateLimiter(wcu_per_second=100)
+    start = time.monotonic()
+    for _ in range(5):
+        rate_limiter.acquire(wcus=10)
+    # the first write goes right away, the other 40 WCUs take 0.4 seconds
+    assert 0.35 < time.monotonic() - start < 1
+
+
+@mock_dynamodb
+def test__load(monkeypatch):
+    monkeypatch.setitem(os.environ, "AWS_DEFAULT_REGION", "us-west-2")
+    monkeypatch.delenv("AWS_PROFILE", raising=False)
+    monkeypatch.setattr(loader, "get_rootski_dynamo_client", lambda: boto3.client("dynamodb"))
+    boto3.client("dynamodb").create_table(
+        TableName=TABLE_NAME,
+        KeySchema=[{"AttributeName": "pk", "KeyType": "HASH"}, {"AttributeName": "sk", "KeyType": "RANGE"}],
+        AttributeDefinitions=[
+            {"AttributeName": "pk", "AttributeType": "S"},
+            {"AttributeName": "sk", "AttributeType": "S"},
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    )
+
+    items = make_items(200) + [{"pk": "WORD#0", "sk": "WORD", "word": "последнее"}]
+    bulk_loader = DynamoBulkLoader(table_name=TABLE_NAME, num_workers=4)
+    num_written = bulk_loader.load(items)
+
+    table = boto3.resource("dynamodb").Table(TABLE_NAME)
+    assert num_written == table.scan()["Count"] == 200
+    assert table.get_item(Key={"pk": "WORD#0", "sk": "WORD"})["Item"]["word"] == "последнее"
+
+    assert bulk_loader.delete_items([{"pk": "WORD#0", "sk": "WORD"}, {"pk": "WORD#1", "sk": "WORD"}]) == 2
+    assert table.scan()["Count"] == 198
@@ -0,0 +1,39 @@
+from pathlib import Path
+
+from dynamodb_play.etl.manifest import ContentHashManifest
+
+
+def make_item(family_id: int, meaning: str) -> dict:
+    return {"pk": f"MORPHEME_FAMILY#{family_id}", "sk": f"MORPHEME_FAMILY#{family_id}", "meaning": meaning}
+
+
+def test__manifest__delta(tmp_path: Path):
+    manifest_fpath = tmp_path / "manifest.json"
+
+    # the first run has nothing to compare against, so every item is written
+    manifest = ContentHashManifest.load(manifest_fpath)
+    first_run_items = [make_item(1, "read"), make_item(2, "write"), make_item(3, "speak")]
+    assert manifest.diff(first_run_items) == first_run_items
+    assert manifest.deleted_keys() == []
+    manifest.commit()
+    manifest.save(manifest_fpath)
+
+    # family 2 changed, family 3 was deleted and family 4 was added
+    manifest = ContentHashManifest.load(manifest_fpath)
+    changed_items = manifest.diff([make_item(1, "read")]) + manifest.diff(
+        [make_item(2, "run"), make_item(4, "go")]
+    )
+    assert changed_items == [make_item(2, "run"), make_item(4, "go")]
+    assert manifest.deleted_keys() == [{"pk": "MORPHEME_FAMILY#3", "sk": "MORPHEME_FAMILY#3"}]
+    manifest.commit()
+
+    # nothing changed since
+    assert manifest.diff([make_item(1, "read"), make_item(2, "run"), make_item(4, "go")]) == []
+    assert manifest.deleted_keys() == []
+
+
+def test__manifest__attribute_order_does_not_matter():
+    manifest = ContentHashManifest()
+    manifest.diff([{"pk": "a", "sk": "b", "x": 1, "y": 2}])
+    manifest.commit()
+    assert manifest.diff([{"y": 2, "x": 1, "sk": "b", "pk": "a"}]) == []
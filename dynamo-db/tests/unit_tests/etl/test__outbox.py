@@ -0,0 +1,36 @@
+from dynamodb_play.etl.outbox import AffectedEntities, OutboxChange, get_affected_entities
+
+
+def make_change(table_name: str, operation: str, old_row: dict = None, new_row: dict = None) -> OutboxChange:
+    return OutboxChange(id=1, table_name=table_name, operation=operation, old_row=old_row, new_row=new_row)
+
+
+def test__get_affected_entities():
+    changes = [
+        # a word is renamed: its old spelling may no longer belong to any word
+        make_change(
+            "words", "UPDATE", old_row={"id": 1, "word": "бежать"}, new_row={"id": 1, "word": "бегать"}
+        ),
+        make_change("nouns", "INSERT", new_row={"word_id": 2}),
+        make_change("conjugations", "UPDATE", old_row={"word_id": 9}, new_row={"word_id": 9}),
+        make_change("verb_pairs", "DELETE", old_row={"imp_word_id": 3, "pfv_word_id": None}),
+        make_change("word_to_breakdowns", "INSERT", new_row={"word_id": 4, "breakdown_id": 40}),
+        make_change("breakdowns", "UPDATE", old_row={"breakdown_id": 50}, new_row={"breakdown_id": 51}),
+        # a morpheme moves to another family: both families change
+        make_change("morphemes", "UPDATE", old_row={"family_id": 6}, new_row={"family_id": 7}),
+        make_change("morpheme_families", "DELETE", old_row={"id": 8}),
+        make_change("users", "INSERT", new_row={"email": "someone@gmail.com"}),
+    ]
+
+    assert get_affected_entities(changes) == AffectedEntities(
+        word_ids={1, 2, 3, 9},
+        search_words={"бежать"},
+        breakdown_word_ids={1, 4},
+        breakdown_ids={50, 51},
+        family_ids={6, 7, 8},
+    )
+
+
+def test__get_affected_entities__unsynced_tables():
+    changes = [make_change("users", "INSERT", new_row={"email": "someone@gmail.com"})]
+    assert get_affected_entities(changes).is_empty()
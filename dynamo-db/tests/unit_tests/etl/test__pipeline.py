@@ -0,0 +1,62 @@
+import threading
+from typing import List
+
+import pytest
+
+from dynamodb_play.etl.pipeline import Batch, Pipeline, PipelineStats, batched
+
+
+def transform(records: List[int]) -> List[dict]:
+    # two items per record, e.g. a parent item and a child item
+    return [{"pk": f"RECORD#{r}", "sk": sk} for r in records for sk in ("PARENT", "CHILD")]
+
+
+def test__batched():
+    batches = list(batched(range(7), batch_size=3))
+    assert [b.index for b in batches] == [0, 1, 2]
+    assert [b.records for b in batches] == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(batched([], batch_size=3)) == []
+
+
+@pytest.mark.parametrize("num_load_workers, max_batches_in_flight", [(1, None), (4, None), (4, 1)])
+def test__pipeline(num_load_workers: int, max_batches_in_flight: int):
+    loaded_items: List[dict] = []
+    lock = threading.Lock()
+    done_batches: List[int] = []
+
+    def load(items: List[dict]) -> int:
+        with lock:
+            loaded_items.extend(items)
+        return len(items)
+
+    stats: PipelineStats = Pipeline(
+        name="test",
+        extract=lambda: batched(range(25), batch_size=4),
+        transform=transform,
+        load=load,
+        num_load_workers=num_load_workers,
+        max_batches_in_flight=max_batches_in_flight,
+        on_batch_done=lambda batch, num_items: done_batches.append((batch.index, num_items)),
+        verbose=False,
+    ).run()
+
+    assert (stats.batches, stats.records, stats.items) == (7, 25, 50)
+    by_key = lambda item: (item["pk"], item["sk"])
+    assert sorted(loaded_items, key=by_key) == sorted(transform(list(range(25))), key=by_key)
+    # batches finish in extract order, whatever order they're loaded in
+    assert done_batches == [(i, 8) for i in range(6)] + [(6, 2)]
+
+
+def test__pipeline__load_error_is_raised():
+    def load(items: List[dict]):
+        raise RuntimeError("throttled")
+
+    pipeline = Pipeline(
+        name="test",
+        extract=lambda: [Batch(index=0, records=[1])],
+        transform=transform,
+        load=load,
+        verbose=False,
+    )
+    with pytest.raises(RuntimeError, match="throttled"):
+        pipeline.run()
@@ -0,0 +1,297 @@
+import os
+from typing import Dict, List
+
+import boto3
+import pytest
+from moto import mock_dynamodb
+
+# needs the database modules of the rootski API
+sync = pytest.importorskip("dynamodb_play.etl.sync")
+
+from dynamodb_play.etl import loader  # noqa: E402
+from dynamodb_play.etl.loader import DynamoBulkLoader, UnprocessedItemsError, get_item_key  # noqa: E402
+from dynamodb_play.etl.outbox import DELETE_OUTBOX_CHANGES_SQL, AffectedEntities  # noqa: E402
+from dynamodb_play.models import (
+    breakdown,
+    breakdown_item,
+    data_version,
+    morpheme,
+    word,
+    word_for_search,
+)  # noqa: E402
+from dynamodb_play.models.morpheme_family_words import MorphemeFamilyWordsChunk  # noqa: E402
+
+TABLE_NAME = "test-table"
+
+
+class FakeQuery:
+    """Ignores the filters and returns the given rows."""
+
+    def __init__(self, rows: list):
+        self.rows = rows
+
+    def filter(self, *args) -> "FakeQuery":
+        return self
+
+    def options(self, *args) -> "FakeQuery":
+        return self
+
+    def all(self) -> list:
+        return self.rows
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+class FakeResult:
+    def __init__(self, rows: List[dict]):
+        self.rows = rows
+
+    def mappings(self) -> List[dict]:
+        return self.rows
+
+
+class FakeSession:
+    """Serves the outbox rows and records what the sync does with the transaction."""
+
+    def __init__(self, outbox_rows: List[dict]):
+        self.outbox_rows = outbox_rows
+        self.deleted_outbox_ids: List[int] = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def execute(self, statement, params: dict) -> FakeResult:
+        if str(statement) == DELETE_OUTBOX_CHANGES_SQL:
+            self.deleted_outbox_ids.extend(params["ids"])
+            return FakeResult([])
+        return FakeResult(self.outbox_rows[: params["limit"]])
+
+    def query(self, *entities) -> FakeQuery:
+        # nothing is left in postgres, as if every affected entity had been deleted
+        return FakeQuery([])
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class FakeRootskiDBService:
+    def __init__(self, words_data: Dict[int, dict]):
+        self.words_data = words_data
+
+    def fetch_words_data(self, word_ids: List[int], raise_errors: bool = False) -> Dict[int, dict]:
+        return {word_id: self.words_data[word_id] for word_id in word_ids if word_id in self.words_data}
+
+
+@pytest.fixture
+def table(monkeypatch):
+    monkeypatch.setitem(os.environ, "AWS_DEFAULT_REGION", "us-west-2")
+    monkeypatch.delenv("AWS_PROFILE", raising=False)
+    with mock_dynamodb():
+        monkeypatch.setattr(loader, "get_rootski_dynamo_client", lambda: boto3.client("dynamodb"))
+        boto3.client("dynamodb").create_table(
+            TableName=TABLE_NAME,
+            KeySchema=[{"AttributeName": "pk", "KeyType": "HASH"}, {"AttributeName": "sk", "KeyType": "RANGE"}],
+            AttributeDefinitions=[
+                {"AttributeName": "pk", "AttributeType": "S"},
+                {"AttributeName": "sk", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        yield boto3.resource("dynamodb").Table(TABLE_NAME)
+
+
+def put_items(table, keys: List[dict]):
+    with table.batch_writer() as batch_writer:
+        for key in keys:
+            batch_writer.put_item(Item={**key, "data": "stale"})
+
+
+def get_keys(table) -> set:
+    return {get_item_key(item) for item in table.scan()["Items"]}
+
+
+def make_dynamo_sync(table, session: FakeSession, words_data: Dict[int, dict] = None) -> "sync.DynamoSync":
+    return sync.DynamoSync(
+        session=session,
+        db=FakeRootskiDBService(words_data=words_data or {}),
+        table=table,
+        loader=DynamoBulkLoader(table_name=TABLE_NAME, max_attempts=1),
+    )
+
+
+FAMILY_KEYS = [
+    {"pk": morpheme.make_pk(family_id="8"), "sk": morpheme.make_pk(family_id="8")},
+    morpheme.make_keys(family_id="8", morpheme_id="80"),
+    morpheme.make_keys(family_id="8", morpheme_id="81"),
+]
+# maintained by the morpheme family words ETL rather than the sync
+FAMILY_WORDS_CHUNK_KEYS = MorphemeFamilyWordsChunk(family_id="8", chunk_index=0, total_words=0, words=[]).keys
+
+
+def test__sync_plan__replace_stale_items():
+    plan = sync.SyncPlan()
+    plan.replace_stale_items(
+        items=[{"pk": "WORD#1", "sk": "BREAKDOWN", "v": 1}],
+        existing_keys=[{"pk": "WORD#1", "sk": "BREAKDOWN"}, {"pk": "WORD#1", "sk": "BREAKDOWN_ITEM#3#0"}],
+    )
+
+    assert plan.items == [{"pk": "WORD#1", "sk": "BREAKDOWN", "v": 1}]
+    assert plan.deleted_keys == [{"pk": "WORD#1", "sk": "BREAKDOWN_ITEM#3#0"}]
+
+
+def test__query_keys(table):
+    keys = [{"pk": "WORD#1", "sk": f"BREAKDOWN_ITEM#3#{position}"} for position in range(30)]
+    put_items(table, keys + [{"pk": "WORD#2", "sk": "WORD#2"}])
+
+    assert sorted(sync.query_keys(table, pk="WORD#1"), key=get_item_key) == sorted(keys, key=get_item_key)
+
+
+def test__make_sync_plan__deletes_the_items_of_deleted_words(table):
+    dynamo_sync = make_dynamo_sync(table, FakeSession(outbox_rows=[]))
+
+    plan = dynamo_sync.make_sync_plan(AffectedEntities(word_ids={1}, search_words={"бежать"}))
+
+    assert plan.items == []
+    assert plan.deleted_keys == [word.make_keys(word_id="1"), word_for_search.make_keys(word="бежать")]
+
+
+def test__make_sync_plan__deletes_stale_breakdown_items(table):
+    breakdown_keys = [
+        breakdown.make_keys(word_id="4"),
+        breakdown_item.make_keys(word_id="4", morpheme_family_id="8", position=0),
+    ]
+    # the Word item is in the same partition, but isn't part of the breakdown
+    put_items(table, breakdown_keys + [word.make_keys(word_id="4")])
+    dynamo_sync = make_dynamo_sync(table, FakeSession(outbox_rows=[]))
+
+    plan = dynamo_sync.make_sync_plan(AffectedEntities(breakdown_word_ids={4}))
+
+    assert sorted(plan.deleted_keys, key=get_item_key) == sorted(breakdown_keys, key=get_item_key)
+
+
+def test__make_sync_plan__keeps_the_morpheme_family_words_index(table):
+    put_items(table, FAMILY_KEYS + [FAMILY_WORDS_CHUNK_KEYS])
+    dynamo_sync = make_dynamo_sync(table, FakeSession(outbox_rows=[]))
+
+    plan = dynamo_sync.make_sync_plan(AffectedEntities(family_ids={8}))
+
+    assert sorted(plan.deleted_keys, key=get_item_key) == sorted(FAMILY_KEYS, key=get_item_key)
+
+
+def test__sync_once(table):
+    put_items(table, FAMILY_KEYS + [FAMILY_WORDS_CHUNK_KEYS])
+    session = FakeSession(
+        outbox_rows=[
+            {
+                "id": 1,
+                "table_name": "morpheme_families",
+                "operation": "DELETE",
+                "old_row": {"id": 8},
+                "new_row": None,
+            },
+            {
+                "id": 2,
+                "table_name": "users",
+                "operation": "INSERT",
+                "old_row": None,
+                "new_row": {"email": "a@b.c"},
+            },
+        ]
+    )
+
+    num_changes: int = make_dynamo_sync(table, session).sync_once()
+
+    assert num_changes == 2
+    assert get_keys(table) == {get_item_key(FAMILY_WORDS_CHUNK_KEYS), get_item_key(data_version.make_keys())}
+    assert session.deleted_outbox_ids == [1, 2]
+    assert (session.commits, session.rollbacks) == (1, 0)
+
+
+def test__sync_once__rebuilds_the_word_of_a_changed_conjugation(table):
+    put_items(table, [word.make_keys(word_id="5")])
+    session = FakeSession(
+        outbox_rows=[
+            {
+                "id": 1,
+                "table_name": "conjugations",
+                "operation": "UPDATE",
+                "old_row": {"word_id": 5, "past_m": "делал"},
+                "new_row": {"word_id": 5, "past_m": "де'лал"},
+            }
+        ]
+    )
+    words_data = {
+        5: {
+            "word": {"word_id": 5, "word": "делать", "accent": "де'лать", "pos": "verb", "frequency": 20},
+            "conjugations": {"aspect": "impf", "past_m": "де'лал"},
+        }
+    }
+
+    assert make_dynamo_sync(table, session, words_data=words_data).sync_once() == 1
+
+    item: dict = table.get_item(Key=word.make_keys(word_id="5"))["Item"]
+    assert item["conjugations"] == {"aspect": "impf", "past_m": "де'лал"}
+    assert session.deleted_outbox_ids == [1]
+
+
+def test__sync_once__bumps_the_data_version_after_changing_items(table):
+    def make_session() -> FakeSession:
+        outbox_row = {"id": 1, "table_name": "morpheme_families", "operation": "DELETE", "old_row": {"id": 8}}
+        return FakeSession(outbox_rows=[{**outbox_row, "new_row": None}])
+
+    put_items(table, FAMILY_KEYS)
+    make_dynamo_sync(table, make_session()).sync_once()
+    first_version: str = table.get_item(Key=data_version.make_keys())["Item"]["version"]
+
+    put_items(table, FAMILY_KEYS)
+    make_dynamo_sync(table, make_session()).sync_once()
+    second_version: str = table.get_item(Key=data_version.make_keys())["Item"]["version"]
+
+    assert first_version != second_version
+
+
+def test__sync_once__keeps_the_data_version_if_no_items_changed(table):
+    session = FakeSession(
+        outbox_rows=[{"id": 1, "table_name": "users", "operation": "INSERT", "old_row": None, "new_row": {}}]
+    )
+
+    assert make_dynamo_sync(table, session).sync_once() == 1
+    assert "Item" not in table.get_item(Key=data_version.make_keys())
+
+
+def test__sync_once__empty_outbox(table):
+    session = FakeSession(outbox_rows=[])
+
+    assert make_dynamo_sync(table, session).sync_once() == 0
+    assert (session.commits, session.rollbacks) == (0, 1)
+
+
+def test__sync_once__keeps_the_changes_if_dynamo_fails(table, monkeypatch):
+    put_items(table, FAMILY_KEYS)
+    session = FakeSession(
+        outbox_rows=[
+            {
+                "id": 1,
+                "table_name": "morpheme_families",
+                "operation": "DELETE",
+                "old_row": {"id": 8},
+                "new_row": None,
+            }
+        ]
+    )
+    dynamo_sync = make_dynamo_sync(table, session)
+
+    def fail(keys: List[dict]) -> int:
+        raise UnprocessedItemsError(unprocessed_items=keys)
+
+    monkeypatch.setattr(dynamo_sync.loader, "delete_items", fail)
+    with pytest.raises(UnprocessedItemsError):
+        dynamo_sync.sync_once()
+
+    # the changes are still in the outbox, so the next sync retries them
+    assert session.deleted_outbox_ids == []
+    assert (session.commits, session.rollbacks) == (0, 1)
+    assert get_keys(table) == {get_item_key(key) for key in FAMILY_KEYS}
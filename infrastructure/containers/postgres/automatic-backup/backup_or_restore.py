@@ -1,13 +1,23 @@
+import gzip
+import hashlib
+import json
 import os
+import re
+import shutil
 import subprocess
 import sys
+import threading
 import time
-from datetime import datetime
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
 from textwrap import dedent
-from typing import List, Union
+from typing import IO, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Set, Union
 
 import boto3
 from botocore.client import BaseClient
+from botocore.exceptions import ClientError
 
 #####################
 # --- Constants --- #
@@ -20,16 +30,50 @@ AWS_SECRET_ACCESS_KEY = os.environ["AWS_SECRET_ACCESS_KEY"]
 BACKUP_BUCKET = os.environ["BACKUP_BUCKET"]
 BACKUP_DIR = os.environ["BACKUP_DIR"]
 BACKUP_INTERVAL = os.environ["BACKUP_INTERVAL"]
-# Postgres connection string
-CONNECTION_STRING = "postgresql://{username}:{password}@{host}:{port}/{database}".format(
+# Postgres connection strings; append "/<database>" to SERVER_CONNECTION_STRING to connect to another database
+SERVER_CONNECTION_STRING = "postgresql://{username}:{password}@{host}:{port}".format(
     username=os.environ["POSTGRES_USER"],
     password=os.environ["POSTGRES_PASSWORD"],
     host=os.environ["POSTGRES_HOST"],
     port=os.environ["POSTGRES_PORT"],
-    database=os.environ["POSTGRES_DB"],
 )
+CONNECTION_STRING = SERVER_CONNECTION_STRING + "/" + os.environ["POSTGRES_DB"]
+# "stream" pipes the dump straight into S3, "file" writes it to BACKUP_DIR before uploading it,
+# "directory" dumps each database in parallel with pg_dump's directory format,
+# "dedup" only uploads the chunks of the dump that aren't in S3 from earlier backups yet
+BACKUP_MODE = os.environ.get("BACKUP_MODE", "stream")
+BACKUP_MODES = ("stream", "file", "directory", "dedup")
+INVALID_BACKUP_MODE_MSG = "BACKUP_MODE must be one of {modes}, got {mode!r}"
 # Format for backup filenames
 FILENAME_DATETIME_FORMAT = "rootski-db-%m-%d-%Y_%Hh-%Mm-%Ss.sql.gz"
+# Format for the S3 prefix of directory format backups
+DIRECTORY_BACKUP_DATETIME_FORMAT = "rootski-db-%m-%d-%Y_%Hh-%Mm-%Ss.dir"
+GLOBALS_FNAME = "globals.sql"
+# Format for the manifests of deduplicated backups, which list the chunks under CHUNKS_PREFIX
+DEDUP_MANIFEST_DATETIME_FORMAT = "rootski-db-%m-%d-%Y_%Hh-%Mm-%Ss.manifest.json"
+CHUNKS_PREFIX = "chunks"
+# Backups are stored under BACKUPS_PREFIX/<year>/<month>/<day>/ and the most recent one is recorded in
+# LATEST_INDEX_KEY, so that restores don't need to list the bucket
+BACKUPS_PREFIX = "backups"
+LATEST_INDEX_KEY = "latest.json"
+# Backups from days more than this many days ago are deleted after each backup; 0 keeps every backup
+BACKUP_RETENTION_DAYS = int(os.environ.get("BACKUP_RETENTION_DAYS", 0))
+# A chunk ends after a line whose CRC32 has its low bits unset, once the chunk is at least
+# MIN_CHUNK_BYTES long; with ~100 byte lines this averages about 1 MiB per chunk
+MIN_CHUNK_BYTES = 256 * 2**10
+MAX_CHUNK_BYTES = 8 * 2**20
+CHUNK_BOUNDARY_MASK = 2**13 - 1
+# S3 requires every part of a multipart upload but the last to be at least 5 MiB
+MULTIPART_PART_SIZE_BYTES = int(os.environ.get("MULTIPART_PART_SIZE_BYTES", 16 * 2**20))
+MAX_CONCURRENT_PART_UPLOADS = int(os.environ.get("MAX_CONCURRENT_PART_UPLOADS", 4))
+# Parallelism of pg_dump/pg_restore and of the S3 transfers of directory format backups
+BACKUP_JOBS = int(os.environ.get("BACKUP_JOBS", os.cpu_count() or 1))
+MAX_CONCURRENT_FILE_TRANSFERS = int(os.environ.get("MAX_CONCURRENT_FILE_TRANSFERS", 8))
+
+# A pg_dumpall dump creates every role and database, including the role psql is connected
+# as and the database recreated before the restore, so psql can't run it with ON_ERROR_STOP.
+# These errors are expected; any other error fails the restore.
+EXPECTED_RESTORE_ERROR_PATTERN = re.compile(r'ERROR:\s+(role|database) ".*" already exists')
 
 ############################
 # --- Helper Functions --- #
@@ -44,6 +88,18 @@ class InvalidBackupIntervalError(Exception):
     """Raised when the specified backup interval cannot be parsed onto a timedelta object."""
 
 
+class InvalidBackupModeError(Exception):
+    """Raised when BACKUP_MODE is not one of BACKUP_MODES."""
+
+
+class BackupCommandFailedError(Exception):
+    """Raised when a command producing a backup exits with a non-zero status."""
+
+
+class CorruptedBackupChunkError(Exception):
+    """Raised when a downloaded chunk of a deduplicated backup doesn't match its hash."""
+
+
 def parse_time_str(time_str: str) -> int:
     """Parse strings of the form "1d 12h" or "1h 30m" or "70s" into seconds.
 
@@ -74,32 +130,56 @@ def run_shell_command(command: str, env_vars: dict):
     print(output.decode("utf-8"))
 
 
+def get_pg_env_vars() -> Dict[str, str]:
+    """Return the environment for postgres cli commands, with the password set so they don't prompt for it."""
+    return {**os.environ, "PGPASSWORD": os.environ["POSTGRES_PASSWORD"]}
+
+
+def make_compress_cmd() -> List[str]:
+    """Return a command compressing stdin to stdout; ``pigz`` compresses on every core if it is installed."""
+    if shutil.which("pigz"):
+        return ["pigz", "--stdout", "--processes", str(os.cpu_count() or 1)]
+    return ["gzip", "--stdout"]
+
+
 ###################
 # --- Backup  --- #
 ###################
 
 
-def make_backup_object_name_from_datetime() -> str:
+def make_backup_object_name_from_datetime(created_at: Optional[datetime] = None) -> str:
     """Return a string using the format specified by the FILENAME_DATETIME_FORMAT.
 
     This FILENAME_DATE_FORMAT is a global variable and the returned string will
     be used as the filename of the backups.
 
+    :param created_at: the time of the backup, defaults to now
+
     :return: the string to be used for the backup file name
     """
-    return datetime.now().strftime(FILENAME_DATETIME_FORMAT)
+    return (created_at or datetime.now()).strftime(FILENAME_DATETIME_FORMAT)
+
+
+def make_backup_key(backup_name: str, created_at: datetime) -> str:
+    """Return the S3 key for ``backup_name`` in the date partition of ``created_at``.
+
+    :return: a key like ``backups/2022/01/31/<backup_name>``
+    """
+    return "{prefix}/{date}/{backup_name}".format(
+        prefix=BACKUPS_PREFIX, date=created_at.strftime("%Y/%m/%d"), backup_name=backup_name
+    )
 
 
 def make_backup_fpath(object_name: str) -> str:
     """Prepend the backup path to give a filepath for the object.
 
-    :param object_name: the name of an object to which the BACKUP_DIR
-        global variable should be prepended
+    :param object_name: the name (or the date partitioned S3 key) of an object to which the
+        BACKUP_DIR global variable should be prepended
 
     :return: returns a filepath for the 'object_name' file in the
         BACKUP_DIR directory
     """
-    return "{backup_dir}/{object_name}".format(backup_dir=BACKUP_DIR, object_name=object_name)
+    return "{backup_dir}/{object_name}".format(backup_dir=BACKUP_DIR, object_name=os.path.basename(object_name))
 
 
 def create_s3_session() -> boto3.session.Session:
@@ -186,14 +266,601 @@ def upload_backup_to_s3_and_delete(backup_object_fpath: str, backup_object_name:
     delete_local_backup_file(backup_fpath=backup_object_fpath)
 
 
+def upload_stream_to_s3(
+    s3_client: BaseClient,
+    stream: IO[bytes],
+    backup_bucket_name: str,
+    backup_object_name: str,
+    part_size_bytes: int = MULTIPART_PART_SIZE_BYTES,
+    max_concurrent_part_uploads: int = MAX_CONCURRENT_PART_UPLOADS,
+    on_stream_end: Optional[Callable[[], None]] = None,
+) -> int:
+    """Upload everything read from ``stream`` to S3 with a multipart upload.
+
+    Parts are uploaded concurrently while the next ones are read. At most
+    ``max_concurrent_part_uploads`` parts are held in memory waiting to be uploaded, so
+    reading from the stream blocks while S3 is the bottleneck. If anything fails, the
+    multipart upload is aborted so that S3 doesn't keep (and bill for) the parts.
+
+    :param s3_client: an S3 client to use to upload the parts
+    :param stream: a binary stream, e.g. the stdout of a process, read until it is exhausted
+    :param backup_bucket_name: the S3 bucket to upload the object to
+    :param backup_object_name: the key of the uploaded object in S3
+    :param part_size_bytes: the size of every part but the last one; at least 5 MiB
+    :param max_concurrent_part_uploads: the number of parts uploaded at the same time
+    :param on_stream_end: called once the stream is exhausted and before the upload is
+        completed; raising an exception in it aborts the upload
+
+    :return: the number of bytes uploaded
+    """
+    upload_id: str = s3_client.create_multipart_upload(Bucket=backup_bucket_name, Key=backup_object_name)[
+        "UploadId"
+    ]
+    upload_slots = threading.BoundedSemaphore(max_concurrent_part_uploads)
+
+    def upload_part(part_number: int, body: bytes) -> dict:
+        try:
+            response = s3_client.upload_part(
+                Bucket=backup_bucket_name,
+                Key=backup_object_name,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                Body=body,
+            )
+            return {"PartNumber": part_number, "ETag": response["ETag"]}
+        finally:
+            upload_slots.release()
+
+    num_bytes = 0
+    futures: List[Future] = []
+    try:
+        with ThreadPoolExecutor(max_workers=max_concurrent_part_uploads) as executor:
+            part_number = 1
+            while True:
+                body: bytes = read_part(stream, part_size_bytes)
+                # S3 needs at least one part, even for an empty stream
+                if not body and part_number > 1:
+                    break
+                upload_slots.acquire()
+                # stop reading the stream as soon as a part failed to upload
+                raise_first_error(futures)
+                futures.append(executor.submit(upload_part, part_number, body))
+                num_bytes += len(body)
+                part_number += 1
+                if len(body) < part_size_bytes:
+                    break
+            parts: List[dict] = [future.result() for future in futures]
+
+        if on_stream_end is not None:
+            on_stream_end()
+        s3_client.complete_multipart_upload(
+            Bucket=backup_bucket_name,
+            Key=backup_object_name,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": parts},
+        )
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        s3_client.abort_multipart_upload(Bucket=backup_bucket_name, Key=backup_object_name, UploadId=upload_id)
+        raise
+
+    return num_bytes
+
+
+def raise_first_error(futures: Iterable[Future]):
+    """Re-raise the exception of the first of ``futures`` that failed, if any has."""
+    for future in futures:
+        if future.done() and future.exception() is not None:
+            future.result()
+
+
+def read_part(stream: IO[bytes], part_size_bytes: int) -> bytes:
+    """Read ``part_size_bytes`` from ``stream``, or fewer only if the stream is exhausted.
+
+    A single ``read()`` on a pipe returns as soon as *some* bytes are available.
+    """
+    chunks: List[bytes] = []
+    num_bytes = 0
+    while num_bytes < part_size_bytes:
+        chunk: bytes = stream.read(part_size_bytes - num_bytes)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        num_bytes += len(chunk)
+    return b"".join(chunks)
+
+
+def stream_command_output_to_s3(
+    s3_client: BaseClient,
+    command: List[str],
+    backup_bucket_name: str,
+    backup_object_name: str,
+    env_vars: Optional[Dict[str, str]] = None,
+) -> int:
+    """Compress the stdout of ``command`` and upload it to S3 as it is produced.
+
+    The upload is only completed if both ``command`` and the compressor succeed.
+
+    :return: the number of compressed bytes uploaded
+    """
+    produce_process = subprocess.Popen(command, stdout=subprocess.PIPE, env=env_vars)
+    compress_process = subprocess.Popen(
+        make_compress_cmd(), stdin=produce_process.stdout, stdout=subprocess.PIPE
+    )
+    # only the compressor should hold the read end of the pipe, so that it sees EOF
+    produce_process.stdout.close()
+
+    def check_processes_succeeded():
+        for process in (produce_process, compress_process):
+            if process.wait() != 0:
+                raise BackupCommandFailedError(
+                    "{cmd} exited with status {status}".format(cmd=process.args[0], status=process.returncode)
+                )
+
+    try:
+        return upload_stream_to_s3(
+            s3_client=s3_client,
+            stream=compress_process.stdout,
+            backup_bucket_name=backup_bucket_name,
+            backup_object_name=backup_object_name,
+            on_stream_end=check_processes_succeeded,
+        )
+    finally:
+        for process in (produce_process, compress_process):
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+        compress_process.stdout.close()
+
+
+def stream_backup_to_s3(backup_object_name: str):
+    """Pipe ``pg_dumpall`` through a compressor straight into S3, without writing the backup to disk.
+
+    :param backup_object_name: the name to be used for the backup file in S3
+    """
+    print("Streaming a backup of the database as", backup_object_name, "to S3")
+    start_time = time.perf_counter()
+    num_bytes = stream_command_output_to_s3(
+        s3_client=create_s3_client(),
+        command=["pg_dumpall", "--dbname", CONNECTION_STRING],
+        backup_bucket_name=BACKUP_BUCKET,
+        backup_object_name=backup_object_name,
+        env_vars=get_pg_env_vars(),
+    )
+    seconds = time.perf_counter() - start_time
+    print(
+        "Uploaded {mib:.1f} MiB in {seconds:.1f}s ({throughput:.1f} MiB/s)".format(
+            mib=num_bytes / 2**20, seconds=seconds, throughput=num_bytes / 2**20 / max(seconds, 1e-9)
+        )
+    )
+
+
+def list_databases() -> List[str]:
+    """Return the names of the databases on the server, leaving out the templates and the ``postgres`` database."""
+    query = "SELECT datname FROM pg_database WHERE NOT datistemplate AND datname <> 'postgres' ORDER BY datname"
+    output = subprocess.run(
+        ["psql", "--dbname", CONNECTION_STRING, "--tuples-only", "--no-align", "--command", query],
+        stdout=subprocess.PIPE,
+        env=get_pg_env_vars(),
+        check=True,
+    ).stdout
+    return output.decode("utf-8").split()
+
+
+def dump_databases_to_directory(backup_dir: str, jobs: int = BACKUP_JOBS):
+    """Dump the roles and tablespaces, and each database with ``jobs`` parallel ``pg_dump`` workers.
+
+    The layout of ``backup_dir`` is::
+
+        globals.sql     # pg_dumpall --globals-only
+        <database>/     # pg_dump --format=directory, one compressed file per table
+
+    :param backup_dir: the directory to write the backup to; it must not exist yet
+    :param jobs: the number of tables of a database dumped at the same time
+    """
+    os.makedirs(backup_dir)
+    pg_env_vars = get_pg_env_vars()
+    subprocess.run(
+        [
+            "pg_dumpall",
+            "--globals-only",
+            "--dbname",
+            CONNECTION_STRING,
+            "--file",
+            os.path.join(backup_dir, GLOBALS_FNAME),
+        ],
+        env=pg_env_vars,
+        check=True,
+    )
+    for database in list_databases():
+        print("Dumping database", database, "with", jobs, "jobs")
+        subprocess.run(
+            [
+                "pg_dump",
+                "--format=directory",
+                "--jobs={jobs}".format(jobs=jobs),
+                "--file",
+                os.path.join(backup_dir, database),
+                "--dbname",
+                SERVER_CONNECTION_STRING + "/" + database,
+            ],
+            env=pg_env_vars,
+            check=True,
+        )
+
+
+def upload_directory_to_s3(
+    s3_client: BaseClient,
+    local_dir: str,
+    backup_bucket_name: str,
+    prefix: str,
+    max_concurrent_transfers: int = MAX_CONCURRENT_FILE_TRANSFERS,
+) -> int:
+    """Upload every file under ``local_dir`` to ``<prefix>/<relative path>`` in S3, several at a time.
+
+    :return: the number of bytes uploaded
+    """
+    fpaths: List[str] = [
+        os.path.join(dirpath, fname) for dirpath, _, fnames in os.walk(local_dir) for fname in fnames
+    ]
+
+    def upload_file(fpath: str):
+        key = prefix + "/" + os.path.relpath(fpath, local_dir).replace(os.sep, "/")
+        s3_client.upload_file(Filename=fpath, Bucket=backup_bucket_name, Key=key)
+
+    with ThreadPoolExecutor(max_workers=max_concurrent_transfers) as executor:
+        # list() re-raises the first failed upload
+        list(executor.map(upload_file, fpaths))
+    return sum(os.path.getsize(fpath) for fpath in fpaths)
+
+
+def directory_backup_to_s3(backup_name: str):
+    """Dump the databases in parallel to a directory in BACKUP_DIR, upload it concurrently and delete it.
+
+    :param backup_name: the S3 prefix to upload the backup under
+    """
+    backup_dir = make_backup_fpath(object_name=backup_name)
+    start_time = time.perf_counter()
+    try:
+        dump_databases_to_directory(backup_dir=backup_dir)
+        dump_seconds = time.perf_counter() - start_time
+        print("Uploading the backup to S3 under", backup_name)
+        num_bytes = upload_directory_to_s3(
+            s3_client=create_s3_client(),
+            local_dir=backup_dir,
+            backup_bucket_name=BACKUP_BUCKET,
+            prefix=backup_name,
+        )
+    finally:
+        shutil.rmtree(backup_dir, ignore_errors=True)
+    print(
+        "Dumped the databases in {dump_seconds:.1f}s and uploaded {mib:.1f} MiB in {upload_seconds:.1f}s".format(
+            dump_seconds=dump_seconds,
+            mib=num_bytes / 2**20,
+            upload_seconds=time.perf_counter() - start_time - dump_seconds,
+        )
+    )
+
+
+def iter_content_defined_chunks(
+    lines: Iterable[bytes],
+    min_chunk_bytes: int = MIN_CHUNK_BYTES,
+    max_chunk_bytes: int = MAX_CHUNK_BYTES,
+    boundary_mask: int = CHUNK_BOUNDARY_MASK,
+) -> Iterator[bytes]:
+    """Group ``lines`` into chunks whose boundaries depend on the content of the lines.
+
+    Chunks end after a line whose CRC32 has none of the ``boundary_mask`` bits set, so
+    inserting or removing rows only changes the chunks around the change: the chunks after
+    it end at the same lines as before and are identical. Fixed size chunks would all shift.
+
+    The boundaries are placed between lines rather than with a rolling hash over the
+    bytes, since the dump is SQL text with one row per line and hashing whole lines with
+    ``zlib.crc32`` keeps up with ``pg_dumpall``.
+
+    :param lines: the lines to chunk, e.g. a binary stream
+    :param min_chunk_bytes: chunks are never cut before this size, except the last one
+    :param max_chunk_bytes: chunks are cut after the line that reaches this size
+    :param boundary_mask: the CRC32 bits that must be 0 for a line to end a chunk; the
+        larger the mask, the larger the chunks
+    """
+    chunk_lines: List[bytes] = []
+    chunk_bytes = 0
+    for line in lines:
+        chunk_lines.append(line)
+        chunk_bytes += len(line)
+        if chunk_bytes >= max_chunk_bytes or (
+            chunk_bytes >= min_chunk_bytes and zlib.crc32(line) & boundary_mask == 0
+        ):
+            yield b"".join(chunk_lines)
+            chunk_lines = []
+            chunk_bytes = 0
+    if chunk_lines:
+        yield b"".join(chunk_lines)
+
+
+def make_chunk_key(chunk_hash: str) -> str:
+    """Return the S3 key of the chunk with the ``chunk_hash`` SHA-256, spread over 256 prefixes."""
+    return "{prefix}/{shard}/{chunk_hash}.gz".format(
+        prefix=CHUNKS_PREFIX, shard=chunk_hash[:2], chunk_hash=chunk_hash
+    )
+
+
+def list_chunk_hashes(s3_client: BaseClient, backup_bucket_name: str) -> Set[str]:
+    """Return the hashes of the chunks in the bucket."""
+    paginator = s3_client.get_paginator("list_objects_v2")
+    return {
+        obj["Key"].rsplit("/", 1)[-1][: -len(".gz")]
+        for page in paginator.paginate(Bucket=backup_bucket_name, Prefix=CHUNKS_PREFIX + "/")
+        for obj in page.get("Contents", [])
+    }
+
+
+def dedup_upload_stream_to_s3(
+    s3_client: BaseClient,
+    stream: IO[bytes],
+    backup_bucket_name: str,
+    manifest_name: str,
+    max_concurrent_uploads: int = MAX_CONCURRENT_FILE_TRANSFERS,
+    on_stream_end: Optional[Callable[[], None]] = None,
+) -> dict:
+    """Split ``stream`` into content defined chunks, upload the new ones and write a manifest listing all of them.
+
+    Chunks are compressed and uploaded concurrently. The manifest is only written once
+    every chunk is in S3 (and ``on_stream_end`` didn't raise), so a failed backup leaves
+    no manifest behind, only chunks that later backups can reuse.
+
+    :param s3_client: an S3 client to use to upload the chunks and the manifest
+    :param stream: a binary stream of the dump
+    :param backup_bucket_name: the S3 bucket to upload the backup to
+    :param manifest_name: the key of the manifest in S3
+    :param max_concurrent_uploads: the number of chunks compressed and uploaded at the same time
+    :param on_stream_end: called once the stream is exhausted; raising an exception in it
+        means the manifest isn't written
+
+    :return: the manifest
+    """
+    existing_chunk_hashes: Set[str] = list_chunk_hashes(
+        s3_client=s3_client, backup_bucket_name=backup_bucket_name
+    )
+    upload_slots = threading.BoundedSemaphore(max_concurrent_uploads)
+
+    def upload_chunk(chunk_hash: str, chunk: bytes) -> int:
+        try:
+            body = gzip.compress(chunk, mtime=0)
+            s3_client.put_object(Bucket=backup_bucket_name, Key=make_chunk_key(chunk_hash), Body=body)
+            return len(body)
+        finally:
+            upload_slots.release()
+
+    chunk_hashes: List[str] = []
+    num_bytes = 0
+    futures: List[Future] = []
+    with ThreadPoolExecutor(max_workers=max_concurrent_uploads) as executor:
+        for chunk in iter_content_defined_chunks(stream):
+            chunk_hash = hashlib.sha256(chunk).hexdigest()
+            chunk_hashes.append(chunk_hash)
+            num_bytes += len(chunk)
+            if chunk_hash in existing_chunk_hashes:
+                continue
+            existing_chunk_hashes.add(chunk_hash)
+            upload_slots.acquire()
+            raise_first_error(futures)
+            futures.append(executor.submit(upload_chunk, chunk_hash, chunk))
+        num_uploaded_bytes = sum(future.result() for future in futures)
+
+    if on_stream_end is not None:
+        on_stream_end()
+    manifest = {
+        "version": 1,
+        "size": num_bytes,
+        "uploaded_bytes": num_uploaded_bytes,
+        "new_chunks": len(futures),
+        "chunks": chunk_hashes,
+    }
+    s3_client.put_object(
+        Bucket=backup_bucket_name, Key=manifest_name, Body=json.dumps(manifest).encode("utf-8")
+    )
+    return manifest
+
+
+def dedup_backup_to_s3(manifest_name: str):
+    """Back up the database with ``pg_dumpall``, uploading only the chunks of the dump that changed.
+
+    The dump isn't compressed before it is chunked, since compressing it would make every
+    chunk after a change differ; each chunk is compressed on its own instead.
+
+    :param manifest_name: the key of the manifest of the backup in S3
+    """
+    print("Backing up the database as", manifest_name, "to S3, skipping unchanged chunks")
+    start_time = time.perf_counter()
+    dump_process = subprocess.Popen(
+        ["pg_dumpall", "--dbname", CONNECTION_STRING], stdout=subprocess.PIPE, env=get_pg_env_vars()
+    )
+
+    def check_dump_succeeded():
+        if dump_process.wait() != 0:
+            raise BackupCommandFailedError(
+                "pg_dumpall exited with status {status}".format(status=dump_process.returncode)
+            )
+
+    try:
+        manifest = dedup_upload_stream_to_s3(
+            s3_client=create_s3_client(),
+            stream=dump_process.stdout,
+            backup_bucket_name=BACKUP_BUCKET,
+            manifest_name=manifest_name,
+            on_stream_end=check_dump_succeeded,
+        )
+    finally:
+        if dump_process.poll() is None:
+            dump_process.kill()
+        dump_process.wait()
+        dump_process.stdout.close()
+
+    seconds = time.perf_counter() - start_time
+    print(
+        "Backed up {mib:.1f} MiB in {seconds:.1f}s ({throughput:.1f} MiB/s): uploaded {new_chunks} of {chunks} "
+        "chunks ({uploaded_mib:.1f} MiB compressed)".format(
+            mib=manifest["size"] / 2**20,
+            seconds=seconds,
+            throughput=manifest["size"] / 2**20 / max(seconds, 1e-9),
+            new_chunks=manifest["new_chunks"],
+            chunks=len(manifest["chunks"]),
+            uploaded_mib=manifest["uploaded_bytes"] / 2**20,
+        )
+    )
+
+
+def validate_backup_mode(mode: str):
+    """Raise an InvalidBackupModeError if ``mode`` is not one of BACKUP_MODES."""
+    if mode not in BACKUP_MODES:
+        raise InvalidBackupModeError(INVALID_BACKUP_MODE_MSG.format(modes=", ".join(BACKUP_MODES), mode=mode))
+
+
 def backup_database_to_s3():
-    """Back up the database to S3 repeatedly on an interval."""
-    s3_backup_object_name = make_backup_object_name_from_datetime()
-    backup_object_to_upload_fpath = make_backup_fpath(object_name=s3_backup_object_name)
-    backup_database(backup_object_fpath=backup_object_to_upload_fpath)
-    upload_backup_to_s3_and_delete(
-        backup_object_fpath=backup_object_to_upload_fpath, backup_object_name=s3_backup_object_name
+    """Back up the database to S3 using the BACKUP_MODE strategy.
+
+    Once the backup is uploaded, it is recorded in the LATEST_INDEX_KEY index, and
+    backups older than BACKUP_RETENTION_DAYS are deleted.
+    """
+    created_at = datetime.now()
+    if BACKUP_MODE == "dedup":
+        backup_key = make_backup_key(created_at.strftime(DEDUP_MANIFEST_DATETIME_FORMAT), created_at=created_at)
+        dedup_backup_to_s3(manifest_name=backup_key)
+    elif BACKUP_MODE == "directory":
+        backup_key = make_backup_key(
+            created_at.strftime(DIRECTORY_BACKUP_DATETIME_FORMAT), created_at=created_at
+        )
+        directory_backup_to_s3(backup_name=backup_key)
+    elif BACKUP_MODE == "stream":
+        backup_key = make_backup_key(make_backup_object_name_from_datetime(created_at), created_at=created_at)
+        stream_backup_to_s3(backup_object_name=backup_key)
+    elif BACKUP_MODE == "file":
+        backup_key = make_backup_key(make_backup_object_name_from_datetime(created_at), created_at=created_at)
+        backup_object_to_upload_fpath = make_backup_fpath(object_name=backup_key)
+        backup_database(backup_object_fpath=backup_object_to_upload_fpath)
+        upload_backup_to_s3_and_delete(
+            backup_object_fpath=backup_object_to_upload_fpath, backup_object_name=backup_key
+        )
+    else:
+        raise InvalidBackupModeError(
+            INVALID_BACKUP_MODE_MSG.format(modes=", ".join(BACKUP_MODES), mode=BACKUP_MODE)
+        )
+
+    s3_client = create_s3_client()
+    write_latest_backup_index(
+        s3_client=s3_client,
+        backup_bucket_name=BACKUP_BUCKET,
+        backup_key=backup_key,
+        mode=BACKUP_MODE,
+        created_at=created_at,
+    )
+    if BACKUP_RETENTION_DAYS > 0:
+        prune_backups(
+            s3_client=s3_client,
+            backup_bucket_name=BACKUP_BUCKET,
+            expire_before=created_at - timedelta(days=BACKUP_RETENTION_DAYS),
+        )
+
+
+def write_latest_backup_index(
+    s3_client: BaseClient, backup_bucket_name: str, backup_key: str, mode: str, created_at: datetime
+):
+    """Record ``backup_key`` as the most recent backup in the LATEST_INDEX_KEY object.
+
+    :param backup_key: the key of the backup, or its prefix for a directory backup
+    :param mode: the BACKUP_MODE the backup was made with
+    """
+    index = {"key": backup_key, "mode": mode, "created_at": created_at.isoformat()}
+    s3_client.put_object(
+        Bucket=backup_bucket_name,
+        Key=LATEST_INDEX_KEY,
+        Body=json.dumps(index).encode("utf-8"),
+        ContentType="application/json",
+    )
+
+
+def delete_keys(s3_client: BaseClient, backup_bucket_name: str, keys: List[str]):
+    """Delete ``keys`` with as few requests as possible; ``delete_objects`` takes up to 1000 keys."""
+    for start in range(0, len(keys), 1000):
+        s3_client.delete_objects(
+            Bucket=backup_bucket_name,
+            Delete={"Objects": [{"Key": key} for key in keys[start : start + 1000]], "Quiet": True},
+        )
+
+
+def get_partition_date(key: str) -> Optional[datetime]:
+    """Return the date of the ``backups/<year>/<month>/<day>/`` partition ``key`` is in, if it is in one."""
+    parts = key.split("/")
+    if len(parts) < 5 or parts[0] != BACKUPS_PREFIX:
+        return None
+    try:
+        return datetime.strptime("/".join(parts[1:4]), "%Y/%m/%d")
+    except ValueError:
+        return None
+
+
+def prune_backups(s3_client: BaseClient, backup_bucket_name: str, expire_before: datetime) -> List[str]:
+    """Delete the backups in the date partitions of the days before ``expire_before``.
+
+    The backup recorded in the latest index is never deleted. If manifests of deduplicated
+    backups were deleted, the chunks no remaining manifest refers to are deleted too.
+
+    :param expire_before: backups from days before the day of this time are deleted
+
+    :return: the deleted keys
+    """
+    latest_index: Optional[dict] = read_latest_backup_index(
+        s3_client=s3_client, backup_bucket_name=backup_bucket_name
     )
+    latest_key: Optional[str] = latest_index["key"] if latest_index else None
+    cutoff = datetime(expire_before.year, expire_before.month, expire_before.day)
+
+    expired_keys: List[str] = []
+    kept_manifest_keys: List[str] = []
+    paginator = s3_client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=backup_bucket_name, Prefix=BACKUPS_PREFIX + "/"):
+        for obj in page.get("Contents", []):
+            key: str = obj["Key"]
+            partition_date = get_partition_date(key)
+            is_latest = latest_key is not None and (key == latest_key or key.startswith(latest_key + "/"))
+            if partition_date is not None and partition_date < cutoff and not is_latest:
+                expired_keys.append(key)
+            elif key.endswith(".manifest.json"):
+                kept_manifest_keys.append(key)
+
+    delete_keys(s3_client=s3_client, backup_bucket_name=backup_bucket_name, keys=expired_keys)
+    if any(key.endswith(".manifest.json") for key in expired_keys):
+        # manifests written before backups were date partitioned are in the root of the bucket
+        kept_manifest_keys.extend(
+            obj["Key"]
+            for page in paginator.paginate(Bucket=backup_bucket_name, Delimiter="/")
+            for obj in page.get("Contents", [])
+            if obj["Key"].endswith(".manifest.json")
+        )
+        referenced_chunk_hashes: Set[str] = {
+            chunk_hash
+            for manifest_key in kept_manifest_keys
+            for chunk_hash in json.loads(
+                s3_client.get_object(Bucket=backup_bucket_name, Key=manifest_key)["Body"].read()
+            )["chunks"]
+        }
+        unreferenced_chunk_keys = [
+            make_chunk_key(chunk_hash)
+            for chunk_hash in list_chunk_hashes(s3_client=s3_client, backup_bucket_name=backup_bucket_name)
+            if chunk_hash not in referenced_chunk_hashes
+        ]
+        delete_keys(s3_client=s3_client, backup_bucket_name=backup_bucket_name, keys=unreferenced_chunk_keys)
+        expired_keys.extend(unreferenced_chunk_keys)
+
+    print(
+        "Deleted {num_keys} objects of backups from before {cutoff}".format(
+            num_keys=len(expired_keys), cutoff=cutoff.date()
+        )
+    )
+    return expired_keys
 
 
 def backup_database_on_interval(seconds: Union[int, float]):
@@ -201,6 +868,8 @@ def backup_database_on_interval(seconds: Union[int, float]):
 
     :param seconds: the number of seconds to wait inbetween backups
     """
+    # fail now rather than after waiting for the first backup
+    validate_backup_mode(BACKUP_MODE)
     print("Starting rootski backup daemon. Backups will run every {seconds}".format(seconds=seconds))
     print(
         "Backup interval in seconds is derived from {interval} found in BACKUP_INTERVAL".format(
@@ -257,23 +926,107 @@ def get_datetime_from_fpath(
     return datetime.strptime(backup_object_name, datetime_format)
 
 
+def get_backup_datetime(backup_name: str) -> Optional[datetime]:
+    """Return when a backup of any mode was created, or ``None`` if the name isn't a backup's."""
+    for datetime_format in (
+        FILENAME_DATETIME_FORMAT,
+        DIRECTORY_BACKUP_DATETIME_FORMAT,
+        DEDUP_MANIFEST_DATETIME_FORMAT,
+    ):
+        try:
+            return get_datetime_from_fpath(backup_name, datetime_format=datetime_format)
+        except ValueError:
+            pass
+    return None
+
+
+def read_latest_backup_index(s3_client: BaseClient, backup_bucket_name: str) -> Optional[dict]:
+    """Return the LATEST_INDEX_KEY index written by ``write_latest_backup_index``, or ``None`` if there is none."""
+    try:
+        body: bytes = s3_client.get_object(Bucket=backup_bucket_name, Key=LATEST_INDEX_KEY)["Body"].read()
+    except ClientError as err:
+        if err.response["Error"]["Code"] == "NoSuchKey":
+            return None
+        raise
+    return json.loads(body)
+
+
+def get_backup_key_from_object_key(object_key: str) -> Optional[str]:
+    """Return the key of the backup ``object_key`` belongs to, or ``None`` if it isn't part of a backup.
+
+    This is ``object_key`` itself for a single file backup, and the prefix up to the
+    backup's name for the files of a directory backup.
+    """
+    parts = object_key.split("/")
+    for i, part in enumerate(parts):
+        if get_backup_datetime(part) is not None:
+            return "/".join(parts[: i + 1])
+    return None
+
+
 def get_most_recent_backup_object_name(session: boto3.session.Session) -> str:
-    """Return the name of the most recent backup in S3.
+    """Return the key of the most recent backup in S3.
 
-    :param session: the AWS session to be used for listing all of the files in the
-        AWS S3 bucket
+    For a directory format backup this is the prefix its files are stored under.
 
-    :return: the name of the most recent backup file in the S3 bucket
+    The backup is looked up in the LATEST_INDEX_KEY index. Buckets with only backups
+    from before the index existed are listed instead.
+
+    :param session: the AWS session to be used for reading the index, or listing all of
+        the files in the AWS S3 bucket
+
+    :return: the key of the most recent backup file in the S3 bucket
     """
-    # get a list of all the backup files
-    backup_files = list_bucket_objects(session=session, backup_bucket_name=BACKUP_BUCKET)
+    latest_index = read_latest_backup_index(s3_client=session.client("s3"), backup_bucket_name=BACKUP_BUCKET)
+    if latest_index is not None:
+        return latest_index["key"]
+
+    # get a list of all the backups; the files of a directory backup share its name as prefix
+    print("No {index} in {bucket}, listing the bucket".format(index=LATEST_INDEX_KEY, bucket=BACKUP_BUCKET))
+    backup_keys = {
+        get_backup_key_from_object_key(key)
+        for key in list_bucket_objects(session=session, backup_bucket_name=BACKUP_BUCKET)
+    } - {None}
+    if not backup_keys:
+        raise DatabaseBackupNotFoundError("No backups found in {bucket}".format(bucket=BACKUP_BUCKET))
 
     # get the most recent backup file
-    most_recent_backup_fpath = max(backup_files, key=get_datetime_from_fpath)
+    most_recent_backup_fpath = max(backup_keys, key=lambda key: get_backup_datetime(os.path.basename(key)))
 
     return most_recent_backup_fpath
 
 
+def download_directory_from_s3(
+    s3_client: BaseClient,
+    backup_bucket_name: str,
+    prefix: str,
+    local_dir: str,
+    max_concurrent_transfers: int = MAX_CONCURRENT_FILE_TRANSFERS,
+) -> int:
+    """Download every object under ``<prefix>/`` to the same relative path in ``local_dir``, several at a time.
+
+    :return: the number of bytes downloaded
+    """
+    keys_and_sizes: List[tuple] = [
+        (obj["Key"], obj["Size"])
+        for page in s3_client.get_paginator("list_objects_v2").paginate(
+            Bucket=backup_bucket_name, Prefix=prefix + "/"
+        )
+        for obj in page.get("Contents", [])
+    ]
+    if not keys_and_sizes:
+        raise DatabaseBackupNotFoundError("No backup found under {prefix}/".format(prefix=prefix))
+
+    def download_file(key: str):
+        fpath = os.path.join(local_dir, *key[len(prefix) + 1 :].split("/"))
+        os.makedirs(os.path.dirname(fpath), exist_ok=True)
+        s3_client.download_file(Bucket=backup_bucket_name, Key=key, Filename=fpath)
+
+    with ThreadPoolExecutor(max_workers=max_concurrent_transfers) as executor:
+        list(executor.map(download_file, [key for key, _ in keys_and_sizes]))
+    return sum(size for _, size in keys_and_sizes)
+
+
 def restore_database_from_most_recent_s3_backup():
     """Download the most recent S3 backup and restore the database from it.
 
@@ -284,18 +1037,25 @@ def restore_database_from_most_recent_s3_backup():
     # find the most recent backup
     session = create_s3_session()
     backup_object_name_to_restore_from = get_most_recent_backup_object_name(session=session)
+    if backup_object_name_to_restore_from.endswith(".dir"):
+        restore_databases_from_s3_directory_backup(backup_name=backup_object_name_to_restore_from)
+        return
+    if backup_object_name_to_restore_from.endswith(".manifest.json"):
+        restore_database_from_s3_dedup_backup(manifest_name=backup_object_name_to_restore_from)
+        return
 
     # download the backup
     print("Downloading backup object from S3")
+    backup_fpath = os.path.basename(backup_object_name_to_restore_from)
     download_backup_object(
         session=session,
         backup_bucket_name=BACKUP_BUCKET,
         backup_object_name=backup_object_name_to_restore_from,
-        backup_fpath=backup_object_name_to_restore_from,
+        backup_fpath=backup_fpath,
     )
 
     # restore the database from the backup
-    restore_database_from_backup(backup_to_restore_from_fpath=backup_object_name_to_restore_from)
+    restore_database_from_backup(backup_to_restore_from_fpath=backup_fpath)
 
 
 def restore_database_from_backup(backup_to_restore_from_fpath: str):
@@ -311,35 +1071,236 @@ def restore_database_from_backup(backup_to_restore_from_fpath: str):
     # this allows running cli commands against the database without manually entering the password
     pg_env_vars = {"PGPASSWORD": os.environ["POSTGRES_PASSWORD"]}
 
-    # Drop any existing $POSTGRES_DB databse
-    print("Dropping database {db_name}".format(db_name=os.environ["POSTGRES_DB"]))
-    drop_db_cmd = "dropdb --host={host} --port={port} --username={user} {db_name}".format(
+    recreate_empty_database(db_name=os.environ["POSTGRES_DB"], pg_env_vars=pg_env_vars)
+
+    # Restore the $POSTGRES_DB from the specified backup file
+    print("Restoring database from", backup_to_restore_from_fpath)
+    restore_cmd = "gunzip --keep --stdout {backup_fpath} | psql --dbname {conn_string}".format(
+        backup_fpath=backup_to_restore_from_fpath, conn_string=CONNECTION_STRING
+    )
+    print(restore_cmd)
+    run_shell_command(command=restore_cmd, env_vars=pg_env_vars)
+
+    print("Successfully restored database")
+
+
+def recreate_empty_database(db_name: str, pg_env_vars: dict):
+    """Drop the ``db_name`` database if it exists and create it again, empty.
+
+    :param db_name: the database to recreate
+    :param pg_env_vars: the environment for the postgres cli commands
+    """
+    # Drop any existing database
+    print("Dropping database {db_name}".format(db_name=db_name))
+    drop_db_cmd = "dropdb --if-exists --host={host} --port={port} --username={user} {db_name}".format(
         host=os.environ["POSTGRES_HOST"],
         port=os.environ["POSTGRES_PORT"],
         user=os.environ["POSTGRES_USER"],
-        db_name=os.environ["POSTGRES_DB"],
+        db_name=db_name,
     )
     run_shell_command(command=drop_db_cmd, env_vars=pg_env_vars)
 
-    # Create a new and empty $POSTGRES_DB database to be restored
-    print("Creating empty database {db_name}".format(db_name=os.environ["POSTGRES_DB"]))
+    # Create a new and empty database to be restored
+    print("Creating empty database {db_name}".format(db_name=db_name))
     create_db_cmd = "createdb --host={host} --port={port} --username={user} {db_name}".format(
         host=os.environ["POSTGRES_HOST"],
         port=os.environ["POSTGRES_PORT"],
         user=os.environ["POSTGRES_USER"],
-        db_name=os.environ["POSTGRES_DB"],
+        db_name=db_name,
     )
     run_shell_command(command=create_db_cmd, env_vars=pg_env_vars)
 
-    # Restore the $POSTGRES_DB from the specified backup file
-    print("Restoring database from", backup_to_restore_from_fpath)
-    restore_cmd = "gunzip --keep --stdout {backup_fpath} | psql --dbname {conn_string}".format(
-        backup_fpath=backup_to_restore_from_fpath, conn_string=CONNECTION_STRING
+
+def restore_databases_from_directory(backup_dir: str, jobs: int = BACKUP_JOBS):
+    """Restore the globals and every database of a backup made by ``dump_databases_to_directory``.
+
+    Each database is dropped, recreated and restored with ``jobs`` parallel ``pg_restore``
+    workers, which load the tables and build the indexes concurrently.
+
+    :param backup_dir: the directory containing the backup
+    :param jobs: the number of ``pg_restore`` workers per database
+    """
+    pg_env_vars = get_pg_env_vars()
+
+    # roles that already exist make psql print errors that are safe to ignore, as with pg_dumpall backups
+    print("Restoring roles and tablespaces")
+    subprocess.run(
+        ["psql", "--dbname", CONNECTION_STRING, "--file", os.path.join(backup_dir, GLOBALS_FNAME)],
+        env=pg_env_vars,
+        check=True,
     )
-    print(restore_cmd)
-    run_shell_command(command=restore_cmd, env_vars=pg_env_vars)
 
-    print("Successfully restored database")
+    databases = sorted(fname for fname in os.listdir(backup_dir) if fname != GLOBALS_FNAME)
+    for database in databases:
+        recreate_empty_database(db_name=database, pg_env_vars=pg_env_vars)
+        print("Restoring database", database, "with", jobs, "jobs")
+        subprocess.run(
+            [
+                "pg_restore",
+                "--jobs={jobs}".format(jobs=jobs),
+                "--dbname",
+                SERVER_CONNECTION_STRING + "/" + database,
+                os.path.join(backup_dir, database),
+            ],
+            env=pg_env_vars,
+            check=True,
+        )
+
+    print("Successfully restored databases", ", ".join(databases))
+
+
+def download_dedup_backup_to_stream(
+    s3_client: BaseClient,
+    backup_bucket_name: str,
+    manifest_name: str,
+    out_stream: IO[bytes],
+    max_concurrent_downloads: int = MAX_CONCURRENT_FILE_TRANSFERS,
+) -> int:
+    """Write the dump of a deduplicated backup to ``out_stream`` by downloading its chunks concurrently.
+
+    Up to ``max_concurrent_downloads`` chunks are downloaded ahead of the one being
+    written, so memory use doesn't depend on the size of the dump.
+
+    :return: the number of bytes written
+    """
+    manifest: dict = json.loads(
+        s3_client.get_object(Bucket=backup_bucket_name, Key=manifest_name)["Body"].read()
+    )
+
+    def download_chunk(chunk_hash: str) -> bytes:
+        body: bytes = s3_client.get_object(Bucket=backup_bucket_name, Key=make_chunk_key(chunk_hash))[
+            "Body"
+        ].read()
+        chunk = gzip.decompress(body)
+        if hashlib.sha256(chunk).hexdigest() != chunk_hash:
+            raise CorruptedBackupChunkError("Chunk {chunk_hash} is corrupted".format(chunk_hash=chunk_hash))
+        return chunk
+
+    num_bytes = 0
+    chunk_hashes: Iterator[str] = iter(manifest["chunks"])
+    with ThreadPoolExecutor(max_workers=max_concurrent_downloads) as executor:
+        pending: Deque[Future] = deque(
+            executor.submit(download_chunk, chunk_hash)
+            for _, chunk_hash in zip(range(max_concurrent_downloads), chunk_hashes)
+        )
+        while pending:
+            chunk: bytes = pending.popleft().result()
+            next_chunk_hash: Optional[str] = next(chunk_hashes, None)
+            if next_chunk_hash is not None:
+                pending.append(executor.submit(download_chunk, next_chunk_hash))
+            out_stream.write(chunk)
+            num_bytes += len(chunk)
+    return num_bytes
+
+
+def pipe_dedup_backup_into_command(
+    s3_client: BaseClient,
+    backup_bucket_name: str,
+    manifest_name: str,
+    command: List[str],
+    env_vars: Optional[Dict[str, str]] = None,
+) -> int:
+    """Write the dump of a deduplicated backup to the stdin of ``command`` as its chunks are downloaded.
+
+    ``command`` is killed if the download fails. Its stderr is passed through, and SQL errors
+    other than the expected ones (see :data:`EXPECTED_RESTORE_ERROR_PATTERN`) fail the restore.
+
+    :raises BackupCommandFailedError: if ``command`` exits with a non-zero status or reports unexpected errors
+    :return: the number of bytes written
+    """
+    restore_process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE, env=env_vars)
+    unexpected_errors: List[str] = []
+
+    def read_stderr():
+        for line in iter(restore_process.stderr.readline, b""):
+            decoded_line: str = line.decode(errors="replace")
+            sys.stderr.write(decoded_line)
+            if "ERROR:" in decoded_line and not EXPECTED_RESTORE_ERROR_PATTERN.search(decoded_line):
+                unexpected_errors.append(decoded_line.strip())
+
+    stderr_thread = threading.Thread(target=read_stderr, daemon=True)
+    stderr_thread.start()
+    try:
+        num_bytes = download_dedup_backup_to_stream(
+            s3_client=s3_client,
+            backup_bucket_name=backup_bucket_name,
+            manifest_name=manifest_name,
+            out_stream=restore_process.stdin,
+        )
+    except BaseException:
+        # don't let the command run (and commit) the partial dump it has been given
+        restore_process.kill()
+        raise
+    finally:
+        restore_process.stdin.close()
+        restore_process.wait()
+        stderr_thread.join()
+        restore_process.stderr.close()
+
+    if restore_process.returncode != 0:
+        raise BackupCommandFailedError(
+            "{cmd} exited with status {status}".format(cmd=command[0], status=restore_process.returncode)
+        )
+    if unexpected_errors:
+        raise BackupCommandFailedError(
+            "{cmd} reported {count} errors, the first was: {error}".format(
+                cmd=command[0], count=len(unexpected_errors), error=unexpected_errors[0]
+            )
+        )
+    return num_bytes
+
+
+def restore_database_from_s3_dedup_backup(manifest_name: str):
+    """Recreate the database and pipe the chunks of a deduplicated backup into ``psql`` as they are downloaded.
+
+    :param manifest_name: the key of the manifest of the backup in S3
+    :raises BackupCommandFailedError: if the restore fails
+    """
+    pg_env_vars = get_pg_env_vars()
+    recreate_empty_database(db_name=os.environ["POSTGRES_DB"], pg_env_vars=pg_env_vars)
+
+    print("Restoring database from", manifest_name)
+    start_time = time.perf_counter()
+    num_bytes = pipe_dedup_backup_into_command(
+        s3_client=create_s3_client(),
+        backup_bucket_name=BACKUP_BUCKET,
+        manifest_name=manifest_name,
+        command=["psql", "--dbname", CONNECTION_STRING],
+        env_vars=pg_env_vars,
+    )
+
+    print(
+        "Successfully restored database from {mib:.1f} MiB in {seconds:.1f}s".format(
+            mib=num_bytes / 2**20, seconds=time.perf_counter() - start_time
+        )
+    )
+
+
+def restore_databases_from_s3_directory_backup(backup_name: str):
+    """Download a directory format backup concurrently and restore the databases from it in parallel.
+
+    :param backup_name: the S3 prefix of the backup
+    """
+    backup_dir = make_backup_fpath(object_name=backup_name)
+    shutil.rmtree(backup_dir, ignore_errors=True)
+    try:
+        print("Downloading backup", backup_name, "from S3")
+        start_time = time.perf_counter()
+        num_bytes = download_directory_from_s3(
+            s3_client=create_s3_client(),
+            backup_bucket_name=BACKUP_BUCKET,
+            prefix=backup_name,
+            local_dir=backup_dir,
+        )
+        print(
+            "Downloaded {mib:.1f} MiB in {seconds:.1f}s".format(
+                mib=num_bytes / 2**20, seconds=time.perf_counter() - start_time
+            )
+        )
+        restore_databases_from_directory(backup_dir=backup_dir)
+    finally:
+        shutil.rmtree(backup_dir, ignore_errors=True)
+
 
 ######################
 # --- Entrypoint --- #
@@ -377,6 +1338,13 @@ def main():
                     BACKUP_INTERVAL: the interval to backup the database; can be numbered in
                         any combination of hours, minutes, and seconds as long as
                         they appear in that order (e.g. "1h30m", "70s", "2h15m")
+                    BACKUP_MODE: "stream" (default) to pipe the backup straight into S3 with
+                        a parallel multipart upload, "file" to write it to BACKUP_DIR first, or
+                        "directory" to dump each database with BACKUP_JOBS parallel pg_dump workers
+                        and upload the files concurrently (restored with parallel pg_restore), or
+                        "dedup" to upload only the chunks of the dump that earlier backups didn't have
+                    BACKUP_RETENTION_DAYS: delete the backups from more than this many days
+                        ago after each backup; 0 (default) keeps every backup
 
                     # connection details
                     POSTGRES_USER: {postgres_user}
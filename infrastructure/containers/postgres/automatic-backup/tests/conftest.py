@@ -0,0 +1,26 @@
+"""Set the environment variables ``backup_or_restore.py`` reads when it is imported."""
+
+import os
+import sys
+from pathlib import Path
+
+THIS_DIR = Path(__file__).parent
+sys.path.append(str(THIS_DIR.parent))
+
+TEST_ENV_VARS = {
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "AWS_DEFAULT_REGION": "us-west-2",
+    "BACKUP_BUCKET": "rootski-database-backups",
+    "BACKUP_DIR": "/backups",
+    "BACKUP_INTERVAL": "24h",
+    "POSTGRES_USER": "postgres",
+    "POSTGRES_PASSWORD": "postgres",
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_PORT": "5432",
+    "POSTGRES_DB": "rootski_db",
+}
+
+# if they are already set on the system, they are not overridden
+for name, value in TEST_ENV_VARS.items():
+    os.environ.setdefault(name, value)
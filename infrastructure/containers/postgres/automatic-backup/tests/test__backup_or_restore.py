@@ -0,0 +1,330 @@
+import gzip
+import io
+import os
+import time
+from datetime import datetime
+
+import boto3
+import pytest
+from botocore.config import Config
+from moto import mock_s3
+
+import backup_or_restore
+
+BUCKET = "rootski-database-backups"
+PART_SIZE_BYTES = 5 * 2**20
+
+
+@pytest.fixture
+def s3_client(monkeypatch):
+    monkeypatch.delenv("AWS_PROFILE", raising=False)
+    with mock_s3():
+        # moto doesn't decode the aws-chunked bodies newer botocore versions send with checksums
+        client = boto3.client(
+            "s3", region_name="us-west-2", config=Config(request_checksum_calculation="when_required")
+        )
+        client.create_bucket(Bucket=BUCKET, CreateBucketConfiguration={"LocationConstraint": "us-west-2"})
+        yield client
+
+
+def get_object_bytes(s3_client, key: str) -> bytes:
+    return s3_client.get_object(Bucket=BUCKET, Key=key)["Body"].read()
+
+
+@pytest.mark.parametrize("num_bytes", [0, 100, PART_SIZE_BYTES, 2 * PART_SIZE_BYTES + 1])
+def test__upload_stream_to_s3(s3_client, num_bytes: int):
+    data = os.urandom(num_bytes)
+
+    num_uploaded_bytes = backup_or_restore.upload_stream_to_s3(
+        s3_client=s3_client,
+        stream=io.BytesIO(data),
+        backup_bucket_name=BUCKET,
+        backup_object_name="backup.sql.gz",
+        part_size_bytes=PART_SIZE_BYTES,
+        max_concurrent_part_uploads=2,
+    )
+
+    assert num_uploaded_bytes == num_bytes
+    assert get_object_bytes(s3_client, "backup.sql.gz") == data
+
+
+def test__upload_stream_to_s3__aborts_upload_on_error(s3_client):
+    def fail():
+        raise backup_or_restore.BackupCommandFailedError("pg_dumpall exited with status 1")
+
+    with pytest.raises(backup_or_restore.BackupCommandFailedError):
+        backup_or_restore.upload_stream_to_s3(
+            s3_client=s3_client,
+            stream=io.BytesIO(os.urandom(PART_SIZE_BYTES + 1)),
+            backup_bucket_name=BUCKET,
+            backup_object_name="backup.sql.gz",
+            part_size_bytes=PART_SIZE_BYTES,
+            on_stream_end=fail,
+        )
+
+    assert "Contents" not in s3_client.list_objects_v2(Bucket=BUCKET)
+    assert "Uploads" not in s3_client.list_multipart_uploads(Bucket=BUCKET)
+
+
+def test__stream_command_output_to_s3(s3_client):
+    backup_or_restore.stream_command_output_to_s3(
+        s3_client=s3_client,
+        command=["echo", "CREATE TABLE words ();"],
+        backup_bucket_name=BUCKET,
+        backup_object_name="backup.sql.gz",
+    )
+
+    assert gzip.decompress(get_object_bytes(s3_client, "backup.sql.gz")) == b"CREATE TABLE words ();\n"
+
+
+def test__stream_command_output_to_s3__fails_if_command_fails(s3_client):
+    with pytest.raises(backup_or_restore.BackupCommandFailedError):
+        backup_or_restore.stream_command_output_to_s3(
+            s3_client=s3_client,
+            command=["sh", "-c", "echo partial dump; exit 1"],
+            backup_bucket_name=BUCKET,
+            backup_object_name="backup.sql.gz",
+        )
+
+    assert "Contents" not in s3_client.list_objects_v2(Bucket=BUCKET)
+
+
+def test__upload_and_download_directory(s3_client, tmp_path):
+    backup_dir = tmp_path / "backup"
+    (backup_dir / "rootski_db").mkdir(parents=True)
+    files = {
+        "globals.sql": b"CREATE ROLE rootski;",
+        "rootski_db/toc.dat": os.urandom(100),
+        "rootski_db/3000.dat.gz": os.urandom(1000),
+    }
+    for relative_fpath, data in files.items():
+        (backup_dir / relative_fpath).write_bytes(data)
+
+    num_uploaded_bytes = backup_or_restore.upload_directory_to_s3(
+        s3_client=s3_client, local_dir=str(backup_dir), backup_bucket_name=BUCKET, prefix="backup.dir"
+    )
+    num_downloaded_bytes = backup_or_restore.download_directory_from_s3(
+        s3_client=s3_client,
+        backup_bucket_name=BUCKET,
+        prefix="backup.dir",
+        local_dir=str(tmp_path / "restore"),
+    )
+
+    assert num_uploaded_bytes == num_downloaded_bytes == sum(len(data) for data in files.values())
+    for relative_fpath, data in files.items():
+        assert get_object_bytes(s3_client, "backup.dir/" + relative_fpath) == data
+        assert (tmp_path / "restore" / relative_fpath).read_bytes() == data
+
+
+def test__get_most_recent_backup_object_name__reads_latest_index(s3_client):
+    created_at = datetime(2022, 1, 3)
+    backup_key = backup_or_restore.make_backup_key(
+        "rootski-db-01-03-2022_00h-00m-00s.sql.gz", created_at=created_at
+    )
+    backup_or_restore.write_latest_backup_index(
+        s3_client=s3_client,
+        backup_bucket_name=BUCKET,
+        backup_key=backup_key,
+        mode="stream",
+        created_at=created_at,
+    )
+
+    most_recent_backup_name = backup_or_restore.get_most_recent_backup_object_name(
+        session=boto3.session.Session(region_name="us-west-2")
+    )
+
+    assert most_recent_backup_name == "backups/2022/01/03/rootski-db-01-03-2022_00h-00m-00s.sql.gz"
+
+
+def test__get_most_recent_backup_object_name__lists_bucket_without_latest_index(s3_client):
+    for key in [
+        "rootski-db-01-02-2022_00h-00m-00s.sql.gz",
+        "backups/2022/01/03/rootski-db-01-03-2022_00h-00m-00s.dir/globals.sql",
+        "backups/2022/01/03/rootski-db-01-03-2022_00h-00m-00s.dir/rootski_db/toc.dat",
+        "not-a-backup.txt",
+    ]:
+        s3_client.put_object(Bucket=BUCKET, Key=key, Body=b"")
+
+    most_recent_backup_name = backup_or_restore.get_most_recent_backup_object_name(
+        session=boto3.session.Session(region_name="us-west-2")
+    )
+
+    assert most_recent_backup_name == "backups/2022/01/03/rootski-db-01-03-2022_00h-00m-00s.dir"
+
+
+def test__prune_backups(s3_client):
+    def dedup_backup(day: int, lines: list) -> str:
+        created_at = datetime(2022, 1, day)
+        manifest_key = backup_or_restore.make_backup_key(
+            created_at.strftime(backup_or_restore.DEDUP_MANIFEST_DATETIME_FORMAT), created_at=created_at
+        )
+        backup_or_restore.dedup_upload_stream_to_s3(
+            s3_client=s3_client,
+            stream=io.BytesIO(b"".join(lines)),
+            backup_bucket_name=BUCKET,
+            manifest_name=manifest_key,
+        )
+        return manifest_key
+
+    expired_key = dedup_backup(day=1, lines=make_dump_lines(num_rows=100, first_row=0))
+    kept_key = dedup_backup(day=2, lines=make_dump_lines(num_rows=100, first_row=100))
+    latest_key = dedup_backup(day=3, lines=make_dump_lines(num_rows=100, first_row=200))
+    backup_or_restore.write_latest_backup_index(
+        s3_client=s3_client,
+        backup_bucket_name=BUCKET,
+        backup_key=latest_key,
+        mode="dedup",
+        created_at=datetime(2022, 1, 3),
+    )
+
+    deleted_keys = backup_or_restore.prune_backups(
+        s3_client=s3_client, backup_bucket_name=BUCKET, expire_before=datetime(2022, 1, 2, 12)
+    )
+
+    remaining_keys = {obj["Key"] for obj in s3_client.list_objects_v2(Bucket=BUCKET)["Contents"]}
+    assert expired_key in deleted_keys
+    assert {kept_key, latest_key, backup_or_restore.LATEST_INDEX_KEY} <= remaining_keys
+    assert len(remaining_keys) == 3 + 2  # one chunk per backup
+
+
+def test__backup_database_to_s3__rejects_unknown_backup_mode(s3_client, monkeypatch):
+    monkeypatch.setattr(backup_or_restore, "BACKUP_MODE", "streem")
+
+    with pytest.raises(backup_or_restore.InvalidBackupModeError, match="got 'streem'"):
+        backup_or_restore.backup_database_to_s3()
+    # the daemon fails right away instead of after the first interval
+    with pytest.raises(backup_or_restore.InvalidBackupModeError):
+        backup_or_restore.backup_database_on_interval(seconds=60 * 60)
+
+    # nothing was backed up, so the latest backup index wasn't written either
+    assert "Contents" not in s3_client.list_objects_v2(Bucket=BUCKET)
+
+
+def make_dump_lines(num_rows: int, first_row: int = 0) -> list:
+    return [f"{row}\tслово {row}\t{row * 7 % 13}\n".encode() for row in range(first_row, first_row + num_rows)]
+
+
+def test__iter_content_defined_chunks__resyncs_after_an_insert():
+    lines = make_dump_lines(num_rows=20_000)
+    edited_lines = lines[:10] + [b"INSERT INTO words VALUES (1);\n"] + lines[10:]
+    chunk_kwargs = dict(min_chunk_bytes=2**10, max_chunk_bytes=2**16, boundary_mask=2**5 - 1)
+
+    chunks = list(backup_or_restore.iter_content_defined_chunks(lines, **chunk_kwargs))
+    edited_chunks = list(backup_or_restore.iter_content_defined_chunks(edited_lines, **chunk_kwargs))
+
+    assert b"".join(chunks) == b"".join(lines)
+    assert len(chunks) > 10
+    assert len(set(edited_chunks) - set(chunks)) == 1
+
+
+def test__dedup_backup_round_trip(s3_client):
+    lines = make_dump_lines(num_rows=200_000)
+    first_manifest = backup_or_restore.dedup_upload_stream_to_s3(
+        s3_client=s3_client,
+        stream=io.BytesIO(b"".join(lines)),
+        backup_bucket_name=BUCKET,
+        manifest_name="first.manifest.json",
+    )
+    edited_dump = b"".join(lines + make_dump_lines(num_rows=10, first_row=200_000))
+    second_manifest = backup_or_restore.dedup_upload_stream_to_s3(
+        s3_client=s3_client,
+        stream=io.BytesIO(edited_dump),
+        backup_bucket_name=BUCKET,
+        manifest_name="second.manifest.json",
+    )
+    restored_dump = io.BytesIO()
+    num_restored_bytes = backup_or_restore.download_dedup_backup_to_stream(
+        s3_client=s3_client,
+        backup_bucket_name=BUCKET,
+        manifest_name="second.manifest.json",
+        out_stream=restored_dump,
+        max_concurrent_downloads=2,
+    )
+
+    assert first_manifest["new_chunks"] == len(set(first_manifest["chunks"])) > 1
+    assert second_manifest["new_chunks"] == 1
+    assert restored_dump.getvalue() == edited_dump
+    assert num_restored_bytes == len(edited_dump)
+
+
+def test__dedup_upload_stream_to_s3__skips_manifest_on_error(s3_client):
+    def fail():
+        raise backup_or_restore.BackupCommandFailedError("pg_dumpall exited with status 1")
+
+    with pytest.raises(backup_or_restore.BackupCommandFailedError):
+        backup_or_restore.dedup_upload_stream_to_s3(
+            s3_client=s3_client,
+            stream=io.BytesIO(b"".join(make_dump_lines(num_rows=100))),
+            backup_bucket_name=BUCKET,
+            manifest_name="backup.manifest.json",
+            on_stream_end=fail,
+        )
+
+    keys = [obj["Key"] for obj in s3_client.list_objects_v2(Bucket=BUCKET)["Contents"]]
+    assert keys and all(key.startswith(backup_or_restore.CHUNKS_PREFIX + "/") for key in keys)
+
+
+def upload_dedup_backup(s3_client, dump: bytes, manifest_name: str = "backup.manifest.json"):
+    backup_or_restore.dedup_upload_stream_to_s3(
+        s3_client=s3_client,
+        stream=io.BytesIO(dump),
+        backup_bucket_name=BUCKET,
+        manifest_name=manifest_name,
+    )
+
+
+def test__pipe_dedup_backup_into_command(s3_client, tmp_path):
+    dump = b"".join(make_dump_lines(num_rows=1000))
+    upload_dedup_backup(s3_client, dump)
+    restored_fpath = tmp_path / "restored.sql"
+
+    num_bytes = backup_or_restore.pipe_dedup_backup_into_command(
+        s3_client=s3_client,
+        backup_bucket_name=BUCKET,
+        manifest_name="backup.manifest.json",
+        # the roles and the database of a pg_dumpall dump already exist
+        command=[
+            "sh",
+            "-c",
+            """echo 'psql:<stdin>:14: ERROR:  role "postgres" already exists' >&2; cat > {fpath}""".format(
+                fpath=restored_fpath
+            ),
+        ],
+    )
+
+    assert num_bytes == len(dump)
+    assert restored_fpath.read_bytes() == dump
+
+
+@pytest.mark.parametrize(
+    "script",
+    [
+        "cat > /dev/null; exit 3",
+        """cat > /dev/null; echo 'psql:<stdin>:20: ERROR:  relation "words" does not exist' >&2""",
+    ],
+)
+def test__pipe_dedup_backup_into_command__fails_if_the_restore_fails(s3_client, script: str):
+    upload_dedup_backup(s3_client, b"".join(make_dump_lines(num_rows=100)))
+
+    with pytest.raises(backup_or_restore.BackupCommandFailedError):
+        backup_or_restore.pipe_dedup_backup_into_command(
+            s3_client=s3_client,
+            backup_bucket_name=BUCKET,
+            manifest_name="backup.manifest.json",
+            command=["sh", "-c", script],
+        )
+
+
+def test__pipe_dedup_backup_into_command__kills_the_command_if_the_download_fails(s3_client):
+    start_time = time.perf_counter()
+
+    # there is no such manifest
+    with pytest.raises(s3_client.exceptions.NoSuchKey):
+        backup_or_restore.pipe_dedup_backup_into_command(
+            s3_client=s3_client,
+            backup_bucket_name=BUCKET,
+            manifest_name="missing.manifest.json",
+            command=["sleep", "60"],
+        )
+
+    assert time.perf_counter() - start_time < 30
@@ -0,0 +1,116 @@
+"""
+Benchmark ``collapse_df`` against the ``groupby().get_group()`` implementation it replaced.
+
+The data imitates the result of ``sql_statements.DEFINITIONS``: one row per sub
+definition, with several definitions per part of speech.
+
+Usage:
+
+.. code-block:: bash
+
+    python benchmarks/benchmark__collapse_df.py --num-definitions 20000
+"""
+
+import argparse
+import timeit
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from rootski.services.database.non_orm.utils import collapse_df
+
+DEFINITIONS_COLLAPSE_KWARGS = dict(
+    groupby_col="definition_id",
+    group_cols=["definition_id", "def_position", "pos"],
+    child_cols=["sub_def_id", "sub_def_position", "definition", "notes"],
+    child_name="sub_defs",
+    grp_sort_col="def_position",
+    ch_sort_col="sub_def_position",
+)
+
+
+def legacy_collapse_df(
+    df: pd.DataFrame,
+    groupby_col,
+    group_cols,
+    child_cols,
+    child_name,
+    grp_sort_col=None,
+    grp_ascending=True,
+    ch_sort_col=None,
+    ch_ascending=True,
+):
+    """The previous implementation of ``collapse_df``, with a stable child sort so that the outputs can be compared."""
+    collapsed_rows = list()
+
+    df = df.replace({np.nan: None})
+    df = df.astype(object)
+
+    groupby = df.groupby(groupby_col)
+    groups = list(groupby.groups.keys())
+
+    for group in groups:
+        group_df = groupby.get_group(group)
+        first_row = group_df.iloc[0]
+        group_data = {col: first_row[col] for col in group_cols}
+        child_df: pd.DataFrame = group_df[list(child_cols)]
+        if ch_sort_col is not None:
+            child_df = child_df.sort_values(ch_sort_col, ascending=ch_ascending, kind="stable")
+        group_data[child_name] = child_df.to_dict(orient="records")
+        collapsed_rows.append(group_data)
+
+    if grp_sort_col:
+        collapsed_rows = sorted(collapsed_rows, key=lambda row: row[grp_sort_col], reverse=not grp_ascending)
+
+    return collapsed_rows
+
+
+def make_definitions_df(num_definitions: int, sub_defs_per_definition: int = 4, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    num_rows = num_definitions * sub_defs_per_definition
+    definition_ids = np.repeat(np.arange(num_definitions), sub_defs_per_definition)
+    df = pd.DataFrame(
+        {
+            "definition_id": definition_ids,
+            "def_position": definition_ids % 7,
+            "pos": rng.choice(["noun", "verb", "adjective"], size=num_definitions).repeat(
+                sub_defs_per_definition
+            ),
+            "sub_def_id": np.arange(num_rows),
+            "sub_def_position": rng.integers(0, 10, size=num_rows),
+            "definition": [f"definition {i}" for i in range(num_rows)],
+            "notes": np.where(rng.random(num_rows) < 0.5, None, "some notes"),
+        }
+    )
+    # shuffle the rows so that the groups aren't contiguous
+    return df.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def time_collapse(collapse: Callable, df: pd.DataFrame, repeat: int) -> float:
+    """Return the best time of ``repeat`` runs in seconds."""
+    return min(timeit.repeat(lambda: collapse(df, **DEFINITIONS_COLLAPSE_KWARGS), number=1, repeat=repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--num-definitions", type=int, nargs="+", default=[10, 1_000, 5_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'definitions':>12} {'legacy (s)':>12} {'new (s)':>12} {'speedup':>8}")
+    for num_definitions in args.num_definitions:
+        df = make_definitions_df(num_definitions=num_definitions)
+        assert collapse_df(df, **DEFINITIONS_COLLAPSE_KWARGS) == legacy_collapse_df(
+            df, **DEFINITIONS_COLLAPSE_KWARGS
+        ), "the implementations disagree"
+
+        legacy_seconds = time_collapse(legacy_collapse_df, df, repeat=args.repeat)
+        new_seconds = time_collapse(collapse_df, df, repeat=args.repeat)
+        print(
+            f"{num_definitions:>12} {legacy_seconds:>12.4f} {new_seconds:>12.4f} {legacy_seconds / new_seconds:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
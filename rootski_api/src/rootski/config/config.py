@@ -25,7 +25,7 @@ import yaml
 from pydantic import AnyHttpUrl, BaseSettings, validator
 from pydantic.dataclasses import dataclass
 from pydantic.env_settings import SettingsSourceCallable
-from rootski.config.ssm import get_ssm_parameters_by_prefix
+from rootski.config.ssm import load_ssm_parameters_by_prefix
 
 ANON_USER = "anon@rootski.io"
 ENVIRON_PREFIX: str = "ROOTSKI__"
@@ -49,9 +49,32 @@ DEFAULT_DEPLOYMENT_ENVIRONMENT = "dev"
 
 DEFAULT_DYNAMO_TABLE_NAME = "rootski-table"
 
+#: how often the Cognito JWKS is refreshed in the background (Cognito rotates keys rarely)
+DEFAULT_JWKS_REFRESH_INTERVAL_SECONDS: int = 60 * 60
+#: minimum time between JWKS refetches triggered by tokens signed with an unknown key ID
+DEFAULT_JWKS_MIN_REFETCH_INTERVAL_SECONDS: int = 60
+
+#: max number of entries in each process-wide GraphQL cache (one per cached entity type)
+DEFAULT_GRAPHQL_SHARED_CACHE_MAX_SIZE: int = 50_000
+#: entries in the process-wide GraphQL caches are refetched after this long
+DEFAULT_GRAPHQL_SHARED_CACHE_TTL_SECONDS: int = 60 * 60
+#: how often the version of the data in dynamo is read; the shared caches are cleared when it changes
+DEFAULT_GRAPHQL_SHARED_CACHE_VERSION_POLL_INTERVAL_SECONDS: int = 60
+
+#: GraphQL queries estimated to need more dynamo reads than this are rejected
+DEFAULT_GRAPHQL_MAX_DYNAMO_READS_PER_QUERY: int = 1000
+
 # maps to a string boolean
 FETCH_VALUES_FROM_SSM_ENV_VAR = f"{ENVIRON_PREFIX}FETCH_VALUES_FROM_AWS_SSM"
 
+# optional encrypted file cache for SSM parameters; these are read from environment
+# variables rather than Config attributes because they are needed to *build* the Config.
+# Generate a key with ``python -c "from cryptography.fernet import Fernet; print(Fernet.generate_key())"``
+SSM_CACHE_FPATH_ENV_VAR = f"{ENVIRON_PREFIX}SSM_CACHE_FPATH"
+SSM_CACHE_KEY_ENV_VAR = f"{ENVIRON_PREFIX}SSM_CACHE_KEY"
+SSM_CACHE_TTL_SECONDS_ENV_VAR = f"{ENVIRON_PREFIX}SSM_CACHE_TTL_SECONDS"
+DEFAULT_SSM_CACHE_TTL_SECONDS = 300
+
 
 #########################################################
 # --- Helper functions to set Rootski config values --- #
@@ -89,13 +112,22 @@ def aws_parameter_store_settings_source(settings: "Config") -> Dict[str, Any]:
 
     If a previous settings provider has set the ``fetch_values_from_ssm`` value to ``False``,
     this function will not attempt to fetch values from SSM.
+
+    The parameters are fetched at most once per process. If ``ROOTSKI__SSM_CACHE_FPATH`` and
+    ``ROOTSKI__SSM_CACHE_KEY`` are set, they are also cached in an encrypted file that expires
+    after ``ROOTSKI__SSM_CACHE_TTL_SECONDS``.
     """
     fetch_values_from_aws_ssm: bool = os.environ.get(FETCH_VALUES_FROM_SSM_ENV_VAR, "false").lower() == "true"
     if not fetch_values_from_aws_ssm:
         return {}
 
     deployment_environment = os.environ.get(DEPLOYMENT_ENVIRONMENT_ENV_VAR, DEFAULT_DEPLOYMENT_ENVIRONMENT)
-    rootski_params: Dict[str, str] = get_ssm_parameters_by_prefix(prefix=f"/rootski/{deployment_environment}/")
+    rootski_params: Dict[str, str] = load_ssm_parameters_by_prefix(
+        prefix=f"/rootski/{deployment_environment}/",
+        cache_fpath=os.environ.get(SSM_CACHE_FPATH_ENV_VAR),
+        cache_key=os.environ.get(SSM_CACHE_KEY_ENV_VAR),
+        cache_ttl_seconds=int(os.environ.get(SSM_CACHE_TTL_SECONDS_ENV_VAR, DEFAULT_SSM_CACHE_TTL_SECONDS)),
+    )
 
     to_return: Dict[str, str] = {}
     if "database_config" in rootski_params.keys():
@@ -183,10 +215,25 @@ class Config(BaseSettings):
 
     dynamo_table_name: str = DEFAULT_DYNAMO_TABLE_NAME
 
+    jwks_refresh_interval_seconds: int = DEFAULT_JWKS_REFRESH_INTERVAL_SECONDS
+    jwks_min_refetch_interval_seconds: int = DEFAULT_JWKS_MIN_REFETCH_INTERVAL_SECONDS
+
+    graphql_shared_cache_max_size: int = DEFAULT_GRAPHQL_SHARED_CACHE_MAX_SIZE
+    graphql_shared_cache_ttl_seconds: int = DEFAULT_GRAPHQL_SHARED_CACHE_TTL_SECONDS
+    graphql_shared_cache_version_poll_interval_seconds: int = (
+        DEFAULT_GRAPHQL_SHARED_CACHE_VERSION_POLL_INTERVAL_SECONDS
+    )
+    graphql_max_dynamo_reads_per_query: int = DEFAULT_GRAPHQL_MAX_DYNAMO_READS_PER_QUERY
+
     @property
     def static_morphemes_json_fpath(self) -> Path:
         return Path(self.static_assets_dir) / "morphemes.json"
 
+    @property
+    def cognito_jwks_cache_fpath(self) -> Path:
+        """File where the Cognito public keys are cached; shared by all API processes on a host."""
+        return Path(self.static_assets_dir) / "cognito-jwks.json"
+
     # TODO - uncomment these; unfortunately, as of Nov 1, 2021, pydantic does not support
     # "postgressql+psycopg2" or "postgresql+asyncpg" as schemas for the PostgresDsn. This
     # is coming in the next release, but when I installed the latest release from GitHub
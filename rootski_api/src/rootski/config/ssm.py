@@ -1,20 +1,125 @@
-from typing import Dict
+"""
+Load parameters from AWS SSM Parameter Store.
+
+Parameters are fetched at most once per process: the result is memoized by prefix,
+so constructing several :class:`rootski.config.config.Config` objects (as
+``create_default_app`` and ``__main__`` both do) costs a single round trip, and
+warm Lambda containers make none.
+
+Optionally, the parameters can also be cached in a local file so that other
+processes on the same host (e.g. gunicorn workers) skip SSM as well. Because the
+parameters contain secrets, the file is encrypted with a Fernet key and expires
+after a TTL.
+"""
+
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
 import boto3
+from cryptography.fernet import Fernet, InvalidToken
+from loguru import logger
+
+# prefix -> parameters; memoized for the lifetime of the process
+_SSM_PARAMETERS_BY_PREFIX: Dict[str, Dict[str, str]] = {}
+_SSM_PARAMETERS_LOCK = threading.Lock()
 
 
 def get_ssm_parameters_by_prefix(prefix: str) -> Dict[str, str]:
     """
     Get all SSM parameters that start with the given prefix.
 
+    ``get_parameters_by_path`` returns at most 10 parameters per call,
+    so this follows the ``NextToken`` until every page has been read.
+
     :param prefix: Fetch all parameters with this prefix.
     """
     ssm = boto3.client("ssm")
-    response = ssm.get_parameters_by_path(
+    paginator = ssm.get_paginator("get_parameters_by_path")
+    pages = paginator.paginate(
         Path=prefix,
         Recursive=True,
         WithDecryption=True,
     )
 
-    parameters = {p["Name"].split("/")[-1]: p["Value"] for p in response["Parameters"]}
+    parameters = {p["Name"].split("/")[-1]: p["Value"] for page in pages for p in page["Parameters"]}
 
     return parameters
+
+
+def load_ssm_parameters_by_prefix(
+    prefix: str,
+    cache_fpath: Optional[Path] = None,
+    cache_key: Optional[str] = None,
+    cache_ttl_seconds: int = 300,
+) -> Dict[str, str]:
+    """
+    Get all SSM parameters that start with the given prefix, using the process and file caches.
+
+    :param prefix: Fetch all parameters with this prefix.
+    :param cache_fpath: if set along with ``cache_key``, the parameters are read from (and
+        written to) this encrypted file before falling back to SSM
+    :param cache_key: Fernet key used to encrypt the cache file, see :meth:`Fernet.generate_key`
+    :param cache_ttl_seconds: the cache file is ignored once it is older than this
+    """
+    with _SSM_PARAMETERS_LOCK:
+        if prefix in _SSM_PARAMETERS_BY_PREFIX:
+            return dict(_SSM_PARAMETERS_BY_PREFIX[prefix])
+
+        use_file_cache: bool = bool(cache_fpath and cache_key)
+        parameters: Optional[Dict[str, str]] = None
+        if use_file_cache:
+            parameters = read_encrypted_cache(
+                cache_fpath=Path(cache_fpath), cache_key=cache_key, prefix=prefix, ttl_seconds=cache_ttl_seconds
+            )
+
+        if parameters is None:
+            logger.info(f"Fetching SSM parameters with prefix {prefix}")
+            parameters = get_ssm_parameters_by_prefix(prefix=prefix)
+            if use_file_cache:
+                write_encrypted_cache(
+                    cache_fpath=Path(cache_fpath), cache_key=cache_key, prefix=prefix, parameters=parameters
+                )
+
+        _SSM_PARAMETERS_BY_PREFIX[prefix] = parameters
+        return dict(parameters)
+
+
+def clear_ssm_parameter_cache():
+    """Forget the memoized parameters so that the next load hits the file cache or SSM again."""
+    with _SSM_PARAMETERS_LOCK:
+        _SSM_PARAMETERS_BY_PREFIX.clear()
+
+
+def read_encrypted_cache(
+    cache_fpath: Path, cache_key: str, prefix: str, ttl_seconds: int
+) -> Optional[Dict[str, str]]:
+    """Return the cached parameters for ``prefix``, or ``None`` if the cache is missing, expired or unreadable."""
+    try:
+        token: bytes = cache_fpath.read_bytes()
+        # Fernet tokens carry their creation timestamp, so the TTL check comes for free
+        cache: dict = json.loads(Fernet(cache_key).decrypt(token, ttl=ttl_seconds))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, InvalidToken) as e:
+        # InvalidToken covers expired caches as well as a changed key
+        logger.info(f"Ignoring SSM parameter cache at {cache_fpath}: {type(e).__name__}")
+        return None
+
+    if cache.get("prefix") != prefix:
+        return None
+    return cache["parameters"]
+
+
+def write_encrypted_cache(cache_fpath: Path, cache_key: str, prefix: str, parameters: Dict[str, str]):
+    """Encrypt and write the parameters; failing to write the cache is not an error."""
+    token: bytes = Fernet(cache_key).encrypt(json.dumps({"prefix": prefix, "parameters": parameters}).encode())
+    tmp_fpath = cache_fpath.with_name(cache_fpath.name + ".tmp")
+    try:
+        cache_fpath.parent.mkdir(parents=True, exist_ok=True)
+        tmp_fpath.write_bytes(token)
+        tmp_fpath.chmod(0o600)
+        tmp_fpath.replace(cache_fpath)
+    except OSError as e:
+        logger.warning(f"Could not write the SSM parameter cache at {cache_fpath}: {str(e)}")
@@ -1,25 +1,50 @@
 from dataclasses import dataclass
-from typing import Callable, List, Optional, TypeVar
+from typing import Awaitable, Callable, List, Optional, TypeVar
 
 from fastapi import Request
-from sqlalchemy.ext.asyncio import AsyncSession
 from strawberry.dataloader import DataLoader
+from strawberry.fastapi import BaseContext
 from strawberry.types import Info
 
 from rootski import schemas
+from rootski.gql.language.breakdown.loaders import make__breakdown_by_word_id__load_fn
+from rootski.gql.language.morpheme.loaders import make__morpheme_family_by_id__load_fn
 from rootski.gql.language.word.loaders import make__word_by_id__load_fn
+from rootski.gql.shared_cache import RootskiSharedCaches, make_shared_cache_load_fn
+from rootski.services.database.dynamo.db_service import DBService as DynamoDBService
+from rootski.services.database.dynamo.models.breakdown import Breakdown
+from rootski.services.database.dynamo.models.morpheme_family import MorphemeFamily
+
+
+TKey = TypeVar("TKey")
+TValue = TypeVar("TValue")
 
 
 @dataclass
 class RootskiDataLoaders:
-    word_by_id__loader: DataLoader[str, schemas.Word]
+    word_by_id__loader: DataLoader[str, Optional[schemas.Word]]
+    breakdown_by_word_id__loader: DataLoader[str, Optional[Breakdown]]
+    morpheme_family_by_id__loader: DataLoader[str, Optional[MorphemeFamily]]
 
 
 @dataclass
-class RootskiGraphQLContext:
+class RootskiGraphQLContext(BaseContext):
+    """
+    Request-scoped context passed to every resolver.
+
+    A new context (and therefore a new set of DataLoaders) is created for
+    every request, so the DataLoader caches never leak data between users.
+    """
+
     user: schemas.User
     request: Request
-    session: AsyncSession
+    db: DynamoDBService
+    # process-wide caches consulted before dynamo; None disables the shared tier
+    shared_caches: Optional[RootskiSharedCaches] = None
+    # queries estimated to need more dynamo reads than this are rejected, see rootski.gql.cost
+    max_dynamo_reads: Optional[int] = None
+    # number of items read from dynamo while resolving this request (DataLoaders and paginated queries)
+    dynamo_reads: int = 0
     __loaders: Optional[RootskiDataLoaders] = None
 
     @property
@@ -30,7 +55,7 @@ class RootskiGraphQLContext:
         Initializing the DataLoader instances in this way allows
         the DataLoader instances to be aware of the other
         :class:`RootskiGraphQLContext` attributes such as the
-        ``request``, ``user``, and ``session``.
+        ``request``, ``user``, and ``db``.
 
         This approach was deemed appropriate because it allows the
         DataLoaders to be able to connect to the appropriate backend
@@ -43,15 +68,52 @@ class RootskiGraphQLContext:
 
         # create the load_fn functions for the DataLoaders using
         # factory wrappers that wrap the necessary request context inside
-        load_words_by_id: Callable[[List[str]], List[schemas.Word]] = make__word_by_id__load_fn(db=self.session)
+        load_words_by_id: Callable[[List[str]], List[Optional[schemas.Word]]] = make__word_by_id__load_fn(
+            db=self.db
+        )
+        load_breakdowns_by_word_id: Callable[
+            [List[str]], List[Optional[Breakdown]]
+        ] = make__breakdown_by_word_id__load_fn(db=self.db)
+        load_morpheme_families_by_id: Callable[
+            [List[str]], List[Optional[MorphemeFamily]]
+        ] = make__morpheme_family_by_id__load_fn(db=self.db)
+
+        load_words_by_id = self._count_dynamo_reads(load_words_by_id)
+        load_breakdowns_by_word_id = self._count_dynamo_reads(load_breakdowns_by_word_id)
+        load_morpheme_families_by_id = self._count_dynamo_reads(load_morpheme_families_by_id)
 
-        # initialize the DataLoaders
-        word_by_id__loader: DataLoader[str, schemas.Word] = DataLoader(load_fn=load_words_by_id)
+        # words and morpheme families are immutable, so they can be shared between requests
+        if self.shared_caches is not None:
+            load_words_by_id = make_shared_cache_load_fn(load_words_by_id, cache=self.shared_caches.word_by_id)
+            load_morpheme_families_by_id = make_shared_cache_load_fn(
+                load_morpheme_families_by_id, cache=self.shared_caches.morpheme_family_by_id
+            )
 
-        self.__loaders = RootskiDataLoaders(word_by_id__loader=word_by_id__loader)
+        # initialize the DataLoaders; each one collects the keys requested while
+        # resolving one level of the query and fetches them with a single BatchGetItem
+        self.__loaders = RootskiDataLoaders(
+            word_by_id__loader=DataLoader(load_fn=load_words_by_id),
+            breakdown_by_word_id__loader=DataLoader(load_fn=load_breakdowns_by_word_id),
+            morpheme_family_by_id__loader=DataLoader(load_fn=load_morpheme_families_by_id),
+        )
 
         return self.__loaders
 
+    def add_dynamo_reads(self, num_reads: int):
+        """Count reads that resolvers make without going through the DataLoaders, e.g. paginated queries."""
+        self.dynamo_reads += num_reads
+
+    def _count_dynamo_reads(
+        self, load_fn: Callable[[List[TKey]], Awaitable[List[TValue]]]
+    ) -> Callable[[List[TKey]], Awaitable[List[TValue]]]:
+        """Wrap a ``load_fn`` that reads from dynamo so that it adds its keys to ``self.dynamo_reads``."""
+
+        async def load_and_count(keys: List[TKey]) -> List[TValue]:
+            self.add_dynamo_reads(len(keys))
+            return await load_fn(keys)
+
+        return load_and_count
+
 
 # Info type specific to Rootski
 # TODO -- what is TRootValue actually supposed to be? I just included
@@ -0,0 +1,302 @@
+"""
+Static cost analysis for GraphQL queries.
+
+A single nested query can fan out into thousands of DataLoader loads, e.g.
+``getWordsByIds`` with 500 ids, each with a ``breakdown`` whose items each
+have a ``morphemeFamily``. Before a query is executed, :class:`QueryCostLimiter`
+estimates how many dynamo reads it could cost and rejects it if the estimate
+is over the budget in :attr:`RootskiGraphQLContext.max_dynamo_reads`.
+
+Resolvers that read from dynamo declare their cost with :func:`dynamo_reads`:
+
+.. code-block:: python
+
+    @field(metadata=dynamo_reads(reads_per_item=1, list_size_arg="ids"))
+    async def get_words_by_ids(info: TInfo, ids: List[str]) -> List[Optional[Word]]:
+        ...
+
+The cost of a field is ``size * (reads_per_item + cost of the selected subfields)``
+where ``size`` is 1 for non-list fields and, for list fields, the length (or value)
+of the ``list_size_arg`` argument if there is one, otherwise the ``assumed_list_size``.
+
+Connection fields (see :mod:`rootski.gql.pagination`) are not lists themselves, so
+their ``list_size_arg`` (``first``) sizes the ``edges`` list below them instead:
+a connection costs ``first * reads_per_item`` plus the cost of its ``edges``.
+
+The estimate is an upper bound: it ignores DataLoader deduplication and the caches.
+Both the estimate and the number of keys actually requested from dynamo are
+reported under ``extensions.cost`` in the response.
+"""
+
+from typing import Any, Dict, Optional, Union
+
+from graphql import (
+    DocumentNode,
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    GraphQLField,
+    GraphQLList,
+    GraphQLNonNull,
+    GraphQLObjectType,
+    GraphQLSchema,
+    InlineFragmentNode,
+    OperationDefinitionNode,
+    SelectionSetNode,
+    get_named_type,
+    get_operation_ast,
+)
+from graphql.execution.values import get_argument_values
+from strawberry.extensions import SchemaExtension
+from strawberry.schema.schema_converter import GraphQLCoreConverter
+
+from rootski.gql.pagination import MAX_PAGE_SIZE
+
+# keys used in the ``metadata`` of strawberry fields
+DYNAMO_READS_PER_ITEM = "dynamo_reads_per_item"
+LIST_SIZE_ARG = "list_size_arg"
+ASSUMED_LIST_SIZE = "assumed_list_size"
+
+#: list size assumed for list fields without a ``list_size_arg`` or ``assumed_list_size``
+DEFAULT_ASSUMED_LIST_SIZE = 10
+
+QUERY_COST_OVER_BUDGET_MSG = (
+    "This query could cost up to {estimated_cost} dynamo reads, which is over the limit of {budget}."
+    + " Request fewer items or fewer nested fields."
+)
+
+
+def dynamo_reads(
+    reads_per_item: int = 1, list_size_arg: Optional[str] = None, assumed_list_size: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Make the ``metadata`` for a strawberry field that reads from dynamo.
+
+    :param reads_per_item: dynamo reads needed to resolve the field (per item, for list fields)
+    :param list_size_arg: name of the argument that determines the number of items returned,
+        either a list (e.g. ``ids``) or an integer (e.g. ``first``)
+    :param assumed_list_size: number of items to assume if ``list_size_arg`` isn't given
+    """
+    return {
+        DYNAMO_READS_PER_ITEM: reads_per_item,
+        LIST_SIZE_ARG: list_size_arg,
+        ASSUMED_LIST_SIZE: assumed_list_size,
+    }
+
+
+def list_size(assumed_list_size: int) -> Dict[str, Any]:
+    """Make the ``metadata`` for a list field that does not read from dynamo itself."""
+    return dynamo_reads(reads_per_item=0, assumed_list_size=assumed_list_size)
+
+
+def estimate_query_cost(
+    schema: GraphQLSchema,
+    document: DocumentNode,
+    operation_name: Optional[str] = None,
+    variables: Optional[Dict[str, Any]] = None,
+) -> int:
+    """
+    Estimate the maximum number of dynamo reads needed to execute an operation in ``document``.
+
+    Fields that don't exist in the schema are ignored; reporting them is up to validation.
+    """
+    operation: Optional[OperationDefinitionNode] = get_operation_ast(document, operation_name)
+    if operation is None:
+        return 0
+
+    root_type: Optional[GraphQLObjectType] = schema.get_root_type(operation.operation)
+    fragments: Dict[str, FragmentDefinitionNode] = {
+        definition.name.value: definition
+        for definition in document.definitions
+        if isinstance(definition, FragmentDefinitionNode)
+    }
+
+    return _selection_set_cost(
+        schema=schema,
+        parent_type=root_type,
+        selection_set=operation.selection_set,
+        fragments=fragments,
+        variables=variables or {},
+        page_size=None,
+    )
+
+
+def _selection_set_cost(
+    schema: GraphQLSchema,
+    parent_type: Optional[GraphQLObjectType],
+    selection_set: Optional[SelectionSetNode],
+    fragments: Dict[str, FragmentDefinitionNode],
+    variables: Dict[str, Any],
+    page_size: Optional[int],
+) -> int:
+    """:param page_size: size of the list fields in this selection set that don't have their own size"""
+    if parent_type is None or selection_set is None:
+        return 0
+
+    cost = 0
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            cost += _field_cost(
+                schema=schema,
+                parent_type=parent_type,
+                node=selection,
+                fragments=fragments,
+                variables=variables,
+                page_size=page_size,
+            )
+            continue
+
+        if isinstance(selection, FragmentSpreadNode):
+            fragment: Optional[FragmentDefinitionNode] = fragments.get(selection.name.value)
+            if fragment is None:
+                continue
+            type_condition, child_selection_set = fragment.type_condition, fragment.selection_set
+        elif isinstance(selection, InlineFragmentNode):
+            type_condition, child_selection_set = selection.type_condition, selection.selection_set
+        else:
+            continue
+
+        fragment_type = schema.get_type(type_condition.name.value) if type_condition else parent_type
+        cost += _selection_set_cost(
+            schema=schema,
+            parent_type=fragment_type if isinstance(fragment_type, GraphQLObjectType) else None,
+            selection_set=child_selection_set,
+            fragments=fragments,
+            variables=variables,
+            page_size=page_size,
+        )
+
+    return cost
+
+
+def _field_cost(
+    schema: GraphQLSchema,
+    parent_type: GraphQLObjectType,
+    node: FieldNode,
+    fragments: Dict[str, FragmentDefinitionNode],
+    variables: Dict[str, Any],
+    page_size: Optional[int],
+) -> int:
+    field: Optional[GraphQLField] = parent_type.fields.get(node.name.value)
+    if field is None:
+        return 0
+
+    strawberry_field = (field.extensions or {}).get(GraphQLCoreConverter.DEFINITION_BACKREF)
+    metadata: Dict[str, Any] = getattr(strawberry_field, "metadata", None) or {}
+    reads_per_item: int = metadata.get(DYNAMO_READS_PER_ITEM) or 0
+    size_from_arg: Optional[int] = _list_size_from_arg(
+        field=field, node=node, metadata=metadata, variables=variables
+    )
+
+    child_type = get_named_type(field.type)
+
+    def children_cost(child_page_size: Optional[int]) -> int:
+        return _selection_set_cost(
+            schema=schema,
+            parent_type=child_type if isinstance(child_type, GraphQLObjectType) else None,
+            selection_set=node.selection_set,
+            fragments=fragments,
+            variables=variables,
+            page_size=child_page_size,
+        )
+
+    if _is_list_type(field.type):
+        size: int = size_from_arg
+        if size is None:
+            size = metadata.get(ASSUMED_LIST_SIZE) or page_size or DEFAULT_ASSUMED_LIST_SIZE
+        return size * (reads_per_item + children_cost(child_page_size=None))
+
+    # a connection: ``first`` sizes the edges list below it
+    if size_from_arg is not None:
+        return size_from_arg * reads_per_item + children_cost(child_page_size=size_from_arg)
+
+    return reads_per_item + children_cost(child_page_size=None)
+
+
+def _is_list_type(type_) -> bool:
+    if isinstance(type_, GraphQLNonNull):
+        type_ = type_.of_type
+    return isinstance(type_, GraphQLList)
+
+
+def _list_size_from_arg(
+    field: GraphQLField, node: FieldNode, metadata: Dict[str, Any], variables: Dict[str, Any]
+) -> Optional[int]:
+    """
+    Return the value of the field's ``list_size_arg``, or None if it has none.
+
+    Integer arguments (page sizes like ``first``) that are missing, invalid or outside
+    ``1..MAX_PAGE_SIZE`` count as :const:`MAX_PAGE_SIZE`; the resolver rejects them anyway,
+    and a negative size would otherwise make up for the cost of the rest of the query.
+    """
+    list_size_arg: Optional[str] = metadata.get(LIST_SIZE_ARG)
+    if list_size_arg is None or list_size_arg not in field.args:
+        return None
+    is_page_size: bool = not _is_list_type(field.args[list_size_arg].type)
+
+    try:
+        args: Dict[str, Any] = get_argument_values(field, node, variables)
+    except GraphQLError:
+        # invalid arguments are reported by validation
+        return MAX_PAGE_SIZE if is_page_size else None
+
+    value: Union[None, int, list] = args.get(list_size_arg)
+    if isinstance(value, (list, tuple)):
+        return len(value)
+    if not is_page_size:
+        return None
+
+    # variables haven't been coerced yet, so e.g. ``{"first": "abc"}`` gets here as is;
+    # reporting them is up to execution
+    try:
+        page_size = int(value)
+    except (ValueError, TypeError):
+        return MAX_PAGE_SIZE
+    return page_size if 1 <= page_size <= MAX_PAGE_SIZE else MAX_PAGE_SIZE
+
+
+class QueryCostLimiter(SchemaExtension):
+    """
+    Reject queries whose estimated dynamo cost is over the budget and report the cost in ``extensions``.
+
+    The budget is read from ``max_dynamo_reads`` of the GraphQL context; if it is ``None``
+    the cost is still reported but no query is rejected. The actual cost is read from the
+    context's ``dynamo_reads`` counter, which the DataLoaders and the paginated resolvers increment.
+    """
+
+    estimated_dynamo_reads: Optional[int] = None
+
+    def on_validate(self):
+        execution_context = self.execution_context
+        budget: Optional[int] = getattr(execution_context.context, "max_dynamo_reads", None)
+
+        if execution_context.graphql_document is not None and not execution_context.errors:
+            self.estimated_dynamo_reads = estimate_query_cost(
+                schema=execution_context.schema._schema,
+                document=execution_context.graphql_document,
+                operation_name=execution_context.provided_operation_name,
+                variables=execution_context.variables,
+            )
+
+            # setting errors before validation runs makes strawberry skip execution
+            if budget is not None and self.estimated_dynamo_reads > budget:
+                execution_context.errors = [
+                    GraphQLError(
+                        QUERY_COST_OVER_BUDGET_MSG.format(
+                            estimated_cost=self.estimated_dynamo_reads, budget=budget
+                        )
+                    )
+                ]
+
+        yield
+
+    def get_results(self) -> Dict[str, Any]:
+        context = self.execution_context.context
+        return {
+            "cost": {
+                "estimated_dynamo_reads": self.estimated_dynamo_reads,
+                "actual_dynamo_reads": getattr(context, "dynamo_reads", None),
+                "max_dynamo_reads": getattr(context, "max_dynamo_reads", None),
+            }
+        }
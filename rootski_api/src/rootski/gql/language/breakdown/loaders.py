@@ -0,0 +1,30 @@
+from typing import Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from rootski.services.database.dynamo.actions.dynamo import batch_get_items
+from rootski.services.database.dynamo.db_service import DBService
+from rootski.services.database.dynamo.models.breakdown import Breakdown
+from rootski.services.database.dynamo.models.breakdown import make_keys as make_keys__breakdown
+
+
+def make__breakdown_by_word_id__load_fn(db: DBService):
+    """
+    Make a DataLoader load function for loading batches of official breakdowns by word ID.
+
+    :param db: The dynamo service used to fulfill batches of :class:`Breakdown` s from batches of word IDs.
+    """
+
+    async def load_breakdowns_by_word_ids(word_ids: List[str]) -> List[Optional[Breakdown]]:
+        items: List[dict] = await run_in_threadpool(
+            batch_get_items, keys=[make_keys__breakdown(word_id=word_id) for word_id in word_ids], db=db
+        )
+
+        breakdowns_by_word_id: Dict[str, Breakdown] = {}
+        for item in items:
+            breakdown: Breakdown = Breakdown.from_dict(item)
+            breakdowns_by_word_id[str(breakdown.word_id)] = breakdown
+
+        return [breakdowns_by_word_id.get(str(word_id)) for word_id in word_ids]
+
+    return load_breakdowns_by_word_ids
@@ -0,0 +1,59 @@
+from typing import List, Optional
+
+import strawberry
+from starlette.concurrency import run_in_threadpool
+from strawberry import field
+
+from rootski.gql.context import TInfo
+from rootski.gql.cost import dynamo_reads
+from rootski.gql.prime import prime
+from rootski.gql.pagination import (
+    DEFAULT_PAGE_SIZE,
+    GSI1_KEY_ATTRIBUTES,
+    Connection,
+    get_exclusive_start_key,
+    make_connection,
+    validate_page_size,
+)
+from rootski.services.database.dynamo.actions.breakdown_actions import get_breakdowns_page_by_user_email
+from rootski.services.database.dynamo.actions.dynamo import DynamoPage
+from rootski.services.database.dynamo.models.breakdown import Breakdown as DynamoBreakdown
+
+from .types import Breakdown
+
+
+@strawberry.type
+class BreakdownQuery:
+    @field(metadata=dynamo_reads(reads_per_item=1, list_size_arg="first"))
+    async def get_my_breakdowns(
+        info: TInfo, first: int = DEFAULT_PAGE_SIZE, after: Optional[str] = None
+    ) -> Connection[Breakdown]:
+        """Page through the official breakdowns submitted by the current user."""
+        user_email: str = info.context.user.email
+        connection_id = f"breakdowns-by-user:{user_email}"
+
+        page: DynamoPage = await run_in_threadpool(
+            get_breakdowns_page_by_user_email,
+            user_email=user_email,
+            limit=validate_page_size(first),
+            exclusive_start_key=get_exclusive_start_key(after=after, connection=connection_id),
+            db=info.context.db,
+        )
+        info.context.add_dynamo_reads(page.num_items_read)
+
+        breakdowns_data: List[DynamoBreakdown] = [DynamoBreakdown.from_dict(item) for item in page.items]
+
+        # these are the same items that Word.breakdown would load
+        for breakdown_data in breakdowns_data:
+            prime(
+                info.context.loaders.breakdown_by_word_id__loader, str(breakdown_data.word_id), breakdown_data
+            )
+
+        return make_connection(
+            items=page.items,
+            nodes=[Breakdown.from_data(data=breakdown_data) for breakdown_data in breakdowns_data],
+            has_next_page=page.has_next_page,
+            has_previous_page=after is not None,
+            connection=connection_id,
+            key_attributes=GSI1_KEY_ATTRIBUTES,
+        )
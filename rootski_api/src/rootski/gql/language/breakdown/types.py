@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+import strawberry
+from strawberry import field
+from strawberry.dataloader import DataLoader
+
+from rootski.gql.context import TInfo
+from rootski.gql.cost import dynamo_reads, list_size
+from rootski.gql.language.morpheme.types import MorphemeFamily
+from rootski.services.database.dynamo.models.breakdown import Breakdown as DynamoBreakdown
+from rootski.services.database.dynamo.models.breakdown_item import BreakdownItemItem
+from rootski.services.database.dynamo.models.morpheme_family import MorphemeFamily as DynamoMorphemeFamily
+
+
+@strawberry.type
+class BreakdownItem:
+    position: int
+    morpheme: str
+    morpheme_id: Optional[str]
+    morpheme_family_id: Optional[str]
+
+    @field(metadata=dynamo_reads(reads_per_item=1))
+    async def morpheme_family(self, info: TInfo) -> Optional[MorphemeFamily]:
+        """The family of the morpheme; null if the morpheme is not in the rootski database."""
+        if self.morpheme_family_id is None:
+            return None
+
+        morpheme_family_by_id__loader: DataLoader[
+            str, Optional[DynamoMorphemeFamily]
+        ] = info.context.loaders.morpheme_family_by_id__loader
+        family_data: Optional[DynamoMorphemeFamily] = await morpheme_family_by_id__loader.load(
+            self.morpheme_family_id
+        )
+
+        return MorphemeFamily.from_data(data=family_data) if family_data else None
+
+    @classmethod
+    def from_data(cls, data: BreakdownItemItem) -> BreakdownItem:
+        return BreakdownItem(
+            position=int(data["position"]),
+            morpheme=data["morpheme"],
+            morpheme_id=data["morpheme_id"],
+            morpheme_family_id=data["morpheme_family_id"],
+        )
+
+
+@strawberry.type
+class Breakdown:
+    word_id: str
+    word: str
+    is_verified: bool
+    is_inference: bool
+    date_submitted: Optional[str]
+    # most words have 2-5 morphemes
+    breakdown_items: List[BreakdownItem] = field(metadata=list_size(assumed_list_size=5))
+
+    @classmethod
+    def from_data(cls, data: DynamoBreakdown) -> Breakdown:
+        return Breakdown(
+            word_id=str(data.word_id),
+            word=data.word,
+            is_verified=data.is_verified,
+            is_inference=data.is_inference,
+            date_submitted=data.date_submitted,
+            breakdown_items=[
+                BreakdownItem.from_data(data=item)
+                for item in sorted(data.breakdown_items, key=lambda item: int(item["position"]))
+            ],
+        )
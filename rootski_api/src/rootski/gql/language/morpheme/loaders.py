@@ -0,0 +1,32 @@
+from typing import Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from rootski.services.database.dynamo.actions.dynamo import batch_get_items
+from rootski.services.database.dynamo.db_service import DBService
+from rootski.services.database.dynamo.models.morpheme_family import MorphemeFamily
+from rootski.services.database.dynamo.models.morpheme_family import make_keys as make_keys__morpheme_family
+
+
+def make__morpheme_family_by_id__load_fn(db: DBService):
+    """
+    Make a DataLoader load function for loading batches of morpheme families by their IDs.
+
+    :param db: The dynamo service used to fulfill batches of :class:`MorphemeFamily` s from batches of family IDs.
+    """
+
+    async def load_morpheme_families_by_ids(family_ids: List[str]) -> List[Optional[MorphemeFamily]]:
+        items: List[dict] = await run_in_threadpool(
+            batch_get_items,
+            keys=[make_keys__morpheme_family(morpheme_family_id=family_id) for family_id in family_ids],
+            db=db,
+        )
+
+        families_by_id: Dict[str, MorphemeFamily] = {}
+        for item in items:
+            family: MorphemeFamily = MorphemeFamily.from_dict(item)
+            families_by_id[str(family.family_id)] = family
+
+        return [families_by_id.get(str(family_id)) for family_id in family_ids]
+
+    return load_morpheme_families_by_ids
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+import strawberry
+
+from rootski.services.database.dynamo.models.morpheme_family import MorphemeFamily as DynamoMorphemeFamily
+
+
+@strawberry.type
+class Morpheme:
+    id: str
+    morpheme: str
+
+
+@strawberry.type
+class MorphemeFamily:
+    id: str
+    type: Optional[str]
+    word_pos: Optional[str]
+    level: Optional[int]
+    meanings: List[str]
+    morphemes: List[Morpheme]
+
+    @classmethod
+    def from_data(cls, data: DynamoMorphemeFamily) -> MorphemeFamily:
+        return MorphemeFamily(
+            id=str(data.family_id),
+            type=data.type,
+            word_pos=data.word_pos,
+            level=data.level,
+            # families without meanings are stored as [None]
+            meanings=[meaning for meaning in data.family_meanings if meaning],
+            morphemes=[Morpheme(id=str(m["morpheme_id"]), morpheme=m["morpheme"]) for m in data.morphemes],
+        )
@@ -1,41 +1,35 @@
-from typing import List
+from typing import Dict, List, Optional
 
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.sql import Select, select
+from starlette.concurrency import run_in_threadpool
 
-import rootski.services.database.models as orm
 from rootski import schemas
+from rootski.services.database.dynamo.actions.dynamo import batch_get_items
+from rootski.services.database.dynamo.db_service import DBService
+from rootski.services.database.dynamo.models.base import replace_decimals
+from rootski.services.database.dynamo.models.word import make_keys as make_keys__word
 
 
-def make__word_by_id__load_fn(db: AsyncSession):
+def make__word_by_id__load_fn(db: DBService):
     """
     Make a DataLoader load function for loading batches of words by their IDs.
 
-    :param db: The async SQLAlchemy ORM session used to fulfill batches of :class:`schemas.Word` s from batches of word IDs.
+    :param db: The dynamo service used to fulfill batches of :class:`schemas.Word` s from batches of word IDs.
     """
 
-    async def load_words_by_ids(word_ids: List[str]) -> List[schemas.Word]:
-
-        words_ids_as_ints = [int(id_) for id_ in word_ids]
-        stmt: Select = select(orm.Word).filter(orm.Word.id.in_(words_ids_as_ints))
-
-        # TODO - what if some of the IDs are invalid and therefore don't exist
-        #     in the database? We could handle that by having this dataloader return a mixed
-        #     list of:
-        #         Errors - for the IDs that were not found
-        #         Data Objects - for the IDs that were found
-        # TODO - what if this function fails to connect to the database or has
-        #     some other error that is raised from SQLAlchemy? Currently, the error message
-        #     is taken and displayed to the User in the payload. That is bad. We don't
-        #     want the clients that make requests to this API to know anything about the
-        #     internal workings of this API. For all they (should) know, it could be written in Golang
-        #     using some other GraphQL framework. We need a way to catch any errors that are raised in
-        #     our strawberry app and alter the error messages before the strawberry framework takes over
-        #     and shows them to the user.
-        result = await db.execute(stmt)
-        orm_words: List[orm.Word] = result.scalars().all()
-
-        words: List[schemas.Word] = [schemas.Word.from_orm(orm_word) for orm_word in orm_words]
-        return words
+    async def load_words_by_ids(word_ids: List[str]) -> List[Optional[schemas.Word]]:
+        # boto3 is synchronous; running it in a thread keeps the event loop free
+        # so that the other DataLoaders in the request can dispatch concurrently
+        items: List[dict] = await run_in_threadpool(
+            batch_get_items, keys=[make_keys__word(word_id=word_id) for word_id in word_ids], db=db
+        )
+
+        words_by_id: Dict[str, schemas.Word] = {}
+        for item in items:
+            word = schemas.Word(**replace_decimals(item["word"]))
+            words_by_id[word.word_id] = word
+
+        # DataLoaders must return exactly one result per key, in the same order;
+        # words that don't exist in the table are returned as None
+        return [words_by_id.get(str(word_id)) for word_id in word_ids]
 
     return load_words_by_ids
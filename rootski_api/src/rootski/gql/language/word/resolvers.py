@@ -1,22 +1,94 @@
+from typing import List, Optional
+
 import strawberry
+from starlette.concurrency import run_in_threadpool
 from strawberry import field
 from strawberry.dataloader import DataLoader
 
 from rootski import schemas
 from rootski.gql.context import TInfo
+from rootski.gql.cost import dynamo_reads
+from rootski.gql.errors import RootskiGraphQLError
+from rootski.gql.pagination import (
+    DEFAULT_PAGE_SIZE,
+    OFFSET_KEY_ATTRIBUTES,
+    Connection,
+    get_offset,
+    make_connection,
+    make_offset_items,
+    validate_page_size,
+)
+from rootski.services.database.dynamo.actions.morpheme_family import (
+    MorphemeFamilyWordsPage,
+    get_morpheme_family_words_chunk_indices,
+    get_morpheme_family_words_page,
+)
 
 from .types import Word
 
 
 @strawberry.type
 class WordQuery:
-    @field
+    @field(metadata=dynamo_reads(reads_per_item=1))
     async def get_word_by_id(info: TInfo, id: str) -> Word:
         """Fetch the word corresponding with the given word id."""
-        word_by_id__loader: DataLoader[str, schemas.Word] = info.context.loaders.word_by_id__loader
+        word_by_id__loader: DataLoader[str, Optional[schemas.Word]] = info.context.loaders.word_by_id__loader
 
         # load the word and convert it to the appropriate graphql type
-        word_data: schemas.Word = await word_by_id__loader.load(id)
+        word_data: Optional[schemas.Word] = await word_by_id__loader.load(id)
+        if word_data is None:
+            raise RootskiGraphQLError(f"No word with ID {id} was found.")
         word: Word = Word.from_data(data=word_data)
 
         return word
+
+    @field(metadata=dynamo_reads(reads_per_item=1, list_size_arg="ids"))
+    async def get_words_by_ids(info: TInfo, ids: List[str]) -> List[Optional[Word]]:
+        """
+        Fetch the words corresponding with the given word ids.
+
+        The result has one entry per id, in order; ids that don't match a word are null.
+        """
+        word_by_id__loader: DataLoader[str, Optional[schemas.Word]] = info.context.loaders.word_by_id__loader
+
+        words_data: List[Optional[schemas.Word]] = await word_by_id__loader.load_many(ids)
+        words: List[Optional[Word]] = [Word.from_data(data=data) if data else None for data in words_data]
+
+        return words
+
+    @field(metadata=dynamo_reads(reads_per_item=2, list_size_arg="first"))
+    async def get_words_in_morpheme_family(
+        info: TInfo, morpheme_family_id: str, first: int = DEFAULT_PAGE_SIZE, after: Optional[str] = None
+    ) -> Connection[Word]:
+        """
+        Page through the words whose breakdowns contain a morpheme from the given family.
+
+        The words are sorted from most to least common and each word appears once.
+        """
+        connection_id = f"words-in-morpheme-family:{morpheme_family_id}"
+        limit: int = validate_page_size(first)
+        offset: int = get_offset(after=after, connection=connection_id)
+
+        # the ETL precomputes the distinct words of each family, so a word can't repeat across pages
+        page: MorphemeFamilyWordsPage = await run_in_threadpool(
+            get_morpheme_family_words_page,
+            morpheme_family_id=morpheme_family_id,
+            offset=offset,
+            limit=limit,
+            db=info.context.db,
+        )
+        info.context.add_dynamo_reads(len(get_morpheme_family_words_chunk_indices(offset=offset, limit=limit)))
+
+        # the index only has the word IDs and spellings; the words themselves are fetched in one batch
+        word_ids: List[str] = [str(word["word_id"]) for word in page.words]
+        word_by_id__loader: DataLoader[str, Optional[schemas.Word]] = info.context.loaders.word_by_id__loader
+        words_data: List[Optional[schemas.Word]] = await word_by_id__loader.load_many(word_ids)
+
+        return make_connection(
+            items=make_offset_items(offset=offset, num_items=len(page.words)),
+            nodes=[Word.from_data(data=word_data) if word_data else None for word_data in words_data],
+            has_next_page=offset + len(page.words) < page.total_words,
+            has_previous_page=after is not None,
+            connection=connection_id,
+            key_attributes=OFFSET_KEY_ATTRIBUTES,
+        )
@@ -2,13 +2,18 @@ from __future__ import annotations
 
 import enum
 from textwrap import dedent
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import strawberry
 from strawberry import field
+from strawberry.dataloader import DataLoader
 
 from rootski import schemas
+from rootski.gql.context import TInfo
+from rootski.gql.cost import dynamo_reads
 from rootski.gql.errors import RootskiGraphQLError
+from rootski.gql.language.breakdown.types import Breakdown
+from rootski.services.database.dynamo.models.breakdown import Breakdown as DynamoBreakdown
 
 
 # Unfortunately, strawberry is unable to derive an enum from
@@ -87,7 +92,7 @@ class Word:
     """
         )
     )
-    frequency: int = field(
+    frequency: Optional[int] = field(
         description=dedent(
             """
         Frequency ranking of the word. For example 'и' (and) has a
@@ -96,12 +101,21 @@ class Word:
     """
         )
     )
-    # breakdowns: List[Breakdown]
+
+    @field(metadata=dynamo_reads(reads_per_item=1))
+    async def breakdown(self, info: TInfo) -> Optional[Breakdown]:
+        """The official breakdown of the word; null if the word has not been broken down."""
+        breakdown_by_word_id__loader: DataLoader[
+            str, Optional[DynamoBreakdown]
+        ] = info.context.loaders.breakdown_by_word_id__loader
+        breakdown_data: Optional[DynamoBreakdown] = await breakdown_by_word_id__loader.load(self.id)
+
+        return Breakdown.from_data(data=breakdown_data) if breakdown_data else None
 
     @classmethod
     def from_data(cls, data: schemas.Word) -> Word:
         return Word(
-            id=data.id,
+            id=data.word_id,
             word=data.word,
             accent=data.accent,
             pos=WordPOSEnum.from_string(data.pos),
@@ -0,0 +1,187 @@
+"""
+Relay-style cursor pagination over dynamo queries.
+
+This productionizes the design prototyped in ``graphql-poc/graphql_pagination_poc.py``.
+Instead of ``OFFSET``/``LIMIT`` (which dynamo doesn't have), every edge's cursor
+encodes the key attributes of its item. Dynamo accepts those as the
+``ExclusiveStartKey`` of the next query, so fetching page ``n`` costs the same
+as fetching the first page and the API never holds more than one page in memory.
+
+Only forward pagination (``first`` and ``after``) is supported.
+
+Connections served from an index precomputed by the ETL rather than from a dynamo query
+(e.g. the words related to a morpheme family) have no item keys to encode, so their
+cursors encode the position of the edge in the index instead; see :func:`get_offset`.
+
+A cursor also records which connection it was made for (e.g. the breakdowns of
+a particular user) so that a cursor can't be replayed against another connection.
+"""
+
+from __future__ import annotations
+
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from typing import Dict, Generic, List, Optional, Sequence, Type, TypeVar
+
+import strawberry
+from pydantic import BaseModel, ValidationError
+
+from rootski.gql.errors import RootskiGraphQLError
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# key attributes of items in the gsi1 index (the table keys plus the index keys)
+GSI1_KEY_ATTRIBUTES = ("pk", "sk", "gsi1pk", "gsi1sk")
+# "key" of the edges of connections that page through a precomputed index by position
+OFFSET_KEY_ATTRIBUTES = ("offset",)
+
+
+class PaginationError(RootskiGraphQLError):
+    """Raised for invalid pagination arguments, e.g. a malformed cursor or a page size out of range."""
+
+
+class DynamoCursor(BaseModel):
+    """
+    The position of an item in the result set of a dynamo query.
+
+    :param connection: identifies the query, e.g. ``"breakdowns-by-user:USER#someone@gmail.com"``
+    :param key: the key attributes of the item, usable as the ``ExclusiveStartKey`` of a query
+    """
+
+    connection: str
+    key: Dict[str, str]
+
+    def to_cursor(self) -> str:
+        """Encode the cursor as an opaque string."""
+        return urlsafe_b64encode(json.dumps(self.dict(), separators=(",", ":")).encode()).decode()
+
+    @classmethod
+    def from_cursor(cls: Type[DynamoCursor], cursor: str, connection: str) -> DynamoCursor:
+        """
+        Decode a cursor previously made by :meth:`to_cursor`.
+
+        :raises PaginationError: if the cursor is malformed or was made for a different connection
+        """
+        try:
+            dynamo_cursor: DynamoCursor = cls(**json.loads(urlsafe_b64decode(cursor.encode())))
+        except (ValueError, TypeError, ValidationError) as e:
+            raise PaginationError(f'"{cursor}" is not a valid cursor.') from e
+
+        if dynamo_cursor.connection != connection:
+            raise PaginationError(f'Cursor "{cursor}" does not belong to this connection.')
+
+        return dynamo_cursor
+
+    @classmethod
+    def from_item(
+        cls: Type[DynamoCursor], item: dict, connection: str, key_attributes: Sequence[str]
+    ) -> DynamoCursor:
+        return cls(connection=connection, key={attribute: item[attribute] for attribute in key_attributes})
+
+
+def validate_page_size(first: int) -> int:
+    """:raises PaginationError: if ``first`` is not between 1 and :const:`MAX_PAGE_SIZE`"""
+    if not 1 <= first <= MAX_PAGE_SIZE:
+        raise PaginationError(f"'first' must be between 1 and {MAX_PAGE_SIZE}, got {first}.")
+    return first
+
+
+def get_exclusive_start_key(after: Optional[str], connection: str) -> Optional[Dict[str, str]]:
+    """Decode the ``after`` cursor into the ``ExclusiveStartKey`` of the next query."""
+    if after is None:
+        return None
+    return DynamoCursor.from_cursor(cursor=after, connection=connection).key
+
+
+def get_offset(after: Optional[str], connection: str) -> int:
+    """
+    Decode the ``after`` cursor of a connection paged by position into the offset of the next page.
+
+    :raises PaginationError: if the cursor is malformed, was made for a different connection
+        or does not hold a position
+    """
+    key: Optional[Dict[str, str]] = get_exclusive_start_key(after=after, connection=connection)
+    if key is None:
+        return 0
+    try:
+        position = int(key["offset"])
+    except (KeyError, ValueError) as e:
+        raise PaginationError(f'"{after}" is not a valid cursor.') from e
+    if position < 0:
+        raise PaginationError(f'"{after}" is not a valid cursor.')
+    return position + 1
+
+
+def make_offset_items(offset: int, num_items: int) -> List[Dict[str, str]]:
+    """Make the "items" that :func:`make_connection` makes the cursors of a page paged by position from."""
+    return [{"offset": str(position)} for position in range(offset, offset + num_items)]
+
+
+#########################
+# --- GraphQL Types --- #
+#########################
+
+# A generic type that is a placeholder for any of our strawberry types
+TNode = TypeVar("TNode")
+
+
+@strawberry.type
+class PageInfo:
+    start_cursor: Optional[str] = strawberry.field(
+        description="Cursor of first edge in page; null if the page is empty."
+    )
+    end_cursor: Optional[str] = strawberry.field(
+        description="Cursor of last edge in page; pass it as 'after' to fetch the next page."
+    )
+    has_previous_page: bool = strawberry.field(
+        description="Whether there are more edges before the start cursor."
+    )
+    has_next_page: bool = strawberry.field(description="Whether there are more edges after the end cursor.")
+
+
+@strawberry.type
+class Edge(Generic[TNode]):
+    cursor: str = strawberry.field(
+        description="Cursor for this particular edge; is used in an 'after' pagination query."
+    )
+    node: TNode = strawberry.field(description="The actual GraphQL type contained in this Edge.")
+
+
+@strawberry.type
+class Connection(Generic[TNode]):
+    page_info: PageInfo
+    edges: List[Edge[TNode]]
+
+
+def make_connection(
+    items: List[dict],
+    nodes: List[Optional[TNode]],
+    has_next_page: bool,
+    has_previous_page: bool,
+    connection: str,
+    key_attributes: Sequence[str],
+) -> Connection[TNode]:
+    """
+    Build a :class:`Connection` from a page of dynamo items and the nodes made from them.
+
+    :param items: the raw dynamo items of the page, used to make the cursors
+    :param nodes: the GraphQL node for each item, in the same order; items whose node
+        is ``None`` (e.g. a word missing from dynamo) are left out of the edges
+    :param has_previous_page: whether the page was fetched with an ``after`` cursor
+    """
+    cursors: List[str] = [
+        DynamoCursor.from_item(item=item, connection=connection, key_attributes=key_attributes).to_cursor()
+        for item in items
+    ]
+    edges: List[Edge[TNode]] = [
+        Edge(cursor=cursor, node=node) for cursor, node in zip(cursors, nodes) if node is not None
+    ]
+    page_info = PageInfo(
+        start_cursor=edges[0].cursor if edges else None,
+        # the next page starts after the last *item*, even if it has no edge
+        end_cursor=cursors[-1] if cursors else None,
+        has_previous_page=has_previous_page,
+        has_next_page=has_next_page,
+    )
+    return Connection(page_info=page_info, edges=edges)
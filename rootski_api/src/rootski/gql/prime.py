@@ -1,4 +1,3 @@
-from asyncio import AbstractEventLoop, Future
 from typing import TypeVar
 
 from strawberry.dataloader import DataLoader
@@ -28,8 +27,8 @@ def prime(loader: DataLoader[TKey, TValue], key: TKey, value: TValue) -> None:
         This function is an official part of the GraphQL JavaScript
         reference implementation. The subset of the GraphQL Dataloader
         API that has to do with this is called the "Prime API".
-        Unfortunately, it has not been included in ``strawberry-graphql``
-        as of Nov 1, 2021.
+        It was not included in ``strawberry-graphql`` as of Nov 1, 2021;
+        newer versions provide ``DataLoader.prime()``, which this delegates to.
 
         You can think of this function as "priming" a DataLoader's cache
         with a value we acquired by some means other than calling
@@ -41,7 +40,4 @@ def prime(loader: DataLoader[TKey, TValue], key: TKey, value: TValue) -> None:
         This should not be an Awaitable or a :class:`Future`, but the actual value
         that would be the result of the ``Future`` after being awaited.
     """
-    loop: AbstractEventLoop = loader.loop
-    future_value: Future = loop.create_future()
-    future_value.set_result(value)
-    loader.cache_map[key] = future_value
+    loader.prime(key, value)
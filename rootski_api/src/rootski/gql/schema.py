@@ -1,8 +1,10 @@
 from strawberry import Schema
 from strawberry.tools import merge_types
 
+from rootski.gql.cost import QueryCostLimiter
+from rootski.gql.language.breakdown.resolvers import BreakdownQuery
 from rootski.gql.language.word.resolvers import WordQuery
 
-Query = merge_types(name="Root", types=(WordQuery,))
+Query = merge_types(name="Root", types=(WordQuery, BreakdownQuery))
 
-SCHEMA = Schema(query=Query)
+SCHEMA = Schema(query=Query, extensions=[QueryCostLimiter])
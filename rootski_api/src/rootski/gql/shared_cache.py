@@ -0,0 +1,218 @@
+"""
+Process-wide cache tier that sits behind the request-scoped DataLoaders.
+
+Every GraphQL request gets fresh :class:`DataLoader` instances (see
+:class:`rootski.gql.context.RootskiGraphQLContext`), so their caches are
+empty at the start of each request. Words and morpheme families are
+effectively immutable--they only change when the ETL is re-run--so it is
+safe to share them between requests. :func:`make_shared_cache_load_fn`
+wraps a DataLoader ``load_fn`` so that a batch only asks Dynamo for
+the keys that are missing from both the request cache and the shared cache.
+
+Entries are evicted when
+
+1. the cache holds more than ``max_size`` entries (least recently used first),
+2. they are older than ``ttl_seconds``, or
+3. the cache ``version`` changes, e.g. after the ETL loads new data.
+
+The ETLs write a new version to the ``DATA_VERSION`` item in Dynamo after loading data.
+:class:`SharedCacheVersionPoller` reads it every minute (by default) and passes it to
+:meth:`RootskiSharedCaches.set_version`, so new data is served soon after it is loaded
+rather than after ``ttl_seconds``.
+
+.. note::
+
+    Breakdowns are NOT cached here because users can submit new breakdowns at any time.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Generic, Hashable, List, Optional, Tuple, TypeVar
+
+from loguru import logger
+from rootski import schemas
+from rootski.config.config import Config
+from rootski.services.database.dynamo.models.morpheme_family import MorphemeFamily
+
+TKey = TypeVar("TKey", bound=Hashable)
+TValue = TypeVar("TValue")
+
+# (value, expires_at, version)
+_CacheEntry = Tuple[TValue, float, Optional[str]]
+
+
+class SharedCache(Generic[TKey, TValue]):
+    def __init__(self, max_size: int, ttl_seconds: float, version: Optional[str] = None):
+        """
+        Thread-safe LRU cache with a TTL and version-based invalidation.
+
+        :param max_size: the least recently used entries are evicted beyond this many entries
+        :param ttl_seconds: entries expire this long after they are set
+        :param version: entries set under a different version are treated as misses
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._version = version
+        self._entries: "OrderedDict[TKey, _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def version(self) -> Optional[str]:
+        return self._version
+
+    def set_version(self, version: Optional[str]):
+        """Invalidate every entry set under a different version."""
+        with self._lock:
+            if version != self._version:
+                self._version = version
+                self._entries.clear()
+
+    def get_many(self, keys: List[TKey]) -> Dict[TKey, TValue]:
+        """Return the cached values for the keys that are present, fresh and of the current version."""
+        now = time.monotonic()
+        found: Dict[TKey, TValue] = {}
+        with self._lock:
+            for key in keys:
+                entry: Optional[_CacheEntry] = self._entries.get(key)
+                if entry is None:
+                    self.misses += 1
+                    continue
+                value, expires_at, version = entry
+                if expires_at <= now or version != self._version:
+                    del self._entries[key]
+                    self.misses += 1
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = value
+                self.hits += 1
+        return found
+
+    def set_many(self, values: Dict[TKey, TValue]):
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            for key, value in values.items():
+                self._entries[key] = (value, expires_at, self._version)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: TKey):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def make_shared_cache_load_fn(
+    load_fn: Callable[[List[TKey]], Awaitable[List[Optional[TValue]]]], cache: SharedCache[TKey, TValue]
+) -> Callable[[List[TKey]], Awaitable[List[Optional[TValue]]]]:
+    """
+    Wrap a DataLoader ``load_fn`` so that it is only called with keys missing from ``cache``.
+
+    Values that ``load_fn`` returns as ``None`` (not found) are not cached so that newly
+    loaded data becomes visible without waiting for the TTL.
+    """
+
+    async def load_with_shared_cache(keys: List[TKey]) -> List[Optional[TValue]]:
+        version: Optional[str] = cache.version
+        values: Dict[TKey, TValue] = cache.get_many(keys)
+
+        missing_keys: List[TKey] = [key for key in keys if key not in values]
+        if missing_keys:
+            loaded_values: List[Optional[TValue]] = await load_fn(missing_keys)
+            loaded: Dict[TKey, TValue] = {
+                key: value for key, value in zip(missing_keys, loaded_values) if value is not None
+            }
+            # values loaded while the version changed may predate the new data
+            if cache.version == version:
+                cache.set_many(loaded)
+            values.update(loaded)
+
+        return [values.get(key) for key in keys]
+
+    return load_with_shared_cache
+
+
+@dataclass
+class RootskiSharedCaches:
+    """The process-wide caches, one per immutable entity type."""
+
+    word_by_id: SharedCache[str, schemas.Word]
+    morpheme_family_by_id: SharedCache[str, MorphemeFamily]
+
+    @classmethod
+    def from_config(cls, config: Config) -> "RootskiSharedCaches":
+        def make_cache() -> SharedCache:
+            return SharedCache(
+                max_size=config.graphql_shared_cache_max_size,
+                ttl_seconds=config.graphql_shared_cache_ttl_seconds,
+            )
+
+        return cls(word_by_id=make_cache(), morpheme_family_by_id=make_cache())
+
+    def set_version(self, version: Optional[str]):
+        """Invalidate the entries of every cache that were set under a different version."""
+        self.word_by_id.set_version(version)
+        self.morpheme_family_by_id.set_version(version)
+
+
+class SharedCacheVersionPoller:
+    def __init__(
+        self,
+        caches: RootskiSharedCaches,
+        get_version: Callable[[], Optional[str]],
+        poll_interval_seconds: float,
+    ):
+        """
+        Keep the version of the shared caches in step with the version of the data in Dynamo.
+
+        :param caches: the caches whose version is set
+        :param get_version: returns the current version of the data, e.g. by reading the
+            ``DATA_VERSION`` item that the ETLs write
+        :param poll_interval_seconds: how often the background thread reads the version
+        """
+        self.caches = caches
+        self.poll_interval_seconds = poll_interval_seconds
+        self._get_version = get_version
+
+        self._stop_polling = threading.Event()
+        self._poll_thread: Optional[threading.Thread] = None
+
+    def poll(self):
+        """Read the version and apply it to the caches; the caches are kept as they are if that fails."""
+        try:
+            self.caches.set_version(self._get_version())
+        except Exception as e:  # pylint: disable=broad-except
+            # keep serving the cached entities; the next poll may succeed
+            logger.error(f"Failed to read the version of the data in Dynamo: {str(e)}")
+
+    def start_background_polling(self):
+        """Apply the current version, then start a daemon thread that polls every ``poll_interval_seconds``."""
+        if self._poll_thread and self._poll_thread.is_alive():
+            return
+        self.poll()
+        self._stop_polling.clear()
+        self._poll_thread = threading.Thread(
+            target=self._poll_periodically, name="shared-cache-version-poll", daemon=True
+        )
+        self._poll_thread.start()
+
+    def stop_background_polling(self):
+        self._stop_polling.set()
+        if self._poll_thread:
+            self._poll_thread.join()
+            self._poll_thread = None
+
+    def _poll_periodically(self):
+        while not self._stop_polling.wait(timeout=self.poll_interval_seconds):
+            self.poll()
@@ -4,6 +4,7 @@ Dependencies for the endpoints.
 The goal is to create all dependencies using a Config class
 so that the app can be configured differently for testing and production.
 """
+
 from typing import Optional
 
 import rootski.services.database.dynamo.models as dynamo_models
@@ -11,6 +12,7 @@ from fastapi import Depends, HTTPException, Request, Security
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from loguru import logger
 from rootski.config.config import ANON_USER
+from rootski.gql.context import RootskiGraphQLContext
 from rootski.schemas import Services
 from rootski.services.database.dynamo.actions.user import UserNotFoundError, get_user, register_user
 from rootski.services.database.dynamo.db_service import DBService as DynamoDBService
@@ -79,14 +81,16 @@ async def get_current_user(
     return current_user
 
 
-# def get_graphql_context(
-#     request: Request,
-#     db: Session = Depends(get_async_session),
-#     user: schemas.User = Depends(get_current_user),
-# ) -> RootskiGraphQLContext:
-#     """Prepare the context object used by GraphQL resolvers."""
-#     return RootskiGraphQLContext(
-#         request=request,
-#         session=db,
-#         user=user,
-#     )
+def get_graphql_context(
+    request: Request,
+    user: schemas.User = Depends(get_current_user),
+) -> RootskiGraphQLContext:
+    """Prepare the context object used by GraphQL resolvers."""
+    services: Services = request.app.state.services
+    return RootskiGraphQLContext(
+        request=request,
+        db=services.dynamo,
+        user=user,
+        shared_caches=request.app.state.graphql_shared_caches,
+        max_dynamo_reads=request.app.state.config.graphql_max_dynamo_reads_per_query,
+    )
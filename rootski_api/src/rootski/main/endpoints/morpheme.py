@@ -1,9 +1,23 @@
 from pathlib import Path
 
+from fastapi import Query, Request
 from fastapi.routing import APIRouter
 from rootski.main.endpoints.breakdown.docs import ExampleResponse, make_apidocs_responses_obj
+from rootski.schemas.core import Services
+from rootski.services.database.dynamo.actions.morpheme_family import (
+    MorphemeFamilyWordsPage,
+    get_morpheme_family_words_page,
+)
+from rootski.services.database.dynamo.db_service import DBService as DynamoDBService
+from rootski.services.database.dynamo.models2schemas.morpheme import dynamo_to_pydantic__related_word
+from starlette.concurrency import run_in_threadpool
 from starlette.responses import FileResponse
 
+from rootski import schemas
+
+DEFAULT_RELATED_WORDS_LIMIT = 20
+MAX_RELATED_WORDS_LIMIT = 100
+
 router = APIRouter()
 
 
@@ -60,3 +74,42 @@ async def get_morphemes_json():  # request: Request, force: bool = False
     THIS_DIR = Path(__file__).parent.parent.parent
     morpheme_json_fpath = THIS_DIR / "resources/morphemes.json"
     return FileResponse(morpheme_json_fpath, media_type="application/json")
+
+
+@router.get("/morpheme_family/{morpheme_family_id}/words", response_model=schemas.RelatedWordsResponse)
+async def get_related_words(
+    morpheme_family_id: str,
+    request: Request,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_RELATED_WORDS_LIMIT, ge=1, le=MAX_RELATED_WORDS_LIMIT),
+):
+    """
+    Get a page of the words whose breakdowns contain a morpheme from the
+    given morpheme family, sorted from most to least common.
+
+    The words are read from an index precomputed by the ETL, so any page
+    costs at most two dynamo reads no matter how large the family is.
+    A family that isn't used in any breakdown has no related words.
+
+    Query parameters:
+        offset (int): number of related words to skip
+        limit (int): maximum number of related words to return
+    """
+    app_services: Services = request.app.state.services
+    dynamo_service: DynamoDBService = app_services.dynamo
+
+    page: MorphemeFamilyWordsPage = await run_in_threadpool(
+        get_morpheme_family_words_page,
+        morpheme_family_id=morpheme_family_id,
+        offset=offset,
+        limit=limit,
+        db=dynamo_service,
+    )
+
+    return schemas.RelatedWordsResponse(
+        morpheme_family_id=morpheme_family_id,
+        words=[dynamo_to_pydantic__related_word(word) for word in page.words],
+        total=page.total_words,
+        offset=offset,
+        limit=limit,
+    )
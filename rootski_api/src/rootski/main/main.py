@@ -13,12 +13,15 @@ from typing import Optional
 
 from fastapi import FastAPI
 from rootski.config.config import Config
+from rootski.gql.shared_cache import RootskiSharedCaches, SharedCacheVersionPoller
 from rootski.main.endpoints.breakdown.routes import router as breakdown_router
+from rootski.main.endpoints.graphql import router as graphql_router
 from rootski.main.endpoints.morpheme import router as morpheme_router
 from rootski.main.endpoints.search import router as search_router
 from rootski.main.endpoints.word import router as word_router
 from rootski.schemas.core import Services
 from rootski.services.auth import AuthService
+from rootski.services.database.dynamo.actions.data_version import get_data_version
 from rootski.services.database.dynamo.db_service import DBService as DynamoDBService
 from rootski.services.logger import LoggingService
 from starlette.middleware.cors import CORSMiddleware
@@ -38,6 +41,12 @@ def create_app(
         logger=LoggingService.from_config(config=config),
         dynamo=DynamoDBService.from_config(config=config),
     )
+    app.state.graphql_shared_caches = RootskiSharedCaches.from_config(config=config)
+    shared_cache_version_poller = SharedCacheVersionPoller(
+        caches=app.state.graphql_shared_caches,
+        get_version=lambda: get_data_version(db=app.state.services.dynamo),
+        poll_interval_seconds=config.graphql_shared_cache_version_poll_interval_seconds,
+    )
 
     # configure startup behavior: initialize services on startup
     @app.on_event("startup")
@@ -52,15 +61,22 @@ def create_app(
         logging_service.init()
         auth_service.init()
         dynamo_service.init()
+        # drop the cached words and morpheme families whenever the ETL loads new data
+        shared_cache_version_poller.start_background_polling()
 
         # # ensure that the static assets dir exists (for morphemes.json)
         Path(config.static_assets_dir).mkdir(exist_ok=True, parents=True)
 
+    @app.on_event("shutdown")
+    async def on_shutdown():
+        shared_cache_version_poller.stop_background_polling()
+
     # add routes
     app.include_router(breakdown_router, tags=["Breakdowns"])
     app.include_router(search_router, tags=["Words"])
     app.include_router(word_router, tags=["Words"])
     app.include_router(morpheme_router, tags=["Morphemes"])
+    app.include_router(graphql_router, tags=["GraphQL"])
 
     # add authorized CORS origins (add these origins to response headers to
     # enable frontends at these origins to receive requests from this API)
@@ -35,6 +35,8 @@ from .morpheme import (
     MorphemeFamilyInDb,
     MorphemeFamilyMeaning,
     MorphemeInDb,
+    RelatedWord,
+    RelatedWordsResponse,
 )
 from .search import SearchResponse, SearchWord
 from .user import User, UserInDB
@@ -75,6 +77,8 @@ __all__ = [
     "MorphemeFamilyInDb",
     "MorphemeFamilyMeaning",
     "MorphemeInDb",
+    "RelatedWord",
+    "RelatedWordsResponse",
     # user
     "User",
     "UserInDB",
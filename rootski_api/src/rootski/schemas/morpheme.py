@@ -96,3 +96,20 @@ class CompleteMorpheme(Morpheme):
     level: int
     # comma separated string of other morpheme variants in the family
     family: str
+
+
+class RelatedWord(BaseModel):
+    word_id: str
+    word: str
+    # frequency rank of the word; 1 is the most common word
+    frequency: Optional[int]
+
+
+class RelatedWordsResponse(BaseModel):
+    morpheme_family_id: str
+    # words whose breakdowns contain a morpheme of the family, from most to least common
+    words: List[RelatedWord]
+    # number of related words across all pages
+    total: int
+    offset: int
+    limit: int
@@ -4,54 +4,56 @@ Logic for authenticating incoming requests.
 The code heavily borrows from this article:
 https://gntrm.medium.com/jwt-authentication-with-fastapi-and-aws-cognito-1333f7f2729e
 """
-from typing import List, Optional
+from pathlib import Path
+from typing import Optional
 
-import httpx
 from jose import JWTError, jwk, jwt
 from jose.utils import base64url_decode
 from loguru import logger
-from pydantic import BaseModel
 
 from rootski.config.config import ANON_USER, Config
 from rootski.errors import AuthServiceError
+from rootski.services.jwks import JsonWebKey, JsonWebKeySet, JwksProvider
 from rootski.services.service import Service
 
 
-class JsonWebKey(BaseModel):
-    """
-    Learn about Cognito JWKs here:
-    https://docs.aws.amazon.com/cognito/latest/developerguide/amazon-cognito-user-pools-using-tokens-verifying-a-jwt.html
-    """
-
-    kid: str  # key ID
-    kty: str
-
-    class Config:
-        extra = "allow"
-
-
-class JsonWebKeySet(BaseModel):
-    keys: List[JsonWebKey]
-
-    class Config:
-        extra = "allow"
-
-
 class AuthService(Service):
-    _jwks: Optional[JsonWebKeySet] = None
+    _jwks_provider: Optional[JwksProvider] = None
 
     @classmethod
     def from_config(cls, config: Config):
-        return cls(cognito_public_keys_url=config.cognito_public_keys_url)
+        return cls(
+            cognito_public_keys_url=config.cognito_public_keys_url,
+            jwks_cache_fpath=config.cognito_jwks_cache_fpath,
+            jwks_refresh_interval_seconds=config.jwks_refresh_interval_seconds,
+            jwks_min_refetch_interval_seconds=config.jwks_min_refetch_interval_seconds,
+        )
 
-    def __init__(self, cognito_public_keys_url: str):
+    def __init__(
+        self,
+        cognito_public_keys_url: str,
+        jwks_cache_fpath: Path,
+        jwks_refresh_interval_seconds: float,
+        jwks_min_refetch_interval_seconds: float,
+    ):
         """Abstraction layer around verifying tokens."""
         self.__cognito_public_keys_url = cognito_public_keys_url
+        self.__jwks_cache_fpath = jwks_cache_fpath
+        self.__jwks_refresh_interval_seconds = jwks_refresh_interval_seconds
+        self.__jwks_min_refetch_interval_seconds = jwks_min_refetch_interval_seconds
 
     def init(self):
-        logger.info("Fetching Cognito Keys")
-        self._jwks = get_jwks(self.__cognito_public_keys_url)
-        logger.info(f"Fetched these keys: {str(self._jwks.json())}")
+        self._jwks_provider = JwksProvider(
+            jwks_url=self.__cognito_public_keys_url,
+            cache_fpath=self.__jwks_cache_fpath,
+            refresh_interval_seconds=self.__jwks_refresh_interval_seconds,
+            min_refetch_interval_seconds=self.__jwks_min_refetch_interval_seconds,
+        )
+        self._jwks_provider.init()
+
+    @property
+    def _jwks(self) -> Optional[JsonWebKeySet]:
+        return self._jwks_provider.jwks if self._jwks_provider else None
 
     def token_is_valid(self, token: str) -> bool:
         if not self._jwks:
@@ -59,7 +61,11 @@ class AuthService(Service):
         if not token_is_well_formed(token=token):
             return False
         logger.info(f"Validating token: {token}")
-        return jwt_is_valid(token, self._jwks)
+        # refetch the keys (rate limited) if the token was signed with a key we haven't seen;
+        # this is how rotated Cognito keys are picked up between background refreshes
+        token_kid: Optional[str] = jwt.get_unverified_header(token).get("kid")
+        jwks: JsonWebKeySet = self._jwks_provider.get_jwks_for_kid(token_kid)
+        return jwt_is_valid(token, jwks)
 
     def get_token_email(self, token: str) -> Optional[str]:
         """Retrieve the email from the token, or return the anonymous user."""
@@ -84,11 +90,6 @@ def token_is_well_formed(token: str) -> bool:
     return True
 
 
-def get_jwks(jwk_url: str) -> JsonWebKeySet:
-    response = httpx.get(jwk_url)
-    return JsonWebKeySet(**response.json())
-
-
 def get_token_jwk(token: str, jwks: JsonWebKeySet) -> Optional[JsonWebKey]:
     """Return the Cognito public key whose ID matches the key ID in the token header.
 
@@ -29,7 +29,7 @@ The function get_morpheme_family_ids_of_non_null_breakdown_items() is used to fi
 """
 
 
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Union
 
 from boto3.dynamodb.conditions import Key
 from mypy_boto3_dynamodb.type_defs import (
@@ -40,11 +40,13 @@ from mypy_boto3_dynamodb.type_defs import (
 )
 from rootski.schemas import breakdown as schemas
 from rootski.services.database.dynamo.actions.dynamo import (
+    DynamoPage,
     batch_get_item_status_code,
     get_item_from_dynamo_response,
     get_item_status_code,
     get_items_from_dynamo_batch_get_items_response,
     get_items_from_dynamo_query_response,
+    query_page,
 )
 from rootski.services.database.dynamo.db_service import DBService
 from rootski.services.database.dynamo.errors import (
@@ -57,7 +59,9 @@ from rootski.services.database.dynamo.errors import (
     UserBreakdownNotFoundError,
 )
 from rootski.services.database.dynamo.models.breakdown import Breakdown
+from rootski.services.database.dynamo.models.breakdown import make_gsi1pk as make_gsi1pk__breakdown
 from rootski.services.database.dynamo.models.breakdown import make_keys as make_keys__breakdown
+from rootski.services.database.dynamo.models.breakdown import make_pk as make_pk__breakdown
 from rootski.services.database.dynamo.models.breakdown import make_unofficial_keys
 from rootski.services.database.dynamo.models.morpheme import Morpheme
 from rootski.services.database.dynamo.models.morpheme import make_gsi1_keys as make_gsi1_keys__morpheme
@@ -82,6 +86,26 @@ def get_official_breakdown_by_word_id(word_id: str, db: DBService) -> Breakdown:
     return breakdown
 
 
+def get_breakdowns_page_by_user_email(
+    user_email: str, limit: int, db: DBService, exclusive_start_key: Optional[Dict[str, str]] = None
+) -> DynamoPage:
+    """Fetch a page of the official breakdowns submitted by a user, ordered by word ID (as a string).
+
+    :param exclusive_start_key: the ``pk``, ``sk``, ``gsi1pk`` and ``gsi1sk`` of the last breakdown
+        of the previous page
+    """
+    key_condition = Key("gsi1pk").eq(make_gsi1pk__breakdown(submitted_by_user_email=user_email)) & Key(
+        "gsi1sk"
+    ).begins_with(make_pk__breakdown(word_id=""))
+    return query_page(
+        key_condition=key_condition,
+        limit=limit,
+        index_name="gsi1",
+        exclusive_start_key=exclusive_start_key,
+        db=db,
+    )
+
+
 def is_breakdown_verified(breakdown: Breakdown) -> bool:
     """Returns the bool of breakdown.is_verified"""
     return breakdown.is_verified
@@ -0,0 +1,13 @@
+from typing import Optional
+
+from rootski.services.database.dynamo.actions.dynamo import get_item_from_dynamo_response
+from rootski.services.database.dynamo.db_service import DBService
+from rootski.services.database.dynamo.models import data_version
+
+
+def get_data_version(db: DBService) -> Optional[str]:
+    """Return the version of the data in Dynamo, or ``None`` if no ETL has written one yet."""
+    get_item_response = db.rootski_table.get_item(Key=data_version.make_keys())
+    if "Item" not in get_item_response:
+        return None
+    return get_item_from_dynamo_response(get_item_response)["version"]
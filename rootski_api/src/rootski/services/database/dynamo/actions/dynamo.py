@@ -1,8 +1,21 @@
+import random
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from boto3.dynamodb.conditions import ConditionBase
 from mypy_boto3_dynamodb.type_defs import (
     BatchGetItemOutputServiceResourceTypeDef,
     GetItemOutputTableTypeDef,
     QueryOutputTableTypeDef,
 )
+from rootski.services.database.dynamo.db_service import DBService
+from rootski.services.database.dynamo.errors import UNPROCESSED_KEYS_MSG, UnprocessedKeysError
+
+# BatchGetItem accepts at most 100 keys per request
+BATCH_GET_ITEM_MAX_KEYS = 100
+BATCH_GET_ITEM_MAX_RETRIES = 8
+BATCH_GET_ITEM_BASE_BACKOFF_SECONDS = 0.05
 
 
 def get_item_status_code(item_output: GetItemOutputTableTypeDef) -> int:
@@ -25,3 +38,94 @@ def get_items_from_dynamo_batch_get_items_response(
     item_output: BatchGetItemOutputServiceResourceTypeDef, table_name: str
 ) -> dict:
     return item_output["Responses"][table_name]
+
+
+def batch_get_items(keys: List[Dict[str, str]], db: DBService) -> List[dict]:
+    """
+    Fetch any number of items from the rootski table with ``BatchGetItem``.
+
+    The keys are deduplicated (``BatchGetItem`` rejects requests with repeated keys)
+    and split into requests of at most :const:`BATCH_GET_ITEM_MAX_KEYS` keys. Keys that
+    dynamo returns as ``UnprocessedKeys`` (e.g. when throttled) are retried with jittered
+    exponential backoff.
+
+    Items are returned in no particular order. Keys that don't exist in the table are
+    silently skipped, so callers should match the items back to their keys.
+
+    :raises UnprocessedKeysError: if some keys are still unprocessed after all of the retries
+    """
+    unique_keys: List[Dict[str, str]] = list({(key["pk"], key["sk"]): key for key in keys}.values())
+
+    items: List[dict] = []
+    for start in range(0, len(unique_keys), BATCH_GET_ITEM_MAX_KEYS):
+        chunk: List[Dict[str, str]] = unique_keys[start : start + BATCH_GET_ITEM_MAX_KEYS]
+        items.extend(_batch_get_chunk(keys=chunk, db=db))
+
+    return items
+
+
+def _batch_get_chunk(keys: List[Dict[str, str]], db: DBService) -> List[dict]:
+    table_name: str = db.rootski_table.name
+    request_items = {table_name: {"Keys": keys}}
+
+    items: List[dict] = []
+    for attempt in range(BATCH_GET_ITEM_MAX_RETRIES + 1):
+        response: BatchGetItemOutputServiceResourceTypeDef = db.dynamo.batch_get_item(
+            RequestItems=request_items
+        )
+        items.extend(response["Responses"].get(table_name, []))
+
+        request_items = response.get("UnprocessedKeys") or {}
+        if not request_items:
+            return items
+
+        # "full jitter" backoff as recommended in the AWS docs
+        time.sleep(random.uniform(0, BATCH_GET_ITEM_BASE_BACKOFF_SECONDS * 2**attempt))
+
+    num_unprocessed: int = len(request_items[table_name]["Keys"])
+    raise UnprocessedKeysError(
+        UNPROCESSED_KEYS_MSG.format(num_unprocessed=num_unprocessed, num_retries=BATCH_GET_ITEM_MAX_RETRIES)
+    )
+
+
+@dataclass
+class DynamoPage:
+    """A page of items from a dynamo query."""
+
+    items: List[dict]
+    has_next_page: bool
+
+    @property
+    def num_items_read(self) -> int:
+        """Number of items dynamo read for the page, including the extra item that revealed the next page."""
+        return len(self.items) + 1 if self.has_next_page else len(self.items)
+
+
+def query_page(
+    key_condition: ConditionBase,
+    limit: int,
+    db: DBService,
+    index_name: Optional[str] = None,
+    exclusive_start_key: Optional[Dict[str, str]] = None,
+) -> DynamoPage:
+    """
+    Fetch at most ``limit`` items matching ``key_condition``, starting after ``exclusive_start_key``.
+
+    Dynamo only reads the requested page, so paging through a large partition
+    takes constant memory. One extra item is requested to find out whether
+    there is a next page, because dynamo returns a ``LastEvaluatedKey`` whenever
+    it stops at the ``Limit``--even if no items are left.
+
+    :param exclusive_start_key: the key attributes of the last item of the previous page;
+        for an index, these are the table keys plus the index keys
+    """
+    query_kwargs = {"KeyConditionExpression": key_condition, "Limit": limit + 1}
+    if index_name:
+        query_kwargs["IndexName"] = index_name
+    if exclusive_start_key:
+        query_kwargs["ExclusiveStartKey"] = exclusive_start_key
+
+    query_response: QueryOutputTableTypeDef = db.rootski_table.query(**query_kwargs)
+    items: List[dict] = get_items_from_dynamo_query_response(query_response)
+
+    return DynamoPage(items=items[:limit], has_next_page=len(items) > limit)
@@ -0,0 +1,94 @@
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from boto3.dynamodb.conditions import Key
+from rootski.services.database.dynamo.actions.dynamo import DynamoPage, batch_get_items, query_page
+from rootski.services.database.dynamo.db_service import DBService
+from rootski.services.database.dynamo.models.breakdown_item import make_gsi1pk as make_gsi1pk__breakdown_item
+from rootski.services.database.dynamo.models.morpheme_family_words import (
+    WORDS_PER_CHUNK,
+    MorphemeFamilyWord,
+    MorphemeFamilyWordsChunk,
+)
+from rootski.services.database.dynamo.models.morpheme_family_words import make_keys as make_keys__words_chunk
+
+
+def get_breakdown_items_page_by_morpheme_family_id(
+    morpheme_family_id: str, limit: int, db: DBService, exclusive_start_key: Optional[Dict[str, str]] = None
+) -> DynamoPage:
+    """Fetch a page of the breakdown items that use a morpheme from the given family.
+
+    The ``word_id`` of each item is the ID of a word containing the morpheme family.
+    A word may appear more than once, e.g. if several users submitted breakdowns for it.
+
+    :param exclusive_start_key: the ``pk``, ``sk``, ``gsi1pk`` and ``gsi1sk`` of the last breakdown
+        item of the previous page
+    """
+    return query_page(
+        key_condition=Key("gsi1pk").eq(make_gsi1pk__breakdown_item(morpheme_family_id=morpheme_family_id)),
+        limit=limit,
+        index_name="gsi1",
+        exclusive_start_key=exclusive_start_key,
+        db=db,
+    )
+
+
+@dataclass
+class MorphemeFamilyWordsPage:
+    """A page of the words related to a morpheme family, from most to least common."""
+
+    words: List[MorphemeFamilyWord]
+    # number of words related to the family across all pages
+    total_words: int
+
+
+def get_morpheme_family_words_page(
+    morpheme_family_id: str, offset: int, limit: int, db: DBService
+) -> MorphemeFamilyWordsPage:
+    """Fetch a page of the precomputed index of words whose breakdowns contain the morpheme family.
+
+    Only the first chunk of the index and the (at most two) chunks that overlap the page are read.
+    Families that aren't used in any breakdown have no index, so their page is empty.
+
+    The first chunk is the source of truth for the number of words: chunks past the
+    end of the index are left over from when the family had more words, and are ignored.
+    """
+    first_chunk_index: int = offset // WORDS_PER_CHUNK
+    chunk_indices: List[int] = get_morpheme_family_words_chunk_indices(offset=offset, limit=limit)
+
+    chunks: List[MorphemeFamilyWordsChunk] = _get_morpheme_family_words_chunks(
+        morpheme_family_id=morpheme_family_id, chunk_indices=chunk_indices, db=db
+    )
+    if not chunks or chunks[0].chunk_index != 0:
+        return MorphemeFamilyWordsPage(words=[], total_words=0)
+
+    total_words: int = chunks[0].total_words
+    num_chunks: int = math.ceil(total_words / WORDS_PER_CHUNK)
+    words: List[MorphemeFamilyWord] = [
+        word for chunk in chunks if first_chunk_index <= chunk.chunk_index < num_chunks for word in chunk.words
+    ]
+    start: int = offset - first_chunk_index * WORDS_PER_CHUNK
+    return MorphemeFamilyWordsPage(words=words[start : start + limit], total_words=total_words)
+
+
+def get_morpheme_family_words_chunk_indices(offset: int, limit: int) -> List[int]:
+    """Return the indices of the chunks :func:`get_morpheme_family_words_page` reads for a page."""
+    first_chunk_index: int = offset // WORDS_PER_CHUNK
+    last_chunk_index: int = (offset + limit - 1) // WORDS_PER_CHUNK
+    return sorted({0, *range(first_chunk_index, last_chunk_index + 1)})
+
+
+def _get_morpheme_family_words_chunks(
+    morpheme_family_id: str, chunk_indices: List[int], db: DBService
+) -> List[MorphemeFamilyWordsChunk]:
+    """Return the chunks that exist, in order of their index."""
+    items: List[dict] = batch_get_items(
+        keys=[
+            make_keys__words_chunk(morpheme_family_id=morpheme_family_id, chunk_index=chunk_index)
+            for chunk_index in chunk_indices
+        ],
+        db=db,
+    )
+    chunks: List[MorphemeFamilyWordsChunk] = [MorphemeFamilyWordsChunk.from_dict(item) for item in items]
+    return sorted(chunks, key=lambda chunk: chunk.chunk_index)
@@ -14,6 +14,7 @@ USER_BREAKDOWN_NOT_FOUND = (
 )
 USER_NOT_FOUND_MSG = "User with email {email} was not found in Dynamo table named {dynamo_table_name}."
 USER_ALREADY_REGISTERED_MSG = 'User with email "{email}" is already registered.'
+UNPROCESSED_KEYS_MSG = "{num_unprocessed} keys were still unprocessed by dynamo after {num_retries} retries."
 
 
 ##################
@@ -54,3 +55,7 @@ class UserNotFoundError(Exception):
 
 class UserAlreadyRegisteredError(Exception):
     """Error thrown if a User is already registered."""
+
+
+class UnprocessedKeysError(Exception):
+    """Error thrown if dynamo keeps returning ``UnprocessedKeys`` for a batch request."""
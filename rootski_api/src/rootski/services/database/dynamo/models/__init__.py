@@ -2,6 +2,7 @@ from .breakdown import Breakdown
 from .breakdown_item import BreakdownItem, BreakdownItemItem, NullBreakdownItem
 from .morpheme import Morpheme
 from .morpheme_family import MorphemeFamily, MorphemeItem
+from .morpheme_family_words import MorphemeFamilyWord, MorphemeFamilyWordsChunk
 from .user import User
 from .word import Word
 
@@ -10,6 +11,8 @@ __all__ = [
     "Morpheme",
     "MorphemeFamily",
     "MorphemeItem",
+    "MorphemeFamilyWord",
+    "MorphemeFamilyWordsChunk",
     "Breakdown",
     "NullBreakdownItem",
     "BreakdownItem",
@@ -0,0 +1,23 @@
+"""
+Keys of the item holding the version of the data in the table.
+
+The ETLs in ``dynamo-db/`` write a new version after they load data, so a change
+of version means that cached words and morpheme families may be out of date.
+"""
+
+from typing import Dict
+
+
+def make_pk() -> str:
+    return "DATA_VERSION"
+
+
+def make_sk() -> str:
+    return "DATA_VERSION"
+
+
+def make_keys() -> Dict[str, str]:
+    return {
+        "pk": make_pk(),
+        "sk": make_sk(),
+    }
@@ -0,0 +1,109 @@
+"""
+Inverted index from a morpheme family to the words whose breakdowns contain it.
+
+The index is precomputed by the ETL and stored next to the ``MorphemeFamily`` item
+(same ``pk``) as a sequence of chunks, each holding up to :const:`WORDS_PER_CHUNK`
+words. The words are sorted by frequency rank, so chunk ``n`` holds words
+``n * WORDS_PER_CHUNK`` through ``(n + 1) * WORDS_PER_CHUNK - 1`` and any page of
+related words can be served by reading at most two chunks.
+
+To keep the chunks small, each word is stored as a ``[word_id, word, frequency]`` list.
+
+NOTE: remember to cast all IDs to strings
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Literal, Optional, Sequence, Type, TypedDict
+
+from rootski.services.database.dynamo.models.base import DynamoModel, replace_decimals
+from rootski.services.database.dynamo.models.morpheme_family import make_pk
+
+# a chunk of 500 words is ~15KB, well under dynamo's 400KB item size limit
+WORDS_PER_CHUNK = 500
+
+
+class MorphemeFamilyWord(TypedDict):
+    word_id: str
+    word: str
+    # frequency rank of the word; 1 is the most common word
+    frequency: Optional[int]
+
+
+@dataclass(frozen=True)
+class MorphemeFamilyWordsChunk(DynamoModel):
+
+    family_id: str
+    chunk_index: int
+    # number of words in all of the chunks of the family
+    total_words: int
+    words: List[MorphemeFamilyWord]
+
+    __type: Literal["MORPHEME_FAMILY_WORDS"] = "MORPHEME_FAMILY_WORDS"
+
+    @property
+    def pk(self) -> str:
+        return make_pk(morpheme_family_id=self.family_id)
+
+    @property
+    def sk(self) -> str:
+        return make_sk(chunk_index=self.chunk_index)
+
+    def to_item(self) -> dict:
+        return {
+            **self.keys,
+            "__type": self.__type,
+            "family_id": str(self.family_id),
+            "chunk_index": self.chunk_index,
+            "total_words": self.total_words,
+            "words": [[str(w["word_id"]), w["word"], w["frequency"]] for w in self.words],
+        }
+
+    @classmethod
+    def from_dict(cls: Type["MorphemeFamilyWordsChunk"], chunk_dict: dict) -> "MorphemeFamilyWordsChunk":
+        cleaned_chunk_dict = replace_decimals(chunk_dict)
+
+        return cls(
+            family_id=cleaned_chunk_dict["family_id"],
+            chunk_index=cleaned_chunk_dict["chunk_index"],
+            total_words=cleaned_chunk_dict["total_words"],
+            words=[
+                MorphemeFamilyWord(word_id=word_id, word=word, frequency=frequency)
+                for word_id, word, frequency in cleaned_chunk_dict["words"]
+            ],
+        )
+
+
+def sort_morpheme_family_words(words: Sequence[MorphemeFamilyWord]) -> List[MorphemeFamilyWord]:
+    """Sort words from most to least common; words without a frequency rank go last."""
+    return sorted(
+        words,
+        key=lambda w: (w["frequency"] is None, w["frequency"] or 0, int(w["word_id"])),
+    )
+
+
+def make_morpheme_family_words_chunks(
+    family_id: str, words: Sequence[MorphemeFamilyWord], words_per_chunk: int = WORDS_PER_CHUNK
+) -> List[MorphemeFamilyWordsChunk]:
+    """Sort ``words`` and split them into the chunks that make up the family's index."""
+    sorted_words: List[MorphemeFamilyWord] = sort_morpheme_family_words(words)
+    return [
+        MorphemeFamilyWordsChunk(
+            family_id=str(family_id),
+            chunk_index=chunk_index,
+            total_words=len(sorted_words),
+            words=sorted_words[start : start + words_per_chunk],
+        )
+        for chunk_index, start in enumerate(range(0, len(sorted_words), words_per_chunk))
+    ]
+
+
+def make_sk(chunk_index: int) -> str:
+    # zero padded so that the chunks of a family sort in order
+    return f"WORDS#{chunk_index:05d}"
+
+
+def make_keys(morpheme_family_id: str, chunk_index: int) -> Dict[str, str]:
+    return {
+        "pk": make_pk(morpheme_family_id=morpheme_family_id),
+        "sk": make_sk(chunk_index=chunk_index),
+    }
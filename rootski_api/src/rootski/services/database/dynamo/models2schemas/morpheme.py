@@ -19,3 +19,11 @@ def dynamo_to_pydantic__complete_morpheme(
         level=ids_to_morpheme_families[morpheme_id]["level"],
         family=ids_to_morpheme_families[morpheme_id]["family"],
     )
+
+
+def dynamo_to_pydantic__related_word(morpheme_family_word: dynamo.MorphemeFamilyWord) -> schemas.RelatedWord:
+    return schemas.RelatedWord(
+        word_id=morpheme_family_word["word_id"],
+        word=morpheme_family_word["word"],
+        frequency=morpheme_family_word["frequency"],
+    )
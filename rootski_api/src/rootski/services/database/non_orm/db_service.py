@@ -1,21 +1,83 @@
-# TODO use regex to make sure query strings are safe from SQL injection
-from typing import Any, Dict, List
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Set
 
 import pandas as pd
 from loguru import logger
-from sqlalchemy.engine import Engine
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
 from sqlalchemy.orm import Session
 
-from rootski.services.database.models.models import (
-    Breakdown,
-    BreakdownItem,
-    Morpheme,
-    MorphemeFamily,
-    MorphemeFamilyMeaning,
-    Word,
-)
 from rootski.services.database.non_orm import sql_statements
-from rootski.services.database.non_orm.utils import collapse_df
+from rootski.services.database.non_orm.utils import collapse_records
+
+if TYPE_CHECKING:
+    from rootski.services.database.models.models import BreakdownItem, MorphemeFamily
+
+
+def escape_like(search_key: str) -> str:
+    """Escape the ``LIKE`` wildcards in ``search_key`` so that they match literally."""
+    return search_key.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def get_deduped_sub_defs(sub_defs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Drop the sub definitions whose ``sub_def_id`` was already seen, keeping their order."""
+    seen_sub_def_ids: Set[Any] = set()
+    deduped_sub_defs = []
+    for sub_def in sub_defs:
+        if sub_def["sub_def_id"] in seen_sub_def_ids:
+            continue
+        seen_sub_def_ids.add(sub_def["sub_def_id"])
+        deduped_sub_defs.append(sub_def)
+    return deduped_sub_defs
+
+
+def nest_definitions(definition_rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Nest the rows of ``sql_statements.DEFINITIONS`` into the structure returned by ``query_definitions``."""
+    # nest the sub definitions under the definitions
+    result_set = collapse_records(
+        definition_rows,
+        groupby_col="definition_id",
+        group_cols=["definition_id", "def_position", "pos"],
+        child_cols=["sub_def_id", "sub_def_position", "definition", "notes"],
+        child_name="sub_defs",
+        grp_sort_col="def_position",
+        ch_sort_col="sub_def_position",
+    )
+    logger.debug("Result set for definitions" + str(result_set))
+
+    # nest the definitions under the word types; the rows are already python dicts
+    result_set = collapse_records(
+        result_set,
+        groupby_col="pos",
+        group_cols=["pos"],
+        child_cols=["def_position", "definition_id", "sub_defs"],
+        child_name="definitions",
+    )
+    logger.debug(str(result_set))
+
+    # the query can return the same sub definition more than once, so de-duplicate
+    # them here, keeping the first occurrence of each
+    for word_type in result_set:
+        for definition in word_type["definitions"]:
+            definition["sub_defs"] = get_deduped_sub_defs(definition["sub_defs"])
+
+    return result_set
+
+
+def first_or_none(rows: Optional[List[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+    return rows[0] if rows else None
+
+
+def group_rows_by_word_id(
+    rows: List[Dict[str, Any]], word_id_col: str = "word_id"
+) -> Dict[int, List[Dict[str, Any]]]:
+    """Group rows by their word ID, keeping their order and dropping the ``word_id_col`` column."""
+    rows_by_word_id: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+    for row in rows:
+        word_id = row.pop(word_id_col)
+        rows_by_word_id[word_id].append(row)
+    return rows_by_word_id
 
 
 class RootskiDBService:
@@ -26,12 +88,39 @@ class RootskiDBService:
         """
         self._engine = engine
 
-    def run_query(self, query, as_df=False, **kwargs):
+    @contextmanager
+    def connect(self, connection: Optional[Connection] = None) -> Iterator[Connection]:
+        """
+        Yield ``connection`` if given, otherwise check out a connection from the engine's pool.
+
+        Pass the yielded connection to several ``query_*`` calls to run them all over
+        the same connection instead of checking one out per query. Each query then runs
+        in a savepoint, so a failed query doesn't abort the queries after it.
+        """
+        if connection is not None:
+            yield connection
+            return
+
+        with self._engine.connect() as new_connection:
+            yield new_connection
+
+    def run_query(
+        self,
+        query,
+        params: Optional[Dict[str, Any]] = None,
+        as_df=False,
+        connection: Optional[Connection] = None,
+        raise_errors: bool = False,
+        **kwargs,
+    ):
         """
         Args:
-            query  (str): pre-validated SQL query ready to run against db
+            query  (str): SQL statement from ``sql_statements`` with bound parameters such as ``:word_id``
+            params (dict): values of the bound parameters
             as_df (bool): return dataframe object if true, otherwise, rows as dictionaries
-            kwargs      : parameters to be forwarded to pandas.read_sql_query
+            connection (Connection): run the query over this connection instead of a new one
+            raise_errors (bool): raise the exception of a failed query instead of logging it and returning ``[]``
+            kwargs      : parameters to be forwarded to pandas.read_sql_query (only if as_df)
 
         Returns:
             list[dict]: SQL result set (if not as_df)
@@ -39,35 +128,41 @@ class RootskiDBService:
             pd.DataFrame: SQL result set (if as_df)
         """
         try:
-            logger.debug(f"Running query: {query}")
-            # run query and parse results to dataframe
-            result_set = pd.read_sql_query(query, con=self._engine, **kwargs)
-            # if desired, convert dataframe rows to list of dicts
-            if not as_df:
-                result_set = result_set.to_dict(orient="records")
+            logger.debug(f"Running query: {query} with params {params}")
+            with self.connect(connection) as conn:
+                # on postgres, a failed statement aborts the transaction it ran in; rolling back
+                # to a savepoint keeps the failure from breaking the caller's later queries
+                with conn.begin_nested() if connection is not None else nullcontext():
+                    if as_df:
+                        result_set = pd.read_sql_query(text(query), con=conn, params=params, **kwargs)
+                    else:
+                        result_set = [dict(row) for row in conn.execute(text(query), params or {}).mappings()]
             logger.debug(f"Fetched results: {str(result_set)}")
             return result_set
         except Exception as e:
+            if raise_errors:
+                raise
             logger.warning(f"Query failed with exception: {str(e)}")
             return []
 
-    def query_word_by_id(self, word_id):
+    def query_word_by_id(self, word_id, connection: Optional[Connection] = None):
         # TODO: decide how to handle errors for example when the given word_id does not exist
-        query = sql_statements.WORD_BY_ID.format(word_id=word_id)
-        result_set = self.run_query(query)
+        result_set = self.run_query(
+            sql_statements.WORD_BY_ID, params={"word_id": word_id}, connection=connection
+        )
         if len(result_set) > 0:
             return result_set[0]
         return None
 
     def search_words(self, search_key, limit=100):
-        query = sql_statements.SEARCH_WORDS.format(search_key=search_key, limit=limit)
-        return self.run_query(query)
+        params = {"search_pattern": f"{escape_like(search_key)}%", "limit": limit}
+        return self.run_query(sql_statements.SEARCH_WORDS, params=params)
 
     def search_morphemes(self, search_key, limit=100):
-        query = sql_statements.SEARCH_MORPHEMES.format(search_key=search_key, limit=limit)
-        return self.run_query(query)
+        params = {"search_pattern": f"%{escape_like(search_key)}%", "limit": limit}
+        return self.run_query(sql_statements.SEARCH_MORPHEMES, params=params)
 
-    def query_definitions(self, word_id):
+    def query_definitions(self, word_id, connection: Optional[Connection] = None):
         """
         Returns
 
@@ -97,65 +192,14 @@ class RootskiDBService:
             ]
 
         """
-        query = sql_statements.DEFINITIONS.format(word_id=word_id)
-        result_set = self.run_query(query, as_df=True)
+        result_set = self.run_query(
+            sql_statements.DEFINITIONS, params={"word_id": word_id}, connection=connection
+        )
 
         if len(result_set) == 0:
             return []
 
-        # nest the sub definitions under the definitions
-        result_set = collapse_df(
-            result_set,
-            groupby_col="definition_id",
-            group_cols=["definition_id", "def_position", "pos"],
-            child_cols=["sub_def_id", "sub_def_position", "definition", "notes"],
-            child_name="sub_defs",
-            grp_sort_col="def_position",
-            ch_sort_col="sub_def_position",
-        )
-        logger.debug("Result set for definitions" + str(result_set))
-
-        # nest the definitions under the word types
-        result_set = pd.DataFrame(result_set)
-        result_set = collapse_df(
-            result_set,
-            groupby_col="pos",
-            group_cols=["pos"],
-            child_cols=["def_position", "definition_id", "sub_defs"],
-            child_name="definitions",
-        )
-        logger.debug(str(result_set))
-
-        # NOTE: this is a hack, rather than play with sql queries, we are going
-        # to manually de-duplicate the subdefinitions here
-        def get_deduped_sub_defs(sub_defs: List[Dict[str, Any]]):
-            deduped_sub_defs = []
-            for sub_def in sub_defs:
-                if len(deduped_sub_defs) == 0:
-                    deduped_sub_defs.append(sub_def)
-                else:
-                    # if the subdef is already in the list, don't add it
-                    if sub_def["sub_def_id"] in [sub_def["sub_def_id"] for sub_def in deduped_sub_defs]:
-                        continue
-                    deduped_sub_defs.append(sub_def)
-            return deduped_sub_defs
-
-        def get_result_item_with_deduped_sub_defs(result_item: Dict[str, Any]):
-            to_return = result_item.copy()
-            to_return["definitions"] = [
-                {
-                    **definition,
-                    "sub_defs": get_deduped_sub_defs(definition["sub_defs"]),
-                }
-                for definition in result_item["definitions"]
-            ]
-            return to_return
-
-        deduped_result_set = [get_result_item_with_deduped_sub_defs(definition) for definition in result_set]
-
-        # END HACK :)
-
-        return deduped_result_set
+        return nest_definitions(result_set)
 
     def query_morpheme_breakdown(self, word_id):
         """
@@ -191,6 +235,9 @@ class RootskiDBService:
         #     child_name="meanings", grp_sort_col="position")
         # return result_set
 
+        # only this query uses the ORM models, so the rest of the service works without them
+        from rootski.services.database.models.models import Breakdown
+
         # query sqlalchemy table for Breakdown where id is morpheme_id
         with Session(self._engine) as session:
             to_return = []
@@ -226,25 +273,30 @@ class RootskiDBService:
 
             return to_return
 
-    def query_adjective_forms(self, word_id):
-        query = sql_statements.ADJECTIVE_FORMS.format(word_id)
-        return self.run_query(query)
+    def query_adjective_forms(self, word_id, connection: Optional[Connection] = None):
+        return self.run_query(
+            sql_statements.ADJECTIVE_FORMS, params={"word_id": word_id}, connection=connection
+        )
 
-    def query_verb_conjugations(self, word_id):
-        query = sql_statements.VERB_CONJUGATIONS.format(word_id)
-        return self.run_query(query)
+    def query_verb_conjugations(self, word_id, connection: Optional[Connection] = None):
+        return self.run_query(
+            sql_statements.VERB_CONJUGATIONS, params={"word_id": word_id}, connection=connection
+        )
 
-    def query_aspectual_pairs(self, word_id):
-        query = sql_statements.ASPECTUAL_PAIRS.format(word_id)
-        return self.run_query(query)
+    def query_aspectual_pairs(self, word_id, connection: Optional[Connection] = None):
+        return self.run_query(
+            sql_statements.ASPECTUAL_PAIRS, params={"word_id": word_id}, connection=connection
+        )
 
-    def query_noun_declensions(self, word_id):
-        query = sql_statements.NOUN_DECLENSIONS.format(word_id)
-        return self.run_query(query)
+    def query_noun_declensions(self, word_id, connection: Optional[Connection] = None):
+        return self.run_query(
+            sql_statements.NOUN_DECLENSIONS, params={"word_id": word_id}, connection=connection
+        )
 
-    def query_example_sentences(self, word_id):
-        query = sql_statements.EXAMPLE_SENTENCES.format(word_id)
-        return self.run_query(query)
+    def query_example_sentences(self, word_id, connection: Optional[Connection] = None):
+        return self.run_query(
+            sql_statements.EXAMPLE_SENTENCES, params={"word_id": word_id}, connection=connection
+        )
 
     def fetch_word_data(self, word_id, main_word_type):
         """
@@ -261,31 +313,109 @@ class RootskiDBService:
         Returns:
             dict: payload-like object of all data to display on word page
         """
-
-        data = {
-            "word": self.query_word_by_id(word_id),
-            # "breakdown": self.query_morpheme_breakdown(word_id),
-            "definitions": self.query_definitions(word_id),
-            "sentences": self.query_example_sentences(word_id),
-        }
-
-        pos_specific_data = dict()
-        if main_word_type == "noun":
-            pos_specific_data = self.fetch_noun_data(word_id)
-        elif main_word_type == "verb":
-            pos_specific_data = self.fetch_verb_data(word_id)
-        elif main_word_type == "adjective":
-            pos_specific_data = self.fetch_adjective_data(word_id)
+        # run all of the queries over one pooled connection
+        with self.connect() as connection:
+            data = {
+                "word": self.query_word_by_id(word_id, connection=connection),
+                # "breakdown": self.query_morpheme_breakdown(word_id),
+                "definitions": self.query_definitions(word_id, connection=connection),
+                "sentences": self.query_example_sentences(word_id, connection=connection),
+            }
+
+            pos_specific_data = dict()
+            if main_word_type == "noun":
+                pos_specific_data = self.fetch_noun_data(word_id, connection=connection)
+            elif main_word_type == "verb":
+                pos_specific_data = self.fetch_verb_data(word_id, connection=connection)
+            elif main_word_type == "adjective":
+                pos_specific_data = self.fetch_adjective_data(word_id, connection=connection)
 
         data.update(pos_specific_data)
 
         return data
 
-    def fetch_adjective_data(self, word_id):
+    def fetch_words_data(self, word_ids: Iterable[int], raise_errors: bool = False) -> Dict[int, dict]:
+        """
+        Set-based version of ``fetch_word_data`` for many words at once.
+
+        Each query runs once for all of ``word_ids`` (with ``= ANY(:word_ids)``) rather
+        than once per word, and the rows are grouped by word afterwards. The POS
+        specific queries only run for the words of that part of speech, which is read
+        from the ``words`` table.
+
+        Args:
+            word_ids (list[int]): ids of words in the "words" table
+            raise_errors (bool): raise if any of the queries fails, rather than leaving its data
+                out (see ``run_query``); use this when a missing word would be mistaken for a deleted one
+
+        Returns:
+            dict[int, dict]: the ``fetch_word_data`` payload of each word that exists, by word id
+        """
+        word_ids: List[int] = [int(word_id) for word_id in dict.fromkeys(word_ids)]
+        if not word_ids:
+            return {}
+
+        # run all of the queries over one pooled connection
+        with self.connect() as connection:
+
+            def query_many(statement: str, ids: List[int]) -> List[Dict[str, Any]]:
+                if not ids:
+                    return []
+                return self.run_query(
+                    statement, params={"word_ids": ids}, connection=connection, raise_errors=raise_errors
+                )
+
+            words: Dict[int, Dict[str, Any]] = {
+                word["word_id"]: word for word in query_many(sql_statements.WORDS_BY_IDS, word_ids)
+            }
+            ids_by_pos: Dict[str, List[int]] = defaultdict(list)
+            for word_id, word in words.items():
+                ids_by_pos[word["pos"]].append(word_id)
+
+            definitions = group_rows_by_word_id(query_many(sql_statements.DEFINITIONS_BY_WORD_IDS, word_ids))
+            sentences = group_rows_by_word_id(
+                query_many(sql_statements.EXAMPLE_SENTENCES_BY_WORD_IDS, word_ids)
+            )
+            short_forms = group_rows_by_word_id(
+                query_many(sql_statements.ADJECTIVE_FORMS_BY_WORD_IDS, ids_by_pos["adjective"])
+            )
+            declensions = group_rows_by_word_id(
+                query_many(sql_statements.NOUN_DECLENSIONS_BY_WORD_IDS, ids_by_pos["noun"])
+            )
+            conjugations = group_rows_by_word_id(
+                query_many(sql_statements.VERB_CONJUGATIONS_BY_WORD_IDS, ids_by_pos["verb"])
+            )
+            aspectual_pair_rows = query_many(sql_statements.ASPECTUAL_PAIRS_BY_WORD_IDS, ids_by_pos["verb"])
+
+        # a pair belongs to both of its verbs
+        aspectual_pairs: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        for pair in aspectual_pair_rows:
+            for word_id in dict.fromkeys([pair["imp_word_id"], pair["pfv_word_id"]]):
+                aspectual_pairs[word_id].append(pair)
+
+        words_data: Dict[int, dict] = {}
+        for word_id, word in words.items():
+            data = {
+                "word": word,
+                "definitions": nest_definitions(definitions.get(word_id, [])),
+                "sentences": sentences.get(word_id, []),
+            }
+            if word["pos"] == "noun":
+                data["declensions"] = first_or_none(declensions.get(word_id))
+            elif word["pos"] == "verb":
+                data["conjugations"] = first_or_none(conjugations.get(word_id))
+                data["aspectual_pairs"] = aspectual_pairs.get(word_id, [])
+            elif word["pos"] == "adjective":
+                data["short_forms"] = first_or_none(short_forms.get(word_id))
+            words_data[word_id] = data
+
+        return words_data
+
+    def fetch_adjective_data(self, word_id, connection: Optional[Connection] = None):
         """
         1. Adjective short forms
         """
-        short_forms = self.query_adjective_forms(word_id)
+        short_forms = self.query_adjective_forms(word_id, connection=connection)
         if len(short_forms) > 0:
             short_forms = short_forms[0]
         else:
@@ -293,11 +423,11 @@ class RootskiDBService:
 
         return {"short_forms": short_forms}
 
-    def fetch_noun_data(self, word_id):
+    def fetch_noun_data(self, word_id, connection: Optional[Connection] = None):
         """
         1. Declensions
         """
-        declensions = self.query_noun_declensions(word_id)
+        declensions = self.query_noun_declensions(word_id, connection=connection)
         if len(declensions) > 0:
             declensions = declensions[0]
         else:
@@ -305,12 +435,12 @@ class RootskiDBService:
 
         return {"declensions": declensions}
 
-    def fetch_verb_data(self, word_id):
+    def fetch_verb_data(self, word_id, connection: Optional[Connection] = None):
         """
         1. Conjugations
         2. Aspectual Pairs
         """
-        conjugations = self.query_verb_conjugations(word_id)
+        conjugations = self.query_verb_conjugations(word_id, connection=connection)
         if len(conjugations) > 0:
             conjugations = conjugations[0]
         else:
@@ -318,5 +448,5 @@ class RootskiDBService:
 
         return {
             "conjugations": conjugations,
-            "aspectual_pairs": self.query_aspectual_pairs(word_id),
+            "aspectual_pairs": self.query_aspectual_pairs(word_id, connection=connection),
         }
@@ -1,3 +1,11 @@
+"""
+SQL statements run by :class:`rootski.services.database.non_orm.db_service.RootskiDBService`.
+
+The statements take bound parameters (e.g. ``:word_id``) instead of being built
+with ``str.format``, so they are safe from SQL injection and their text is the same
+for every word, which lets SQLAlchemy cache the compiled statements.
+"""
+
 WORD_BY_ID = """
 SELECT
     id as word_id
@@ -6,18 +14,18 @@ SELECT
     ,pos
     ,frequency
 FROM words
-WHERE words.id={word_id}
+WHERE words.id = :word_id
 """
 
 SEARCH_WORDS = """
 SELECT
 	id
 	,word
-    ,type
+    ,pos AS type
     ,frequency
 FROM words
-WHERE words.word LIKE "{search_key}%"
-LIMIT {limit};
+WHERE words.word LIKE :search_pattern ESCAPE '\\'
+LIMIT :limit;
 """
 
 SEARCH_MORPHEMES = """
@@ -26,8 +34,8 @@ SELECT
 	,morpheme
 	,"type"
 FROM morphemes
-WHERE morphemes.morpheme LIKE "%{search_key}%"
-LIMIT {limit}
+WHERE morphemes.morpheme LIKE :search_pattern ESCAPE '\\'
+LIMIT :limit
 """
 
 DEFINITIONS = """
@@ -49,7 +57,7 @@ INNER JOIN definitions
 ON definition_contents.child_id = definitions.id
 WHERE TRUE
     AND child_type != 'example'
-    AND words.id = {word_id};
+    AND words.id = :word_id;
 """
 
 MORPHEME_BREAKDOWN = """
@@ -68,7 +76,7 @@ LEFT JOIN morphemes
 ON breakdowns.morpheme_id = morphemes.morpheme_id
 LEFT JOIN family_meanings
 ON morphemes.family_id = family_meanings.family_id
-WHERE word_id = {};
+WHERE word_id = :word_id;
 """
 
 ADJECTIVE_FORMS = """
@@ -80,7 +88,7 @@ SELECT
 	,neut_short
 	,plural_short
 FROM adjectives
-WHERE word_id = {};
+WHERE word_id = :word_id;
 """
 
 VERB_CONJUGATIONS = """
@@ -105,7 +113,7 @@ SELECT
 	,"impr"
 	,"impr_pl"
 FROM conjugations
-WHERE word_id = {};
+WHERE word_id = :word_id;
 """
 
 ASPECTUAL_PAIRS = """
@@ -120,7 +128,7 @@ LEFT JOIN verb_pairs
 ON w1.id = verb_pairs.imp_word_id
 LEFT JOIN words w2
 ON w2.id = verb_pairs.pfv_word_id
-WHERE {} IN (verb_pairs.imp_word_id, verb_pairs.pfv_word_id);
+WHERE :word_id IN (verb_pairs.imp_word_id, verb_pairs.pfv_word_id);
 """
 
 NOUN_DECLENSIONS = """
@@ -142,7 +150,7 @@ SELECT
 	,dat_pl
 	,inst_pl
 FROM nouns
-WHERE word_id = {};
+WHERE word_id = :word_id;
 """
 
 EXAMPLE_SENTENCES = """
@@ -158,6 +166,143 @@ INNER JOIN sentences
 ON word_to_sentence.sentence_id = sentences.sentence_id
 INNER JOIN sentence_translations
 ON sentences.sentence_id = sentence_translations.sentence_id
-WHERE words.id = {}
+WHERE words.id = :word_id
 ORDER BY exact_match DESC;
 """
+
+
+###################################################
+# --- Batched statements for many words at once --- #
+###################################################
+
+# These take a list of word IDs as the ``:word_ids`` parameter, which psycopg2
+# sends as a postgres ARRAY. Every row includes the ``word_id`` it belongs to.
+
+WORDS_BY_IDS = """
+SELECT
+    id as word_id
+    ,word
+    ,accent
+    ,pos
+    ,frequency
+FROM words
+WHERE words.id = ANY(:word_ids)
+"""
+
+DEFINITIONS_BY_WORD_IDS = """
+-- definitions
+SELECT
+    words.id as "word_id"
+    ,word_defs.definition_id
+    ,word_defs."position" as "def_position"
+    ,definition_contents.child_id as "sub_def_id"
+    ,definition_contents."position" as "sub_def_position"
+    ,definitions.pos
+    ,definitions.definition
+    ,definitions.notes
+FROM words
+INNER JOIN word_defs
+ON words.id = word_defs.word_id
+INNER JOIN definition_contents
+ON word_defs.definition_id = definition_contents.definition_id
+INNER JOIN definitions
+ON definition_contents.child_id = definitions.id
+WHERE TRUE
+    AND child_type != 'example'
+    AND words.id = ANY(:word_ids);
+"""
+
+ADJECTIVE_FORMS_BY_WORD_IDS = """
+-- adjective
+SELECT
+    word_id
+	,comp
+	,fem_short
+	,masc_short
+	,neut_short
+	,plural_short
+FROM adjectives
+WHERE word_id = ANY(:word_ids);
+"""
+
+VERB_CONJUGATIONS_BY_WORD_IDS = """
+-- verb (conjugations + aspect)
+SELECT
+    word_id
+	,"aspect"
+	,"1st_per_sing"
+    ,"2nd_per_sing"
+	,"3rd_per_sing"
+	,"1st_per_pl"
+	,"2nd_per_pl"
+	,"3rd_per_pl"
+	,"past_m"
+	,"past_f"
+	,"past_n"
+	,"past_pl"
+	,"actv_part"
+	,"pass_part"
+	,"actv_past_part"
+	,"pass_past_part"
+	,"gerund"
+	,"impr"
+	,"impr_pl"
+FROM conjugations
+WHERE word_id = ANY(:word_ids);
+"""
+
+ASPECTUAL_PAIRS_BY_WORD_IDS = """
+-- verb (aspectual pair); a pair belongs to both its imperfective and perfective word
+SELECT
+	verb_pairs.imp_word_id
+	,w1.accent "imp_accent"
+	,verb_pairs.pfv_word_id
+	,w2.accent "pfv_accent"
+FROM words w1
+LEFT JOIN verb_pairs
+ON w1.id = verb_pairs.imp_word_id
+LEFT JOIN words w2
+ON w2.id = verb_pairs.pfv_word_id
+WHERE verb_pairs.imp_word_id = ANY(:word_ids) OR verb_pairs.pfv_word_id = ANY(:word_ids);
+"""
+
+NOUN_DECLENSIONS_BY_WORD_IDS = """
+-- noun (declensions)
+SELECT
+    word_id
+	,gender
+	,animate
+	,indeclinable
+	,nom
+	,acc
+	,prep
+	,gen
+	,dat
+	,inst
+	,nom_pl
+	,acc_pl
+	,prep_pl
+	,gen_pl
+	,dat_pl
+	,inst_pl
+FROM nouns
+WHERE word_id = ANY(:word_ids);
+"""
+
+EXAMPLE_SENTENCES_BY_WORD_IDS = """
+-- example sentences
+SELECT
+    words.id "word_id"
+	,sentence "rus"
+	,sentence_translations."translation" "eng"
+	,word_to_sentence.exact_match
+FROM words
+INNER JOIN word_to_sentence
+ON words.id = word_to_sentence.word_id
+INNER JOIN sentences
+ON word_to_sentence.sentence_id = sentences.sentence_id
+INNER JOIN sentence_translations
+ON sentences.sentence_id = sentence_translations.sentence_id
+WHERE words.id = ANY(:word_ids)
+ORDER BY words.id, exact_match DESC;
+"""
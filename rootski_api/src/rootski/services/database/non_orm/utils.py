@@ -1,25 +1,85 @@
-import numpy as np
-import pandas as pd
+import math
+from typing import TYPE_CHECKING, Any, Dict, Hashable, Iterable, List, Optional, Sequence
 
+if TYPE_CHECKING:
+    # only the methods of the given DataFrames are used, so pandas isn't needed at runtime
+    import pandas as pd
 
-def get_group_data(
-    group_df: pd.DataFrame,
-    *group_cols,
-):
-    first_row = group_df.iloc[0]
-    return {col: first_row[col] for col in group_cols}
 
+def df_to_records(df: "pd.DataFrame", columns: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Convert the rows of ``df`` to dicts of python values, with ``NaN`` replaced by ``None``.
+
+    Only ``columns`` (default: all) are converted. ``Series.tolist()`` converts a whole
+    column of numpy scalars to python scalars at once, which solves the JSON serialization
+    problem of numpy types without copying the frame with ``replace`` and ``astype(object)``.
+    """
+    columns = list(df.columns) if columns is None else list(dict.fromkeys(columns))
+    column_values: List[list] = [[_nan_to_none(v) for v in df[col].tolist()] for col in columns]
+    return [dict(zip(columns, row_values)) for row_values in zip(*column_values)]
+
+
+def _nan_to_none(value: Any) -> Any:
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def _sort_children(children: List[Dict[str, Any]], sort_col: str, ascending: bool) -> List[Dict[str, Any]]:
+    """Stable sort ``children`` by ``sort_col``; like pandas, missing values go last either way."""
+    present = [child for child in children if child[sort_col] is not None]
+    missing = [child for child in children if child[sort_col] is None]
+    return sorted(present, key=lambda child: child[sort_col], reverse=not ascending) + missing
+
+
+def collapse_records(
+    rows: Iterable[Dict[str, Any]],
+    groupby_col: str,
+    group_cols: Sequence[str],
+    child_cols: Sequence[str],
+    child_name: str,
+    grp_sort_col: Optional[str] = None,
+    grp_ascending: bool = True,
+    ch_sort_col: Optional[str] = None,
+    ch_ascending: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Nest rows that share a ``groupby_col`` value under a single group row in one pass.
+
+    The arguments are the same as :func:`collapse_df`. Rows whose ``groupby_col`` is ``None``
+    are dropped and groups are ordered by their ``groupby_col`` value, as ``df.groupby`` does.
+    """
+    groups: Dict[Hashable, Dict[str, Any]] = {}
+    for row in rows:
+        group_key = row[groupby_col]
+        if group_key is None:
+            continue
+
+        group_data: Optional[Dict[str, Any]] = groups.get(group_key)
+        if group_data is None:
+            # the group level values are taken from the first row of the group
+            group_data = {col: row[col] for col in group_cols}
+            group_data[child_name] = []
+            groups[group_key] = group_data
+
+        group_data[child_name].append({col: row[col] for col in child_cols})
 
-def get_group_children(group_df, *child_cols, sort_col=None, ascending=True):
-    child_df: pd.DataFrame = group_df[list(child_cols)]
-    if sort_col is not None:
-        child_df.sort_values(sort_col, ascending=ascending, inplace=True)
-    child_rows = child_df.to_dict(orient="records")
-    return child_rows
+    collapsed_rows: List[Dict[str, Any]] = [groups[group_key] for group_key in sorted(groups)]
+
+    if ch_sort_col is not None:
+        for group_data in collapsed_rows:
+            group_data[child_name] = _sort_children(
+                group_data[child_name], sort_col=ch_sort_col, ascending=ch_ascending
+            )
+
+    if grp_sort_col:
+        collapsed_rows = sorted(collapsed_rows, key=lambda row: row[grp_sort_col], reverse=not grp_ascending)
+
+    return collapsed_rows
 
 
 def collapse_df(
-    df: pd.DataFrame,
+    df: "pd.DataFrame",
     groupby_col,
     group_cols,
     child_cols,
@@ -42,24 +102,17 @@ def collapse_df(
         child_name (str): name of the child attribute
         ch_sort_col (str): one of the child_cols, sorts children within group by this column
     """
+    # only the columns that end up in the output are converted to python values
+    rows: List[Dict[str, Any]] = df_to_records(df, columns=[groupby_col, *group_cols, *child_cols])
 
-    collapsed_rows = list()
-
-    # solves JSON serialization problem by casting numpy types to python types
-    df = df.replace({np.nan: None})
-    df = df.astype(object)
-
-    groupby = df.groupby(groupby_col)
-    groups = list(groupby.groups.keys())
-
-    for group in groups:
-        group_df = groupby.get_group(group)
-        group_data = get_group_data(group_df, *group_cols)
-        group_children = get_group_children(group_df, *child_cols, sort_col=ch_sort_col, ascending=ch_ascending)
-        group_data[child_name] = group_children
-        collapsed_rows.append(group_data)
-
-    if grp_sort_col:
-        collapsed_rows = sorted(collapsed_rows, key=lambda row: row[grp_sort_col], reverse=not grp_ascending)
-
-    return collapsed_rows
+    return collapse_records(
+        rows,
+        groupby_col=groupby_col,
+        group_cols=group_cols,
+        child_cols=child_cols,
+        child_name=child_name,
+        grp_sort_col=grp_sort_col,
+        grp_ascending=grp_ascending,
+        ch_sort_col=ch_sort_col,
+        ch_ascending=ch_ascending,
+    )
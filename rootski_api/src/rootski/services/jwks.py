@@ -0,0 +1,246 @@
+"""
+Fetch, cache, and refresh the JSON Web Key Set (JWKS) of our Cognito user pool.
+
+Every API worker process (and every Lambda container) needs the JWKS to verify
+JWT tokens. Rather than having each process fetch the keys over HTTP when it starts,
+the keys are cached in a JSON file under ``Config.static_assets_dir``. The file is
+shared by all processes on the same host:
+
+1. On startup, a process reads the cached keys from disk. Only if the cache is missing
+   or stale does it fetch the keys from Cognito.
+2. Fetches are guarded by an exclusive file lock. When many workers boot at once, one
+   of them fetches the keys and the rest read the file it wrote.
+3. A daemon thread refreshes the keys periodically so that rotated keys are picked up
+   without a restart.
+4. If a token is signed with a key ID (``kid``) that we don't know about, the keys are
+   refetched right away--but at most once every ``min_refetch_interval_seconds``, so
+   that garbage tokens can't be used to flood Cognito with requests.
+"""
+
+import fcntl
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import httpx
+from loguru import logger
+from pydantic import BaseModel
+
+
+class JsonWebKey(BaseModel):
+    """
+    Learn about Cognito JWKs here:
+    https://docs.aws.amazon.com/cognito/latest/developerguide/amazon-cognito-user-pools-using-tokens-verifying-a-jwt.html
+    """
+
+    kid: str  # key ID
+    kty: str
+
+    class Config:
+        extra = "allow"
+
+
+class JsonWebKeySet(BaseModel):
+    keys: List[JsonWebKey]
+
+    class Config:
+        extra = "allow"
+
+    def has_key(self, kid: str) -> bool:
+        return any(key.kid == kid for key in self.keys)
+
+
+def get_jwks(jwk_url: str) -> JsonWebKeySet:
+    response = httpx.get(jwk_url)
+    return JsonWebKeySet(**response.json())
+
+
+class JwksProvider:
+    def __init__(
+        self,
+        jwks_url: str,
+        cache_fpath: Path,
+        refresh_interval_seconds: float,
+        min_refetch_interval_seconds: float,
+        fetch_jwks: Callable[[str], JsonWebKeySet] = get_jwks,
+    ):
+        """
+        Provide an up-to-date JWKS to the auth service.
+
+        :param jwks_url: URL of the Cognito ``.well-known/jwks.json`` endpoint
+        :param cache_fpath: JSON file where the keys are cached; the file is shared between processes
+        :param refresh_interval_seconds: how often the background thread refreshes the keys;
+            cached keys older than this are considered stale
+        :param min_refetch_interval_seconds: minimum time between two fetches triggered by
+            a token signed with an unknown ``kid``
+        :param fetch_jwks: function used to fetch the keys over the network
+        """
+        self.jwks_url = jwks_url
+        self.cache_fpath = Path(cache_fpath)
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.min_refetch_interval_seconds = min_refetch_interval_seconds
+        self._fetch_jwks = fetch_jwks
+
+        self._jwks: Optional[JsonWebKeySet] = None
+        self._fetched_at: float = 0.0
+        self._lock = threading.Lock()
+        self._stop_refreshing = threading.Event()
+        self._refresh_thread: Optional[threading.Thread] = None
+
+    @property
+    def lock_fpath(self) -> Path:
+        return self.cache_fpath.with_name(self.cache_fpath.name + ".lock")
+
+    @property
+    def jwks(self) -> Optional[JsonWebKeySet]:
+        return self._jwks
+
+    def init(self, start_background_refresh: bool = True) -> JsonWebKeySet:
+        """
+        Load the keys from the disk cache, falling back to Cognito if the cache is stale.
+
+        :param start_background_refresh: start a daemon thread that refreshes the keys
+            every ``refresh_interval_seconds``
+        """
+        with self._lock:
+            self._load(max_age_seconds=self.refresh_interval_seconds)
+        if start_background_refresh:
+            self.start_background_refresh()
+        return self._jwks
+
+    def get_jwks(self) -> JsonWebKeySet:
+        if self._jwks is None:
+            return self.init(start_background_refresh=False)
+        return self._jwks
+
+    def get_jwks_for_kid(self, kid: Optional[str]) -> JsonWebKeySet:
+        """
+        Return the keys, refetching them first if none of them has the key ID ``kid``.
+
+        Refetches are rate limited to one every ``min_refetch_interval_seconds``
+        (shared across processes through the disk cache). If the refetch fails, the keys
+        we already have are returned, so the token is rejected rather than raising.
+        """
+        jwks = self.get_jwks()
+        if kid is None or jwks.has_key(kid):
+            return jwks
+
+        with self._lock:
+            # another thread may have refreshed the keys while we waited for the lock
+            if self._jwks.has_key(kid):
+                return self._jwks
+            if time.time() - self._fetched_at < self.min_refetch_interval_seconds:
+                logger.warning(f"Unknown JWK kid {kid}, but the keys were fetched too recently to refetch")
+                return self._jwks
+            logger.info(f"Unknown JWK kid {kid}, refetching Cognito keys")
+            try:
+                self._load(max_age_seconds=self.min_refetch_interval_seconds)
+            except Exception as e:  # pylint: disable=broad-except
+                # the token is rejected as signed by an unknown key; count the failed attempt
+                # toward the rate limit so that an unreachable Cognito isn't retried on every request
+                logger.error(f"Failed to refetch the Cognito JWKS: {str(e)}")
+                self._fetched_at = time.time()
+
+        return self._jwks
+
+    def refresh(self) -> JsonWebKeySet:
+        """Refresh the keys unless another process already refreshed the disk cache recently."""
+        with self._lock:
+            self._load(max_age_seconds=self.refresh_interval_seconds)
+        return self._jwks
+
+    def start_background_refresh(self):
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+        self._stop_refreshing.clear()
+        self._refresh_thread = threading.Thread(
+            target=self._refresh_periodically, name="jwks-refresh", daemon=True
+        )
+        self._refresh_thread.start()
+
+    def stop_background_refresh(self):
+        self._stop_refreshing.set()
+        if self._refresh_thread:
+            self._refresh_thread.join()
+            self._refresh_thread = None
+
+    def _refresh_periodically(self):
+        while not self._stop_refreshing.wait(timeout=self.refresh_interval_seconds):
+            try:
+                self.refresh()
+            except Exception as e:  # pylint: disable=broad-except
+                # keep serving the keys we have; the next refresh may succeed
+                logger.error(f"Failed to refresh the Cognito JWKS: {str(e)}")
+
+    def _load(self, max_age_seconds: float):
+        """
+        Adopt the disk cache if it is fresher than ``max_age_seconds``, otherwise fetch the keys.
+
+        Must be called while holding ``self._lock``.
+        """
+        cached: Optional[Tuple[JsonWebKeySet, float]] = self._read_cache()
+        if cached and time.time() - cached[1] < max_age_seconds:
+            self._jwks, self._fetched_at = cached
+            return
+
+        with exclusive_file_lock(self.lock_fpath):
+            # while we were waiting on the lock, another process may have fetched the keys
+            cached = self._read_cache()
+            if cached and time.time() - cached[1] < max_age_seconds:
+                self._jwks, self._fetched_at = cached
+                return
+            self._fetch_and_write_cache()
+
+    def _fetch_and_write_cache(self):
+        logger.info("Fetching Cognito Keys")
+        jwks: JsonWebKeySet = self._fetch_jwks(self.jwks_url)
+        fetched_at: float = time.time()
+        logger.info(f"Fetched these keys: {str(jwks.json())}")
+
+        self._jwks, self._fetched_at = jwks, fetched_at
+
+        # write to a temporary file and rename it so readers never see a partially written file
+        tmp_fpath = self.cache_fpath.with_name(f"{self.cache_fpath.name}.{os.getpid()}.tmp")
+        try:
+            tmp_fpath.write_text(json.dumps({"fetched_at": fetched_at, "jwks": jwks.dict()}))
+            os.replace(tmp_fpath, self.cache_fpath)
+        except OSError as e:
+            logger.warning(f"Could not write the JWKS disk cache at {self.cache_fpath}: {str(e)}")
+
+    def _read_cache(self) -> Optional[Tuple[JsonWebKeySet, float]]:
+        try:
+            cache: dict = json.loads(self.cache_fpath.read_text())
+            return JsonWebKeySet(**cache["jwks"]), float(cache["fetched_at"])
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable JWKS cache file {self.cache_fpath}: {str(e)}")
+            return None
+
+
+@contextmanager
+def exclusive_file_lock(lock_fpath: Path) -> Iterator[None]:
+    """
+    Hold an exclusive ``flock`` on ``lock_fpath``; blocks until other processes release it.
+
+    If the lock file can't be created (e.g. the directory is on a read-only filesystem),
+    the body runs without the lock rather than failing.
+    """
+    try:
+        lock_fpath.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = open(lock_fpath, "a")  # pylint: disable=consider-using-with
+    except OSError as e:
+        logger.warning(f"Could not create lock file {lock_fpath}, continuing without it: {str(e)}")
+        yield
+        return
+
+    with lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,117 @@
+from typing import Any, Dict, List
+
+import pytest
+from rootski.services.database.dynamo.actions import dynamo as dynamo_actions
+from rootski.services.database.dynamo.db_service import DBService as DynamoDBService
+from starlette.testclient import TestClient
+from tests.fixtures.seed_data import seed_data
+
+WORDS_WITH_BREAKDOWNS_QUERY = """
+query ($ids: [String!]!) {
+  getWordsByIds(ids: $ids) {
+    id
+    word
+    pos
+    breakdown {
+      word
+      breakdownItems {
+        position
+        morpheme
+        morphemeFamily {
+          id
+          morphemes { morpheme }
+        }
+      }
+    }
+  }
+}
+"""
+
+
+@pytest.fixture
+def batch_get_calls(monkeypatch) -> List[int]:
+    """Record the number of keys in every ``BatchGetItem`` request."""
+    calls: List[int] = []
+    get_chunk = dynamo_actions._batch_get_chunk
+
+    def counting_get_chunk(keys, db):
+        calls.append(len(keys))
+        return get_chunk(keys=keys, db=db)
+
+    monkeypatch.setattr(dynamo_actions, "_batch_get_chunk", counting_get_chunk)
+    return calls
+
+
+@pytest.mark.parametrize(["disable_auth", "act_as_admin"], [(True, False)])
+def test__graphql__words_with_breakdowns(
+    dynamo_client: TestClient, dynamo_db_service: DynamoDBService, batch_get_calls: List[int]
+):
+    seed_data(rootski_dynamo_table=dynamo_db_service.rootski_table)
+
+    response = dynamo_client.post(
+        "/graphql", json={"query": WORDS_WITH_BREAKDOWNS_QUERY, "variables": {"ids": ["7", "18", "999"]}}
+    )
+    result: Dict[str, Any] = response.json()
+
+    assert "errors" not in result
+    word_7, word_18, missing_word = result["data"]["getWordsByIds"]
+
+    assert word_7["word"] == "быть"
+    assert word_7["breakdown"]["word"] == "быть"
+    bi_item, ty_item = word_7["breakdown"]["breakdownItems"]
+    assert bi_item["morphemeFamily"]["id"] == "934"
+    assert ty_item["morphemeFamily"] is None
+
+    assert word_18["breakdown"] is None
+    assert missing_word is None
+
+    # one BatchGetItem per level of the query: words, breakdowns, morpheme families
+    assert batch_get_calls == [3, 2, 1]
+    assert result["extensions"]["cost"]["estimated_dynamo_reads"] == 3 * (1 + 1 + 5)
+    assert result["extensions"]["cost"]["actual_dynamo_reads"] == 3 + 2 + 1
+
+
+@pytest.mark.parametrize(["disable_auth", "act_as_admin"], [(True, False)])
+def test__graphql__words_and_morpheme_families_are_shared_between_requests(
+    dynamo_client: TestClient, dynamo_db_service: DynamoDBService, batch_get_calls: List[int]
+):
+    seed_data(rootski_dynamo_table=dynamo_db_service.rootski_table)
+
+    for _ in range(3):
+        response = dynamo_client.post(
+            "/graphql", json={"query": WORDS_WITH_BREAKDOWNS_QUERY, "variables": {"ids": ["7", "18"]}}
+        )
+        assert "errors" not in response.json()
+
+    # after the first request, only the (mutable) breakdowns are fetched from dynamo
+    assert batch_get_calls == [2, 2, 1, 2, 2]
+
+
+@pytest.mark.parametrize(["disable_auth", "act_as_admin"], [(True, False)])
+def test__graphql__word_not_found(dynamo_client: TestClient, dynamo_db_service: DynamoDBService):
+    seed_data(rootski_dynamo_table=dynamo_db_service.rootski_table)
+
+    response = dynamo_client.post("/graphql", json={"query": '{ getWordById(id: "999") { id } }'})
+    result: Dict[str, Any] = response.json()
+
+    assert result["data"] is None
+    assert "No word with ID 999" in result["errors"][0]["message"]
+
+
+@pytest.mark.parametrize(["disable_auth", "act_as_admin"], [(True, False)])
+def test__graphql__rejects_queries_over_the_dynamo_budget(
+    dynamo_client: TestClient, dynamo_db_service: DynamoDBService, batch_get_calls: List[int]
+):
+    seed_data(rootski_dynamo_table=dynamo_db_service.rootski_table)
+    config = dynamo_client.app.state.config
+    dynamo_client.app.state.config = config.copy(update={"graphql_max_dynamo_reads_per_query": 20})
+
+    ids = [str(word_id) for word_id in range(3)]
+    response = dynamo_client.post(
+        "/graphql", json={"query": WORDS_WITH_BREAKDOWNS_QUERY, "variables": {"ids": ids}}
+    )
+    result: Dict[str, Any] = response.json()
+
+    assert result["data"] is None
+    assert "over the limit of 20" in result["errors"][0]["message"]
+    assert batch_get_calls == []
@@ -0,0 +1,173 @@
+from typing import Any, Dict, List, Optional
+
+import pytest
+from rootski.gql.pagination import DynamoCursor
+from rootski.services.database.dynamo.db_service import DBService as DynamoDBService
+from rootski.services.database.dynamo.models.breakdown import Breakdown
+from rootski.services.database.dynamo.models.morpheme_family_words import (
+    MorphemeFamilyWord,
+    make_morpheme_family_words_chunks,
+)
+from starlette.testclient import TestClient
+from tests.constants import TEST_USER
+from tests.fixtures.seed_data import seed_data
+
+MY_BREAKDOWNS_QUERY = """
+query ($first: Int!, $after: String) {
+  getMyBreakdowns(first: $first, after: $after) {
+    pageInfo { endCursor hasNextPage hasPreviousPage }
+    edges { node { wordId word } }
+  }
+}
+"""
+
+WORDS_IN_FAMILY_QUERY = """
+query ($familyId: String!, $first: Int!, $after: String) {
+  getWordsInMorphemeFamily(morphemeFamilyId: $familyId, first: $first, after: $after) {
+    pageInfo { endCursor hasNextPage }
+    edges { node { id word } }
+  }
+}
+"""
+
+
+def make_breakdown(word_id: int, user_email: str) -> Breakdown:
+    return Breakdown(
+        word=f"word-{word_id}",
+        word_id=word_id,
+        submitted_by_user_email=user_email,
+        is_verified=False,
+        is_inference=False,
+        date_submitted="2022-02-15 05:45:18.740114",
+        date_verified=None,
+        breakdown_items=[],
+    )
+
+
+def fetch_all_pages(client: TestClient, query: str, field_name: str, **variables) -> List[Dict[str, Any]]:
+    pages: List[Dict[str, Any]] = []
+    after: Optional[str] = None
+    while True:
+        response = client.post("/graphql", json={"query": query, "variables": {**variables, "after": after}})
+        result = response.json()
+        assert "errors" not in result, result
+        page = result["data"][field_name]
+        pages.append(page)
+        if not page["pageInfo"]["hasNextPage"]:
+            return pages
+        after = page["pageInfo"]["endCursor"]
+
+
+@pytest.mark.parametrize(["disable_auth", "act_as_admin"], [(True, False)])
+def test__get_my_breakdowns__pages_through_gsi1(dynamo_client: TestClient, dynamo_db_service: DynamoDBService):
+    table = dynamo_db_service.rootski_table
+    for word_id in range(100, 105):
+        table.put_item(
+            Item=make_breakdown(word_id=word_id, user_email=TEST_USER["email"]).to_item(is_official=True)
+        )
+    table.put_item(
+        Item=make_breakdown(word_id=200, user_email="someone-else@gmail.com").to_item(is_official=True)
+    )
+
+    pages = fetch_all_pages(dynamo_client, MY_BREAKDOWNS_QUERY, "getMyBreakdowns", first=2)
+
+    assert [len(page["edges"]) for page in pages] == [2, 2, 1]
+    assert [page["pageInfo"]["hasPreviousPage"] for page in pages] == [False, True, True]
+    word_ids = [edge["node"]["wordId"] for page in pages for edge in page["edges"]]
+    assert sorted(word_ids) == [str(word_id) for word_id in range(100, 105)]
+
+
+@pytest.mark.parametrize(["disable_auth", "act_as_admin"], [(True, False)])
+def test__get_my_breakdowns__counts_the_items_read(
+    dynamo_client: TestClient, dynamo_db_service: DynamoDBService
+):
+    table = dynamo_db_service.rootski_table
+    for word_id in range(100, 103):
+        table.put_item(
+            Item=make_breakdown(word_id=word_id, user_email=TEST_USER["email"]).to_item(is_official=True)
+        )
+
+    response = dynamo_client.post("/graphql", json={"query": MY_BREAKDOWNS_QUERY, "variables": {"first": 2}})
+    first_page: Dict[str, Any] = response.json()
+    response = dynamo_client.post("/graphql", json={"query": MY_BREAKDOWNS_QUERY, "variables": {"first": 5}})
+    last_page: Dict[str, Any] = response.json()
+
+    # a page reads one more item than it returns to find out whether there is a next page
+    assert first_page["extensions"]["cost"]["actual_dynamo_reads"] == 3
+    assert last_page["extensions"]["cost"]["actual_dynamo_reads"] == 3
+
+
+@pytest.mark.parametrize(["disable_auth", "act_as_admin"], [(True, False)])
+def test__get_words_in_morpheme_family__pages_through_the_index(
+    dynamo_client: TestClient, dynamo_db_service: DynamoDBService
+):
+    seed_data(rootski_dynamo_table=dynamo_db_service.rootski_table)
+    # word 999 is in the index but has no Word item, so it gets no edge
+    index_words = [
+        MorphemeFamilyWord(word_id="50", word="сказать", frequency=3),
+        MorphemeFamilyWord(word_id="7", word="быть", frequency=1),
+        MorphemeFamilyWord(word_id="999", word="нет", frequency=2),
+        MorphemeFamilyWord(word_id="18", word="они", frequency=4),
+    ]
+    for chunk in make_morpheme_family_words_chunks(family_id="42", words=index_words):
+        dynamo_db_service.rootski_table.put_item(Item=chunk.to_item())
+
+    (page,) = fetch_all_pages(
+        dynamo_client, WORDS_IN_FAMILY_QUERY, "getWordsInMorphemeFamily", familyId="42", first=10
+    )
+    assert [edge["node"]["word"] for edge in page["edges"]] == ["быть", "сказать", "они"]
+
+    # each word appears once across pages, from most to least common
+    pages = fetch_all_pages(
+        dynamo_client, WORDS_IN_FAMILY_QUERY, "getWordsInMorphemeFamily", familyId="42", first=1
+    )
+    assert len(pages) == 4
+    assert [edge["node"]["word"] for page in pages for edge in page["edges"]] == ["быть", "сказать", "они"]
+
+
+@pytest.mark.parametrize(["disable_auth", "act_as_admin"], [(True, False)])
+def test__get_words_in_morpheme_family__counts_the_items_read(
+    dynamo_client: TestClient, dynamo_db_service: DynamoDBService
+):
+    seed_data(rootski_dynamo_table=dynamo_db_service.rootski_table)
+    index_words = [MorphemeFamilyWord(word_id="7", word="быть", frequency=1)]
+    for chunk in make_morpheme_family_words_chunks(family_id="42", words=index_words):
+        dynamo_db_service.rootski_table.put_item(Item=chunk.to_item())
+
+    response = dynamo_client.post(
+        "/graphql", json={"query": WORDS_IN_FAMILY_QUERY, "variables": {"familyId": "42", "first": 10}}
+    )
+
+    # the first chunk of the index and the word
+    assert response.json()["extensions"]["cost"]["actual_dynamo_reads"] == 1 + 1
+
+
+@pytest.mark.parametrize(["disable_auth", "act_as_admin"], [(True, False)])
+def test__pagination__rejects_foreign_cursors(dynamo_client: TestClient, dynamo_db_service: DynamoDBService):
+    table = dynamo_db_service.rootski_table
+    for word_id in range(100, 103):
+        table.put_item(
+            Item=make_breakdown(word_id=word_id, user_email=TEST_USER["email"]).to_item(is_official=True)
+        )
+
+    response = dynamo_client.post("/graphql", json={"query": MY_BREAKDOWNS_QUERY, "variables": {"first": 1}})
+    cursor: str = response.json()["data"]["getMyBreakdowns"]["pageInfo"]["endCursor"]
+
+    response = dynamo_client.post(
+        "/graphql",
+        json={"query": WORDS_IN_FAMILY_QUERY, "variables": {"familyId": "42", "first": 1, "after": cursor}},
+    )
+    assert "does not belong to this connection" in response.json()["errors"][0]["message"]
+
+    # a cursor of the right connection that doesn't hold a position
+    cursor = DynamoCursor(connection="words-in-morpheme-family:42", key={"pk": "WORD#1"}).to_cursor()
+    response = dynamo_client.post(
+        "/graphql",
+        json={"query": WORDS_IN_FAMILY_QUERY, "variables": {"familyId": "42", "first": 1, "after": cursor}},
+    )
+    assert "is not a valid cursor" in response.json()["errors"][0]["message"]
+
+    response = dynamo_client.post(
+        "/graphql", json={"query": MY_BREAKDOWNS_QUERY, "variables": {"first": 1000, "after": None}}
+    )
+    assert "'first' must be between 1 and 100" in response.json()["errors"][0]["message"]
@@ -0,0 +1,40 @@
+import pytest
+from mypy_boto3_dynamodb.service_resource import _Table
+from rootski.services.database.dynamo.models.morpheme_family_words import (
+    MorphemeFamilyWord,
+    make_morpheme_family_words_chunks,
+)
+from starlette.testclient import TestClient
+
+from rootski import schemas
+
+MORPHEME_FAMILY_ID = "934"
+
+
+@pytest.fixture
+def seed_morpheme_family_words(rootski_dynamo_table: _Table) -> None:
+    words = [
+        MorphemeFamilyWord(word_id="50", word="сказать", frequency=30),
+        MorphemeFamilyWord(word_id="7", word="быть", frequency=7),
+        MorphemeFamilyWord(word_id="18", word="они", frequency=18),
+    ]
+    for chunk in make_morpheme_family_words_chunks(family_id=MORPHEME_FAMILY_ID, words=words):
+        rootski_dynamo_table.put_item(Item=chunk.to_item())
+
+
+@pytest.mark.parametrize(["disable_auth", "act_as_admin"], [(True, False)])
+def test__get_related_words(dynamo_client: TestClient, seed_morpheme_family_words: None):
+    response = dynamo_client.get(
+        f"/morpheme_family/{MORPHEME_FAMILY_ID}/words", params={"offset": 1, "limit": 1}
+    )
+    assert response.status_code == 200
+
+    related_words = schemas.RelatedWordsResponse(**response.json())
+    assert related_words.total == 3
+    assert related_words.words == [schemas.RelatedWord(word_id="18", word="они", frequency=18)]
+
+
+@pytest.mark.parametrize(["disable_auth", "act_as_admin"], [(True, False)])
+def test__get_related_words__invalid_limit(dynamo_client: TestClient):
+    response = dynamo_client.get(f"/morpheme_family/{MORPHEME_FAMILY_ID}/words", params={"limit": 1000})
+    assert response.status_code == 422
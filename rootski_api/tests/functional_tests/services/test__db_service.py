@@ -0,0 +1,185 @@
+"""
+Run the ``RootskiDBService`` queries against postgres.
+
+These tests require the postgres database in ``tests/resources/docker-compose.yml``, or another
+one that the ``ROOTSKI__POSTGRES_*`` env vars (defaults in ``tests/resources/test.env``) point at.
+They are skipped if it can't be reached. The tables are created in a schema of their own,
+which is dropped afterwards.
+"""
+import os
+from typing import Dict, List
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+from rootski.services.database.non_orm.db_service import RootskiDBService
+
+pytest.importorskip("psycopg2")
+
+SCHEMA = "test_db_service"
+
+CONJUGATION_COLUMNS = [
+    "1st_per_sing",
+    "2nd_per_sing",
+    "3rd_per_sing",
+    "1st_per_pl",
+    "2nd_per_pl",
+    "3rd_per_pl",
+    "past_m",
+    "past_f",
+    "past_n",
+    "past_pl",
+    "actv_part",
+    "pass_part",
+    "actv_past_part",
+    "pass_past_part",
+    "gerund",
+    "impr",
+    "impr_pl",
+]
+DECLENSION_COLUMNS = ["nom", "acc", "prep", "gen", "dat", "inst"]
+DECLENSION_COLUMNS += [f"{case}_pl" for case in DECLENSION_COLUMNS]
+
+
+def text_columns(columns: List[str]) -> str:
+    return ", ".join(f'"{column}" TEXT' for column in columns)
+
+
+# just the columns that the statements in sql_statements read
+CREATE_TABLES_SQL = f"""
+CREATE TABLE words (id INTEGER PRIMARY KEY, word TEXT, accent TEXT, pos TEXT, frequency INTEGER);
+CREATE TABLE definitions (id INTEGER PRIMARY KEY, pos TEXT, definition TEXT, notes TEXT);
+CREATE TABLE word_defs (word_id INTEGER, definition_id INTEGER, "position" INTEGER);
+CREATE TABLE definition_contents (
+    definition_id INTEGER, child_id INTEGER, child_type TEXT, "position" INTEGER
+);
+CREATE TABLE adjectives (
+    word_id INTEGER, comp TEXT, fem_short TEXT, masc_short TEXT, neut_short TEXT, plural_short TEXT
+);
+CREATE TABLE conjugations (word_id INTEGER, aspect TEXT, {text_columns(CONJUGATION_COLUMNS)});
+CREATE TABLE verb_pairs (imp_word_id INTEGER, pfv_word_id INTEGER);
+CREATE TABLE nouns (
+    word_id INTEGER, gender TEXT, animate BOOLEAN, indeclinable BOOLEAN, {text_columns(DECLENSION_COLUMNS)}
+);
+CREATE TABLE sentences (sentence_id INTEGER, sentence TEXT);
+CREATE TABLE sentence_translations (sentence_id INTEGER, "translation" TEXT);
+CREATE TABLE word_to_sentence (word_id INTEGER, sentence_id INTEGER, exact_match BOOLEAN);
+"""
+
+WORDS = [
+    {"id": 1, "word": "год", "accent": "го'д", "pos": "noun", "frequency": 10},
+    {"id": 2, "word": "делать", "accent": "де'лать", "pos": "verb", "frequency": 20},
+    {"id": 3, "word": "сделать", "accent": "сде'лать", "pos": "verb", "frequency": 30},
+    {"id": 4, "word": "новый", "accent": "но'вый", "pos": "adjective", "frequency": 40},
+    {"id": 5, "word": "уже", "accent": "уже'", "pos": "adverb", "frequency": 50},
+]
+
+ROWS: Dict[str, List[dict]] = {
+    "words": WORDS,
+    "definitions": [
+        {"id": 100, "pos": "noun", "definition": "year", "notes": None},
+        {"id": 101, "pos": "noun", "definition": "age", "notes": "plural"},
+        {"id": 200, "pos": "verb", "definition": "to do", "notes": None},
+        {"id": 300, "pos": "verb", "definition": "to have done", "notes": None},
+    ],
+    "word_defs": [
+        {"word_id": 1, "definition_id": 10, "position": 0},
+        {"word_id": 2, "definition_id": 20, "position": 0},
+        {"word_id": 3, "definition_id": 30, "position": 0},
+    ],
+    "definition_contents": [
+        {"definition_id": 10, "child_id": 101, "child_type": "definition", "position": 1},
+        {"definition_id": 10, "child_id": 100, "child_type": "definition", "position": 0},
+        {"definition_id": 20, "child_id": 200, "child_type": "definition", "position": 0},
+        {"definition_id": 30, "child_id": 300, "child_type": "definition", "position": 0},
+        {"definition_id": 30, "child_id": 301, "child_type": "example", "position": 1},
+    ],
+    "adjectives": [
+        {
+            "word_id": 4,
+            "comp": "нове'е",
+            "fem_short": "нова'",
+            "masc_short": "но'в",
+            "neut_short": "но'во",
+            "plural_short": "но'вы",
+        }
+    ],
+    "conjugations": [
+        {"word_id": 2, "aspect": "impf", "past_m": "де'лал"},
+        {"word_id": 3, "aspect": "perf", "past_m": "сде'лал"},
+    ],
+    "verb_pairs": [{"imp_word_id": 2, "pfv_word_id": 3}],
+    "nouns": [
+        {"word_id": 1, "gender": "m", "animate": False, "indeclinable": False, "nom": "го'д", "gen_pl": "ле'т"}
+    ],
+    "sentences": [{"sentence_id": 1, "sentence": "Что делать?"}, {"sentence_id": 2, "sentence": "Новый год."}],
+    "sentence_translations": [
+        {"sentence_id": 1, "translation": "What is to be done?"},
+        {"sentence_id": 2, "translation": "New year."},
+    ],
+    "word_to_sentence": [
+        {"word_id": 2, "sentence_id": 1, "exact_match": True},
+        {"word_id": 1, "sentence_id": 2, "exact_match": True},
+        {"word_id": 4, "sentence_id": 2, "exact_match": False},
+    ],
+}
+
+
+def get_postgres_url() -> str:
+    return "postgresql+psycopg2://{user}:{password}@{host}:{port}/{db}".format(
+        user=os.environ["ROOTSKI__POSTGRES_USER"],
+        password=os.environ["ROOTSKI__POSTGRES_PASSWORD"],
+        host=os.environ["ROOTSKI__POSTGRES_HOST"],
+        port=os.environ["ROOTSKI__POSTGRES_PORT"],
+        db=os.environ["ROOTSKI__POSTGRES_DB"],
+    )
+
+
+@pytest.fixture(scope="module")
+def engine() -> Engine:
+    admin_engine = create_engine(get_postgres_url())
+    try:
+        with admin_engine.begin() as connection:
+            connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    except OperationalError as error:
+        pytest.skip(f"postgres isn't reachable: {error}")
+
+    engine = create_engine(get_postgres_url(), connect_args={"options": f"-csearch_path={SCHEMA}"})
+    with engine.begin() as connection:
+        connection.execute(text(CREATE_TABLES_SQL))
+        for table_name, rows in ROWS.items():
+            for row in rows:
+                columns = ", ".join(f'"{column}"' for column in row)
+                values = ", ".join(f":{column}" for column in row)
+                connection.execute(text(f"INSERT INTO {table_name} ({columns}) VALUES ({values})"), row)
+
+    yield engine
+
+    engine.dispose()
+    with admin_engine.begin() as connection:
+        connection.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+    admin_engine.dispose()
+
+
+@pytest.fixture
+def db(engine: Engine) -> RootskiDBService:
+    return RootskiDBService(engine=engine)
+
+
+def test__fetch_words_data__matches_fetch_word_data(db: RootskiDBService):
+    word_ids = [word["id"] for word in WORDS]
+
+    words_data = db.fetch_words_data(word_ids=word_ids + [404], raise_errors=True)
+
+    assert words_data == {word["id"]: db.fetch_word_data(word["id"], word["pos"]) for word in WORDS}
+    assert [d["definition_id"] for d in words_data[1]["definitions"][0]["definitions"]] == [10]
+    assert words_data[2]["aspectual_pairs"] == words_data[3]["aspectual_pairs"]
+    assert words_data[3]["definitions"][0]["definitions"][0]["sub_defs"][0]["definition"] == "to have done"
+
+
+def test__search_words(db: RootskiDBService):
+    assert db.search_words("де") == [{"id": 2, "word": "делать", "type": "verb", "frequency": 20}]
+    assert db.search_words("%") == []
@@ -0,0 +1,81 @@
+from graphql import parse
+from rootski.gql.cost import estimate_query_cost
+from rootski.gql.pagination import MAX_PAGE_SIZE
+from rootski.gql.schema import SCHEMA
+
+WORDS_QUERY = """
+query ($ids: [String!]!) {
+  getWordsByIds(ids: $ids) {
+    word
+    breakdown {
+      breakdownItems {
+        ...family
+      }
+    }
+  }
+}
+
+fragment family on BreakdownItem {
+  morphemeFamily { id }
+}
+"""
+
+
+def estimate(query: str, **variables) -> int:
+    return estimate_query_cost(schema=SCHEMA._schema, document=parse(query), variables=variables)
+
+
+def test__estimate_query_cost__single_word():
+    assert estimate('{ getWordById(id: "7") { word pos } }') == 1
+    assert estimate('{ getWordById(id: "7") { breakdown { word } } }') == 2
+
+
+def test__estimate_query_cost__scales_with_list_arguments():
+    # per word: the word + its breakdown + 5 (assumed) morpheme families
+    assert estimate(WORDS_QUERY, ids=["1", "2", "3"]) == 3 * (1 + 1 + 5)
+    assert estimate(WORDS_QUERY, ids=[str(i) for i in range(100)]) == 100 * (1 + 1 + 5)
+
+
+def test__estimate_query_cost__ignores_unknown_fields():
+    assert estimate('{ getWordById(id: "7") { notAField { id } } }') == 1
+
+
+def test__estimate_query_cost__connections_size_their_edges():
+    query = """
+    query ($first: Int!) {
+      getWordsInMorphemeFamily(morphemeFamilyId: "42", first: $first) {
+        pageInfo { hasNextPage }
+        edges { node { word breakdown { word } } }
+      }
+    }
+    """
+    # per word: the gsi1 item + the word + its breakdown
+    assert estimate(query, first=30) == 30 * 2 + 30 * 1
+
+
+def test__estimate_query_cost__ignores_variables_of_the_wrong_type():
+    query = """
+    query ($first: Int!) {
+      getMyBreakdowns(first: $first) { edges { node { word } } }
+    }
+    """
+    # variables aren't coerced before the estimate, so this must not raise
+    assert estimate(query, first="abc") == estimate(query, first=MAX_PAGE_SIZE)
+    assert estimate(query, first={"not": "an int"}) == estimate(query, first=MAX_PAGE_SIZE)
+
+
+def test__estimate_query_cost__page_sizes_out_of_range_count_as_the_max_page_size():
+    query = """
+    query ($first: Int!, $ids: [String!]!) {
+      getMyBreakdowns(first: $first) { edges { node { word } } }
+      getWordsByIds(ids: $ids) { word breakdown { word } }
+    }
+    """
+    ids = [str(i) for i in range(20000)]
+    max_page_cost = estimate(query, first=MAX_PAGE_SIZE, ids=ids)
+
+    # a negative page size must not cancel out the cost of the other fields
+    assert estimate(query, first=-100000, ids=ids) == max_page_cost
+    assert estimate(query, first=0, ids=ids) == max_page_cost
+    assert estimate(query, first=MAX_PAGE_SIZE + 1, ids=ids) == max_page_cost
+    assert max_page_cost > 20000 * 2
@@ -0,0 +1,108 @@
+import asyncio
+from typing import List, Optional
+
+from rootski.gql.shared_cache import (
+    RootskiSharedCaches,
+    SharedCache,
+    SharedCacheVersionPoller,
+    make_shared_cache_load_fn,
+)
+
+
+def test__shared_cache__evicts_least_recently_used():
+    cache = SharedCache(max_size=2, ttl_seconds=60)
+    cache.set_many({"a": 1, "b": 2})
+    cache.get_many(["a"])  # "b" is now the least recently used
+    cache.set_many({"c": 3})
+
+    assert cache.get_many(["a", "b", "c"]) == {"a": 1, "c": 3}
+
+
+def test__shared_cache__expires_entries():
+    cache = SharedCache(max_size=10, ttl_seconds=-1)
+    cache.set_many({"a": 1})
+
+    assert cache.get_many(["a"]) == {}
+    assert len(cache) == 0
+
+
+def test__shared_cache__version_change_invalidates():
+    cache = SharedCache(max_size=10, ttl_seconds=60, version="1")
+    cache.set_many({"a": 1})
+    cache.set_version("1")
+    assert cache.get_many(["a"]) == {"a": 1}
+
+    cache.set_version("2")
+    assert cache.get_many(["a"]) == {}
+
+
+def test__make_shared_cache_load_fn__only_loads_missing_keys():
+    requested_batches: List[List[str]] = []
+
+    async def load_fn(keys: List[str]) -> List[Optional[str]]:
+        requested_batches.append(keys)
+        return [f"value-{key}" if key != "missing" else None for key in keys]
+
+    cache = SharedCache(max_size=10, ttl_seconds=60)
+    load_with_cache = make_shared_cache_load_fn(load_fn, cache=cache)
+
+    assert asyncio.run(load_with_cache(["1", "2"])) == ["value-1", "value-2"]
+    assert asyncio.run(load_with_cache(["2", "3", "missing"])) == ["value-2", "value-3", None]
+    # "missing" was not cached, so it is requested again
+    assert asyncio.run(load_with_cache(["1", "missing"])) == ["value-1", None]
+
+    assert requested_batches == [["1", "2"], ["3", "missing"], ["missing"]]
+
+
+def test__make_shared_cache_load_fn__skips_values_loaded_during_a_version_change():
+    cache = SharedCache(max_size=10, ttl_seconds=60, version="1")
+
+    async def load_fn(keys: List[str]) -> List[Optional[str]]:
+        # the ETL loads new data while the old values are being read
+        cache.set_version("2")
+        return [f"old-value-{key}" for key in keys]
+
+    load_with_cache = make_shared_cache_load_fn(load_fn, cache=cache)
+
+    assert asyncio.run(load_with_cache(["1"])) == ["old-value-1"]
+    assert len(cache) == 0
+
+
+def test__shared_cache_version_poller__applies_the_version():
+    caches = RootskiSharedCaches(
+        word_by_id=SharedCache(max_size=10, ttl_seconds=60),
+        morpheme_family_by_id=SharedCache(max_size=10, ttl_seconds=60),
+    )
+    versions = iter(["1", "1", "2"])
+    poller = SharedCacheVersionPoller(
+        caches=caches, get_version=lambda: next(versions), poll_interval_seconds=60
+    )
+
+    poller.poll()
+    caches.word_by_id.set_many({"a": 1})
+    caches.morpheme_family_by_id.set_many({"b": 2})
+    poller.poll()
+    assert len(caches.word_by_id) == len(caches.morpheme_family_by_id) == 1
+
+    poller.poll()
+    assert caches.word_by_id.version == caches.morpheme_family_by_id.version == "2"
+    assert len(caches.word_by_id) == len(caches.morpheme_family_by_id) == 0
+
+
+def test__shared_cache_version_poller__keeps_the_caches_if_reading_the_version_fails():
+    cache = SharedCache(max_size=10, ttl_seconds=60, version="1")
+    cache.set_many({"a": 1})
+
+    def get_version() -> str:
+        raise ConnectionError("dynamo is unreachable")
+
+    poller = SharedCacheVersionPoller(
+        caches=RootskiSharedCaches(
+            word_by_id=cache, morpheme_family_by_id=SharedCache(max_size=10, ttl_seconds=60)
+        ),
+        get_version=get_version,
+        poll_interval_seconds=60,
+    )
+    poller.poll()
+
+    assert cache.get_many(["a"]) == {"a": 1}
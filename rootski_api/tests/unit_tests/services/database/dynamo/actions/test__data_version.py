@@ -0,0 +1,11 @@
+from rootski.services.database.dynamo.actions.data_version import get_data_version
+from rootski.services.database.dynamo.db_service import DBService
+from rootski.services.database.dynamo.models.data_version import make_keys
+
+
+def test__get_data_version(dynamo_db_service: DBService):
+    assert get_data_version(db=dynamo_db_service) is None
+
+    dynamo_db_service.rootski_table.put_item(Item={**make_keys(), "version": "1", "__type": "DATA_VERSION"})
+
+    assert get_data_version(db=dynamo_db_service) == "1"
@@ -0,0 +1,65 @@
+from typing import Dict, List
+
+import pytest
+from rootski.services.database.dynamo.actions import dynamo as dynamo_actions
+from rootski.services.database.dynamo.actions.dynamo import batch_get_items
+from rootski.services.database.dynamo.db_service import DBService
+from rootski.services.database.dynamo.errors import UnprocessedKeysError
+from rootski.services.database.dynamo.models.word import make_keys as make_keys__word
+
+NUM_WORDS = 250
+
+
+def seed_words(dynamo_db_service: DBService, num_words: int):
+    with dynamo_db_service.rootski_table.batch_writer() as batch:
+        for word_id in range(num_words):
+            batch.put_item(Item={**make_keys__word(word_id=str(word_id)), "word": {"word_id": str(word_id)}})
+
+
+def test__batch_get_items__chunks_and_dedupes_keys(dynamo_db_service: DBService, monkeypatch):
+    seed_words(dynamo_db_service, num_words=NUM_WORDS)
+
+    chunk_sizes: List[int] = []
+    get_chunk = dynamo_actions._batch_get_chunk
+
+    def counting_get_chunk(keys: List[Dict[str, str]], db: DBService) -> List[dict]:
+        chunk_sizes.append(len(keys))
+        return get_chunk(keys=keys, db=db)
+
+    monkeypatch.setattr(dynamo_actions, "_batch_get_chunk", counting_get_chunk)
+
+    # request every word twice plus some words that don't exist
+    keys = [make_keys__word(word_id=str(word_id)) for word_id in [*range(NUM_WORDS + 10), *range(NUM_WORDS)]]
+    items = batch_get_items(keys=keys, db=dynamo_db_service)
+
+    assert sorted(int(item["word"]["word_id"]) for item in items) == list(range(NUM_WORDS))
+    assert chunk_sizes == [100, 100, 60]
+
+
+def test__batch_get_items__retries_unprocessed_keys(dynamo_db_service: DBService, monkeypatch):
+    seed_words(dynamo_db_service, num_words=3)
+    monkeypatch.setattr(dynamo_actions, "BATCH_GET_ITEM_BASE_BACKOFF_SECONDS", 0)
+
+    batch_get_item = dynamo_db_service.dynamo.batch_get_item
+    calls: List[dict] = []
+
+    def throttled_batch_get_item(RequestItems: dict) -> dict:
+        """Only process the first key of each request, like a throttled table might."""
+        calls.append(RequestItems)
+        table_name = dynamo_db_service.rootski_table.name
+        first_key, *other_keys = RequestItems[table_name]["Keys"]
+        response = batch_get_item(RequestItems={table_name: {"Keys": [first_key]}})
+        response["UnprocessedKeys"] = {table_name: {"Keys": other_keys}} if other_keys else {}
+        return response
+
+    monkeypatch.setattr(dynamo_db_service.dynamo, "batch_get_item", throttled_batch_get_item)
+
+    keys = [make_keys__word(word_id=str(word_id)) for word_id in range(3)]
+    items = batch_get_items(keys=keys, db=dynamo_db_service)
+
+    assert len(items) == 3
+    assert len(calls) == 3
+
+    monkeypatch.setattr(dynamo_actions, "BATCH_GET_ITEM_MAX_RETRIES", 1)
+    with pytest.raises(UnprocessedKeysError):
+        batch_get_items(keys=keys, db=dynamo_db_service)
@@ -0,0 +1,110 @@
+from typing import List
+
+import pytest
+from mypy_boto3_dynamodb.service_resource import _Table
+from rootski.services.database.dynamo.actions.morpheme_family import (
+    MorphemeFamilyWordsPage,
+    get_morpheme_family_words_page,
+)
+from rootski.services.database.dynamo.db_service import DBService as DynamoDBService
+from rootski.services.database.dynamo.models.morpheme_family_words import (
+    WORDS_PER_CHUNK,
+    MorphemeFamilyWord,
+    MorphemeFamilyWordsChunk,
+    make_morpheme_family_words_chunks,
+)
+
+MORPHEME_FAMILY_ID = "934"
+# enough words for three chunks
+NUM_WORDS = 2 * WORDS_PER_CHUNK + 200
+
+
+@pytest.fixture
+def morpheme_family_words(rootski_dynamo_table: _Table) -> List[MorphemeFamilyWord]:
+    # frequencies in reverse order of the word IDs, plus one word without a frequency rank
+    words: List[MorphemeFamilyWord] = [
+        MorphemeFamilyWord(word_id=str(i), word=f"word-{i}", frequency=NUM_WORDS - i)
+        for i in range(NUM_WORDS - 1)
+    ]
+    words.append(MorphemeFamilyWord(word_id=str(NUM_WORDS - 1), word="unranked", frequency=None))
+
+    chunks: List[MorphemeFamilyWordsChunk] = make_morpheme_family_words_chunks(
+        family_id=MORPHEME_FAMILY_ID, words=words
+    )
+    with rootski_dynamo_table.batch_writer() as batch_writer:
+        for chunk in chunks:
+            batch_writer.put_item(Item=chunk.to_item())
+
+    return sorted(words[:-1], key=lambda w: w["frequency"]) + words[-1:]
+
+
+def test__make_morpheme_family_words_chunks():
+    words = [
+        MorphemeFamilyWord(word_id="3", word="c", frequency=None),
+        MorphemeFamilyWord(word_id="2", word="b", frequency=50),
+        MorphemeFamilyWord(word_id="1", word="a", frequency=7),
+    ]
+    chunks = make_morpheme_family_words_chunks(family_id=MORPHEME_FAMILY_ID, words=words, words_per_chunk=2)
+
+    assert [chunk.sk for chunk in chunks] == ["WORDS#00000", "WORDS#00001"]
+    assert [w["word"] for chunk in chunks for w in chunk.words] == ["a", "b", "c"]
+    assert all(chunk.total_words == 3 for chunk in chunks)
+    assert MorphemeFamilyWordsChunk.from_dict(chunks[0].to_item()) == chunks[0]
+
+
+@pytest.mark.parametrize(
+    "offset, limit",
+    [
+        (0, 20),
+        # spans the first two chunks
+        (WORDS_PER_CHUNK - 10, 20),
+        # the end of the index
+        (NUM_WORDS - 5, 20),
+    ],
+)
+def test__get_morpheme_family_words_page(
+    dynamo_db_service: DynamoDBService, morpheme_family_words: List[MorphemeFamilyWord], offset: int, limit: int
+):
+    page: MorphemeFamilyWordsPage = get_morpheme_family_words_page(
+        morpheme_family_id=MORPHEME_FAMILY_ID, offset=offset, limit=limit, db=dynamo_db_service
+    )
+    assert page.total_words == NUM_WORDS
+    assert page.words == morpheme_family_words[offset : offset + limit]
+
+
+def test__get_morpheme_family_words_page__past_the_end(
+    dynamo_db_service: DynamoDBService, morpheme_family_words: List[MorphemeFamilyWord]
+):
+    page: MorphemeFamilyWordsPage = get_morpheme_family_words_page(
+        morpheme_family_id=MORPHEME_FAMILY_ID, offset=10 * WORDS_PER_CHUNK, limit=20, db=dynamo_db_service
+    )
+    assert page == MorphemeFamilyWordsPage(words=[], total_words=NUM_WORDS)
+
+
+def test__get_morpheme_family_words_page__no_index(dynamo_db_service: DynamoDBService):
+    page: MorphemeFamilyWordsPage = get_morpheme_family_words_page(
+        morpheme_family_id="does-not-exist", offset=0, limit=20, db=dynamo_db_service
+    )
+    assert page == MorphemeFamilyWordsPage(words=[], total_words=0)
+
+
+def test__get_morpheme_family_words_page__ignores_chunks_past_the_end(
+    rootski_dynamo_table: _Table, dynamo_db_service: DynamoDBService
+):
+    # the family had three chunks of words, and has a single chunk now
+    old_words = [MorphemeFamilyWord(word_id=str(i), word=f"old-{i}", frequency=i + 1) for i in range(NUM_WORDS)]
+    new_words = [MorphemeFamilyWord(word_id=str(i), word=f"new-{i}", frequency=i + 1) for i in range(10)]
+    with rootski_dynamo_table.batch_writer() as batch_writer:
+        for words in [old_words, new_words]:
+            for chunk in make_morpheme_family_words_chunks(family_id=MORPHEME_FAMILY_ID, words=words):
+                batch_writer.put_item(Item=chunk.to_item())
+
+    first_page: MorphemeFamilyWordsPage = get_morpheme_family_words_page(
+        morpheme_family_id=MORPHEME_FAMILY_ID, offset=0, limit=20, db=dynamo_db_service
+    )
+    stale_page: MorphemeFamilyWordsPage = get_morpheme_family_words_page(
+        morpheme_family_id=MORPHEME_FAMILY_ID, offset=WORDS_PER_CHUNK, limit=20, db=dynamo_db_service
+    )
+
+    assert first_page == MorphemeFamilyWordsPage(words=new_words, total_words=10)
+    assert stale_page == MorphemeFamilyWordsPage(words=[], total_words=10)
@@ -0,0 +1,199 @@
+from typing import Any, Dict, List
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+from rootski.services.database.non_orm import sql_statements
+from rootski.services.database.non_orm.db_service import (
+    RootskiDBService,
+    escape_like,
+    group_rows_by_word_id,
+    nest_definitions,
+)
+
+WORDS = [
+    {"id": 1, "word": "год", "accent": "го'д", "pos": "noun", "frequency": 10},
+    {"id": 2, "word": "годный", "accent": "го'дный", "pos": "adjective", "frequency": 20},
+    {"id": 3, "word": "100%_год", "accent": None, "pos": "noun", "frequency": 30},
+]
+
+
+@pytest.fixture
+def engine() -> Engine:
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "CREATE TABLE words "
+                + "(id INTEGER PRIMARY KEY, word TEXT, accent TEXT, pos TEXT, frequency INTEGER)"
+            )
+        )
+        connection.execute(
+            text(
+                "INSERT INTO words (id, word, accent, pos, frequency) "
+                + "VALUES (:id, :word, :accent, :pos, :frequency)"
+            ),
+            WORDS,
+        )
+    return engine
+
+
+@pytest.fixture
+def db(engine: Engine) -> RootskiDBService:
+    return RootskiDBService(engine=engine)
+
+
+def test__escape_like():
+    assert escape_like("год") == "год"
+    assert escape_like("100%_год") == "100\\%\\_год"
+    assert escape_like("a\\b") == "a\\\\b"
+
+
+def test__query_word_by_id__binds_the_word_id(db: RootskiDBService):
+    assert db.query_word_by_id(2)["word"] == "годный"
+    assert db.query_word_by_id(4) is None
+    # the word id is a bound parameter, not part of the SQL text
+    assert db.query_word_by_id("1 OR 1=1") is None
+
+
+def test__search_words__matches_prefixes(db: RootskiDBService):
+    assert sorted(word["id"] for word in db.search_words("год")) == [1, 2]
+    assert [word["id"] for word in db.search_words("год", limit=1)] == [1]
+
+
+def test__search_words__matches_wildcards_literally(db: RootskiDBService):
+    assert [word["id"] for word in db.search_words("100%_")] == [3]
+    assert db.search_words("%") == []
+    assert db.search_words("_од") == []
+
+
+def test__run_query__failed_query_does_not_break_the_shared_connection(db: RootskiDBService):
+    with db.connect() as connection:
+        assert db.run_query("SELECT * FROM not_a_table", connection=connection) == []
+        assert db.query_word_by_id(1, connection=connection)["word"] == "год"
+
+
+def test__run_query__raise_errors(db: RootskiDBService):
+    with pytest.raises(OperationalError):
+        db.run_query("SELECT * FROM not_a_table", raise_errors=True)
+
+
+def test__fetch_words_data__raise_errors(db: RootskiDBService):
+    # sqlite doesn't support = ANY(...), so every batched query fails
+    assert db.fetch_words_data(word_ids=[1]) == {}
+    with pytest.raises(OperationalError):
+        db.fetch_words_data(word_ids=[1], raise_errors=True)
+
+
+def make_definition_row(
+    word_id: int, definition_id: int, def_position: int, sub_def_id: int, sub_def_position: int
+):
+    return {
+        "word_id": word_id,
+        "definition_id": definition_id,
+        "def_position": def_position,
+        "pos": "noun",
+        "sub_def_id": sub_def_id,
+        "sub_def_position": sub_def_position,
+        "definition": f"definition {sub_def_id}",
+        "notes": None,
+    }
+
+
+def test__group_rows_by_word_id():
+    rows = [{"word_id": 1, "x": "a"}, {"word_id": 2, "x": "b"}, {"word_id": 1, "x": "c"}]
+
+    assert group_rows_by_word_id(rows) == {1: [{"x": "a"}, {"x": "c"}], 2: [{"x": "b"}]}
+
+
+def test__nest_definitions__sorts_and_dedupes_sub_definitions():
+    rows = [
+        make_definition_row(word_id=1, definition_id=20, def_position=1, sub_def_id=200, sub_def_position=0),
+        make_definition_row(word_id=1, definition_id=10, def_position=0, sub_def_id=101, sub_def_position=1),
+        make_definition_row(word_id=1, definition_id=10, def_position=0, sub_def_id=100, sub_def_position=0),
+        make_definition_row(word_id=1, definition_id=10, def_position=0, sub_def_id=100, sub_def_position=0),
+    ]
+    for row in rows:
+        del row["word_id"]
+
+    [noun_definitions] = nest_definitions(rows)
+
+    assert noun_definitions["pos"] == "noun"
+    assert [d["definition_id"] for d in noun_definitions["definitions"]] == [10, 20]
+    first_definition = noun_definitions["definitions"][0]
+    assert [sub_def["sub_def_id"] for sub_def in first_definition["sub_defs"]] == [100, 101]
+
+
+class CannedRowsDBService(RootskiDBService):
+    """Answers the ``*_BY_WORD_IDS`` queries from canned rows, since ``= ANY(...)`` needs postgres."""
+
+    def __init__(self, engine: Engine, rows_by_statement: Dict[str, List[Dict[str, Any]]]):
+        super().__init__(engine=engine)
+        self.rows_by_statement = rows_by_statement
+        self.queried_word_ids: Dict[str, List[int]] = {}
+
+    def run_query(self, query, params=None, as_df=False, connection=None, **kwargs):
+        word_ids: List[int] = params["word_ids"]
+        self.queried_word_ids[query] = word_ids
+        return [
+            dict(row)
+            for row in self.rows_by_statement.get(query, [])
+            if {row.get("word_id"), row.get("imp_word_id"), row.get("pfv_word_id")} & set(word_ids)
+        ]
+
+
+def test__fetch_words_data__groups_the_rows_by_word(engine: Engine):
+    db = CannedRowsDBService(
+        engine=engine,
+        rows_by_statement={
+            sql_statements.WORDS_BY_IDS: [
+                {"word_id": 1, "word": "год", "accent": "го'д", "pos": "noun", "frequency": 10},
+                {"word_id": 2, "word": "делать", "accent": "де'лать", "pos": "verb", "frequency": 20},
+                {"word_id": 3, "word": "сделать", "accent": "сде'лать", "pos": "verb", "frequency": 30},
+            ],
+            sql_statements.DEFINITIONS_BY_WORD_IDS: [
+                make_definition_row(
+                    word_id=1, definition_id=10, def_position=0, sub_def_id=100, sub_def_position=0
+                ),
+            ],
+            sql_statements.EXAMPLE_SENTENCES_BY_WORD_IDS: [
+                {"word_id": 2, "rus": "Что делать?", "eng": "What is to be done?", "exact_match": True},
+            ],
+            sql_statements.NOUN_DECLENSIONS_BY_WORD_IDS: [{"word_id": 1, "gender": "m", "nom": "год"}],
+            sql_statements.VERB_CONJUGATIONS_BY_WORD_IDS: [
+                {"word_id": 2, "aspect": "impf"},
+                {"word_id": 3, "aspect": "perf"},
+            ],
+            sql_statements.ASPECTUAL_PAIRS_BY_WORD_IDS: [
+                {"imp_word_id": 2, "imp_accent": "де'лать", "pfv_word_id": 3, "pfv_accent": "сде'лать"},
+            ],
+        },
+    )
+
+    words_data = db.fetch_words_data(word_ids=[3, 1, 2, 1, 404])
+
+    assert set(words_data) == {1, 2, 3}
+    assert words_data[1]["definitions"][0]["definitions"][0]["definition_id"] == 10
+    assert words_data[1]["declensions"] == {"gender": "m", "nom": "год"}
+    assert words_data[1]["sentences"] == []
+    assert words_data[2]["sentences"] == [
+        {"rus": "Что делать?", "eng": "What is to be done?", "exact_match": True}
+    ]
+    assert words_data[2]["conjugations"] == {"aspect": "impf"}
+    assert words_data[3]["conjugations"] == {"aspect": "perf"}
+    # a pair belongs to both of its verbs
+    assert words_data[2]["aspectual_pairs"] == words_data[3]["aspectual_pairs"]
+    assert len(words_data[2]["aspectual_pairs"]) == 1
+    assert "declensions" not in words_data[2]
+
+    # each query runs once for the whole batch, and the POS specific queries only for their words
+    assert db.queried_word_ids[sql_statements.WORDS_BY_IDS] == [3, 1, 2, 404]
+    assert db.queried_word_ids[sql_statements.NOUN_DECLENSIONS_BY_WORD_IDS] == [1]
+    assert sorted(db.queried_word_ids[sql_statements.VERB_CONJUGATIONS_BY_WORD_IDS]) == [2, 3]
+    assert sql_statements.ADJECTIVE_FORMS_BY_WORD_IDS not in db.queried_word_ids
+
+
+def test__fetch_words_data__no_word_ids(engine: Engine):
+    assert CannedRowsDBService(engine=engine, rows_by_statement={}).fetch_words_data(word_ids=[]) == {}
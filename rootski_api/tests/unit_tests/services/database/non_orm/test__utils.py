@@ -0,0 +1,99 @@
+import math
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from rootski.services.database.non_orm.utils import collapse_df, collapse_records  # noqa: E402
+
+
+@pytest.fixture
+def definitions_df() -> pd.DataFrame:
+    return pd.DataFrame(
+        [
+            {
+                "definition_id": 2,
+                "def_position": 0,
+                "pos": "noun",
+                "sub_def_id": 20,
+                "sub_def_position": 1,
+                "notes": None,
+            },
+            {
+                "definition_id": 1,
+                "def_position": 1,
+                "pos": "noun",
+                "sub_def_id": 11,
+                "sub_def_position": 2,
+                "notes": "x",
+            },
+            {
+                "definition_id": 1,
+                "def_position": 1,
+                "pos": "noun",
+                "sub_def_id": 10,
+                "sub_def_position": 0,
+                "notes": None,
+            },
+            {
+                "definition_id": 2,
+                "def_position": 0,
+                "pos": "noun",
+                "sub_def_id": 21,
+                "sub_def_position": math.nan,
+                "notes": None,
+            },
+            {
+                "definition_id": math.nan,
+                "def_position": 2,
+                "pos": "noun",
+                "sub_def_id": 30,
+                "sub_def_position": 0,
+                "notes": None,
+            },
+        ]
+    )
+
+
+def test__collapse_df(definitions_df: pd.DataFrame):
+    collapsed_rows = collapse_df(
+        definitions_df,
+        groupby_col="definition_id",
+        group_cols=["definition_id", "def_position"],
+        child_cols=["sub_def_id", "sub_def_position"],
+        child_name="sub_defs",
+        grp_sort_col="def_position",
+        ch_sort_col="sub_def_position",
+    )
+
+    # rows without a definition_id are dropped, NaN becomes None and is sorted last
+    assert collapsed_rows == [
+        {
+            "definition_id": 2.0,
+            "def_position": 0,
+            "sub_defs": [
+                {"sub_def_id": 20, "sub_def_position": 1.0},
+                {"sub_def_id": 21, "sub_def_position": None},
+            ],
+        },
+        {
+            "definition_id": 1.0,
+            "def_position": 1,
+            "sub_defs": [
+                {"sub_def_id": 10, "sub_def_position": 0.0},
+                {"sub_def_id": 11, "sub_def_position": 2.0},
+            ],
+        },
+    ]
+    # numpy scalars are converted to python types so the result is JSON serializable
+    assert type(collapsed_rows[0]["def_position"]) is int
+
+
+def test__collapse_records__groups_in_key_order():
+    rows = [{"pos": "verb", "id": 1}, {"pos": "noun", "id": 2}, {"pos": "verb", "id": 3}]
+    assert collapse_records(
+        rows, groupby_col="pos", group_cols=["pos"], child_cols=["id"], child_name="ids"
+    ) == [
+        {"pos": "noun", "ids": [{"id": 2}]},
+        {"pos": "verb", "ids": [{"id": 1}, {"id": 3}]},
+    ]
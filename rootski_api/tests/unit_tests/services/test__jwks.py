@@ -0,0 +1,126 @@
+import json
+import time
+from pathlib import Path
+from typing import List
+
+import httpx
+import pytest
+
+from rootski.services.jwks import JsonWebKeySet, JwksProvider
+
+JWKS_URL = "https://cognito-idp.us-west-2.amazonaws.com/us-west-2_abc/.well-known/jwks.json"
+OLD_KID = "old-key-id"
+NEW_KID = "new-key-id"
+
+
+def make_jwks(*kids: str) -> JsonWebKeySet:
+    return JsonWebKeySet(keys=[{"kid": kid, "kty": "RSA", "e": "AQAB", "n": "abc"} for kid in kids])
+
+
+class FakeCognito:
+    """Stands in for the Cognito JWKS endpoint; counts how many times it was hit."""
+
+    def __init__(self, jwks: JsonWebKeySet):
+        self.jwks = jwks
+        self.requested_urls: List[str] = []
+
+    def fetch(self, url: str) -> JsonWebKeySet:
+        self.requested_urls.append(url)
+        return self.jwks
+
+
+def make_provider(cache_fpath: Path, cognito: FakeCognito, min_refetch_interval_seconds: float = 60):
+    return JwksProvider(
+        jwks_url=JWKS_URL,
+        cache_fpath=cache_fpath,
+        refresh_interval_seconds=3600,
+        min_refetch_interval_seconds=min_refetch_interval_seconds,
+        fetch_jwks=cognito.fetch,
+    )
+
+
+@pytest.fixture
+def cache_fpath(tmp_path: Path) -> Path:
+    return tmp_path / "static" / "cognito-jwks.json"
+
+
+def test__init__fetches_and_writes_cache(cache_fpath: Path):
+    cognito = FakeCognito(make_jwks(OLD_KID))
+    provider = make_provider(cache_fpath, cognito)
+
+    jwks = provider.init(start_background_refresh=False)
+
+    assert jwks == cognito.jwks
+    assert cognito.requested_urls == [JWKS_URL]
+    assert json.loads(cache_fpath.read_text())["jwks"] == cognito.jwks.dict()
+
+
+def test__init__processes_share_the_disk_cache(cache_fpath: Path):
+    cognito = FakeCognito(make_jwks(OLD_KID))
+    for _ in range(5):
+        make_provider(cache_fpath, cognito).init(start_background_refresh=False)
+
+    assert len(cognito.requested_urls) == 1
+
+
+def test__init__refetches_stale_cache(cache_fpath: Path):
+    cognito = FakeCognito(make_jwks(NEW_KID))
+    cache_fpath.parent.mkdir(parents=True)
+    stale_cache = {"fetched_at": time.time() - 2 * 3600, "jwks": make_jwks(OLD_KID).dict()}
+    cache_fpath.write_text(json.dumps(stale_cache))
+
+    jwks = make_provider(cache_fpath, cognito).init(start_background_refresh=False)
+
+    assert jwks.has_key(NEW_KID)
+    assert len(cognito.requested_urls) == 1
+
+
+def test__get_jwks_for_kid__refetches_unknown_kid_once(cache_fpath: Path):
+    cognito = FakeCognito(make_jwks(OLD_KID))
+    provider = make_provider(cache_fpath, cognito, min_refetch_interval_seconds=0)
+    provider.init(start_background_refresh=False)
+
+    # the keys are rotated in cognito
+    cognito.jwks = make_jwks(OLD_KID, NEW_KID)
+
+    assert provider.get_jwks_for_kid(OLD_KID).has_key(NEW_KID) is False
+    assert provider.get_jwks_for_kid(NEW_KID).has_key(NEW_KID)
+    assert len(cognito.requested_urls) == 2
+
+
+def test__get_jwks_for_kid__rate_limits_refetches(cache_fpath: Path):
+    cognito = FakeCognito(make_jwks(OLD_KID))
+    provider = make_provider(cache_fpath, cognito, min_refetch_interval_seconds=60)
+    provider.init(start_background_refresh=False)
+
+    for _ in range(10):
+        jwks = provider.get_jwks_for_kid("bogus-key-id")
+
+    assert jwks.has_key(OLD_KID)
+    assert len(cognito.requested_urls) == 1
+
+
+def test__get_jwks_for_kid__keeps_the_keys_when_the_refetch_fails(cache_fpath: Path):
+    cognito = FakeCognito(make_jwks(OLD_KID))
+    provider = make_provider(cache_fpath, cognito, min_refetch_interval_seconds=0)
+    provider.init(start_background_refresh=False)
+    cache_fpath.unlink()
+
+    def unreachable_cognito(url: str) -> JsonWebKeySet:
+        raise httpx.ConnectError("Cognito is unreachable")
+
+    provider._fetch_jwks = unreachable_cognito  # pylint: disable=protected-access
+    jwks = provider.get_jwks_for_kid(NEW_KID)
+
+    assert jwks.has_key(OLD_KID)
+    assert not jwks.has_key(NEW_KID)
+
+
+def test__init__works_without_a_writable_cache_dir(tmp_path: Path):
+    read_only_file = tmp_path / "not-a-dir"
+    read_only_file.write_text("")
+    cognito = FakeCognito(make_jwks(OLD_KID))
+
+    jwks = make_provider(read_only_file / "cognito-jwks.json", cognito).init(start_background_refresh=False)
+
+    assert jwks.has_key(OLD_KID)
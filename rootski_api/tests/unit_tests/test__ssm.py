@@ -0,0 +1,94 @@
+"""Test loading config values from AWS SSM Parameter Store."""
+
+from pathlib import Path
+from typing import Dict
+
+import boto3
+import pytest
+from cryptography.fernet import Fernet
+from moto import mock_ssm
+
+from rootski.config import ssm
+from rootski.config.ssm import (
+    clear_ssm_parameter_cache,
+    get_ssm_parameters_by_prefix,
+    load_ssm_parameters_by_prefix,
+)
+
+PREFIX = "/rootski/test/"
+# get_parameters_by_path returns at most 10 parameters per page
+NUM_PARAMETERS = 25
+
+
+@pytest.fixture
+def ssm_parameters() -> Dict[str, str]:
+    parameters = {f"param_{i}": f"value-{i}" for i in range(NUM_PARAMETERS)}
+    with mock_ssm():
+        ssm_client = boto3.client("ssm", region_name="us-west-2")
+        for name, value in parameters.items():
+            ssm_client.put_parameter(Name=PREFIX + name, Value=value, Type="SecureString")
+        clear_ssm_parameter_cache()
+        yield parameters
+        clear_ssm_parameter_cache()
+
+
+@pytest.fixture
+def ssm_call_counter(monkeypatch) -> Dict[str, int]:
+    calls = {"count": 0}
+    get_parameters = ssm.get_ssm_parameters_by_prefix
+
+    def counting_get_parameters(prefix: str) -> Dict[str, str]:
+        calls["count"] += 1
+        return get_parameters(prefix=prefix)
+
+    monkeypatch.setattr(ssm, "get_ssm_parameters_by_prefix", counting_get_parameters)
+    return calls
+
+
+def test__get_ssm_parameters_by_prefix__paginates(ssm_parameters: Dict[str, str]):
+    assert get_ssm_parameters_by_prefix(prefix=PREFIX) == ssm_parameters
+
+
+def test__load_ssm_parameters_by_prefix__memoizes(
+    ssm_parameters: Dict[str, str], ssm_call_counter: Dict[str, int]
+):
+    for _ in range(3):
+        assert load_ssm_parameters_by_prefix(prefix=PREFIX) == ssm_parameters
+    assert ssm_call_counter["count"] == 1
+
+
+def test__load_ssm_parameters_by_prefix__encrypted_file_cache(
+    ssm_parameters: Dict[str, str], ssm_call_counter: Dict[str, int], tmp_path: Path
+):
+    cache_fpath = tmp_path / "ssm-cache"
+    cache_key = Fernet.generate_key().decode()
+
+    load_ssm_parameters_by_prefix(prefix=PREFIX, cache_fpath=cache_fpath, cache_key=cache_key)
+    assert "value-0" not in cache_fpath.read_text()
+
+    # simulate another process on the same host
+    clear_ssm_parameter_cache()
+    parameters = load_ssm_parameters_by_prefix(prefix=PREFIX, cache_fpath=cache_fpath, cache_key=cache_key)
+    assert parameters == ssm_parameters
+    assert ssm_call_counter["count"] == 1
+
+    # a different key can't read the cache, so SSM is hit again
+    clear_ssm_parameter_cache()
+    other_key = Fernet.generate_key().decode()
+    load_ssm_parameters_by_prefix(prefix=PREFIX, cache_fpath=cache_fpath, cache_key=other_key)
+    assert ssm_call_counter["count"] == 2
+
+
+def test__load_ssm_parameters_by_prefix__expired_file_cache(
+    ssm_parameters: Dict[str, str], ssm_call_counter: Dict[str, int], tmp_path: Path
+):
+    cache_fpath = tmp_path / "ssm-cache"
+    cache_key = Fernet.generate_key().decode()
+
+    load_ssm_parameters_by_prefix(prefix=PREFIX, cache_fpath=cache_fpath, cache_key=cache_key)
+    clear_ssm_parameter_cache()
+    load_ssm_parameters_by_prefix(
+        prefix=PREFIX, cache_fpath=cache_fpath, cache_key=cache_key, cache_ttl_seconds=-1
+    )
+
+    assert ssm_call_counter["count"] == 2
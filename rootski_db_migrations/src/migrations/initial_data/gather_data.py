@@ -32,14 +32,15 @@ This script relies on a few environment variables variables:
     We'll incrementally refactor this file as it makes sense.
 """
 
+import math
 import os
 import sys
 import time
 from os.path import join
 from typing import Any, Dict, List, Optional, Tuple
 
-import numpy as np
 import pandas as pd
+from migrations.initial_data.copy_loader import copy_dfs_into_tables
 from migrations.initial_data.initial_models import (
     Breakdown,
     BreakdownItem,
@@ -53,6 +54,8 @@ from migrations.initial_data.initial_models import (
     VerbPair,
     Word,
 )
+from migrations.initial_data.post_load import fix_sequences, run_post_load_stage
+from migrations.initial_data.seed_cache import get_or_prepare_tables
 from migrations.utils.alembic_x_args import get_db_connection_string_from_env_vars
 from sqlalchemy import create_engine
 from sqlalchemy.engine import Engine
@@ -61,28 +64,24 @@ from sqlalchemy.orm import Session
 # get the location of the csv files
 THIS_DIR = os.path.dirname(os.path.realpath(__file__))
 DATA_DIR = join(THIS_DIR, "data") if not os.environ.get("DATA_DIR") else os.environ.get("DATA_DIR")
+# the cleaned DataFrames are cached here as Parquet files
+SEED_CACHE_DIR = os.environ.get("SEED_CACHE_DIR") or join(DATA_DIR, ".seed-cache")
 
 
-def get_group_data(
-    group_df: pd.DataFrame,
-    *group_cols,
-) -> Dict[str, pd.DataFrame]:
+def df_to_records(df: pd.DataFrame, columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
     """
-    Convert a dataframe resulting from a ``df.groupby()`` call to a dict.
-
-    The keys of the dict is the value defining the group.
-    """
-    first_row = group_df.iloc[0]
-    return {col: first_row[col] for col in group_cols}
+    Convert the rows of ``df`` to dicts of python values, with ``NaN`` replaced by ``None``.
 
+    ``Series.tolist()`` converts a whole column of numpy scalars to python scalars at once,
+    which solves the JSON serialization problem of numpy types without copying the frame.
 
-def get_group_children(group_df, *child_cols, sort_col=None, ascending=True) -> Dict[str, pd.DataFrame]:
-    """Turn a dataframe resulting from ``df.groupby()`` into a dict."""
-    child_df: pd.DataFrame = group_df[list(child_cols)]
-    if sort_col is not None:
-        child_df.sort_values(sort_col, ascending=ascending, inplace=True)
-    child_rows = child_df.to_dict(orient="records")
-    return child_rows
+    :param columns: the columns to convert; defaults to all of them
+    """
+    columns = list(df.columns) if columns is None else list(dict.fromkeys(columns))
+    column_values: List[list] = [
+        [None if isinstance(v, float) and math.isnan(v) else v for v in df[col].tolist()] for col in columns
+    ]
+    return [dict(zip(columns, row_values)) for row_values in zip(*column_values)]
 
 
 # pylint: disable=too-many-arguments, invalid-name, too-many-locals
@@ -96,35 +95,48 @@ def collapse_df(
     grp_ascending=True,
     ch_sort_col=None,
     ch_ascending=True,
-):
+) -> List[Dict[str, Any]]:
     """
     Collapses results of two joined dataframes.
 
-    Args:
-        df (pd.DataFrame): dataframe to collapse
-        groupby_col (str): column name to group by and collapse
-        group_cols (list[str]): list of column names to keep at the group level
-        grp_sort_col (str): one of the group_cols, sort the group rows by this col
-        grp_ascending (bool): sort group cols in ascending order
-        child_cols (list[str]): list of columns to keep for each child in the child attribute
-        child_name (str): name of the child attribute
-        ch_sort_col (str): one of the child_cols, sorts children within group by this column
+    The rows are nested in a single pass over ``df``. Like ``df.groupby()``, rows whose
+    ``groupby_col`` is missing are dropped and the groups are ordered by ``groupby_col``.
+
+    :param df: dataframe to collapse
+    :param groupby_col: column name to group by and collapse
+    :param group_cols: list of column names to keep at the group level
+    :param child_cols: list of columns to keep for each child in the child attribute
+    :param child_name: name of the child attribute
+    :param grp_sort_col: one of the group_cols, sort the group rows by this col
+    :param grp_ascending: sort group cols in ascending order
+    :param ch_sort_col: one of the child_cols, sorts children within group by this column
+    :param ch_ascending: sort the children in ascending order
     """
-    collapsed_rows = []
-
-    # solves JSON serialization problem by casting numpy types to python types
-    df = df.replace({np.nan: None})
-    df = df.astype(object)
-
-    groupby = df.groupby(groupby_col)
-    groups = list(groupby.groups.keys())
-
-    for group in groups:
-        group_df = groupby.get_group(group)
-        group_data = get_group_data(group_df, *group_cols)
-        group_children = get_group_children(group_df, *child_cols, sort_col=ch_sort_col, ascending=ch_ascending)
-        group_data[child_name] = group_children
-        collapsed_rows.append(group_data)
+    groups: Dict[Any, Dict[str, Any]] = {}
+    for row in df_to_records(df, columns=[groupby_col, *group_cols, *child_cols]):
+        group_key = row[groupby_col]
+        if group_key is None:
+            continue
+
+        group_data: Optional[Dict[str, Any]] = groups.get(group_key)
+        if group_data is None:
+            # the group level values are taken from the first row of the group
+            group_data = {col: row[col] for col in group_cols}
+            group_data[child_name] = []
+            groups[group_key] = group_data
+
+        group_data[child_name].append({col: row[col] for col in child_cols})
+
+    collapsed_rows = [groups[group_key] for group_key in sorted(groups)]
+
+    if ch_sort_col is not None:
+        for group_data in collapsed_rows:
+            # like pandas, sort missing values last
+            children = group_data[child_name]
+            present = [child for child in children if child[ch_sort_col] is not None]
+            missing = [child for child in children if child[ch_sort_col] is None]
+            present.sort(key=lambda child: child[ch_sort_col], reverse=not ch_ascending)
+            group_data[child_name] = present + missing
 
     if grp_sort_col:
         collapsed_rows = sorted(collapsed_rows, key=lambda row: row[grp_sort_col], reverse=not grp_ascending)
@@ -161,14 +173,9 @@ def collapse_deconstructions_df(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Data
         ch_ascending=True,
     )
 
-    collapsed_df = pd.DataFrame(collapsed_rows)
-
     # separate out words_to_breakdown from breakdowns (deconstructions)
-    word_to_breakdown_df = collapsed_df[["word_id", "breakdown_id", "word"]]
-    breakdown_rows = []
-    for _, row in collapsed_df.iterrows():
-        breakdown_rows += row["breakdown"]
-    breakdowns_df = pd.DataFrame(breakdown_rows)
+    word_to_breakdown_df = pd.DataFrame(collapsed_rows, columns=["word_id", "breakdown_id", "word"])
+    breakdowns_df = pd.DataFrame([child for row in collapsed_rows for child in row["breakdown"]])
 
     return word_to_breakdown_df, breakdowns_df
 
@@ -191,43 +198,48 @@ def collapse_family_meanings_df(family_meanings: pd.DataFrame):
         child_name="meanings",
         child_cols=["meaning", "family_id"],
     )
-    collapsed_df = pd.DataFrame(collapsed_rows)
-
     # separate out morpheme families from family meanings
-    morpheme_families = collapsed_df[["family_id", "family", "level"]].rename(columns={"family_id": "id"})
-
-    family_meaning_rows = []
-    for _, row in collapsed_df.iterrows():
-        family_meaning_rows += row["meanings"]
-    family_meanings = pd.DataFrame(family_meaning_rows)
+    morpheme_families = pd.DataFrame(collapsed_rows, columns=["family_id", "family", "level"]).rename(
+        columns={"family_id": "id"}
+    )
+    family_meanings = pd.DataFrame([child for row in collapsed_rows for child in row["meanings"]])
 
     return family_meanings, morpheme_families
 
 
+# the CSV files in DATA_DIR read by prepare_base_tables
+BASE_TABLE_CSV_FNAMES = [
+    "words.csv",
+    "adjectives.csv",
+    "nouns.csv",
+    "conjugations.csv",
+    "breakdown-items.csv",
+    "word-to-breakdown.csv",
+    "morphemes_v3.csv",
+    "family_meanings_v1.csv",
+    "verb_pairs.csv",
+    "sentences.csv",
+    "translations.csv",
+    "word_to_sentence.csv",
+    "word_defs.csv",
+    "definitions.csv",
+    "definition_contents.csv",
+]
+
+
 # pylint: disable=too-many-statements, too-many-locals
-def load_base_tables(
-    db_conn_url: Optional[str] = None,
-    engine_override: Optional[Engine] = None,
-    verbose: bool = False,
-    chunksize: int = 2**11,
-):
+def prepare_base_tables() -> Dict[str, pd.DataFrame]:
     """
-    Load CSV files into the SQL database pointed to by ``db_conn_url``.
+    Read the CSV files in ``DATA_DIR`` and clean them up into the rows of each table.
 
-    :param db_conn_url: connection string for a postgres database
-    :param engine_override: used instead of using ``db_conn_url`` to create an engine.
-    :param verbose: print the SQL statements as they are emitted
-    :param chunksize: batch size of number of records to insert into the database
+    :return: the DataFrame to load into each table, by table name
     """
-    if not db_conn_url and not engine_override:
-        raise ValueError("One of db_conn_url or engine_override must be set to seed the database.")
 
     #################
     # --- Words --- #
     #################
 
     words = pd.read_csv(join(DATA_DIR, "words.csv")).rename(columns={"type": "pos"})
-    pd.read_csv(join(DATA_DIR, "declensions.csv"))
     adjectives = pd.read_csv(join(DATA_DIR, "adjectives.csv")).reset_index(drop=True)
     nouns = pd.read_csv(join(DATA_DIR, "nouns.csv")).astype({"animate": bool, "indeclinable": bool})
     # drop the nouns that don't have an associated word in the words table
@@ -321,63 +333,74 @@ def load_base_tables(
     # we're not using the definition examples because they are sparse
     # definition_examples = pd.read_csv(join(DATA_DIR, 'definition_examples.csv'))
 
+    return {
+        "words": words,
+        "adjectives": adjectives,
+        "nouns": nouns,
+        "conjugations": conjugations,
+        "word_to_breakdowns": word_to_breakdown,
+        "morpheme_families": morpheme_families,
+        "morpheme_family_meanings": morpheme_family_meanings,
+        "morphemes": morphemes,
+        "breakdowns": breakdowns,
+        "verb_pairs": verb_pairs,
+        "sentences": sentences,
+        "sentence_translations": translations,
+        "word_to_sentence": word_to_sentence,
+        "word_defs": word_defs,
+        "definitions": definitions,
+        "definition_contents": definition_contents,
+        # we aren't using the definition_examples because the data was very sparse
+        # "definition_examples": definition_examples,
+    }
+
+
+def load_base_tables(
+    db_conn_url: Optional[str] = None,
+    engine_override: Optional[Engine] = None,
+    verbose: bool = False,
+    max_workers: int = 8,
+    use_cache: bool = True,
+):
+    """
+    Load CSV files into the SQL database pointed to by ``db_conn_url``.
+
+    :param db_conn_url: connection string for a postgres database
+    :param engine_override: used instead of using ``db_conn_url`` to create an engine.
+    :param verbose: print the SQL statements as they are emitted
+    :param max_workers: number of tables loaded concurrently, each over its own connection
+    :param use_cache: reuse the tables prepared from the same CSV files by an earlier run (see ``seed_cache``)
+    """
+    if not db_conn_url and not engine_override:
+        raise ValueError("One of db_conn_url or engine_override must be set to seed the database.")
+
+    tables: Dict[str, pd.DataFrame] = (
+        get_or_prepare_tables(
+            prepare_fn=prepare_base_tables,
+            data_dir=DATA_DIR,
+            source_fnames=BASE_TABLE_CSV_FNAMES,
+            cache_dir=SEED_CACHE_DIR,
+        )
+        if use_cache
+        else prepare_base_tables()
+    )
+
     # Create the tables from SQLAlchemy definitions
     engine = engine_override or create_engine(db_conn_url, echo=verbose)
 
     engine.execute("SELECT * FROM words")
 
-    # Populate the created SQL tables from the dataframes
-    to_sql_args = {
-        "if_exists": "append",
-        "con": engine,
-        "index": False,
-        "chunksize": chunksize,
-    }
+    # Populate the created SQL tables from the dataframes with COPY; the indexes
+    # below are created afterwards so that they are built once rather than row by row
+    copy_dfs_into_tables(tables, engine=engine, max_workers=max_workers)
 
-    words.to_sql(name="words", **to_sql_args)
-    adjectives.to_sql(name="adjectives", **to_sql_args)
-    nouns.to_sql(name="nouns", **to_sql_args)
-    conjugations.to_sql(name="conjugations", **to_sql_args)
-
-    word_to_breakdown.to_sql(name="word_to_breakdowns", **to_sql_args)
-    morpheme_families.to_sql(name="morpheme_families", **to_sql_args)
-    morpheme_family_meanings.to_sql(name="morpheme_family_meanings", **to_sql_args)
-    morphemes.to_sql(name="morphemes", **to_sql_args)
-    breakdowns.to_sql(name="breakdowns", **to_sql_args)
-    verb_pairs.to_sql(name="verb_pairs", **to_sql_args)
-    sentences.to_sql(name="sentences", **to_sql_args)
-    translations.to_sql(name="sentence_translations", **to_sql_args)
-    word_to_sentence.to_sql(name="word_to_sentence", **to_sql_args)
-
-    word_defs.to_sql(name="word_defs", **to_sql_args)
-    definitions.to_sql(name="definitions", **to_sql_args)
-    definition_contents.to_sql(name="definition_contents", **to_sql_args)
-    # we aren't using the definition_examples because the data was very sparse
-    # definition_examples.to_sql(name='definition_examples', **to_sql_args)
-
-    # create indexes for faster querying (this way gets faster results than setting the
-    # pd.DataFrame index and setting index=True in pd.to_sql(if_exists="replace", )
-    con = engine.connect()
-    con.execute(
-        """CREATE UNIQUE INDEX "idx_definition_id" ON "definitions" (
-        "id"	ASC
-    );"""
+    # sequences, indexes and planner statistics are taken care of once all of the rows are in
+    run_post_load_stage(
+        engine,
+        table_pk_pairs=PRIMARY_KEY_TABLES_AND_COLUMNS,
+        table_names=list(tables),
+        max_workers=max_workers,
     )
-    # again, we're not using the definition examples
-    # con.execute("""CREATE UNIQUE INDEX "idx_example_id" ON "definition_examples" (
-    #     "id"	ASC
-    # );""")
-    con.execute(
-        """CREATE UNIQUE INDEX "idx_word_id" ON "words" (
-        "id"	ASC
-    );"""
-    )
-    con.execute(
-        """CREATE UNIQUE INDEX "idx_sentence_id" ON "sentences" (
-        "sentence_id"	ASC
-    );"""
-    )
-    con.close()
 
 
 # def load_definitions_examples_materialized_view(db_type):
@@ -408,16 +431,10 @@ def load_base_tables(
 # taking up IDs 1-200,000... not good.
 #
 # To fix this, we need to call the SETVAL() postgres function on all of our primary key columns
-# in all of our tables after doing a bulk load.
+# in all of our tables after doing a bulk load. load_base_tables does this in its post-load stage
+# (see post_load.fix_sequences).
 #
 
-SET_VAL_QUERY = """
-select setval(
-    pg_get_serial_sequence('{table_name}', '{pk_column}'),
-    (select max({pk_column}) from {table_name}) + 1
-)
-"""
-
 PRIMARY_KEY_TABLES_AND_COLUMNS = [
     (Word, "id"),
     (MorphemeFamily, "id"),
@@ -434,36 +451,17 @@ PRIMARY_KEY_TABLES_AND_COLUMNS = [
 ]
 
 
-def fix_pkey_for_table(table_name, pk_column, engine: Engine):
-    """Set the autoincrement value to the correct number in a primary key column.
-
-    This fixes a problem where data loaded from a CSV into the postgres database
-    doesn't correctly update the autoincrementing primary key value. Result:
-    if we load primary keys 1, 2, and 3 and then insert a new row in the table,
-    postgres will try to insert 1 again. We need it to insert 4 in this scenario.
-
-    :param table_name: SQL table to fix the primary key column in
-    :param pk_column: Autoincrementing column in the table to fix
-    :param _engine: SQLAlchemy object to connect to the database
-    """
-    print(f"Setting sequence for {table_name}")
-    query = SET_VAL_QUERY.format(table_name=table_name, pk_column=pk_column)
-    engine.execute(query)
-
-
 def fix_all_tables(
     engine: Engine,
     table_pk_pairs: Optional[List[Tuple[Any, str]]] = None,
 ):
-    """Fix the autoincrement problem on all tables in ``table_pk_pairs``.
+    """Fix the autoincrement problem on all tables in ``table_pk_pairs`` in a single transaction.
 
     :param engine: for connecting to the database
     :param table_pk_pairs: List of tuples where the first argument is a SQLAlchemy model class and the
         second is a primary key column name whose autoincrement should be fixed.
     """
-    table_pk_pairs: List[Tuple[Any, str]] = table_pk_pairs or PRIMARY_KEY_TABLES_AND_COLUMNS
-    for table, pk_column in table_pk_pairs:
-        fix_pkey_for_table(table.__tablename__, pk_column, engine)
+    fix_sequences(engine, table_pk_pairs=table_pk_pairs or PRIMARY_KEY_TABLES_AND_COLUMNS)
 
 
 def seed_database(connection_string: str):
@@ -472,9 +470,9 @@ def seed_database(connection_string: str):
     :param connection_string: URL for the database with credentials
     """
     try:
+        # this also fixes the primary key sequences, creates the indexes and analyzes
+        # the tables (see run_post_load_stage)
         load_base_tables(db_conn_url=connection_string, verbose=True)
-        engine: Engine = create_engine(connection_string, echo=True)
-        fix_all_tables(engine=engine)
     except Exception as err:
         with open("error.log", "w", encoding="utf-8") as file:
             file.write(str(err))
@@ -0,0 +1,144 @@
+"""
+Steps run once the seed data has been bulk loaded: sequences, indexes and planner statistics.
+
+The indexes are declared in :data:`POST_LOAD_INDEXES` rather than created one statement
+at a time. Building an index once over a loaded table is much cheaper than maintaining
+it during the load, and the indexes are built in parallel, each over its own connection.
+
+On a database that is already serving traffic, pass ``concurrently=True`` to build the
+indexes with ``CREATE INDEX CONCURRENTLY``, which doesn't block writes to the table.
+It is slower and can't run in a transaction, so the seed uses plain ``CREATE INDEX``.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+
+@dataclass(frozen=True)
+class Index:
+    """An index on ``columns`` of ``table``; ``name`` defaults to ``idx_<table>_<columns>``."""
+
+    table: str
+    columns: Tuple[str, ...]
+    unique: bool = False
+    name: Optional[str] = None
+
+    @property
+    def index_name(self) -> str:
+        return self.name or f"idx_{self.table}_{'_'.join(self.columns)}"
+
+    def create_sql(self, concurrently: bool = False) -> str:
+        columns: str = ", ".join(f'"{column}"' for column in self.columns)
+        return (
+            f"CREATE {'UNIQUE ' if self.unique else ''}INDEX {'CONCURRENTLY ' if concurrently else ''}"
+            + f'IF NOT EXISTS "{self.index_name}" ON "{self.table}" ({columns})'
+        )
+
+
+POST_LOAD_INDEXES: List[Index] = [
+    # the unique indexes created by earlier versions of the seed, with their original names
+    Index("definitions", ("id",), unique=True, name="idx_definition_id"),
+    Index("words", ("id",), unique=True, name="idx_word_id"),
+    Index("sentences", ("sentence_id",), unique=True, name="idx_sentence_id"),
+    # words -> definitions
+    Index("word_defs", ("word_id",)),
+    Index("definition_contents", ("definition_id",)),
+    Index("definition_contents", ("child_id",)),
+    # words -> example sentences
+    Index("word_to_sentence", ("word_id",)),
+    Index("word_to_sentence", ("sentence_id",)),
+    Index("sentence_translations", ("sentence_id",)),
+    # words -> breakdowns -> morphemes
+    Index("word_to_breakdowns", ("word_id",)),
+    Index("word_to_breakdowns", ("submitted_by_user_email",)),
+    Index("breakdowns", ("breakdown_id",)),
+    Index("breakdowns", ("morpheme_id",)),
+    Index("morphemes", ("family_id",)),
+    Index("morpheme_family_meanings", ("family_id",)),
+    # word forms and aspectual pairs
+    Index("conjugations", ("word_id",)),
+    Index("verb_pairs", ("imp_word_id",)),
+    Index("verb_pairs", ("pfv_word_id",)),
+]
+
+SET_VAL_QUERY = """
+select setval(
+    pg_get_serial_sequence('{table_name}', '{pk_column}'),
+    (select max({pk_column}) from {table_name}) + 1
+)
+"""
+
+
+def create_index(engine: Engine, index: Index, concurrently: bool = False) -> float:
+    """Create ``index`` if it doesn't exist and return how many seconds it took."""
+    start_time: float = time.perf_counter()
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text(index.create_sql(concurrently=concurrently)))
+    return time.perf_counter() - start_time
+
+
+def create_indexes(
+    engine: Engine,
+    indexes: Sequence[Index] = tuple(POST_LOAD_INDEXES),
+    concurrently: bool = False,
+    max_workers: int = 4,
+) -> Dict[str, float]:
+    """Create ``indexes`` in parallel and return how many seconds each one took, by name."""
+    with ThreadPoolExecutor(max_workers) as executor:
+        seconds: List[float] = list(
+            executor.map(lambda index: create_index(engine, index, concurrently=concurrently), indexes)
+        )
+
+    seconds_by_index: Dict[str, float] = {index.index_name: s for index, s in zip(indexes, seconds)}
+    for index_name, index_seconds in seconds_by_index.items():
+        print(f"Created index {index_name} in {index_seconds:.2f}s")
+    return seconds_by_index
+
+
+def fix_sequences(engine: Engine, table_pk_pairs: Sequence[Tuple[Any, str]]):
+    """
+    Set the sequence of each autoincrementing primary key past the largest loaded key, in one transaction.
+
+    :param table_pk_pairs: (SQLAlchemy model class, primary key column name) pairs
+    """
+    with engine.begin() as connection:
+        for table, pk_column in table_pk_pairs:
+            connection.execute(text(SET_VAL_QUERY.format(table_name=table.__tablename__, pk_column=pk_column)))
+    print(f"Set the sequences of {len(table_pk_pairs)} primary key columns")
+
+
+def analyze_tables(engine: Engine, table_names: Sequence[str]):
+    """
+    Collect planner statistics for ``table_names`` so that queries are planned well right away.
+
+    The tables are analyzed one at a time since ``ANALYZE`` only accepts a list of tables from postgres 11 on.
+    """
+    start_time: float = time.perf_counter()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        for table_name in table_names:
+            connection.execute(text(f'ANALYZE "{table_name}"'))
+    print(f"Analyzed {len(table_names)} tables in {time.perf_counter() - start_time:.2f}s")
+
+
+def run_post_load_stage(
+    engine: Engine,
+    table_pk_pairs: Sequence[Tuple[Any, str]],
+    table_names: Sequence[str],
+    indexes: Sequence[Index] = tuple(POST_LOAD_INDEXES),
+    concurrently: bool = False,
+    max_workers: int = 4,
+):
+    """
+    Fix the primary key sequences, create the indexes and analyze ``table_names``.
+
+    ``ANALYZE`` runs last so that it also gathers statistics for the new indexes.
+    """
+    fix_sequences(engine, table_pk_pairs=table_pk_pairs)
+    create_indexes(engine, indexes=indexes, concurrently=concurrently, max_workers=max_workers)
+    analyze_tables(engine, table_names=table_names)
@@ -0,0 +1,109 @@
+"""
+Cache the cleaned seed DataFrames as Parquet files, keyed by the content of the source CSVs.
+
+Parsing the seed CSVs and redoing the merges that clean them up takes longer than loading
+the result. The prepared tables are saved to ``<cache_dir>/<key>/<table_name>.parquet``,
+where the key is a hash of
+
+- the contents of the source CSVs (which are tracked by DVC, so a ``dvc pull`` of new
+  data changes the key), and
+- the source code of the module that defines the function that prepares the tables,
+  so that editing the cleaning logic (including the helpers it calls, such as
+  ``collapse_family_meanings_df``) doesn't serve stale tables
+
+Parquet keeps the pandas dtypes, and the files are memory mapped when they're read back.
+"""
+
+import hashlib
+import inspect
+import os
+import shutil
+from os.path import exists, join
+from typing import Callable, Dict, Iterable, Optional
+
+import pandas as pd
+
+# written last, so a cache entry without it was interrupted while being saved
+COMPLETE_MARKER_FNAME = "_COMPLETE"
+
+FILE_READ_CHUNK_BYTES = 2**20
+
+
+def hash_file(fpath: str, hasher: "hashlib._Hash"):
+    with open(fpath, "rb") as file:
+        for chunk in iter(lambda: file.read(FILE_READ_CHUNK_BYTES), b""):
+            hasher.update(chunk)
+
+
+def get_cache_key(data_dir: str, source_fnames: Iterable[str], prepare_fn: Callable) -> str:
+    """Hash the source CSVs in ``data_dir`` and the code of the module that defines ``prepare_fn``."""
+    hasher = hashlib.sha256()
+    hasher.update(inspect.getsource(inspect.getmodule(prepare_fn)).encode())
+    for fname in sorted(source_fnames):
+        hasher.update(fname.encode())
+        hash_file(join(data_dir, fname), hasher)
+    return hasher.hexdigest()[:16]
+
+
+def load_cached_tables(cache_entry_dir: str) -> Optional[Dict[str, pd.DataFrame]]:
+    """Read the tables of a complete cache entry, or return ``None`` if there isn't one."""
+    if not exists(join(cache_entry_dir, COMPLETE_MARKER_FNAME)):
+        return None
+    return {
+        fname[: -len(".parquet")]: pd.read_parquet(join(cache_entry_dir, fname), memory_map=True)
+        for fname in sorted(os.listdir(cache_entry_dir))
+        if fname.endswith(".parquet")
+    }
+
+
+def save_cached_tables(tables: Dict[str, pd.DataFrame], cache_entry_dir: str):
+    """Write ``tables`` to a temporary directory and move it into place once every table is written."""
+    tmp_dir = cache_entry_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for table_name, df in tables.items():
+        df.to_parquet(join(tmp_dir, f"{table_name}.parquet"))
+    with open(join(tmp_dir, COMPLETE_MARKER_FNAME), "w", encoding="utf-8"):
+        pass
+
+    shutil.rmtree(cache_entry_dir, ignore_errors=True)
+    os.replace(tmp_dir, cache_entry_dir)
+
+
+def get_or_prepare_tables(
+    prepare_fn: Callable[[], Dict[str, pd.DataFrame]],
+    data_dir: str,
+    source_fnames: Iterable[str],
+    cache_dir: str,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Return the tables made by ``prepare_fn`` from the cache, or call it and cache the result.
+
+    Entries for older versions of the source CSVs are removed when a new one is saved.
+
+    :param prepare_fn: reads the CSVs in ``data_dir`` and returns the cleaned tables by name
+    :param source_fnames: the CSV files in ``data_dir`` that ``prepare_fn`` reads
+    """
+    cache_key: str = get_cache_key(data_dir=data_dir, source_fnames=source_fnames, prepare_fn=prepare_fn)
+    cache_entry_dir: str = join(cache_dir, cache_key)
+
+    tables: Optional[Dict[str, pd.DataFrame]] = load_cached_tables(cache_entry_dir)
+    if tables is not None:
+        print(f"Using the prepared seed tables cached in {cache_entry_dir}")
+        return tables
+
+    tables = prepare_fn()
+    if exists(cache_dir):
+        for stale_entry in os.listdir(cache_dir):
+            shutil.rmtree(join(cache_dir, stale_entry), ignore_errors=True)
+
+    # the cache is only an optimization, so failing to write it (e.g. pyarrow isn't installed,
+    # or a column has mixed types parquet can't store) mustn't fail the seed
+    try:
+        save_cached_tables(tables, cache_entry_dir)
+        print(f"Cached the prepared seed tables in {cache_entry_dir}")
+    except (ImportError, ValueError, TypeError, OSError) as err:
+        print(f"Could not cache the prepared seed tables: {err}")
+        shutil.rmtree(cache_entry_dir + ".tmp", ignore_errors=True)
+
+    return tables
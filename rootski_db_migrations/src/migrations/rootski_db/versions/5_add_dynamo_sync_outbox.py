@@ -0,0 +1,103 @@
+# pylint: disable=invalid-name
+# noqa: D400
+"""
+Migration for an outbox table that records the changes to sync to DynamoDB.
+
+Triggers on the tables that the dynamo items are built from insert a row into
+``dynamo_sync_outbox`` for every inserted, updated or deleted row and send a
+``NOTIFY dynamo_sync``. The sync service in ``dynamo-db/`` listens for the
+notifications, rebuilds the affected dynamo items and deletes the outbox rows
+it has applied.
+
+Revision ID: 5
+Revises: 4
+Create Date: 2022-06-05 10:12:31.520113
+
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import JSONB
+
+# revision identifiers, used by Alembic.
+revision = "5"
+down_revision = "4"
+branch_labels = None
+depends_on = None
+
+OUTBOX_TABLE = "dynamo_sync_outbox"
+NOTIFY_CHANNEL = "dynamo_sync"
+TRIGGER_FUNCTION = "record_dynamo_sync_change"
+
+# tables whose rows end up in (or determine the keys of) dynamo items
+SYNCED_TABLES = [
+    # Word and WordForSearch items
+    "words",
+    "nouns",
+    "adjectives",
+    "verbs",
+    # the seeded verb data; the Word items are built from this table rather than from verbs
+    "conjugations",
+    "verb_pairs",
+    "word_defs",
+    "word_to_sentence",
+    # Breakdown and BreakdownItem items
+    "word_to_breakdowns",
+    "breakdowns",
+    # MorphemeFamily and Morpheme items
+    "morpheme_families",
+    "morpheme_family_meanings",
+    "morphemes",
+]
+
+
+def get_trigger_name(table_name: str) -> str:
+    return f"{table_name}_dynamo_sync"
+
+
+def upgrade():
+    """Create the outbox table and the triggers that fill it."""
+    op.create_table(
+        OUTBOX_TABLE,
+        sa.Column("id", sa.BigInteger, primary_key=True, autoincrement=True),
+        sa.Column("table_name", sa.String(64), nullable=False),
+        sa.Column("operation", sa.String(8), nullable=False, comment="INSERT, UPDATE or DELETE"),
+        sa.Column("old_row", JSONB, nullable=True, comment="the row before an UPDATE or DELETE"),
+        sa.Column("new_row", JSONB, nullable=True, comment="the row after an INSERT or UPDATE"),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+
+    # OLD and NEW are null when they don't apply to the operation, so to_jsonb returns null too
+    op.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION {TRIGGER_FUNCTION}() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO {OUTBOX_TABLE} (table_name, operation, old_row, new_row)
+            VALUES (
+                TG_TABLE_NAME,
+                TG_OP,
+                CASE WHEN TG_OP IN ('UPDATE', 'DELETE') THEN to_jsonb(OLD) END,
+                CASE WHEN TG_OP IN ('INSERT', 'UPDATE') THEN to_jsonb(NEW) END
+            );
+            PERFORM pg_notify('{NOTIFY_CHANNEL}', TG_TABLE_NAME);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """
+    )
+
+    for table_name in SYNCED_TABLES:
+        op.execute(
+            f"""
+            CREATE TRIGGER {get_trigger_name(table_name)}
+            AFTER INSERT OR UPDATE OR DELETE ON {table_name}
+            FOR EACH ROW EXECUTE PROCEDURE {TRIGGER_FUNCTION}();
+            """
+        )
+
+
+def downgrade():
+    """Drop the triggers, the trigger function and the outbox table."""
+    for table_name in SYNCED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {get_trigger_name(table_name)} ON {table_name};")
+    op.execute(f"DROP FUNCTION IF EXISTS {TRIGGER_FUNCTION}();")
+    op.drop_table(OUTBOX_TABLE)
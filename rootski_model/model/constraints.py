@@ -0,0 +1,94 @@
+"""
+Restrict the decoder to the tag sequences that to_target() can produce.
+
+Every letter of a word gets exactly one tag, and the tags of a morpheme follow a fixed pattern:
+
+- a morpheme of one letter is a singleton tag, e.g. <SR>; a link is always <L>
+- a longer morpheme is <B?> <M?> ... <M?> <E?>, with the same morpheme type (?) throughout
+- every letter of a morpheme with an unknown type is tagged <?>
+
+These rules are a finite state machine: the decoder is either between morphemes or inside
+a morpheme of some type. Combined with the number of letters left in the word, the state
+determines which tags can come next, so the scores of all other tags are set to -inf
+before a tag is picked.
+"""
+
+from typing import List
+
+import torch
+from data import BEGINNING_TAGS, ENDING_TAGS, MIDDLE_TAGS, SINGLETON_TAGS, UNKNOWN_TOKEN
+from torch import Tensor
+from torchtext.data import Field
+
+# state before the first tag and after the last tag of each morpheme;
+# state 1 + i is inside a morpheme of type MORPHEME_TYPES[i]
+BETWEEN_MORPHEMES = 0
+MORPHEME_TYPES: List[str] = list(BEGINNING_TAGS)
+
+
+class TagGrammar:
+    def __init__(self, trg_vocab: Field):
+        """The constraints of the target language, as lookup tables over the indices of :trg_vocab:.
+
+        Tags that aren't in the vocabulary (because they never appeared in the training
+        data) are never allowed.
+
+        Args:
+            trg_vocab (Field): the target vocabulary the model was trained with
+        """
+        stoi = {tag: idx for idx, tag in enumerate(trg_vocab.vocab.itos)}
+        vocab_size = len(stoi)
+        num_states = 1 + len(MORPHEME_TYPES)
+
+        self.eos_idx = stoi[trg_vocab.eos_token]
+        # allowed[state, tag]: whether :tag: can follow the tags that led to :state:
+        self.allowed = torch.zeros(num_states, vocab_size, dtype=torch.bool)
+        # next_state[state, tag]: the state after :tag:, if it is allowed
+        self.next_state = torch.full((num_states, vocab_size), BETWEEN_MORPHEMES, dtype=torch.long)
+        # tags that have to be followed by at least one more tag of the same morpheme
+        self.opens_morpheme = torch.zeros(vocab_size, dtype=torch.bool)
+        self.is_eos = torch.zeros(vocab_size, dtype=torch.bool)
+        self.is_eos[self.eos_idx] = True
+
+        def allow(state: int, tag: str, next_state: int):
+            if tag in stoi:
+                self.allowed[state, stoi[tag]] = True
+                self.next_state[state, stoi[tag]] = next_state
+
+        for tag in list(SINGLETON_TAGS.values()) + [UNKNOWN_TOKEN, trg_vocab.eos_token]:
+            allow(BETWEEN_MORPHEMES, tag, BETWEEN_MORPHEMES)
+        for i, morpheme_type in enumerate(MORPHEME_TYPES):
+            inside_morpheme = 1 + i
+            allow(BETWEEN_MORPHEMES, BEGINNING_TAGS[morpheme_type], inside_morpheme)
+            allow(inside_morpheme, MIDDLE_TAGS[morpheme_type], inside_morpheme)
+            allow(inside_morpheme, ENDING_TAGS[morpheme_type], BETWEEN_MORPHEMES)
+            for tag in (BEGINNING_TAGS[morpheme_type], MIDDLE_TAGS[morpheme_type]):
+                if tag in stoi:
+                    self.opens_morpheme[stoi[tag]] = True
+
+    def to(self, device) -> "TagGrammar":
+        """Move the lookup tables to :device: (in place) and return self."""
+        self.allowed = self.allowed.to(device)
+        self.next_state = self.next_state.to(device)
+        self.opens_morpheme = self.opens_morpheme.to(device)
+        self.is_eos = self.is_eos.to(device)
+        return self
+
+    def make_mask(self, states: Tensor, num_letters_left: Tensor) -> Tensor:
+        """Construct a mask to add to the scores of the next tag of each sequence.
+
+        Args:
+            states           (Tensor): [n] the state of each sequence
+            num_letters_left (Tensor): [n] the number of letters of each word that don't have a tag yet
+
+        Returns:
+            Tensor: [n, Target Vocab Size] 0 for the allowed tags, -inf for the others
+        """
+        allowed = self.allowed[states]  # (n) -> (n, Target Vocab Size)
+        # <end> comes right after the tag of the last letter, and only then
+        allowed = allowed & (self.is_eos.unsqueeze(0) == (num_letters_left == 0).unsqueeze(1))
+        # a morpheme can't be opened or continued on the last letter, since it has to be ended
+        allowed = allowed & ~(self.opens_morpheme.unsqueeze(0) & (num_letters_left < 2).unsqueeze(1))
+
+        mask = torch.zeros(allowed.shape, dtype=torch.float, device=allowed.device)
+        return mask.masked_fill(~allowed, float("-inf"))
@@ -28,6 +28,28 @@ TRAINING_DATA_PATH = os.path.join(DATA_DIR, TRAINING_DATA_FILENAME)
 TESTING_DATA_PATH = os.path.join(DATA_DIR, TESTING_DATA_FILENAME)
 DATA_FILE_FORMAT = "tsv"
 
+# target vocabulary: one tag per letter of a morpheme, see to_target()
+BEGINNING_TAGS = {
+    "root": "<BR>",  # begin root
+    "prefix": "<BP>",  # begin prefix
+    "suffix": "<BS>",  # begin suffix
+}
+
+MIDDLE_TAGS = {
+    "root": "<MR>",  # middle root
+    "prefix": "<MP>",  # middle prefix
+    "suffix": "<MS>",  # middle suffix
+}
+
+ENDING_TAGS = {"root": "<ER>", "prefix": "<EP>", "suffix": "<ES>"}  # end root  # end prefix  # end suffix
+
+SINGLETON_TAGS = {
+    "root": "<SR>",  # singleton root
+    "prefix": "<SP>",  # singleton prefix
+    "suffix": "<SS>",  # singleton suffix
+    "link": "<L>",  # link (link is always singleton)
+}
+
 #########################################################
 # --- Helper Functions for Data Preprocessing Utils --- #
 #########################################################
@@ -89,27 +111,10 @@ def to_target(morpheme_pairs):
         ex: ["<BP>", "<MP>", "<EP>", "<BR>", "<MR>", "<ER>", "<BS>", "<MS>", "<ES>"]
     """
 
-    # target vocabulary
-    beginning = {
-        "root": "<BR>",  # begin root
-        "prefix": "<BP>",  # begin prefix
-        "suffix": "<BS>",  # begin suffix
-    }
-
-    middle = {
-        "root": "<MR>",  # middle root
-        "prefix": "<MP>",  # middle prefix
-        "suffix": "<MS>",  # middle suffix
-    }
-
-    ending = {"root": "<ER>", "prefix": "<EP>", "suffix": "<ES>"}  # end root  # end prefix  # end suffix
-
-    single = {
-        "root": "<SR>",  # singleton root
-        "prefix": "<SP>",  # singleton prefix
-        "suffix": "<SS>",  # singleton suffix
-        "link": "<L>",  # link (link is always singleton)
-    }
+    beginning = BEGINNING_TAGS
+    middle = MIDDLE_TAGS
+    ending = ENDING_TAGS
+    single = SINGLETON_TAGS
 
     def translate_morpheme(morpheme, tag):
         """Given a :morpheme: and :tag: return a list of words in the morpheme target language
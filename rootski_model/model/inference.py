@@ -1,4 +1,7 @@
+from typing import List, Optional
+
 import torch
+from constraints import BETWEEN_MORPHEMES, TagGrammar
 from data import MorphemeDataset
 from model import Transformer
 from torch import Tensor
@@ -15,6 +18,25 @@ def preprocess(word: str, vocab: Field) -> Tensor:
     return word
 
 
+def preprocess_batch(words: List[str], vocab: Field) -> Tensor:
+    """Like :func:`preprocess`, but for several words, padded to the length of the longest one.
+
+    Returns:
+        Tensor: (N, s) where s is the length of the longest word + 2
+    """
+    sequences = [
+        MorphemeDataset.add_eos_sos_tokens(list(word), vocab.init_token, vocab.eos_token) for word in words
+    ]
+    max_seq_len = max(len(sequence) for sequence in sequences)
+    sequences = [
+        MorphemeDataset.sequence_stoi(
+            MorphemeDataset.pad_sequence(sequence, max_seq_len, vocab.pad_token), vocab
+        )
+        for sequence in sequences
+    ]
+    return torch.tensor(sequences, dtype=torch.long)  # (N, s)
+
+
 def decode(sequence: list, vocab: Field, remove_meta_tokens=True) -> list:
     sequence = MorphemeDataset.sequence_itos(sequence, vocab)
     if remove_meta_tokens:
@@ -25,75 +47,204 @@ def decode(sequence: list, vocab: Field, remove_meta_tokens=True) -> list:
     return sequence
 
 
-def breakdown_russian_word(word: str, model: Transformer, src_vocab: Field, trg_vocab: Field):
-    """[summary]
+def greedy_decode(model: Transformer, src: Tensor, trg_sos_idx: int, trg_eos_idx: int) -> List[List[int]]:
+    """Predict the target sequence of each source sequence in :src:, one item at a time.
+
+    The batch is encoded once, and each step only decodes the newest item of every
+    sequence, attending over the keys/values of the previous ones cached by
+    :meth:`Transformer.decode_step`. Sequences that predicted <end> are dropped from
+    the batch, so the remaining steps only run over the unfinished ones.
 
     Args:
-        word          (str): [description]
-        model (Transformer): [description]
-        src_vocab   (Field): [description]
-        trg_vocab   (Field): [description]
+        src (Tensor): (N, s) source sequences, padded with the source <padding> index
 
     Returns:
-        [type]: [description]
+        list[list[int]]: the predicted target indices of each sequence, without <start> and <end>
     """
+    results: List[List[int]] = [[] for _ in range(src.size(0))]
 
-    # put the model in evaluation mode; turn of features like dropout
-    model.eval()
+    with torch.no_grad():
+        # run the encoder once; the decoder reuses its output at every step
+        cache = model.make_decoder_cache(src=src, memory=model.encode(src))
+        newest_tokens = torch.full((src.size(0),), trg_sos_idx, dtype=torch.long, device=src.device)  # (n)
+        # the index in :results: of each sequence still being decoded
+        unfinished = torch.arange(src.size(0), device=src.device)  # (n)
+
+        # predict one token at a time until every sequence hit an <end> token or the max seq length
+        for _ in range(model.max_trg_seq_len):
+            output = model.decode_step(newest_tokens, cache)  # (n) -> (n, trg vocab size)
+            newest_tokens = output.argmax(dim=1)  # (n, trg vocab size) -> (n)
 
-    # get the meta tokens & indices from the src/trg vocabs
-    src_sos_tkn = src_vocab.init_token  # <start>
-    src_eos_tkn = src_vocab.eos_token  # <end>
-    trg_sos_tkn = trg_vocab.init_token  # <start>
-    trg_eos_tkn = trg_vocab.eos_token  # <end>
+            for result_idx, token_idx in zip(unfinished.tolist(), newest_tokens.tolist()):
+                if token_idx != trg_eos_idx:
+                    results[result_idx].append(token_idx)
 
-    trg_sos_idx = trg_vocab.vocab.stoi[trg_sos_tkn]
-    trg_eos_idx = trg_vocab.vocab.stoi[trg_eos_tkn]
+            # finish the translation of the sequences that predicted the end of the word
+            is_unfinished = newest_tokens != trg_eos_idx
+            if not is_unfinished.any():
+                break
+            if not is_unfinished.all():
+                keep = is_unfinished.nonzero(as_tuple=True)[0]
+                cache = cache.index_select(keep)
+                newest_tokens = newest_tokens[keep]
+                unfinished = unfinished[keep]
 
-    # prepare an initial trg sequence
-    trg = [trg_sos_tkn]  # [<start>]
+    return results
 
-    # encode the initial src/trg pair as tensors of indices
-    trg = MorphemeDataset.sequence_stoi(trg, trg_vocab)  # encode trg as list of trg_vocab indices
-    trg = torch.tensor(trg, dtype=torch.long).unsqueeze(0)  # (1, t := len(trg))
-    src = preprocess(word, src_vocab)  # (1, s := len(src))
 
-    trg_start_index_tensor = torch.tensor([[trg_sos_idx]], dtype=torch.long)
-    final_result = []
+def beam_search_decode(
+    model: Transformer,
+    src: Tensor,
+    word_lengths: Tensor,
+    grammar: TagGrammar,
+    trg_sos_idx: int,
+    beam_size: int = 4,
+) -> List[List[int]]:
+    """Predict the tags of each word in :src: with a beam search restricted to valid tag sequences.
 
-    with torch.no_grad():
-        # predict one token at a time until we hit an <end> token or the max seq length
-        for _ in range(model.max_trg_seq_len):
+    At each step, the :beam_size: most likely tag sequences of every word are extended
+    by the tags that :grammar: allows after them, and the :beam_size: most likely of those
+    are kept. Invalid tags are masked out before the scores are compared, so the search
+    never spends a beam on a sequence that to_target() couldn't have produced, and every
+    sequence has exactly one tag per letter.
+
+    The beams of all the words are decoded together as a batch of N * :beam_size:
+    sequences, sharing the incremental decoder cache of :meth:`Transformer.decode_step`.
 
-            # print("INFERENCE src", src.size())
-            # print("INFERENCE trg", trg.size())
+    Args:
+        src          (Tensor): (N, s) source sequences, padded with the source <padding> index
+        word_lengths (Tensor): (N) the number of letters of each word
+        grammar  (TagGrammar): the constraints of the target vocabulary
+        beam_size       (int): number of tag sequences kept per word; 1 is constrained greedy decoding
+
+    Returns:
+        list[list[int]]: the most likely valid target indices of each word, without <start> and <end>
+    """
+    N, K, V = src.size(0), beam_size, model.trg_vocab_size
+    device = src.device
+    grammar = grammar.to(device)
+    eos_idx = grammar.eos_idx
+
+    with torch.no_grad():
+        # run the encoder once per word and share its output between the beams of the word
+        cache = model.make_decoder_cache(src=src, memory=model.encode(src))
+        cache = cache.index_select(torch.arange(N, device=device).repeat_interleave(K))  # N -> N * K
 
-            output = model(src, trg)  # (1, 1, s), (1, 1, t) -> (1, t, trg vocab size)
-            # print("INFERENCE output", output.size())
+        # only the first beam of each word is alive until the first step branches out
+        scores = torch.full((N, K), float("-inf"), device=device)
+        scores[:, 0] = 0.0
+        newest_tokens = torch.full((N * K,), trg_sos_idx, dtype=torch.long, device=device)
+        states = torch.full((N * K,), BETWEEN_MORPHEMES, dtype=torch.long, device=device)
+        num_letters_left = word_lengths.to(device).repeat_interleave(K)
+        finished = torch.zeros(N * K, dtype=torch.bool, device=device)
+        tag_sequences = torch.zeros(N * K, 0, dtype=torch.long, device=device)
 
-            output = torch.softmax(output, dim=2)  # (1, t, output vocab size) -> (1, t, output vocab size)
-            trg = output.argmax(dim=2)  # (1, t, output vocab size) -> (1, t)
-            x = trg.squeeze(0)  # (1, t) -> (t)
+        # a finished sequence "predicts" <end> again at no cost, so its score carries over unchanged
+        finished_log_probs = torch.full((V,), float("-inf"), device=device)
+        finished_log_probs[eos_idx] = 0.0
 
-            trg = torch.cat([trg_start_index_tensor, trg], dim=1)  # trg = [<start>] + trg
-            newest_token_idx = x[-1].item()
+        # each word takes exactly one step per letter, plus one for <end>
+        for _ in range(min(int(word_lengths.max()) + 1, model.max_trg_seq_len)):
+            log_probs = torch.log_softmax(model.decode_step(newest_tokens, cache), dim=1)  # (N * K, V)
+            log_probs = log_probs + grammar.make_mask(states, num_letters_left)
+            log_probs = torch.where(finished.unsqueeze(1), finished_log_probs.unsqueeze(0), log_probs)
 
-            # # print("output:")
-            # # print(x)
-            # # print("final result:")
-            # # print(final_result)
+            # keep the K best extensions of the K beams of each word
+            candidate_scores = (scores.view(N * K, 1) + log_probs).view(N, K * V)
+            scores, candidates = candidate_scores.topk(K, dim=1)  # (N, K)
+            beam_origins = (candidates // V + torch.arange(N, device=device).unsqueeze(1) * K).view(-1)
+            newest_tokens = (candidates % V).view(-1)
 
-            # finish translation if we
-            if newest_token_idx == trg_eos_idx:
-                # print("ending!")
+            # follow the beams that were extended
+            cache = cache.index_select(beam_origins)
+            tag_sequences = torch.cat([tag_sequences[beam_origins], newest_tokens.unsqueeze(1)], dim=1)
+            states = grammar.next_state[states[beam_origins], newest_tokens]
+            num_letters_left = num_letters_left[beam_origins] - 1
+            finished = finished[beam_origins] | (newest_tokens == eos_idx)
+            if finished.all():
                 break
 
-            final_result += [newest_token_idx]
+    # topk sorts the beams, so the first beam of each word is its best one
+    results: List[List[int]] = []
+    for tag_sequence in tag_sequences.view(N, K, -1)[:, 0].tolist():
+        results.append(tag_sequence[: tag_sequence.index(eos_idx)] if eos_idx in tag_sequence else tag_sequence)
+    return results
 
-    # conver the index sequence to a sequence of string tokens
-    breakdown_sequence = MorphemeDataset.sequence_itos(final_result, trg_vocab)
 
-    return breakdown_sequence
+def breakdown_russian_words(
+    words: List[str],
+    model: Transformer,
+    src_vocab: Field,
+    trg_vocab: Field,
+    batch_size: int = 256,
+    beam_size: Optional[int] = None,
+) -> List[List[str]]:
+    """Predict the morpheme tags of many words, :batch_size: words at a time.
+
+    The words are sorted by length before they are batched, so the words in a batch
+    need little padding. The predictions are returned in the order of :words:.
+
+    Args:
+        words  (list[str]): russian words, e.g. ["приказать", "слово"]
+        model (Transformer): a trained model
+        src_vocab   (Field): the source vocabulary the model was trained with
+        trg_vocab   (Field): the target vocabulary the model was trained with
+        batch_size    (int, optional): number of words decoded together. Defaults to 256.
+        beam_size     (int, optional): if set, decode with :func:`beam_search_decode`, keeping this
+            many valid tag sequences per word. Defaults to None: unconstrained greedy decoding.
+
+    Returns:
+        list[list[str]]: the predicted tags of each word, see :func:`breakdown_russian_word`
+    """
+
+    # put the model in evaluation mode; turn of features like dropout
+    model.eval()
+
+    # get the meta tokens & indices from the trg vocab
+    trg_sos_idx = trg_vocab.vocab.stoi[trg_vocab.init_token]  # <start>
+    trg_eos_idx = trg_vocab.vocab.stoi[trg_vocab.eos_token]  # <end>
+
+    device = next(model.parameters()).device
+    grammar = TagGrammar(trg_vocab) if beam_size is not None else None
+
+    # length bucketing: batch words of similar lengths together
+    word_indices_by_length = sorted(range(len(words)), key=lambda i: len(words[i]))
+    breakdowns: List[List[str]] = [[] for _ in words]
+
+    for start in range(0, len(words), batch_size):
+        batch_word_indices = word_indices_by_length[start : start + batch_size]
+        src = preprocess_batch([words[i] for i in batch_word_indices], src_vocab).to(device)  # (N, s)
+        if grammar is None:
+            predictions = greedy_decode(model, src, trg_sos_idx=trg_sos_idx, trg_eos_idx=trg_eos_idx)
+        else:
+            predictions = beam_search_decode(
+                model,
+                src,
+                word_lengths=torch.tensor([len(words[i]) for i in batch_word_indices]),
+                grammar=grammar,
+                trg_sos_idx=trg_sos_idx,
+                beam_size=beam_size,
+            )
+        for word_idx, prediction in zip(batch_word_indices, predictions):
+            # conver the index sequence to a sequence of string tokens
+            breakdowns[word_idx] = MorphemeDataset.sequence_itos(prediction, trg_vocab)
+
+    return breakdowns
+
+
+def breakdown_russian_word(word: str, model: Transformer, src_vocab: Field, trg_vocab: Field) -> List[str]:
+    """Predict the morpheme tags of :word: one at a time (greedy decoding).
+
+    Args:
+        word          (str): a russian word, e.g. "приказать"
+        model (Transformer): a trained model
+        src_vocab   (Field): the source vocabulary the model was trained with
+        trg_vocab   (Field): the target vocabulary the model was trained with
+
+    Returns:
+        list[str]: the predicted tags, one per letter of :word:, e.g. ["<BP>", "<MP>", "<EP>", ...]
+    """
+    return breakdown_russian_words([word], model, src_vocab, trg_vocab)[0]
 
 
 if __name__ == "__main__":
@@ -102,3 +253,5 @@ if __name__ == "__main__":
     breakdown = breakdown_russian_word(word, model, src_vocab, trg_vocab)
     print("Word:", word)
     print("Breakdown", breakdown)
+    beam_breakdown = breakdown_russian_words([word], model, src_vocab, trg_vocab, beam_size=4)[0]
+    print("Breakdown (beam search)", beam_breakdown)
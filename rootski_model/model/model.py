@@ -1,6 +1,8 @@
 import math
+from typing import List, Optional
 
 import torch
+import torch.nn.functional as F
 from torch import Tensor, nn
 from torch.autograd import Variable
 
@@ -64,7 +66,7 @@ class PositionalEncoder(nn.Module):
         # disable gradient descent for the positional encoding matrix; it is a constant
         self.register_buffer("pos_encoding", pos_encoding)
 
-    def forward(self, x) -> Tensor:
+    def forward(self, x, offset: int = 0) -> Tensor:
         """Performs positional encoding on a batch of sequences whose items
         have been sent to an embedding space. This is done by adding the constant
         2-d positional encoding matrix to each of the 2-d embedded sequence matrices
@@ -72,6 +74,8 @@ class PositionalEncoder(nn.Module):
 
         Args:
             x (Tensor): [batch size, max sequence length, d_model] the embedded sequences
+            offset (int, optional): position of the first item of :x: in its sequence; used when
+                decoding one item at a time. Defaults to 0.
         Returns:
             Tensor: [batch size, max sequence length, d_model] the positionally encoded embeddings
         """
@@ -79,10 +83,55 @@ class PositionalEncoder(nn.Module):
         # scale up the word meaning embeddings by a positive constant so that meaning outweighs position
         x = x * math.sqrt(self.d_model)
         # left is 3-d, right is 2-d: right is added to each of the pages of left
-        x = x + Variable(self.pos_encoding[:max_batch_seq_len, :], requires_grad=False)
+        x = x + Variable(self.pos_encoding[offset : offset + max_batch_seq_len, :], requires_grad=False)
         return x
 
 
+class DecoderCache:
+    def __init__(self, memory_padding_mask: Tensor, cross_keys: List[Tensor], cross_values: List[Tensor]):
+        """State of an incremental decode with :meth:`Transformer.decode_step`.
+
+        Holds the attention keys and values of each decoder layer, split into heads, so that
+        a decoding step only computes them for the newest target item:
+
+        - the keys/values of the encoder output ("memory") for the cross attention; these
+          are computed once per source sequence
+        - the keys/values of the target items decoded so far for the self attention; these
+          grow by one item per step
+
+        Args:
+            memory_padding_mask (Tensor): [N, 1, 1, s] 0 for source items, -inf for <padding>
+            cross_keys   (list[Tensor]): [N, num heads, s, E / num heads] per decoder layer
+            cross_values (list[Tensor]): [N, num heads, s, E / num heads] per decoder layer
+        """
+        self.memory_padding_mask = memory_padding_mask
+        self.cross_keys = cross_keys
+        self.cross_values = cross_values
+        self.self_keys: List[Optional[Tensor]] = [None] * len(cross_keys)
+        self.self_values: List[Optional[Tensor]] = [None] * len(cross_keys)
+        # number of target items decoded so far, i.e. the position of the next one
+        self.length = 0
+
+    def index_select(self, indices: Tensor) -> "DecoderCache":
+        """Return the cache of the sequences at :indices: of the batch, e.g. to drop finished
+        sequences or to follow the surviving hypotheses of a beam search.
+
+        Args:
+            indices (Tensor): [M] indices into the batch dimension; may repeat
+        """
+        cache = DecoderCache(
+            memory_padding_mask=self.memory_padding_mask.index_select(0, indices),
+            cross_keys=[keys.index_select(0, indices) for keys in self.cross_keys],
+            cross_values=[values.index_select(0, indices) for values in self.cross_values],
+        )
+        cache.self_keys = [None if keys is None else keys.index_select(0, indices) for keys in self.self_keys]
+        cache.self_values = [
+            None if values is None else values.index_select(0, indices) for values in self.self_values
+        ]
+        cache.length = self.length
+        return cache
+
+
 class Transformer(nn.Module):
     def __init__(
         self,
@@ -215,6 +264,123 @@ class Transformer(nn.Module):
         mask = mask.float().masked_fill(mask == 0, float("-inf")).masked_fill(mask == 1, float(0.0))
         return mask
 
+    def encode(self, src: Tensor) -> Tensor:
+        """Run the encoder over a batch of source sequences.
+
+        Args:
+            src (Tensor): [N, s] un-embedded source sequences
+        Returns:
+            Tensor: [s, N, E] the encoded source sequences ("memory") to pass to the decoder
+        """
+        src_padding_mask = self.make_padding_mask(sequences=src, padding_idx=self.src_pad_idx)
+        src = self.src_embedding(src)  # (N, s)    -> (N, s, E)
+        src = self.src_positional_encoder(src)  # (N, s, E) -> (N, s, E)
+        src = src.transpose(0, 1)  # (N, s, E) -> (s, N, E)
+        return self.transformer.encoder(src, src_key_padding_mask=src_padding_mask)
+
+    def _split_heads(self, x: Tensor) -> Tensor:
+        """(N, L, E) -> (N, num heads, L, E / num heads)"""
+        N, L, E = x.shape
+        return x.view(N, L, self.num_heads, E // self.num_heads).transpose(1, 2)
+
+    def _attend(
+        self, attention: nn.MultiheadAttention, q: Tensor, k: Tensor, v: Tensor, mask: Optional[Tensor] = None
+    ) -> Tensor:
+        """Scaled dot product attention of queries (N, h, l, d) over keys/values (N, h, L, d)
+        followed by the output projection of :attention:; returns (N, l, E)
+        """
+        scores = torch.matmul(q, k.transpose(-2, -1)) / math.sqrt(q.size(-1))  # (N, h, l, L)
+        if mask is not None:
+            scores = scores + mask
+        out = torch.matmul(torch.softmax(scores, dim=-1), v)  # (N, h, l, d)
+        N, _, l, _ = out.shape
+        out = out.transpose(1, 2).reshape(N, l, self.d_model)  # (N, h, l, d) -> (N, l, E)
+        return F.linear(out, attention.out_proj.weight, attention.out_proj.bias)
+
+    def make_decoder_cache(self, src: Tensor, memory: Tensor) -> DecoderCache:
+        """Prepare an incremental decode of the target sequences of :src:.
+
+        Unlike in :meth:`forward`, the decoder doesn't attend to the <padding> items of the
+        source sequences, so that the breakdown of a word doesn't depend on the other words
+        it is batched with.
+
+        Args:
+            src    (Tensor): [N, s] un-embedded source sequences
+            memory (Tensor): [s, N, E] the output of :meth:`encode` for :src:
+        """
+        memory_padding_mask = self.make_padding_mask(sequences=src, padding_idx=self.src_pad_idx)
+        memory = memory.transpose(0, 1)  # (s, N, E) -> (N, s, E)
+
+        cross_keys, cross_values = [], []
+        for layer in self.transformer.decoder.layers:
+            attention: nn.MultiheadAttention = layer.multihead_attn
+            keys, values = F.linear(
+                memory, attention.in_proj_weight[self.d_model :], attention.in_proj_bias[self.d_model :]
+            ).chunk(2, dim=-1)
+            cross_keys.append(self._split_heads(keys))
+            cross_values.append(self._split_heads(values))
+
+        return DecoderCache(
+            memory_padding_mask=memory_padding_mask[:, None, None, :].to(memory.device),
+            cross_keys=cross_keys,
+            cross_values=cross_values,
+        )
+
+    def decode_step(self, trg: Tensor, cache: DecoderCache) -> Tensor:
+        """Decode the next item of each target sequence, given the previous one.
+
+        Computes the same outputs as the last position of :meth:`forward`, but each layer
+        only processes the newest item and attends over the keys/values in :cache:, so
+        decoding a sequence of length t costs O(t) instead of O(t^2) decoder work.
+        Dropout is applied as in the decoder layers, so call this in eval mode.
+
+        Args:
+            trg    (Tensor): [N] the most recently decoded (or the <start>) item of each sequence
+            cache (DecoderCache): from :meth:`make_decoder_cache`; updated in place
+        Returns:
+            Tensor: [N, Target Vocab Size] scores for the next item of each sequence
+        """
+        x = self.trg_embedding(trg.unsqueeze(1))  # (N)       -> (N, 1, E)
+        x = self.trg_positional_encoder(x, offset=cache.length)  # (N, 1, E) -> (N, 1, E)
+
+        for i, layer in enumerate(self.transformer.decoder.layers):
+            norm_first = getattr(layer, "norm_first", False)
+
+            # self attention over the target items decoded so far, including this one
+            h = layer.norm1(x) if norm_first else x
+            q, k, v = F.linear(h, layer.self_attn.in_proj_weight, layer.self_attn.in_proj_bias).chunk(3, dim=-1)
+            q, k, v = self._split_heads(q), self._split_heads(k), self._split_heads(v)
+            if cache.self_keys[i] is not None:
+                k = torch.cat([cache.self_keys[i], k], dim=2)
+                v = torch.cat([cache.self_values[i], v], dim=2)
+            cache.self_keys[i], cache.self_values[i] = k, v
+            h = layer.dropout1(self._attend(layer.self_attn, q, k, v))
+            x = x + h if norm_first else layer.norm1(x + h)
+
+            # cross attention over the encoded source sequence
+            h = layer.norm2(x) if norm_first else x
+            attention: nn.MultiheadAttention = layer.multihead_attn
+            q = self._split_heads(
+                F.linear(h, attention.in_proj_weight[: self.d_model], attention.in_proj_bias[: self.d_model])
+            )
+            h = layer.dropout2(
+                self._attend(
+                    attention, q, cache.cross_keys[i], cache.cross_values[i], mask=cache.memory_padding_mask
+                )
+            )
+            x = x + h if norm_first else layer.norm2(x + h)
+
+            # feed forward
+            h = layer.norm3(x) if norm_first else x
+            h = layer.dropout3(layer.linear2(layer.dropout(layer.activation(layer.linear1(h)))))
+            x = x + h if norm_first else layer.norm3(x + h)
+
+        if self.transformer.decoder.norm is not None:
+            x = self.transformer.decoder.norm(x)
+
+        cache.length += 1
+        return self.trg_embedding_to_trg_vocab(x).squeeze(1)  # (N, 1, E) -> (N, Target Vocab Size)
+
     def forward(self, src, trg) -> Tensor:
         """
 
@@ -0,0 +1,83 @@
+import sys
+from pathlib import Path
+from typing import List
+
+import pytest
+
+# the model modules import each other by their file names, e.g. ``from model import Transformer``
+MODEL_DIR = Path(__file__).parent.parent / "model"
+sys.path.insert(0, str(MODEL_DIR))
+
+# words of different lengths, so that a batch of them is padded
+WORDS = ["а", "дом", "слово", "приказать", "при", "переписывать", "он", "красивый"]
+
+
+@pytest.fixture
+def words() -> List[str]:
+    return list(WORDS)
+
+
+@pytest.fixture
+def src_vocab():
+    from data import END_OF_WORD_TOKEN, PADDING_TOKEN, START_OF_WORD_TOKEN, UNKNOWN_TOKEN
+    from torchtext.data import Field
+
+    vocab = Field(
+        sequential=True,
+        tokenize=list,
+        unk_token=UNKNOWN_TOKEN,
+        pad_token=PADDING_TOKEN,
+        init_token=START_OF_WORD_TOKEN,
+        eos_token=END_OF_WORD_TOKEN,
+    )
+    vocab.build_vocab([list(word) for word in WORDS])
+    return vocab
+
+
+@pytest.fixture
+def trg_vocab():
+    from data import (
+        BEGINNING_TAGS,
+        END_OF_WORD_TOKEN,
+        ENDING_TAGS,
+        MIDDLE_TAGS,
+        PADDING_TOKEN,
+        SINGLETON_TAGS,
+        START_OF_WORD_TOKEN,
+        UNKNOWN_TOKEN,
+    )
+    from torchtext.data import Field
+
+    vocab = Field(
+        sequential=True,
+        unk_token=UNKNOWN_TOKEN,
+        pad_token=PADDING_TOKEN,
+        init_token=START_OF_WORD_TOKEN,
+        eos_token=END_OF_WORD_TOKEN,
+    )
+    tags = [BEGINNING_TAGS, MIDDLE_TAGS, ENDING_TAGS, SINGLETON_TAGS]
+    vocab.build_vocab([list(tags_by_type.values()) for tags_by_type in tags])
+    return vocab
+
+
+@pytest.fixture
+def breakdown_model(src_vocab, trg_vocab):
+    """A random-init model with the shapes of the vocabularies, in eval mode."""
+    import torch
+    from model import Transformer
+
+    torch.manual_seed(0)
+    model = Transformer(
+        src_pad_idx=src_vocab.vocab.stoi[src_vocab.pad_token],
+        trg_pad_idx=trg_vocab.vocab.stoi[trg_vocab.pad_token],
+        src_vocab_size=len(src_vocab.vocab.itos),
+        trg_vocab_size=len(trg_vocab.vocab.itos),
+        d_model=8,
+        num_heads=2,
+        num_encoder_layers=2,
+        num_decoder_layers=2,
+        dim_feedforward=16,
+        max_src_seq_len=20,
+        max_trg_seq_len=20,
+    )
+    return model.eval()
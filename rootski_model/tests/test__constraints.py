@@ -0,0 +1,126 @@
+from typing import List
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("torchtext")
+
+from constraints import BETWEEN_MORPHEMES, TagGrammar  # noqa: E402
+from data import breakdown_from_raw, to_target  # noqa: E402
+from inference import beam_search_decode, breakdown_russian_words, preprocess, preprocess_batch  # noqa: E402
+
+
+def is_accepted(grammar: TagGrammar, tags: List[int]) -> bool:
+    """Whether :tags: (without <start> and <end>) is a complete sequence of morphemes."""
+    state = BETWEEN_MORPHEMES
+    for tag in tags:
+        if not grammar.allowed[state, tag] or tag == grammar.eos_idx:
+            return False
+        state = int(grammar.next_state[state, tag])
+    return bool(grammar.allowed[state, grammar.eos_idx])
+
+
+def constrained_greedy_decode(model, src, word_length: int, grammar: TagGrammar, trg_sos_idx: int) -> List[int]:
+    """Decode a single word, picking the most likely tag that :grammar: allows at each step."""
+    with torch.no_grad():
+        cache = model.make_decoder_cache(src=src, memory=model.encode(src))
+        newest_token = torch.tensor([trg_sos_idx])
+        state = torch.tensor([BETWEEN_MORPHEMES])
+        tags: List[int] = []
+        for num_letters_left in range(word_length, -1, -1):
+            scores = model.decode_step(newest_token, cache) + grammar.make_mask(
+                state, torch.tensor([num_letters_left])
+            )
+            newest_token = scores.argmax(dim=1)
+            if int(newest_token) == grammar.eos_idx:
+                break
+            tags.append(int(newest_token))
+            state = grammar.next_state[state, newest_token]
+    return tags
+
+
+@pytest.mark.parametrize(
+    "raw_breakdown",
+    ["при:prefix/каз:root/ать:suffix", "о:prefix/писа:root/ть:suffix", "дом:root", "в:prefix/о:link/да:root"],
+)
+def test__tag_grammar__accepts_the_targets_of_breakdowns(trg_vocab, raw_breakdown: str):
+    grammar = TagGrammar(trg_vocab)
+    tags: List[int] = [trg_vocab.vocab.stoi[tag] for tag in to_target(breakdown_from_raw(raw_breakdown))]
+
+    assert is_accepted(grammar, tags)
+
+
+def test__tag_grammar__rejects_unfinished_morphemes(trg_vocab):
+    grammar = TagGrammar(trg_vocab)
+    stoi = trg_vocab.vocab.stoi
+
+    assert not is_accepted(grammar, [stoi["<BR>"], stoi["<MR>"]])
+    assert not is_accepted(grammar, [stoi["<BR>"], stoi["<ES>"]])
+    assert not is_accepted(grammar, [stoi["<MR>"], stoi["<ER>"]])
+
+
+def test__make_mask__ends_the_word_after_its_last_letter(trg_vocab):
+    grammar = TagGrammar(trg_vocab)
+    states = torch.tensor([BETWEEN_MORPHEMES] * 3)
+
+    allowed = grammar.make_mask(states, num_letters_left=torch.tensor([0, 1, 2])) == 0
+
+    assert allowed[0].tolist() == grammar.is_eos.tolist()
+    # a morpheme can't start on the last letter, since there is no letter left to end it
+    assert not allowed[1, trg_vocab.vocab.stoi["<BR>"]]
+    assert allowed[1, trg_vocab.vocab.stoi["<SR>"]]
+    assert allowed[2, trg_vocab.vocab.stoi["<BR>"]]
+    assert not allowed[1:, grammar.eos_idx].any()
+
+
+@pytest.mark.parametrize("beam_size", [1, 4])
+def test__beam_search_decode__predicts_one_valid_tag_per_letter(
+    breakdown_model, src_vocab, trg_vocab, words: List[str], beam_size: int
+):
+    grammar = TagGrammar(trg_vocab)
+
+    predictions = beam_search_decode(
+        breakdown_model,
+        preprocess_batch(words, src_vocab),
+        word_lengths=torch.tensor([len(word) for word in words]),
+        grammar=grammar,
+        trg_sos_idx=trg_vocab.vocab.stoi[trg_vocab.init_token],
+        beam_size=beam_size,
+    )
+
+    for word, tags in zip(words, predictions):
+        assert len(tags) == len(word)
+        assert is_accepted(grammar, tags)
+
+
+def test__beam_search_decode__beam_size_1_is_constrained_greedy(
+    breakdown_model, src_vocab, trg_vocab, words: List[str]
+):
+    grammar = TagGrammar(trg_vocab)
+    trg_sos_idx = trg_vocab.vocab.stoi[trg_vocab.init_token]
+
+    predictions = beam_search_decode(
+        breakdown_model,
+        preprocess_batch(words, src_vocab),
+        word_lengths=torch.tensor([len(word) for word in words]),
+        grammar=grammar,
+        trg_sos_idx=trg_sos_idx,
+        beam_size=1,
+    )
+
+    assert predictions == [
+        constrained_greedy_decode(
+            breakdown_model, preprocess(word, src_vocab), len(word), grammar=grammar, trg_sos_idx=trg_sos_idx
+        )
+        for word in words
+    ]
+
+
+def test__breakdown_russian_words__beam_search_batch_matches_single_words(
+    breakdown_model, src_vocab, trg_vocab, words: List[str]
+):
+    breakdowns = breakdown_russian_words(words, breakdown_model, src_vocab, trg_vocab, beam_size=3)
+
+    assert breakdowns == [
+        breakdown_russian_words([word], breakdown_model, src_vocab, trg_vocab, beam_size=3)[0] for word in words
+    ]
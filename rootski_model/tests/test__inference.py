@@ -0,0 +1,47 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("torchtext")
+
+from inference import (  # noqa: E402
+    breakdown_russian_word,
+    breakdown_russian_words,
+    greedy_decode,
+    preprocess,
+    preprocess_batch,
+)
+
+
+def test__preprocess_batch__pads_to_the_longest_word(src_vocab):
+    src = preprocess_batch(["дом", "а"], src_vocab)
+    pad_idx = src_vocab.vocab.stoi[src_vocab.pad_token]
+
+    assert src.shape == (2, 5)
+    assert src[0].tolist() == preprocess("дом", src_vocab)[0].tolist()
+    assert src[1].tolist() == preprocess("а", src_vocab)[0].tolist() + [pad_idx, pad_idx]
+
+
+def test__greedy_decode__batch_matches_single_words(breakdown_model, src_vocab, trg_vocab, words):
+    trg_sos_idx = trg_vocab.vocab.stoi[trg_vocab.init_token]
+    trg_eos_idx = trg_vocab.vocab.stoi[trg_vocab.eos_token]
+
+    batched = greedy_decode(
+        breakdown_model, preprocess_batch(words, src_vocab), trg_sos_idx=trg_sos_idx, trg_eos_idx=trg_eos_idx
+    )
+    single = [
+        greedy_decode(
+            breakdown_model, preprocess(word, src_vocab), trg_sos_idx=trg_sos_idx, trg_eos_idx=trg_eos_idx
+        )[0]
+        for word in words
+    ]
+
+    assert batched == single
+
+
+@pytest.mark.parametrize("batch_size", [1, 3, 100])
+def test__breakdown_russian_words__matches_breakdown_russian_word(
+    breakdown_model, src_vocab, trg_vocab, words, batch_size: int
+):
+    breakdowns = breakdown_russian_words(words, breakdown_model, src_vocab, trg_vocab, batch_size=batch_size)
+
+    assert breakdowns == [breakdown_russian_word(word, breakdown_model, src_vocab, trg_vocab) for word in words]
@@ -0,0 +1,99 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("torchtext")
+
+import torch.nn.functional as F  # noqa: E402
+from model import PositionalEncoder, Transformer  # noqa: E402
+
+SRC_VOCAB_SIZE = 12
+TRG_VOCAB_SIZE = 10
+SRC_PAD_IDX = 1
+TRG_PAD_IDX = 1
+D_MODEL = 8
+
+
+@pytest.fixture
+def model() -> Transformer:
+    torch.manual_seed(0)
+    model = Transformer(
+        src_pad_idx=SRC_PAD_IDX,
+        trg_pad_idx=TRG_PAD_IDX,
+        src_vocab_size=SRC_VOCAB_SIZE,
+        trg_vocab_size=TRG_VOCAB_SIZE,
+        d_model=D_MODEL,
+        num_heads=2,
+        num_encoder_layers=2,
+        num_decoder_layers=2,
+        dim_feedforward=16,
+        dropout=0.1,
+        max_src_seq_len=12,
+        max_trg_seq_len=12,
+    )
+    return model.eval()
+
+
+def random_sequences(batch_size: int, seq_len: int, vocab_size: int) -> "torch.Tensor":
+    """Sequences without <padding>, since :meth:`Transformer.forward` attends to the padding of the source."""
+    return torch.randint(2, vocab_size, (batch_size, seq_len))
+
+
+def test__positional_encoder__offset():
+    encoder = PositionalEncoder(d_model=D_MODEL, max_seq_len=10)
+    x = torch.randn(3, 6, D_MODEL)
+
+    encoded = encoder(x)
+
+    for position in range(6):
+        assert torch.allclose(
+            encoder(x[:, position : position + 1], offset=position), encoded[:, position : position + 1]
+        )
+
+
+def test__make_decoder_cache__splits_the_cross_attention_projection(model: Transformer):
+    src = random_sequences(batch_size=3, seq_len=5, vocab_size=SRC_VOCAB_SIZE)
+    with torch.no_grad():
+        memory = model.encode(src)  # (s, N, E)
+        cache = model.make_decoder_cache(src=src, memory=memory)
+        x = torch.randn(3, 1, D_MODEL)
+
+        for i, layer in enumerate(model.transformer.decoder.layers):
+            attention = layer.multihead_attn
+            q = model._split_heads(
+                F.linear(x, attention.in_proj_weight[:D_MODEL], attention.in_proj_bias[:D_MODEL])
+            )
+            attended = model._attend(
+                attention, q, cache.cross_keys[i], cache.cross_values[i], mask=cache.memory_padding_mask
+            )
+            expected, _ = attention(x.transpose(0, 1), memory, memory)
+
+            assert torch.allclose(attended, expected.transpose(0, 1), atol=1e-6)
+
+
+def test__decode_step__matches_forward(model: Transformer):
+    src = random_sequences(batch_size=3, seq_len=5, vocab_size=SRC_VOCAB_SIZE)
+    trg = random_sequences(batch_size=3, seq_len=7, vocab_size=TRG_VOCAB_SIZE)
+
+    with torch.no_grad():
+        cache = model.make_decoder_cache(src=src, memory=model.encode(src))
+        for step in range(trg.size(1)):
+            logits = model.decode_step(trg[:, step], cache)
+            expected = model(src, trg[:, : step + 1])[:, -1]
+
+            assert cache.length == step + 1
+            assert torch.allclose(logits, expected, atol=1e-5)
+
+
+def test__decoder_cache__index_select(model: Transformer):
+    src = random_sequences(batch_size=3, seq_len=5, vocab_size=SRC_VOCAB_SIZE)
+    trg = random_sequences(batch_size=3, seq_len=4, vocab_size=TRG_VOCAB_SIZE)
+    keep = torch.tensor([2, 0, 2])
+
+    with torch.no_grad():
+        cache = model.make_decoder_cache(src=src, memory=model.encode(src))
+        model.decode_step(trg[:, 0], cache)
+        model.decode_step(trg[:, 1], cache)
+        cache = cache.index_select(keep)
+        logits = model.decode_step(trg[keep, 2], cache)
+
+        assert torch.allclose(logits, model(src[keep], trg[keep, :3])[:, -1], atol=1e-5)